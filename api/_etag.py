@@ -0,0 +1,82 @@
+"""
+ClipBox API - 条件付き GET（弱い ETag / If-None-Match → 304）と Cache-Control の付与。
+
+役割:
+    read 系エンドポイントに、データ世代（`app_service.get_data_generation`。core の書き込みのコミットで進む）
+    から作る弱い ETag を付ける。If-None-Match が一致すれば、エンドポイント本体（SQLite の集計・
+    レスポンスの直列化）を実行せずに 304 を返す。
+
+【設計制約】
+- ETag は「プロセス起動ごとの ID」「データ世代」「時間枠（config.QUERY_CACHE_MAX_AGE_SEC ごと）」から作る。
+  起動し直すと世代が 0 からになるため起動 ID で区別し、世代に表れない変化（別プロセスの書き込み・
+  日付の変わり目・「直近 N 日」）は時間枠で最長 1 枠ぶんに抑える（core.query_cache の最大保持時間と同じ）。
+- 世代はエンドポイント実行前に読む。実行中に書き込みがあると新しい内容に古い ETag が付くが、
+  次回は世代が進んでいて一致しないため、古い内容を返し続けることはない。
+- ランダム抽選・ジョブ状態など、データ世代で内容が決まらないエンドポイントには付けない。
+- Cache-Control はルーターごとに `conditional_get` / `cache_control` の依存で付ける。
+- `streamlit` を import しない。
+
+【依存関係】
+api.stats / api.analysis / api.videos / api.likes → api._etag → core.app_service
+"""
+
+from __future__ import annotations
+
+import time
+import uuid
+from typing import Callable
+
+from fastapi import HTTPException, Request, Response
+
+import config
+from core import app_service
+
+# 何度でも再検証させる（変化が無ければ 304 で本文を送らない）
+REVALIDATE = "private, no-cache"
+# 保存させない（ランダム・書き込み系）
+NO_STORE = "no-store"
+
+_BOOT_ID = uuid.uuid4().hex[:8]
+
+
+def data_etag() -> str:
+    """現在のデータ世代に対応する弱い ETag を返す（DB に触れない）。"""
+    window = int(time.time() // config.QUERY_CACHE_MAX_AGE_SEC)
+    return f'W/"{_BOOT_ID}-{app_service.get_data_generation()}-{window}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match（カンマ区切り・* 可）が etag に弱い比較で一致するか。"""
+    target = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == target:
+            return True
+    return False
+
+
+def conditional_get(cache_control: str = REVALIDATE) -> Callable[[Request, Response], None]:
+    """ETag を付け、If-None-Match が一致すれば 304 で打ち切る依存関数を返す。"""
+
+    def dependency(request: Request, response: Response) -> None:
+        etag = data_etag()
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _matches(if_none_match, etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return dependency
+
+
+def cache_control(value: str) -> Callable[[Response], None]:
+    """Cache-Control だけを付ける依存関数を返す（ETag を付けないルーター・エンドポイント用）。"""
+
+    def dependency(response: Response) -> None:
+        response.headers["Cache-Control"] = value
+
+    return dependency
@@ -4,10 +4,11 @@ ClipBox API - クエリパラメータ補助。
 役割:
     配列クエリパラメータを「カンマ区切り（?levels=3,4）」と「repeated query
     （?levels=3&levels=4）」の両形式で受け取れるようにパースする。
+    一覧のキーセットページング用カーソル（不透明文字列）のエンコード / デコードも行う。
 
 【設計制約】
 - FastAPI 既定の `List[int] = Query(...)` は repeated 形式のみ。本ヘルパで両対応にする。
-- 整数変換に失敗したら 422（HTTPException）に寄せる（500 にしない）。
+- 整数変換・カーソル復号に失敗したら 422（HTTPException）に寄せる（500 にしない）。
 - `core` / `streamlit` を import しない（純粋なパース層）。
 
 【依存関係】
@@ -16,7 +17,10 @@ api.videos / api.likes / api.analysis などのルーターから利用。
 
 from __future__ import annotations
 
-from typing import List, Optional
+import base64
+import binascii
+import json
+from typing import Any, List, Optional, Sequence, Tuple
 
 from fastapi import HTTPException
 
@@ -47,3 +51,28 @@ def csv_int_list(values: Optional[List[str]]) -> Optional[List[int]]:
         return [int(p) for p in parts]
     except ValueError:
         raise HTTPException(status_code=422, detail="整数の配列パラメータが不正です")
+
+
+def encode_cursor(sort: Optional[str], order: Optional[str], key: Optional[Sequence[Any]]) -> Optional[str]:
+    """最終行のソートキーを不透明なカーソル文字列にする。key が None なら None（次ページなし）。
+
+    sort / order も埋め込み、別の並び順のリクエストに流用されたら decode_cursor で弾く。
+    """
+    if key is None:
+        return None
+    raw = json.dumps([sort, order, list(key)], ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: Optional[str], order: Optional[str]) -> Tuple[Any, ...]:
+    """encode_cursor の逆変換。壊れたカーソル・並び順の食い違いは 422。"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        c_sort, c_order, key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError, UnicodeError, binascii.Error):
+        raise HTTPException(status_code=422, detail="cursor が不正です")
+    if not isinstance(key, list) or not all(isinstance(v, (str, int, float)) for v in key):
+        raise HTTPException(status_code=422, detail="cursor が不正です")
+    if (c_sort, c_order) != (sort, order):
+        raise HTTPException(status_code=422, detail="cursor が不正です（sort / order が一致しません）")
+    return tuple(key)
@@ -0,0 +1,89 @@
+"""
+ClipBox API - 全件エクスポートのストリーミング応答（NDJSON / CSV）。
+
+役割:
+    core が id のキーセットで少しずつ読むバッチ（`app_service.iter_*`）を、そのまま NDJSON または CSV の
+    チャンクにして `StreamingResponse` で送る。全件をリストや DataFrame にしないため、メモリ使用量は
+    バッチ 1 つ分で一定になり、最初のバッチを読んだ時点で送信が始まる。
+
+【設計制約】
+- 1 バッチ = 1 チャンク。行ごとに小さな書き込みをしない。
+- NDJSON は 1 行 1 JSON オブジェクト（orjson。無ければ pydantic_core.to_json。`api._video_json` と同じ）。
+- CSV は 1 行目がヘッダ。columns を渡せばそれを使い、省略時は最初の行のキー（0 行なら本文なし）。
+  None は空欄。
+- 依存関数が付けたヘッダ（ETag / Cache-Control）を写す（`api._video_json.json_response` と同じ理由）。
+- `streamlit` を import しない。
+
+【依存関係】
+api.videos / api.analysis / api.stats → api._stream → api._video_json（JSON 化）
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+from typing import Any, Dict, Iterable, Iterator, List, Literal, Mapping, Optional, Sequence
+
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+
+from api._video_json import _to_json
+
+ExportFormat = Literal["ndjson", "csv"]
+
+_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+# OpenAPI 用（ストリーミングは response_model を持たない）
+EXPORT_RESPONSES: Dict[int, Dict[str, Any]] = {
+    200: {
+        "content": {"application/x-ndjson": {}, "text/csv": {}},
+        "description": "1 行 1 レコード（format=ndjson は JSON オブジェクト、csv は 1 行目がヘッダ）",
+    }
+}
+
+
+def row_records(batches: Iterable[Sequence[Mapping[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+    """DB 行（sqlite3.Row）のバッチを dict のバッチにする。"""
+    for rows in batches:
+        yield [dict(row) for row in rows]
+
+
+def _ndjson_chunks(batches: Iterable[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    for records in batches:
+        yield b"".join(_to_json(record) + b"\n" for record in records)
+
+
+def _csv_chunks(batches: Iterable[List[Dict[str, Any]]], columns: Optional[Sequence[str]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    header = list(columns) if columns is not None else None
+    if header is not None:
+        writer.writerow(header)
+    for records in batches:
+        if not records:
+            continue
+        if header is None:
+            header = list(records[0])
+            writer.writerow(header)
+        writer.writerows([record.get(name) for name in header] for record in records)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # 0 行でもヘッダだけは送る（columns 指定時）
+        yield buffer.getvalue().encode("utf-8")
+
+
+def stream_records(
+    response: Response,
+    batches: Iterable[List[Dict[str, Any]]],
+    format: ExportFormat,
+    filename: str,
+    columns: Optional[Sequence[str]] = None,
+) -> StreamingResponse:
+    """dict のバッチを NDJSON / CSV で流す StreamingResponse を返す（response のヘッダを写す）。"""
+    chunks = _ndjson_chunks(batches) if format == "ndjson" else _csv_chunks(batches, columns)
+    streamed = StreamingResponse(chunks, media_type=_MEDIA_TYPES[format])
+    streamed.headers.update(response.headers)
+    streamed.headers["Content-Disposition"] = f'attachment; filename="{filename}.{format}"'
+    return streamed
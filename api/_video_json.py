@@ -0,0 +1,66 @@
+"""
+ClipBox API - Video リストの一括 JSON 直列化（VideoOut を 1 件ずつ作らない高速経路）。
+
+役割:
+    一覧・検索・ID 指定取得は数百件の `Video` を返す。`VideoOut.from_video` で項目ごとにモデルを作って
+    検証し、さらに response_model で検証し直す代わりに、dataclass の属性から dict を組み立てて
+    レスポンス全体を 1 回で JSON バイト列にする。
+
+【設計制約】
+- 出力は `VideoOut.from_video(v).model_dump(mode="json")` と同じ（項目順・日時の文字列化・派生値）。
+  項目は `VideoOut.model_fields` の順に並べ、VideoOut を変えればここにも反映される。
+- エンドポイントは response_model を宣言したまま Response を直接返す（OpenAPI スキーマは変わらない）。
+  直接返す応答には依存関数が付けたヘッダ（ETag / Cache-Control）が移らないため写す。
+- JSON 化は orjson（無ければ pydantic_core.to_json）。
+- `streamlit` を import しない。
+
+【依存関係】
+api.videos → api._video_json → api.schemas（VideoOut の項目定義） / core.models.Video
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from fastapi import Response
+
+from api.schemas import VideoOut, _as_str
+from core.models import Video
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson は requirements.txt で入る想定
+    orjson = None
+    from pydantic_core import to_json as _to_json
+else:
+    _to_json = orjson.dumps
+
+_DATETIME_FIELDS = ("last_file_modified", "created_at", "last_scanned_at", "file_created_at")
+_BOOL_FIELDS = ("is_available", "is_deleted", "is_judging", "needs_selection", "watch_later")
+
+# VideoOut の項目ごとの値の取り出し方（VideoOut.from_video と同じ変換）
+_GETTERS: Dict[str, Callable[[Video], Any]] = {
+    "is_selection_completed": lambda v: v.is_selection_completed,
+    "is_judged": lambda v: v.is_judged(),
+}
+_GETTERS.update({name: (lambda v, n=name: _as_str(getattr(v, n))) for name in _DATETIME_FIELDS})
+_GETTERS.update({name: (lambda v, n=name: bool(getattr(v, n))) for name in _BOOL_FIELDS})
+
+FIELDS = tuple(VideoOut.model_fields)
+
+
+def video_dicts(videos: Iterable[Video], fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """Video を VideoOut と同じ形の dict にする（fields 指定時はその項目だけ。順序は VideoOut の定義順）。"""
+    wanted = FIELDS if fields is None else tuple(name for name in FIELDS if name in set(fields))
+    getters = [(name, _GETTERS.get(name)) for name in wanted]
+    return [
+        {name: (getter(v) if getter is not None else getattr(v, name)) for name, getter in getters}
+        for v in videos
+    ]
+
+
+def json_response(response: Response, content: Any) -> Response:
+    """content を JSON バイト列にした Response を返す（response のヘッダを写す）。"""
+    encoded = Response(_to_json(content), media_type="application/json")
+    encoded.headers.update(response.headers)
+    return encoded
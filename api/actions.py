@@ -23,9 +23,10 @@ from __future__ import annotations
 
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 
 from core import app_service
+from api._etag import NO_STORE, cache_control
 from api.schemas import (
     LevelRequest,
     PlayRequest,
@@ -35,12 +36,13 @@ from api.schemas import (
     WatchLaterResponse,
 )
 
-router = APIRouter()
+# 書き込み・ジョブ状態は保存させない
+router = APIRouter(dependencies=[Depends(cache_control(NO_STORE))])
 
 
 def _ensure_exists(video_id: int) -> None:
     """動画が存在しなければ 404 を投げる。"""
-    if not app_service.get_videos_by_ids([video_id]):
+    if not app_service.video_exists(video_id):
         raise HTTPException(status_code=404, detail="動画が見つかりません")
 
 
@@ -50,7 +52,7 @@ def _map_mutation_result(video_id: int, result: dict) -> StatusMessageResponse:
         return StatusMessageResponse(status="success", message=result.get("message", ""))
 
     # エラー: ファイル不在（is_available が 0 に落ちた）なら 409、それ以外は 500
-    videos = app_service.get_videos_by_ids([video_id])
+    videos = app_service.get_videos_by_ids([video_id], columns=("is_available",))
     message = result.get("message", "操作に失敗しました")
     if videos and not videos[0].is_available:
         raise HTTPException(status_code=409, detail=message)
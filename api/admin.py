@@ -2,59 +2,158 @@
 ClipBox API - スキャン・設定・バックアップの管理ルーター。
 
 役割:
-    `POST /scan/library`・`POST /scan/selection`・`GET/PUT /config`・`POST /backup` を提供する。
+    `POST /scan/library`・`/scan/jobs`（バックグラウンドスキャン）・`POST /scan/selection`・
+    `GET/PUT /config`・`POST /backup`・`GET/POST /snapshots`（列指向スナップショット）を提供する。
 
 【設計制約】
 - `core.app_service` のファサード経由でのみ DB / 設定 / バックアップにアクセスする。
 - scan/library は config の library_roots からサーバ側で scanner を構築する（app_service.scan_library）。
+- scan/jobs はスキャンをバックグラウンドジョブとして開始し 202 を返す（同時実行は 1 件、実行中は 409）。
+  進捗は `GET /scan/jobs/{id}`（ポーリング）か `/scan/jobs/{id}/events`（NDJSON ストリーム）で取得し、
+  `DELETE /scan/jobs/{id}` で中止する（中止時は書き込みトランザクションごとロールバック）。
 - scan/selection は folder 省略時 config の selection_folder。両方未設定なら 400。
+- snapshots は `config.SNAPSHOT_EXPORT_DIR` への書き出し（core.export_service）。pyarrow は任意依存で、無ければ POST は 503。
 - これらは書き込み系。Streamlit 稼働中の同時実行は避ける（テストは tmp に隔離）。
 - `streamlit` を import しない。
 
 【依存関係】
-api.admin → core.app_service → core.selection_service / core.config_utils / core.database
-api.admin → api.schemas（ScanLibraryResponse / ScanSelectionRequest / ScanSelectionResponse /
-            ConfigModel / BackupResponse / StatusMessageResponse）
+api.admin → core.app_service → core.selection_service / core.config_utils / core.database / core.scan_jobs /
+            core.export_service
+api.admin → api.schemas（ScanLibraryResponse / ScanJobOut / ScanSelectionRequest / ScanSelectionResponse /
+            ConfigModel / BackupResponse / SnapshotResponse / StatusMessageResponse）
 """
 
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
 from core import app_service
+from api._etag import NO_STORE, cache_control
+from api._params import csv_str_list
+from core.scan_jobs import ScanJob, ScanJobConflict
 from api.schemas import (
     BackupResponse,
     ConfigModel,
+    ScanJobOut,
     ScanLibraryResponse,
     ScanSelectionRequest,
     ScanSelectionResponse,
+    SnapshotResponse,
     StatusMessageResponse,
 )
 
-router = APIRouter()
+# 書き込み・ジョブ状態は保存させない
+router = APIRouter(dependencies=[Depends(cache_control(NO_STORE))])
+
+SnapshotFormat = Literal["parquet", "arrow"]
+
+# 進捗ストリームの送出間隔（秒）。変化が無い間は行を送らない
+_SCAN_EVENTS_INTERVAL_SEC = 0.5
+
+_BACKUP_REQUIRED_DETAIL = "ライブラリスキャン前にバックアップを作成してください（直近24時間以内のバックアップがありません）"
+
+
+def _require_recent_backup() -> None:
+    if not app_service.has_recent_backup(hours=24):
+        raise HTTPException(status_code=409, detail=_BACKUP_REQUIRED_DETAIL)
+
+
+def _get_scan_job_or_404(job_id: str) -> ScanJob:
+    job = app_service.get_scan_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="スキャンジョブが見つかりません")
+    return job
 
 
 @router.post("/scan/library", response_model=ScanLibraryResponse)
-def scan_library() -> ScanLibraryResponse:
+def scan_library(
+    incremental: bool = Query(default=False, description="スキャンマニフェストで未変更のサブツリーを省略する"),
+) -> ScanLibraryResponse:
     """保存済み config の library_roots でライブラリ全体をスキャンし DB を更新する。
 
+    incremental=true は前回スキャン以降にディレクトリ mtime / ファイル (size, mtime) が
+    変わった部分だけを処理する（未変更ファイルでも利用不可になっている行は戻す）。
+
     破壊的（不在動画を is_available=0 にする）ため、**直近24時間以内の DB バックアップが無ければ 409**。
     UI ガードを迂回した API 直叩きでも事故を防ぐ（startup_backup が起動時に当日分を作る前提）。
     """
-    if not app_service.has_recent_backup(hours=24):
-        raise HTTPException(
-            status_code=409,
-            detail="ライブラリスキャン前にバックアップを作成してください（直近24時間以内のバックアップがありません）",
-        )
-    result = app_service.scan_library()
+    _require_recent_backup()
+    result = app_service.scan_library(incremental=incremental)
     if result.get("status") != "success":
         raise HTTPException(status_code=500, detail=result.get("message", "スキャンに失敗しました"))
     return ScanLibraryResponse(**result)
 
 
+@router.post("/scan/jobs", response_model=ScanJobOut, status_code=202)
+def start_scan_job(
+    incremental: bool = Query(default=False, description="スキャンマニフェストで未変更のサブツリーを省略する"),
+) -> ScanJobOut:
+    """ライブラリスキャンをバックグラウンドで開始し、ジョブ（id・初期状態）を 202 で返す。
+
+    バックアップ要件は `POST /scan/library` と同じ（無ければ 409）。実行中のジョブがあれば 409。
+    """
+    _require_recent_backup()
+    try:
+        job = app_service.start_scan_job(incremental=incremental)
+    except ScanJobConflict as e:
+        raise HTTPException(status_code=409, detail=f"スキャンジョブが実行中です（id={e.job.id}）")
+    return ScanJobOut(**job.to_dict())
+
+
+@router.get("/scan/jobs", response_model=List[ScanJobOut])
+def list_scan_jobs() -> List[ScanJobOut]:
+    """保持しているスキャンジョブを新しい順に返す（実行中 + 直近の完了分）。"""
+    return [ScanJobOut(**job.to_dict()) for job in app_service.list_scan_jobs()]
+
+
+@router.get("/scan/jobs/{job_id}", response_model=ScanJobOut)
+def get_scan_job(job_id: str) -> ScanJobOut:
+    """スキャンジョブの状態・進捗を返す。存在しなければ 404。"""
+    return ScanJobOut(**_get_scan_job_or_404(job_id).to_dict())
+
+
+@router.get(
+    "/scan/jobs/{job_id}/events",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "ScanJobOut を 1 行 1 JSON で送る"}},
+)
+def stream_scan_job(job_id: str) -> StreamingResponse:
+    """スキャンジョブの進捗を NDJSON（1 行 = ScanJobOut）で流し、完了したら最終状態を送って閉じる。"""
+    job = _get_scan_job_or_404(job_id)
+
+    def events() -> Iterator[str]:
+        last = None
+        while True:
+            finished = job.finished
+            state = ScanJobOut(**job.to_dict())
+            # elapsed_ms だけの変化では送らない
+            key = state.model_dump(exclude={"elapsed_ms"})
+            if key != last or finished:
+                last = key
+                yield state.model_dump_json() + "\n"
+            if finished:
+                return
+            job.wait(_SCAN_EVENTS_INTERVAL_SEC)
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@router.delete("/scan/jobs/{job_id}", response_model=ScanJobOut)
+def cancel_scan_job(job_id: str) -> ScanJobOut:
+    """スキャンジョブの中止を要求する（完了済みなら何もしない）。
+
+    中止は非同期。スキャナーが次の確認箇所で止まり、書き込みはロールバックされて status=cancelled になる。
+    """
+    job = app_service.cancel_scan_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="スキャンジョブが見つかりません")
+    return ScanJobOut(**job.to_dict())
+
+
 @router.post("/scan/selection", response_model=ScanSelectionResponse)
 def scan_selection(body: Optional[ScanSelectionRequest] = None) -> ScanSelectionResponse:
     """単一のセレクションフォルダをスキャンする（横断的な is_available 更新はしない）。"""
@@ -100,3 +199,30 @@ def backup() -> BackupResponse:
     if result.get("status") != "success":
         raise HTTPException(status_code=500, detail=result.get("message", "バックアップに失敗しました"))
     return BackupResponse(**result)
+
+
+@router.get("/snapshots", response_model=SnapshotResponse)
+def snapshot_status(format: SnapshotFormat = Query(default="parquet", description="parquet / arrow")) -> SnapshotResponse:
+    """列指向スナップショットの表ごとの watermark・part 数・サイズを返す（pyarrow 不要）。"""
+    return SnapshotResponse(format=format, tables=app_service.get_snapshot_status(format))
+
+
+@router.post("/snapshots", response_model=SnapshotResponse)
+def export_snapshots(
+    format: SnapshotFormat = Query(default="parquet", description="parquet / arrow（Arrow IPC・memory-map 向け）"),
+    table: Optional[List[str]] = Query(default=None, description="書き出す表（複数可 / カンマ区切り可）。省略時は全表"),
+    full: bool = Query(default=False, description="履歴も全件を書き直す（削除された履歴を反映する）"),
+) -> SnapshotResponse:
+    """videos / 履歴 / いいねを Parquet または Arrow IPC に書き出す。履歴は id の watermark からの増分。
+
+    pyarrow が入っていなければ 503。
+    """
+    tables = csv_str_list(table)
+    unknown = [name for name in tables or [] if name not in app_service.SNAPSHOT_TABLES]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"table に未知の表があります: {', '.join(unknown)}")
+    try:
+        results = app_service.export_snapshots(format, tables, full)
+    except app_service.SnapshotUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return SnapshotResponse(format=format, tables=results)
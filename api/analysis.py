@@ -9,11 +9,16 @@ ClipBox API - 分析ダッシュボードのルーター（read）。
 - `core.app_service` のファサード経由でのみ DB にアクセスする（analysis_service は app_service 再公開）。
 - 列挙パラメータ（period/availability/kind）は `Literal` で 422 に寄せる。
 - ランキングは「フラット snake_case・型付き」へ正規化する（表示用文字列を漏らさない）。
+- `*/export` は同じ絞り込みの全行を core のバッチ読み（`app_service.iter_*`）から NDJSON / CSV で流す
+  （`api._stream`。DataFrame を作らない）。
+- 全エンドポイントに弱い ETag（データ世代）と `Cache-Control: private, no-cache` を付ける（`api._etag`）。
 - `streamlit` を import しない。
 
 【依存関係】
 api.analysis → core.app_service → core.analysis_service
+api.analysis → api._etag（条件付き GET）
 api.analysis → api._serialization（DataFrame→list[dict]）, api._params（配列クエリ）, api.schemas
+api.analysis → api._stream（エクスポートのストリーミング）
 """
 
 from __future__ import annotations
@@ -21,11 +26,14 @@ from __future__ import annotations
 from datetime import date, datetime
 from typing import List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 
 from core import app_service
+from api._etag import conditional_get
 from api._params import csv_int_list
 from api._serialization import df_records
+from api._stream import EXPORT_RESPONSES, ExportFormat, row_records, stream_records
 from api.schemas import (
     AnalysisDataResponse,
     AnalysisRankingItem,
@@ -38,7 +46,8 @@ from api.schemas import (
     ViewingHistoryItem,
 )
 
-router = APIRouter()
+# 集計はデータ世代が変わるまで同じ内容（ETag で再検証させ、変化が無ければ 304）
+router = APIRouter(dependencies=[Depends(conditional_get())])
 
 PeriodPreset = Literal["全期間", "直近7日", "直近30日", "直近90日", "直近180日", "カスタム"]
 Availability = Literal["利用可能のみ", "利用不可のみ", "すべて"]
@@ -66,32 +75,46 @@ def _resolve_period(period: str, start: Optional[date], end: Optional[date]):
 
 
 def _scoped_df(period, start, end, availability, include_deleted):
-    """load → scope を行い、(df, period_start, period_end) を返す。"""
-    is_deleted_filter = None if include_deleted else 0
-    df = app_service.load_analysis_data(is_deleted_filter)
+    """load → scope を行い、(df, scope, period_start, period_end) を返す。
+
+    scope は df と同じ絞り込み条件（集計クエリが対象動画を videos のサブクエリで絞るのに使う）。
+    """
+    scope = app_service.VideoScope(is_deleted_filter=None if include_deleted else 0, availability=availability)
+    df = app_service.load_analysis_data(scope.is_deleted_filter)
     period_start, period_end = _resolve_period(period, start, end)
     df = app_service.apply_scope_filter(df, availability)
-    return df, period_start, period_end
+    return df, scope, period_start, period_end
 
 
 def _ranking_items(rdf, score_col_jp: str) -> List[AnalysisRankingItem]:
-    """日本語フラット列のランキング DataFrame を型付き snake_case 項目へ正規化する（Q2）。"""
-    items: List[AnalysisRankingItem] = []
-    for _, row in rdf.iterrows():
-        created = row.get("ファイル作成日")
-        storage = row.get("保存場所")
-        items.append(
-            AnalysisRankingItem(
-                rank=int(row["順位"]),
-                filename=str(row.get("ファイル名", "")),
-                is_available=_AVAIL_TO_BOOL.get(row.get("利用可否")),
-                storage_location=(str(storage) if storage else None),
-                file_created_at=(None if created in (None, "-", "") else str(created)),
-                favorite_level=int(row.get("お気に入りレベル", -1)),
-                score=int(row.get(score_col_jp, 0)),
-            )
+    """日本語フラット列のランキング DataFrame を型付き snake_case 項目へ正規化する（Q2）。
+
+    行ごとの Series を作らないよう、列配列を zip して項目を組み立てる。
+    """
+    if rdf.empty:
+        return []
+    rdf = rdf.astype(object).where(rdf.notna(), None)
+    rows = zip(
+        rdf["順位"].tolist(),
+        rdf["ファイル名"].tolist(),
+        rdf["利用可否"].tolist(),
+        rdf["保存場所"].tolist(),
+        rdf["ファイル作成日"].tolist(),
+        rdf["お気に入りレベル"].tolist(),
+        rdf[score_col_jp].tolist(),
+    )
+    return [
+        AnalysisRankingItem(
+            rank=int(rank),
+            filename=str(filename if filename is not None else ""),
+            is_available=_AVAIL_TO_BOOL.get(available),
+            storage_location=(str(storage) if storage else None),
+            file_created_at=(None if created in (None, "-", "") else str(created)),
+            favorite_level=int(level if level is not None else -1),
+            score=int(score if score is not None else 0),
         )
-    return items
+        for rank, filename, available, storage, created, level, score in rows
+    ]
 
 
 @router.get("/analysis/data", response_model=AnalysisDataResponse)
@@ -103,8 +126,8 @@ def analysis_data(
     include_deleted: bool = Query(default=False),
 ) -> AnalysisDataResponse:
     """分析ダッシュボードの基礎データ（動画 + 期間内視聴回数）を返す。"""
-    df, period_start, period_end = _scoped_df(period, start, end, availability, include_deleted)
-    df = app_service.calculate_period_view_count(df, period_start, period_end)
+    df, scope, period_start, period_end = _scoped_df(period, start, end, availability, include_deleted)
+    df = app_service.calculate_period_view_count(df, period_start, period_end, scope)
     records = df_records(df)
     return AnalysisDataResponse(items=records, total=len(records))
 
@@ -131,6 +154,53 @@ def judgment_history(
     return df_records(app_service.get_judgment_history(start, end, ids))
 
 
+@router.get("/analysis/data/export", response_class=StreamingResponse, responses=EXPORT_RESPONSES)
+def export_analysis_data(
+    period: PeriodPreset = Query(default="全期間"),
+    start: Optional[date] = Query(default=None),
+    end: Optional[date] = Query(default=None),
+    availability: Availability = Query(default="すべて"),
+    include_deleted: bool = Query(default=False),
+    format: ExportFormat = Query(default="ndjson", description="ndjson / csv"),
+    response: Response = None,
+) -> StreamingResponse:
+    """/analysis/data の items と同じ行を id 順に NDJSON / CSV で流す（DataFrame を作らない）。"""
+    scope = app_service.VideoScope(is_deleted_filter=None if include_deleted else 0, availability=availability)
+    period_start, period_end = _resolve_period(period, start, end)
+    batches = app_service.iter_analysis_data(scope, period_start, period_end)
+    return stream_records(response, row_records(batches), format, "analysis-data")
+
+
+@router.get("/analysis/viewing-history/export", response_class=StreamingResponse, responses=EXPORT_RESPONSES)
+def export_viewing_history(
+    start: Optional[datetime] = Query(default=None),
+    end: Optional[datetime] = Query(default=None),
+    video_ids: Optional[List[str]] = Query(default=None, description="動画ID（複数可 / カンマ区切り可。省略時は全動画）"),
+    format: ExportFormat = Query(default="ndjson", description="ndjson / csv"),
+    response: Response = None,
+) -> StreamingResponse:
+    """視聴履歴（id, video_id, viewed_at）を id 順に NDJSON / CSV で流す。"""
+    batches = app_service.iter_viewing_history(start, end, csv_int_list(video_ids))
+    return stream_records(
+        response, row_records(batches), format, "viewing-history", columns=("id", "video_id", "viewed_at")
+    )
+
+
+@router.get("/analysis/judgment-history/export", response_class=StreamingResponse, responses=EXPORT_RESPONSES)
+def export_judgment_history(
+    start: Optional[datetime] = Query(default=None),
+    end: Optional[datetime] = Query(default=None),
+    video_ids: Optional[List[str]] = Query(default=None, description="動画ID（複数可 / カンマ区切り可。省略時は全動画）"),
+    format: ExportFormat = Query(default="ndjson", description="ndjson / csv"),
+    response: Response = None,
+) -> StreamingResponse:
+    """判定履歴（id, video_id, judged_at）を id 順に NDJSON / CSV で流す。"""
+    batches = app_service.iter_judgment_history(start, end, csv_int_list(video_ids))
+    return stream_records(
+        response, row_records(batches), format, "judgment-history", columns=("id", "video_id", "judged_at")
+    )
+
+
 @router.get("/analysis/viewing-trend", response_model=List[TrendItem])
 def viewing_trend(
     period: PeriodPreset = Query(default="全期間"),
@@ -205,15 +275,15 @@ def analysis_rankings(
     top_n: int = Query(default=50, ge=1, le=500),
 ) -> AnalysisRankingResponse:
     """分析ダッシュボード内の3種ランキング（視聴回数・視聴日数・いいね）を返す。"""
-    df, period_start, period_end = _scoped_df(period, start, end, availability, include_deleted)
+    df, scope, period_start, period_end = _scoped_df(period, start, end, availability, include_deleted)
 
     if kind == "view_count":
-        df = app_service.calculate_period_view_count(df, period_start, period_end)
+        df = app_service.calculate_period_view_count(df, period_start, period_end, scope)
         rdf = app_service.get_view_count_ranking(df, top_n)
     elif kind == "view_days":
-        rdf = app_service.get_view_days_ranking(df, period_start, period_end, top_n)
+        rdf = app_service.get_view_days_ranking(df, period_start, period_end, top_n, scope)
     else:  # likes
-        rdf = app_service.get_like_count_ranking(df, period_start, period_end, top_n)
+        rdf = app_service.get_like_count_ranking(df, period_start, period_end, top_n, scope)
 
     return AnalysisRankingResponse(kind=kind, items=_ranking_items(rdf, _SCORE_COL[kind]))
 
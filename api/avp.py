@@ -15,12 +15,14 @@ from __future__ import annotations
 import subprocess
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 
 from core import app_service
+from api._etag import NO_STORE, cache_control
 from api.schemas import AvpPlayRequest, StatusMessageResponse
 
-router = APIRouter()
+# 書き込み・ジョブ状態は保存させない
+router = APIRouter(dependencies=[Depends(cache_control(NO_STORE))])
 
 _MAX_AVP_VIDEOS = 4
 
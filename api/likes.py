@@ -11,6 +11,7 @@ ClipBox API - いいねルーター。
 
 【依存関係】
 api.likes → core.app_service → core.like_service.add_like / get_like_counts
+api.likes → api._etag（条件付き GET）
 api.likes → api.schemas（LikeResponse）, api._params（配列クエリ）
 """
 
@@ -18,25 +19,26 @@ from __future__ import annotations
 
 from typing import Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 
 from core import app_service
+from api._etag import NO_STORE, cache_control, conditional_get
 from api.schemas import LikeResponse
 from api._params import csv_int_list
 
 router = APIRouter()
 
 
-@router.post("/videos/{video_id}/like", response_model=LikeResponse)
+@router.post("/videos/{video_id}/like", response_model=LikeResponse, dependencies=[Depends(cache_control(NO_STORE))])
 def add_like(video_id: int) -> LikeResponse:
     """動画にいいねを1件追加し、更新後のいいね数を返す。"""
-    if not app_service.get_videos_by_ids([video_id]):
+    if not app_service.video_exists(video_id):
         raise HTTPException(status_code=404, detail="動画が見つかりません")
     count = app_service.add_like(video_id)
     return LikeResponse(video_id=video_id, like_count=count)
 
 
-@router.get("/likes", response_model=Dict[int, int])
+@router.get("/likes", response_model=Dict[int, int], dependencies=[Depends(conditional_get())])
 def get_likes(
     video_ids: Optional[List[str]] = Query(default=None, description="動画ID（複数可 / カンマ区切り可）"),
 ) -> Dict[int, int]:
@@ -94,12 +94,16 @@ class VideoOut(BaseModel):
 
 
 class VideosResponse(BaseModel):
-    """動画一覧のページング付きレスポンス。"""
+    """動画一覧のページング付きレスポンス。
+
+    next_cursor は次ページ取得用の不透明カーソル（`cursor=` に渡す）。最終ページでは None。
+    """
 
     items: List[VideoOut]
     total: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
 
 
 class VideosByIdsRequest(BaseModel):
@@ -227,6 +231,24 @@ class ScanLibraryResponse(BaseModel):
     message: str
 
 
+class ScanJobOut(BaseModel):
+    """バックグラウンドスキャンジョブの状態と進捗。"""
+
+    id: str
+    status: str = Field(description="pending / running / succeeded / failed / cancelled")
+    incremental: bool
+    message: Optional[str] = None
+    created_at: str
+    finished_at: Optional[str] = None
+    elapsed_ms: int
+    dirs_visited: int = Field(description="走査したディレクトリ数")
+    files_seen: int = Field(description="見つかった動画ファイル数")
+    files_processed: int = Field(description="DB へ upsert したファイル数")
+    inserted: int
+    updated: int
+    marked_unavailable: int
+
+
 class ScanSelectionRequest(BaseModel):
     """セレクションフォルダスキャンのリクエスト（folder 省略時は config）。"""
 
@@ -250,6 +272,22 @@ class BackupResponse(BaseModel):
     size_bytes: int
 
 
+class SnapshotTableOut(BaseModel):
+    """列指向スナップショット 1 表分の状況。"""
+
+    rows: int = Field(default=0, description="今回書き出した行数（状況取得では 0）")
+    watermark: int = Field(description="書き出し済みの最大 id（0 は未書き出し）")
+    parts: int
+    size_bytes: int
+
+
+class SnapshotResponse(BaseModel):
+    """列指向スナップショットの書き出し結果・状況（表名 → SnapshotTableOut）。"""
+
+    format: str
+    tables: Dict[str, SnapshotTableOut]
+
+
 class ConfigModel(BaseModel):
     """ユーザー設定（GET/PUT /api/config）。"""
 
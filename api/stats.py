@@ -9,10 +9,14 @@ ClipBox API - 統計・ランキングのルーター（read）。
 - ランキングの列挙パラメータ（type/period/availability）は `Literal` で 422 に寄せる
   （特に period は不正値で core が KeyError になるため境界で固定する）。
 - selection-kpi の folder 省略時は config の selection_folder、未設定なら全体 KPI（None）。
+- `/stats/view-counts/export` は視聴回数を core のバッチ読みから NDJSON / CSV で流す（`api._stream`）。
+- 全エンドポイントに弱い ETag（データ世代）と `Cache-Control: private, no-cache` を付ける（`api._etag`）。
 - `streamlit` を import しない。
 
 【依存関係】
 api.stats → core.app_service → core.analysis_service / core.selection_service / core.database
+api.stats → api._etag（条件付き GET）
+api.stats → api._stream（エクスポートのストリーミング）
 api.stats → api.schemas（KpiResponse / SelectionKpiResponse / RankingItem / RankingResponse / VideoOut）
 """
 
@@ -20,9 +24,12 @@ from __future__ import annotations
 
 from typing import Dict, Literal, Optional
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import StreamingResponse
 
 from core import app_service
+from api._etag import conditional_get
+from api._stream import EXPORT_RESPONSES, ExportFormat, row_records, stream_records
 from api.schemas import (
     KpiResponse,
     RankingItem,
@@ -31,7 +38,8 @@ from api.schemas import (
     VideoOut,
 )
 
-router = APIRouter()
+# 集計はデータ世代が変わるまで同じ内容（ETag で再検証させ、変化が無ければ 304）
+router = APIRouter(dependencies=[Depends(conditional_get())])
 
 
 @router.get("/stats/kpi", response_model=KpiResponse)
@@ -55,6 +63,16 @@ def stats_view_counts() -> Dict[int, int]:
     return app_service.get_view_counts_map()
 
 
+@router.get("/stats/view-counts/export", response_class=StreamingResponse, responses=EXPORT_RESPONSES)
+def export_view_counts(
+    format: ExportFormat = Query(default="ndjson", description="ndjson / csv"),
+    response: Response = None,
+) -> StreamingResponse:
+    """視聴回数（video_id, view_count）を video_id 順に NDJSON / CSV で流す（マップを作らない）。"""
+    batches = app_service.iter_view_counts()
+    return stream_records(response, row_records(batches), format, "view-counts", columns=("video_id", "view_count"))
+
+
 @router.get("/stats/last-viewed", response_model=Dict[int, str])
 def stats_last_viewed() -> Dict[int, str]:
     """全動画の最終視聴日時マップ（video_id → ISO文字列）を返す。"""
@@ -2,31 +2,43 @@
 ClipBox API - 動画 read 系ルーター（一覧・単体・検索・ランダム・セレクション・フィルタ選択肢）。
 
 役割:
-    動画の読み取りエンドポイントを提供する。フィルタ条件で取得し、サーバー側でソート・
-    ページングして返す。view_count / last_viewed ソートは視聴回数・最終視聴日時マップを併用する。
+    動画の読み取りエンドポイントを提供する。一覧はフィルタ・ソート・ページングを core 側の
+    SQL（`app_service.get_videos_page`）で行い、1ページ分だけを取得して返す。
 
 【設計制約】
 - `core.app_service` のファサード経由でのみ DB にアクセスする。read-only。
-- キーワード絞り込み（normalize_text 正規化での本質的ファイル名 部分一致）は **core 側**
-  （`app_service.get_videos(keyword=...)`）に委譲する。API 層では二重実装しない。
+- キーワード絞り込み（normalize_text 正規化での本質的ファイル名 部分一致）・フォルダ絞り込み・
+  ソートは **core 側**（`app_service.get_videos_page`）に委譲する。API 層では二重実装しない。
 - ルートは「固定パスを先、`/videos/{video_id}` を最後」に定義する（FastAPI のパス解決順序。
   さもないと `/videos/search` 等が `{video_id}` に吸われ 422 になる）。
 - 列挙パラメータは `Literal` で 422 に寄せる。配列は `api._params` で両形式対応。
+- 一覧・検索の `fields=` は core の列射影（`columns=`）に渡し、指定項目だけの要素を返す。
+- 動画リストを返すエンドポイントは response_model を宣言したまま、`api._video_json` で一括 JSON 化した
+  Response を返す（VideoOut を 1 件ずつ作らない。OpenAPI スキーマは response_model のまま）。
+- `/videos/export` は検索と同じ条件の全件を core のバッチ読み（`app_service.iter_search_videos`）で流す。
+- 一覧・検索・単体・フィルタ選択肢・エクスポートは弱い ETag（データ世代）で再検証させ、ランダム抽選は `no-store`（`api._etag`）。
 - `streamlit` を import しない。
 
 【依存関係】
 api.videos → core.app_service → core.video_manager / core.database
 api.videos → api.schemas（VideoOut / VideosResponse / FilterOptionsResponse）
+api.videos → api._etag（条件付き GET）
+api.videos → api._video_json（動画リストの一括 JSON 化）
+api.videos → api._stream（全件エクスポートの NDJSON / CSV ストリーミング）
 api.videos → api._params（配列クエリの両形式パース）
 """
 
 from __future__ import annotations
 
-from typing import List, Literal, Optional
+from typing import List, Literal, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 
-from api._params import csv_int_list, csv_str_list
+from api._etag import NO_STORE, cache_control, conditional_get
+from api._params import csv_int_list, csv_str_list, decode_cursor, encode_cursor
+from api._stream import EXPORT_RESPONSES, ExportFormat, stream_records
+from api._video_json import FIELDS, json_response, video_dicts
 from api.schemas import (
     FilterOptionsResponse,
     VideoOut,
@@ -35,76 +47,97 @@ from api.schemas import (
     VideosResponse,
 )
 from core import app_service
-from core.models import Video, is_path_within
+from core.video_manager import VIDEO_COLUMNS, VideoPage
 
 router = APIRouter()
 
+# 一覧・検索・単体はデータ世代で内容が決まる（ETag で再検証）。ランダム抽選は保存させない
+_REVALIDATE = [Depends(conditional_get())]
+_NO_STORE = [Depends(cache_control(NO_STORE))]
+
+_FIELDS_DESCRIPTION = (
+    "返す Video の項目（複数可 / カンマ区切り可。id は常に含む）。省略時は全項目。"
+    "指定時は DB からも必要な列だけを読み、items の各要素は指定項目だけになる"
+)
+# VideoOut の派生値と、それを求めるのに読む列
+_DERIVED_SOURCES = {
+    "is_selection_completed": ("current_full_path",),
+    "is_judged": ("current_full_path", "essential_filename"),
+}
+
+
+def _parse_fields(fields: Optional[List[str]]) -> Optional[Tuple[str, ...]]:
+    """fields クエリを VideoOut の項目名タプル（id を先頭に含む）にする。未指定は None、未知の項目は 422。"""
+    names = csv_str_list(fields)
+    if not names:
+        return None
+    unknown = [name for name in names if name not in VideoOut.model_fields]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"fields に未知の項目があります: {', '.join(unknown)}")
+    return tuple(dict.fromkeys(["id", *names]))
+
+
+def _columns_for(fields: Optional[Tuple[str, ...]]) -> Optional[Tuple[str, ...]]:
+    """返す項目に必要な videos の列（None は全列）。"""
+    if fields is None:
+        return None
+    columns: List[str] = []
+    for name in fields:
+        columns.extend(_DERIVED_SOURCES.get(name, (name,) if name in VIDEO_COLUMNS else ()))
+    return tuple(dict.fromkeys(columns))
+
+
 SortField = Literal["favorite_level", "creation_date", "view_count", "last_viewed", "title", "judged_at"]
 Order = Literal["asc", "desc"]
 
 
-def _apply_sort(
-    videos: List[Video],
+def _fetch_page(
+    cursor: Optional[str],
     sort: Optional[str],
     order: Optional[str],
-    *,
-    selection: bool = False,
-) -> List[Video]:
-    """Video リストをサーバー側ソートする。sort 未指定なら get_videos の既定順序を維持する。
-
-    既定方向は降順（title のみ昇順）。order を明示すると優先する。
-    view_count / last_viewed / judged_at は app_service のマップを引いて並べ替える。
-    judged_at は Tier 別（selection=False=Tier1 / True=Tier2）の最新判定日時を使い、
-    判定履歴の無い動画は asc/desc いずれでも常に末尾に置く（partition 方式）。
+    page: int,
+    page_size: int,
+    response: Response,
+    fields: Optional[List[str]],
+    **filters,
+):
+    """1ページ分を core から取得し、VideosResponse と同じ形の JSON で返す。
+
+    cursor 指定時はキーセット（前ページ末尾の続き）で取得し page は無視する。
+    未指定時は従来どおり page から OFFSET を計算する。どちらの場合も next_cursor を返す。
+    fields 指定時は必要な列だけを読み、指定項目だけの items を返す。
+    items は VideoOut を 1 件ずつ作らずに一括で JSON 化する（`api._video_json`）。
     """
-    if not sort:
-        return videos
-
-    reverse = (order != "asc") if order else (sort != "title")
-
-    if sort == "favorite_level":
-        return sorted(videos, key=lambda v: v.current_favorite_level, reverse=reverse)
-    if sort == "creation_date":
-        return sorted(videos, key=lambda v: (v.file_created_at or v.created_at or ""), reverse=reverse)
-    if sort == "title":
-        return sorted(videos, key=lambda v: v.essential_filename.lower(), reverse=reverse)
-    if sort == "view_count":
-        view_counts = app_service.get_view_counts_map()
-        return sorted(videos, key=lambda v: view_counts.get(v.id, 0), reverse=reverse)
-    if sort == "last_viewed":
-        last_viewed = app_service.get_last_viewed_map()
-        return sorted(videos, key=lambda v: (last_viewed.get(v.id) or ""), reverse=reverse)
-    if sort == "judged_at":
-        judged_at = app_service.get_latest_judged_at_map(selection)
-        judged = [v for v in videos if judged_at.get(v.id)]
-        unjudged = [v for v in videos if not judged_at.get(v.id)]
-        judged.sort(key=lambda v: judged_at.get(v.id) or "", reverse=reverse)
-        # 未判定（判定履歴なし）は order に依らず常に末尾。
-        return judged + unjudged
-    return videos
-
-
-def _paginate(videos: List[Video], page: int, page_size: int) -> VideosResponse:
-    """ソート済み Video リストをページングして VideosResponse に詰める。"""
-    total = len(videos)
-    offset = (page - 1) * page_size
-    page_items = videos[offset : offset + page_size]
-    return VideosResponse(
-        items=[VideoOut.from_video(v) for v in page_items],
-        total=total,
-        page=page,
-        page_size=page_size,
+    projection = _parse_fields(fields)
+    after = decode_cursor(cursor, sort, order) if cursor else None
+    try:
+        result: VideoPage = app_service.get_videos_page(
+            sort=sort,
+            order=order,
+            limit=page_size,
+            offset=(page - 1) * page_size,
+            after=after,
+            columns=_columns_for(projection),
+            **filters,
+        )
+    except ValueError:
+        # カーソルのキー数がソート定義と合わない（改ざん・旧形式）
+        raise HTTPException(status_code=422, detail="cursor が不正です")
+    return json_response(
+        response,
+        {
+            "items": video_dicts(result.items, projection),
+            "total": result.total,
+            "page": page,
+            "page_size": page_size,
+            "next_cursor": encode_cursor(sort, order, result.next_key),
+        },
     )
 
 
-def _folder_filter(videos: List[Video], folder: str) -> List[Video]:
-    """current_full_path が folder 配下の動画のみ残す（区切り境界を尊重＝is_path_within）。"""
-    return [v for v in videos if is_path_within(v.current_full_path, folder)]
-
-
 # --- 固定パス（/videos/{video_id} より前に定義すること） ----------------------
 
-@router.get("/videos", response_model=VideosResponse)
+@router.get("/videos", response_model=VideosResponse, dependencies=_REVALIDATE)
 def list_videos(
     levels: Optional[List[str]] = Query(default=None, description="お気に入りレベル（複数可 / カンマ区切り可）。-1=未判定"),
     storage: Optional[List[str]] = Query(default=None, description="保存場所 C_DRIVE / EXTERNAL_HDD"),
@@ -119,13 +152,25 @@ def list_videos(
     order: Optional[Order] = Query(default=None, description="asc / desc（既定: title は asc、他は desc）"),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=100, ge=1, le=200),
+    cursor: Optional[str] = Query(default=None, description="前ページの next_cursor（指定時は page を無視してその続きを返す）"),
+    fields: Optional[List[str]] = Query(default=None, description=_FIELDS_DESCRIPTION),
+    response: Response = None,
 ) -> VideosResponse:
     """フィルタ条件に合致する動画一覧を、サーバー側ソート + ページングで返す。
 
-    keyword は core（`get_videos`）でフィルタ適用後・ソート前に正規化部分一致される。
+    keyword は core（`get_videos_page`）の SQL で正規化部分一致される。total は別途 COUNT(*)。
+    cursor（前ページの next_cursor）を渡すとキーセットで続きを取得する（深いページでも一定コスト）。
     judged_at は Tier1 判定（was_selection_judgment=0）の最新日時で並べる。
+    fields を渡すと指定項目だけを返す（カード・ID 選択用に転送量と変換を減らす）。
     """
-    videos = app_service.get_videos(
+    return _fetch_page(
+        cursor,
+        sort,
+        order,
+        page,
+        page_size,
+        response,
+        fields,
         favorite_levels=csv_int_list(levels),
         storage_locations=csv_str_list(storage),
         keyword=keyword,
@@ -135,29 +180,60 @@ def list_videos(
         watch_later_filter=watch_later,
         needs_selection_filter=needs_selection_filter,
         exclude_selection=exclude_selection,
+        selection=False,
     )
-    videos = _apply_sort(videos, sort, order, selection=False)
-    return _paginate(videos, page, page_size)
 
 
-@router.get("/videos/search", response_model=List[VideoOut])
+@router.get("/videos/search", response_model=List[VideoOut], dependencies=_REVALIDATE)
 def search_videos(
     keyword: str = Query(default="", description="検索語（空で全件）"),
     storage: Optional[List[str]] = Query(default=None, description="保存場所 C_DRIVE / EXTERNAL_HDD"),
+    fields: Optional[List[str]] = Query(default=None, description=_FIELDS_DESCRIPTION),
+    response: Response = None,
 ) -> List[VideoOut]:
-    """ファイル名でDB内動画を部分一致検索する（normalize_text 正規化一致）。"""
-    videos = app_service.search_videos(keyword, storage_locations=csv_str_list(storage))
-    return [VideoOut.from_video(v) for v in videos]
+    """ファイル名でDB内動画を部分一致検索する（normalize_text 正規化一致）。fields は一覧と同様。"""
+    projection = _parse_fields(fields)
+    videos = app_service.search_videos(
+        keyword, storage_locations=csv_str_list(storage), columns=_columns_for(projection)
+    )
+    return json_response(response, video_dicts(videos, projection))
 
 
-@router.get("/videos/unrated/random", response_model=List[VideoOut])
+@router.get(
+    "/videos/export",
+    response_class=StreamingResponse,
+    responses=EXPORT_RESPONSES,
+    dependencies=_REVALIDATE,
+)
+def export_videos(
+    keyword: str = Query(default="", description="検索語（空で全件）"),
+    storage: Optional[List[str]] = Query(default=None, description="保存場所 C_DRIVE / EXTERNAL_HDD"),
+    fields: Optional[List[str]] = Query(default=None, description=_FIELDS_DESCRIPTION),
+    format: ExportFormat = Query(default="ndjson", description="ndjson / csv"),
+    response: Response = None,
+) -> StreamingResponse:
+    """/videos/search と同じ条件の動画を id 順に NDJSON / CSV で流す（全件をメモリに載せない）。"""
+    projection = _parse_fields(fields)
+    batches = app_service.iter_search_videos(
+        keyword, storage_locations=csv_str_list(storage), columns=_columns_for(projection)
+    )
+    records = (video_dicts(videos, projection) for videos in batches)
+    return stream_records(response, records, format, "videos", columns=projection or FIELDS)
+
+
+@router.get("/videos/unrated/random", response_model=List[VideoOut], dependencies=_NO_STORE)
 def unrated_random(n: int = Query(default=1, ge=1, le=200, description="取得本数")) -> List[VideoOut]:
     """未判定動画をランダムに n 本返す（ファイル存在チェック済み）。"""
     videos = app_service.get_unrated_random_videos(n)
     return [VideoOut.from_video(v) for v in videos]
 
 
-@router.get("/videos/unrated/fate", response_model=VideoOut, responses={204: {"description": "未判定動画なし"}})
+@router.get(
+    "/videos/unrated/fate",
+    response_model=VideoOut,
+    responses={204: {"description": "未判定動画なし"}},
+    dependencies=_NO_STORE,
+)
 def unrated_fate(
     recently_unwatched_priority: bool = Query(default=False, description="最近見ていない動画を少し優先する"),
 ):
@@ -170,7 +246,7 @@ def unrated_fate(
     return VideoOut.from_video(video)
 
 
-@router.get("/videos/selection", response_model=VideosResponse)
+@router.get("/videos/selection", response_model=VideosResponse, dependencies=_REVALIDATE)
 def list_selection(
     folder: str = Query(..., description="セレクションフォルダパス（必須）"),
     status: Literal["all", "unselected", "completed"] = Query(default="all"),
@@ -183,10 +259,20 @@ def list_selection(
     order: Optional[Order] = Query(default=None),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=100, ge=1, le=200),
+    cursor: Optional[str] = Query(default=None, description="前ページの next_cursor（指定時は page を無視してその続きを返す）"),
+    fields: Optional[List[str]] = Query(default=None, description=_FIELDS_DESCRIPTION),
+    response: Response = None,
 ) -> VideosResponse:
-    """指定セレクションフォルダ配下の動画を選別状態 + フィルタで絞り込んで返す。"""
+    """指定セレクションフォルダ配下の動画を選別状態 + フィルタで絞り込んで返す（cursor・fields は一覧と同様）。"""
     needs_selection_filter = {"all": None, "unselected": True, "completed": False}[status]
-    videos = app_service.get_videos(
+    return _fetch_page(
+        cursor,
+        sort,
+        order,
+        page,
+        page_size,
+        response,
+        fields,
         favorite_levels=csv_int_list(levels),
         storage_locations=csv_str_list(storage),
         keyword=keyword,
@@ -194,13 +280,17 @@ def list_selection(
         show_unavailable=show_unavailable,
         show_deleted=False,
         watch_later_filter=watch_later,
+        folder=folder,
+        selection=True,
     )
-    videos = _folder_filter(videos, folder)
-    videos = _apply_sort(videos, sort, order, selection=True)
-    return _paginate(videos, page, page_size)
 
 
-@router.get("/videos/selection/fate", response_model=VideoOut, responses={204: {"description": "未選別動画なし"}})
+@router.get(
+    "/videos/selection/fate",
+    response_model=VideoOut,
+    responses={204: {"description": "未選別動画なし"}},
+    dependencies=_NO_STORE,
+)
 def selection_fate(
     folder: str = Query(..., description="セレクションフォルダパス"),
     recently_unwatched_priority: bool = Query(default=False, description="最近見ていない動画を少し優先する"),
@@ -215,8 +305,8 @@ def selection_fate(
     return VideoOut.from_video(video)
 
 
-@router.post("/videos/by-ids", response_model=VideosByIdsResponse)
-def get_videos_by_ids(req: VideosByIdsRequest) -> VideosByIdsResponse:
+@router.post("/videos/by-ids", response_model=VideosByIdsResponse, dependencies=_NO_STORE)
+def get_videos_by_ids(req: VideosByIdsRequest, response: Response) -> VideosByIdsResponse:
     """指定IDの動画をまとめて取得する（入力順保持・デフォルト削除済み除外）。
 
     見つからなかったID（削除済み・消滅など）は missing_ids に入れて返す。AVP候補の
@@ -226,13 +316,10 @@ def get_videos_by_ids(req: VideosByIdsRequest) -> VideosByIdsResponse:
     videos = app_service.get_videos_by_ids(req.ids)
     found_ids = {v.id for v in videos}
     missing = [vid for vid in dict.fromkeys(req.ids) if vid not in found_ids]
-    return VideosByIdsResponse(
-        items=[VideoOut.from_video(v) for v in videos],
-        missing_ids=missing,
-    )
+    return json_response(response, {"items": video_dicts(videos), "missing_ids": missing})
 
 
-@router.get("/filter-options", response_model=FilterOptionsResponse)
+@router.get("/filter-options", response_model=FilterOptionsResponse, dependencies=_REVALIDATE)
 def filter_options() -> FilterOptionsResponse:
     """フィルタ UI 用の選択肢（使用中のレベル・登場人物・保存場所）を返す。"""
     return FilterOptionsResponse(**app_service.get_filter_options())
@@ -240,7 +327,7 @@ def filter_options() -> FilterOptionsResponse:
 
 # --- 動的パス（必ず最後に定義） ----------------------------------------------
 
-@router.get("/videos/{video_id}", response_model=VideoOut)
+@router.get("/videos/{video_id}", response_model=VideoOut, dependencies=_REVALIDATE)
 def get_video(video_id: int) -> VideoOut:
     """動画IDを指定して1件取得する（削除済みも返す＝現行踏襲）。存在しなければ 404。"""
     videos = app_service.get_videos_by_ids([video_id], include_deleted=True)
@@ -12,8 +12,14 @@ ClipBox - FastAPI エントリーポイント。
   `init_database` / `run_startup_migration`（書き込み）は実行しない
   （DB 初期化・移行は起動スクリプト `run_api.bat` / `run_dev.bat` の `scripts/run_migrations.py`
   ＋ `scripts/startup_backup.py` が起動前に担う）。
-- mutation（play/level/like/scan/config/backup/avp）は単一サーバー書き込み前提（WAL 未設定。
+- mutation（play/level/like/scan/config/backup/avp）は単一サーバー書き込み前提。プロセス内の書き込みは
+  `core.database` の書き込みキューで直列化される（WAL は `CLIPBOX_DB_WAL=1` で opt-in。
   archived 旧 Streamlit UI を同時起動して書き込むと SQLite ロック競合になり得る）。
+- **ライブラリ監視は既定で無効**。`CLIPBOX_WATCH_LIBRARY=1` のときのみ lifespan で
+  `core.library_watcher` のポーリングスレッドを起動し、変化を増分スキャンで反映する（lifespan 自体は
+  書き込まない。反映は書き込みキュー経由）。
+- 存在確認キャッシュ（`core.availability`）のバックグラウンド更新は DB があれば lifespan で起動する
+  （DB は読むだけで、ファイルシステムの stat 結果をメモリに持つ）。
 - **Runtime control（dev/ops 用）は既定で無効**。`CLIPBOX_ENABLE_RUNTIME_CONTROL=1` のときのみ
   `/api/runtime*` を公開する（ブラウザからプロセス停止できる強い副作用のため明示有効化）。
 
@@ -28,6 +34,7 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+import config
 from core import app_service
 from core.logger import get_logger
 from api import videos, stats, actions, likes, admin, analysis, avp, runtime
@@ -44,13 +51,20 @@ ALLOWED_ORIGINS = [
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """起動時の read-only 健全性チェック（書き込みはしない）。"""
+    """起動時の read-only 健全性チェック（書き込みはしない）と、バックグラウンドサービスの起動・停止。"""
     if app_service.check_database_exists():
         logger.info("api_startup db_exists=true")
+        app_service.start_availability_refresher()
     else:
         # 停止はせず警告のみ。DB 初期化・移行は起動スクリプト（run_migrations.py）が起動前に担う。
         logger.warning("api_startup db_exists=false reason=database_not_initialized")
+    if config.LIBRARY_WATCH_ENABLED:
+        app_service.start_library_watcher()
     yield
+    app_service.stop_library_watcher()
+    app_service.stop_availability_refresher()
+    # 終了時にプール済み接続を閉じる（WAL 有効時は最後の接続クローズで WAL が本体へ書き戻される）
+    app_service.close_db_pool()
 
 
 def _runtime_control_enabled() -> bool:
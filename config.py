@@ -3,6 +3,7 @@ ClipBox - 設定ファイル
 アプリケーション全体の設定を管理
 """
 
+import os
 from pathlib import Path
 
 # プロジェクトルートディレクトリ
@@ -18,6 +19,50 @@ SCAN_DIRECTORIES = [
 # データベースパス
 DATABASE_PATH = PROJECT_ROOT / "data" / "videos.db"
 
+# DB 接続プールで保持する接続数の上限（uvicorn スレッドプールからの同時利用を想定）
+DB_POOL_MAX_SIZE = 8
+
+# WAL モード（opt-in）。CLIPBOX_DB_WAL=1 で有効化する。
+# 有効時は読み取りが書き込み（リネーム・スキャン）を待たなくなる。
+DB_WAL_ENABLED = os.getenv("CLIPBOX_DB_WAL") == "1"
+# WAL 時の synchronous レベル（NORMAL: コミットごとの fsync を省き、チェックポイント時に同期）
+DB_WAL_SYNCHRONOUS = "NORMAL"
+# 自動チェックポイントの閾値（WAL ページ数）。書き込みキューもこの間隔で PASSIVE チェックポイントを行う
+DB_WAL_AUTOCHECKPOINT_PAGES = 1000
+DB_WAL_CHECKPOINT_INTERVAL_WRITES = 200
+# 書き込みキューの待ち時間の上限（秒）。超えたら OperationalError（database is locked）で失敗させる
+DB_WRITE_QUEUE_TIMEOUT_SEC = 30.0
+
+# スキャンの並列度。ルート（ドライブ）ごとに 1 ワーカーで os.scandir 走査し、DB 書き込みは呼び出し元の 1 接続で行う
+SCAN_MAX_WORKERS = 4
+# True でルート直下のサブディレクトリごとにもワーカーを分ける（1 ドライブに大きなサブツリーが並ぶ場合）
+SCAN_SPLIT_TOP_LEVEL = False
+
+# ライブラリ監視（opt-in）。CLIPBOX_WATCH_LIBRARY=1 で FastAPI 起動中に library_roots / selection_folder を
+# ポーリングし、変化が落ち着いたら増分スキャンを自動実行する
+LIBRARY_WATCH_ENABLED = os.getenv("CLIPBOX_WATCH_LIBRARY") == "1"
+LIBRARY_WATCH_POLL_SEC = 10.0
+# 最後の変化からこの秒数だけ変化が無ければ反映する（コピー途中のファイルを拾わないため）
+LIBRARY_WATCH_DEBOUNCE_SEC = 5.0
+
+# ファイル存在確認キャッシュ（core.availability）。ドライブ接続状態・ファイル単位の存在を TTL 付きで保持し、
+# 運命の1本 / ランダム取得のホットパスで stat しない。バックグラウンド更新は API 起動中のみ
+AVAILABILITY_DRIVE_TTL_SEC = 30.0
+AVAILABILITY_PATH_TTL_SEC = 300.0
+AVAILABILITY_REFRESH_SEC = 15.0
+
+# 集計クエリ結果のキャッシュ（core.query_cache）。データ世代（書き込みのコミットで進む）が変わるまで結果を使い回す。
+# 別プロセスからの書き込み・日付の変わり目に備え、世代が同じでも最大保持秒数を過ぎたら計算し直す
+QUERY_CACHE_MAX_ENTRIES = 256
+QUERY_CACHE_MAX_AGE_SEC = 300.0
+
+# ストリーミング出力（/api/export/*）で 1 回の読み取りに取る行数。バッチごとに接続を借りて返すため、
+# 読み取りロックはこの行数を読む間だけ（WAL 無効時も長い転送中に書き込みを待たせない）
+EXPORT_BATCH_SIZE = 1000
+
+# 列指向スナップショット（core.export_service。Parquet / Arrow IPC）の既定の書き出し先。個人データを含むため公開しない
+SNAPSHOT_EXPORT_DIR = PROJECT_ROOT / "data" / "exports"
+
 # 対応する動画拡張子
 VIDEO_EXTENSIONS = ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm']
 
@@ -8,48 +8,59 @@ components without embedding any rendering logic.
 
 from __future__ import annotations
 
+import json
+import os
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta
-from pathlib import Path
-from sqlite3 import Connection
-from typing import Dict, Iterable, Literal, Optional, Sequence, Tuple
+from sqlite3 import Connection, Row
+from typing import Dict, Iterable, Iterator, List, Literal, Optional, Sequence, Tuple
 
 import pandas as pd
 
-from core.database import get_db_connection
+from config import EXPORT_BATCH_SIZE
+from core.database import get_db_connection, iter_keyset_batches
 from core.viewing import VIEWING_METHOD_APP_PLAYBACK
 
-_SQLITE_MAX_VARS = 900  # SQLite の SQLITE_LIMIT_VARIABLE_NUMBER 上限余裕込み
-
+AvailabilityFilter = Literal["利用可能のみ", "利用不可のみ", "すべて"]
+PeriodPreset = Literal["全期間", "直近7日", "直近30日", "直近90日", "直近180日", "カスタム"]
 
-def _run_chunked_query(
-    conn,
-    base_query: str,
-    video_ids: list,
-    extra_params: list | None = None,
-) -> list[dict]:
-    """video_ids を 900 件ずつに分割してクエリを実行し結果を結合する。
 
-    base_query の ``{placeholders}`` が IN 句のプレースホルダに置換される。
-    extra_params は各チャンクの IN 句パラメータより前に渡されるパラメータ。
+@dataclass(frozen=True)
+class VideoScope:
+    """分析対象の動画集合（load_analysis_data + apply_scope_filter と同じ条件）。
 
-    NOTE: 複数チャンクにまたがる場合、結果の順序はチャンク内の ORDER BY のみ
-    保証される。チャンク間の順序は保証されないため、呼び出し側で再ソートすること。
+    集計クエリはこの条件を videos のサブクエリとして結合し、対象動画の id を SQL に送り返さない。
     """
-    extra_params = extra_params or []
-    results: list[dict] = []
-    if not video_ids:
-        return results
-    for i in range(0, len(video_ids), _SQLITE_MAX_VARS):
-        chunk = video_ids[i : i + _SQLITE_MAX_VARS]
-        placeholders = ",".join("?" * len(chunk))
-        query = base_query.format(placeholders=placeholders)
-        rows = conn.execute(query, [*extra_params, *chunk]).fetchall()
-        results.extend([dict(row) for row in rows])
-    return results
 
+    is_deleted_filter: Optional[int] = 0
+    availability: AvailabilityFilter = "すべて"
+
+    def condition(self, alias: str = "v") -> Tuple[str, list]:
+        """videos（別名 alias）に対する WHERE 条件とパラメータを返す。"""
+        clauses = ["1=1"]
+        params: list = []
+        if self.is_deleted_filter is not None:
+            clauses.append(f"{alias}.is_deleted = ?")
+            params.append(self.is_deleted_filter)
+        if self.availability == "利用可能のみ":
+            clauses.append(f"{alias}.is_available = 1")
+        elif self.availability == "利用不可のみ":
+            clauses.append(f"{alias}.is_available = 0")
+        return " AND ".join(clauses), params
+
+
+def _video_id_filter(
+    column: str, video_ids: Iterable[int], scope: Optional[VideoScope] = None
+) -> Tuple[str, list]:
+    """column を対象動画に絞る条件とパラメータを返す（IN リストを組み立てない）。
 
-AvailabilityFilter = Literal["利用可能のみ", "利用不可のみ", "すべて"]
-PeriodPreset = Literal["全期間", "直近7日", "直近30日", "直近90日", "直近180日", "カスタム"]
+    scope があれば videos のサブクエリ、無ければ id 列を JSON 配列 1 つのパラメータで渡して
+    json_each で展開する（件数によらず 1 文・1 パラメータ）。
+    """
+    if scope is not None:
+        condition, params = scope.condition("sv")
+        return f"{column} IN (SELECT sv.id FROM videos sv WHERE {condition})", params
+    return f"{column} IN (SELECT value FROM json_each(?))", [json.dumps([int(i) for i in video_ids])]
 
 
 def get_kpi_stats(conn: Connection) -> Dict[str, float]:
@@ -111,7 +122,7 @@ def get_kpi_stats(conn: Connection) -> Dict[str, float]:
 
 def load_analysis_data(is_deleted_filter: Optional[int]) -> pd.DataFrame:
     """
-    videos と viewing_history を結合し、累計視聴回数付きの DataFrame を返す。
+    videos に video_stats を結合し、累計視聴回数付きの DataFrame を返す。
 
     Args:
         is_deleted_filter: 0 を指定すると削除済みを除外、None なら全件を対象。
@@ -122,20 +133,17 @@ def load_analysis_data(is_deleted_filter: Optional[int]) -> pd.DataFrame:
     query = """
     SELECT
         v.*,
-        COALESCE(COUNT(vh.id), 0) AS total_view_count,
-        MAX(vh.viewed_at) AS last_viewed_at
+        COALESCE(vs.view_count, 0) AS total_view_count,
+        vs.last_viewed_at AS last_viewed_at
       FROM videos v
-      LEFT JOIN viewing_history vh
-        ON v.id = vh.video_id AND vh.viewing_method = ?
+      LEFT JOIN video_stats vs ON vs.video_id = v.id
     """
-    params: list = [VIEWING_METHOD_APP_PLAYBACK]
+    params: list = []
 
     if is_deleted_filter is not None:
         query += " WHERE v.is_deleted = ?"
         params.append(is_deleted_filter)
 
-    query += " GROUP BY v.id"
-
     with get_db_connection() as conn:
         df = pd.read_sql_query(query, conn, params=params)
 
@@ -205,10 +213,13 @@ def calculate_period_view_count(
     df: pd.DataFrame,
     period_start: Optional[datetime],
     period_end: Optional[datetime],
+    scope: Optional[VideoScope] = None,
 ) -> pd.DataFrame:
     """
     期間内視聴回数 (period_view_count) を付与した DataFrame を返す。
     全期間指定なら total_view_count をそのまま使用する。
+
+    scope に df の絞り込み条件を渡すと、対象動画を id 列ではなく videos のサブクエリで絞る。
     """
     df_result = df.copy()
 
@@ -220,30 +231,22 @@ def calculate_period_view_count(
         df_result["period_view_count"] = df_result["total_view_count"].fillna(0).astype(int)
         return df_result
 
-    video_ids: list[int] = df_result["id"].tolist()
-    if not video_ids:
-        df_result["period_view_count"] = 0
-        return df_result
-
-    base_query = """
+    id_filter, id_params = _video_id_filter("video_id", df_result["id"].tolist(), scope)
+    query = f"""
         SELECT video_id, COUNT(*) AS period_view_count
          FROM viewing_history
          WHERE viewed_at BETWEEN ? AND ?
            AND viewing_method = ?
-           AND video_id IN ({placeholders})
+           AND {id_filter}
          GROUP BY video_id
     """
     with get_db_connection() as conn:
-        rows = _run_chunked_query(
-            conn,
-            base_query,
-            video_ids,
-            [period_start, period_end, VIEWING_METHOD_APP_PLAYBACK],
-        )
-    df_period = (
-        pd.DataFrame(rows)
-        if rows
-        else pd.DataFrame(columns=["video_id", "period_view_count"])
+        rows = conn.execute(
+            query, [period_start, period_end, VIEWING_METHOD_APP_PLAYBACK, *id_params]
+        ).fetchall()
+    df_period = pd.DataFrame(
+        [(row["video_id"], row["period_view_count"]) for row in rows],
+        columns=["video_id", "period_view_count"],
     )
 
     df_result = df_result.merge(df_period, left_on="id", right_on="video_id", how="left")
@@ -254,33 +257,38 @@ def calculate_period_view_count(
     return df_result
 
 
-def get_viewing_history(
+def _history_query(
+    table: str,
+    time_col: str,
     period_start: Optional[datetime],
     period_end: Optional[datetime],
     video_ids: Sequence[int],
 ) -> pd.DataFrame:
-    """期間・対象動画で絞った viewing_history を返す。"""
-    if not video_ids:
-        return pd.DataFrame(columns=["video_id", "viewed_at"])
-
-    base_query = "SELECT video_id, viewed_at FROM viewing_history WHERE 1=1"
-    extra_params: list = []
-
+    query = f"SELECT video_id, {time_col} FROM {table} WHERE 1=1"
+    params: list = []
     if period_start is not None:
-        base_query += " AND viewed_at >= ?"
-        extra_params.append(period_start)
+        query += f" AND {time_col} >= ?"
+        params.append(period_start)
     if period_end is not None:
-        base_query += " AND viewed_at <= ?"
-        extra_params.append(period_end)
-
-    base_query += " AND video_id IN ({placeholders})"
+        query += f" AND {time_col} <= ?"
+        params.append(period_end)
+    id_filter, id_params = _video_id_filter("video_id", video_ids)
+    query += f" AND {id_filter} ORDER BY {time_col}"
 
     with get_db_connection() as conn:
-        rows = _run_chunked_query(conn, base_query, list(video_ids), extra_params)
+        rows = conn.execute(query, [*params, *id_params]).fetchall()
+    return pd.DataFrame([tuple(row) for row in rows], columns=["video_id", time_col])
 
-    if not rows:
+
+def get_viewing_history(
+    period_start: Optional[datetime],
+    period_end: Optional[datetime],
+    video_ids: Sequence[int],
+) -> pd.DataFrame:
+    """期間・対象動画で絞った viewing_history を返す（viewed_at 昇順）。"""
+    if not video_ids:
         return pd.DataFrame(columns=["video_id", "viewed_at"])
-    return pd.DataFrame(rows).sort_values("viewed_at").reset_index(drop=True)
+    return _history_query("viewing_history", "viewed_at", period_start, period_end, video_ids)
 
 
 def get_judgment_history(
@@ -288,46 +296,106 @@ def get_judgment_history(
     period_end: Optional[datetime],
     video_ids: Sequence[int],
 ) -> pd.DataFrame:
-    """期間・対象動画で絞った judgment_history を返す。"""
+    """期間・対象動画で絞った judgment_history を返す（judged_at 昇順）。"""
     if not video_ids:
         return pd.DataFrame(columns=["video_id", "judged_at"])
+    return _history_query("judgment_history", "judged_at", period_start, period_end, video_ids)
 
-    base_query = "SELECT video_id, judged_at FROM judgment_history WHERE 1=1"
-    extra_params: list = []
 
+def _iter_history(
+    table: str,
+    time_col: str,
+    period_start: Optional[datetime],
+    period_end: Optional[datetime],
+    video_ids: Optional[Sequence[int]],
+    batch_size: int,
+) -> Iterator[List[Row]]:
+    clauses = ["1=1"]
+    params: list = []
     if period_start is not None:
-        base_query += " AND judged_at >= ?"
-        extra_params.append(period_start)
+        clauses.append(f"{time_col} >= ?")
+        params.append(period_start)
     if period_end is not None:
-        base_query += " AND judged_at <= ?"
-        extra_params.append(period_end)
+        clauses.append(f"{time_col} <= ?")
+        params.append(period_end)
+    if video_ids is not None:
+        id_filter, id_params = _video_id_filter("video_id", video_ids)
+        clauses.append(id_filter)
+        params.extend(id_params)
+    select = f"SELECT id, video_id, {time_col} FROM {table}"
+    return iter_keyset_batches(select, " AND ".join(clauses), params, "id", batch_size)
 
-    base_query += " AND video_id IN ({placeholders})"
 
-    with get_db_connection() as conn:
-        rows = _run_chunked_query(conn, base_query, list(video_ids), extra_params)
+def iter_viewing_history(
+    period_start: Optional[datetime],
+    period_end: Optional[datetime],
+    video_ids: Optional[Sequence[int]] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[List[Row]]:
+    """get_viewing_history と同じ絞り込みの (id, video_id, viewed_at) を id 順に batch_size 行ずつ返す。
 
-    if not rows:
-        return pd.DataFrame(columns=["video_id", "judged_at"])
-    return pd.DataFrame(rows).sort_values("judged_at").reset_index(drop=True)
+    video_ids が None なら全動画。全件を DataFrame にしない（ストリーミング出力用）。
+    """
+    return _iter_history("viewing_history", "viewed_at", period_start, period_end, video_ids, batch_size)
+
+
+def iter_judgment_history(
+    period_start: Optional[datetime],
+    period_end: Optional[datetime],
+    video_ids: Optional[Sequence[int]] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[List[Row]]:
+    """get_judgment_history と同じ絞り込みの (id, video_id, judged_at) を id 順に batch_size 行ずつ返す。"""
+    return _iter_history("judgment_history", "judged_at", period_start, period_end, video_ids, batch_size)
 
 
-def _bucket_label_expr(col: str, bucket: str) -> str:
-    """日時列 col をバケット単位のラベル文字列に変換する SQL 式を返す。
+def iter_analysis_data(
+    scope: VideoScope,
+    period_start: Optional[datetime],
+    period_end: Optional[datetime],
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[List[Row]]:
+    """load_analysis_data → apply_scope_filter → calculate_period_view_count と同じ行を id 順に返す。
+
+    列は videos の全列 + total_view_count / last_viewed_at / period_view_count。
+    期間内視聴回数はバッチの動画ごとに相関サブクエリで数える（viewing_history.video_id の索引）。
+    """
+    condition, params = scope.condition("v")
+    if period_start is None and period_end is None:
+        period_expr = "COALESCE(vs.view_count, 0)"
+        period_params: list = []
+    else:
+        period_expr = """(SELECT COUNT(*) FROM viewing_history h
+                           WHERE h.video_id = v.id AND h.viewed_at BETWEEN ? AND ? AND h.viewing_method = ?)"""
+        period_params = [period_start, period_end, VIEWING_METHOD_APP_PLAYBACK]
+    select = f"""
+        SELECT v.*,
+               COALESCE(vs.view_count, 0) AS total_view_count,
+               vs.last_viewed_at AS last_viewed_at,
+               {period_expr} AS period_view_count
+          FROM videos v
+          LEFT JOIN video_stats vs ON vs.video_id = v.id
+    """
+    # SELECT 句（期間）のパラメータが WHERE 句より前に来る
+    return iter_keyset_batches(select, condition, [*period_params, *params], "v.id", batch_size)
+
+
+def _bucket_label_expr(day_col: str, bucket: str) -> str:
+    """ローカル日付列 day_col（YYYY-MM-DD）をバケット単位のラベル文字列に変換する SQL 式を返す。
 
     既存フロント（selection-trend の client 集計）と表示ラベルを揃える:
       day=YYYY-MM-DD / week=月曜開始日(YYYY-MM-DD) / month=YYYY-MM。
-    col は内部固定文字列のみ（ユーザー入力を渡さない）。
+    day_col は内部固定文字列のみ（ユーザー入力を渡さない）。
     """
     if bucket == "month":
-        return f"strftime('%Y-%m', {col}, 'localtime')"
+        return f"substr({day_col}, 1, 7)"
     if bucket == "week":
         # 月曜開始日。%w は 0=日..6=土。(w+6)%7 日戻すと月曜になる。
         return (
-            f"date({col}, 'localtime', '-' || "
-            f"((cast(strftime('%w', {col}, 'localtime') as integer) + 6) % 7) || ' days')"
+            f"date({day_col}, '-' || "
+            f"((cast(strftime('%w', {day_col}) as integer) + 6) % 7) || ' days')"
         )
-    return f"DATE({col}, 'localtime')"  # day
+    return day_col  # day
 
 
 def _trend_filters(
@@ -354,6 +422,92 @@ def _trend_filters(
     return clause, params
 
 
+def _rollup_period(
+    date_col: str, period_start: Optional[datetime], period_end: Optional[datetime]
+) -> Tuple[str, list, Optional[str], list]:
+    """期間を「日次ロールアップで読む日」と「基表から読む境界の日」に分ける。
+
+    期間条件は保存値（raw）との比較なので、期間の内側に完全に含まれる raw_day だけを
+    ロールアップから読み、開始日・終了日の当日分は基表の date_col で厳密に絞る（idx_*_at 索引）。
+
+    Returns:
+        (ロールアップの WHERE 句, params, 基表の WHERE 句（境界が無ければ None）, params)
+    """
+    if period_start is None and period_end is None:
+        return "", [], None, []
+    rollup_clause = ""
+    rollup_params: list = []
+    raw_clause = ""
+    raw_params: list = []
+    edges: List[str] = []
+    edge_params: list = []
+    if period_start is not None:
+        rollup_clause += " AND raw_day > ?"
+        rollup_params.append(period_start.date().isoformat())
+        raw_clause += f" AND {date_col} >= ?"
+        raw_params.append(period_start)
+        edges.append(f"{date_col} < ?")
+        edge_params.append((period_start.date() + timedelta(days=1)).isoformat())
+    if period_end is not None:
+        rollup_clause += " AND raw_day < ?"
+        rollup_params.append(period_end.date().isoformat())
+        raw_clause += f" AND {date_col} <= ?"
+        raw_params.append(period_end)
+        edges.append(f"{date_col} >= ?")
+        edge_params.append(period_end.date().isoformat())
+    raw_clause += " AND (" + " OR ".join(edges) + ")"
+    return rollup_clause, rollup_params, raw_clause, raw_params + edge_params
+
+
+def _rollup_scope(alias: str, is_available: Optional[bool], include_deleted: bool) -> Tuple[str, list]:
+    """件数型ロールアップ（viewing_daily / likes_daily）のスコープ列の WHERE 句と params。"""
+    clause = ""
+    params: list = []
+    if not include_deleted:
+        clause += f" AND {alias}.is_deleted = 0"
+    if is_available is not None:
+        clause += f" AND {alias}.is_available = ?"
+        params.append(1 if is_available else 0)
+    return clause, params
+
+
+def _count_trend_query(
+    rollup: str,
+    source: str,
+    date_col: str,
+    condition: str,
+    condition_params: list,
+    period_start: Optional[datetime],
+    period_end: Optional[datetime],
+    is_available: Optional[bool],
+    include_deleted: bool,
+    bucket: str,
+) -> Tuple[str, list]:
+    """件数型の推移（視聴・いいね）を日次ロールアップ + 境界日の基表から数える SQL と params。
+
+    source は「基表 別名 JOIN videos v」の FROM 句、condition は基表側の追加条件（先頭 AND）。
+    """
+    rollup_period, rollup_period_params, raw_period, raw_period_params = _rollup_period(
+        date_col, period_start, period_end
+    )
+    scope, scope_params = _rollup_scope("r", is_available, include_deleted)
+    parts = [f"SELECT r.local_day AS day, r.count AS n FROM {rollup} r WHERE 1=1{scope}{rollup_period}"]
+    params = [*scope_params, *rollup_period_params]
+    if raw_period is not None:
+        where, raw_params = _trend_filters(date_col, None, None, is_available, include_deleted)
+        parts.append(
+            f"SELECT DATE({date_col}, 'localtime') AS day, 1 AS n FROM {source}"
+            f" WHERE 1=1{where}{condition}{raw_period}"
+        )
+        params += [*raw_params, *condition_params, *raw_period_params]
+    label = _bucket_label_expr("day", bucket)
+    query = (
+        f"SELECT {label} AS label, SUM(n) AS count FROM ({' UNION ALL '.join(parts)})"
+        f" GROUP BY label ORDER BY label"
+    )
+    return query, params
+
+
 def get_viewing_trend(
     period_start: Optional[datetime],
     period_end: Optional[datetime],
@@ -361,22 +515,22 @@ def get_viewing_trend(
     include_deleted: bool,
     bucket: str = "day",
 ) -> pd.DataFrame:
-    """視聴回数のバケット別推移を返す（videos と JOIN し scope 済み・SQL 集計）。
+    """視聴回数のバケット別推移を返す（日次ロールアップ viewing_daily を集計・scope 済み）。
 
     Returns:
         DataFrame: columns = ["label", "count"]（count = 視聴イベント数）
     """
-    label = _bucket_label_expr("vh.viewed_at", bucket)
-    where, params = _trend_filters(
-        "vh.viewed_at", period_start, period_end, is_available, include_deleted
-    )
-    where += " AND vh.viewing_method = ?"
-    params.append(VIEWING_METHOD_APP_PLAYBACK)
-    query = (
-        f"SELECT {label} AS label, COUNT(*) AS count"
-        f" FROM viewing_history vh JOIN videos v ON v.id = vh.video_id"
-        f" WHERE 1=1{where}"
-        f" GROUP BY label ORDER BY label"
+    query, params = _count_trend_query(
+        "viewing_daily",
+        "viewing_history vh JOIN videos v ON v.id = vh.video_id",
+        "vh.viewed_at",
+        " AND vh.viewing_method = ?",
+        [VIEWING_METHOD_APP_PLAYBACK],
+        period_start,
+        period_end,
+        is_available,
+        include_deleted,
+        bucket,
     )
     with get_db_connection() as conn:
         return pd.read_sql_query(query, conn, params=params)
@@ -393,23 +547,38 @@ def get_judgment_trend(
     """判定のバケット別推移を返す（バケットごとに COUNT(DISTINCT video_id)・SQL 集計）。
 
     週/月でも同一動画はバケット内で1カウントになる（client 側合算では過大計上になるため SQL で distinct）。
+    日ごとの判定済み動画の集合 judgment_daily から数え、期間の境界日だけ judgment_history を読む。
     tier=1 は Tier1 判定、tier=2 は Tier2 選別判定だけに絞る。None は既存どおり両方を含む。
 
     Returns:
         DataFrame: columns = ["label", "count"]
     """
-    label = _bucket_label_expr("jh.judged_at", bucket)
-    where, params = _trend_filters(
-        "jh.judged_at", period_start, period_end, is_available, include_deleted
+    rollup_period, rollup_period_params, raw_period, raw_period_params = _rollup_period(
+        "jh.judged_at", period_start, period_end
     )
+    where, scope_params = _trend_filters("jh.judged_at", None, None, is_available, include_deleted)
+    rollup_tier = ""
+    raw_tier = ""
     if tier == 1:
-        where += " AND jh.was_selection_judgment = 0"
+        rollup_tier, raw_tier = " AND j.tier = 1", " AND jh.was_selection_judgment = 0"
     elif tier == 2:
-        where += " AND jh.was_selection_judgment = 1"
+        rollup_tier, raw_tier = " AND j.tier = 2", " AND jh.was_selection_judgment = 1"
+    parts = [
+        f"SELECT j.local_day AS day, j.video_id AS video_id"
+        f" FROM judgment_daily j JOIN videos v ON v.id = j.video_id"
+        f" WHERE 1=1{where}{rollup_tier}{rollup_period}"
+    ]
+    params = [*scope_params, *rollup_period_params]
+    if raw_period is not None:
+        parts.append(
+            f"SELECT DATE(jh.judged_at, 'localtime') AS day, jh.video_id AS video_id"
+            f" FROM judgment_history jh JOIN videos v ON v.id = jh.video_id"
+            f" WHERE 1=1{where}{raw_tier}{raw_period}"
+        )
+        params += [*scope_params, *raw_period_params]
+    label = _bucket_label_expr("day", bucket)
     query = (
-        f"SELECT {label} AS label, COUNT(DISTINCT jh.video_id) AS count"
-        f" FROM judgment_history jh JOIN videos v ON v.id = jh.video_id"
-        f" WHERE 1=1{where}"
+        f"SELECT {label} AS label, COUNT(DISTINCT video_id) AS count FROM ({' UNION ALL '.join(parts)})"
         f" GROUP BY label ORDER BY label"
     )
     with get_db_connection() as conn:
@@ -424,20 +593,22 @@ def get_likes_trend(
     bucket: str = "day",
     conn: Optional[Connection] = None,
 ) -> pd.DataFrame:
-    """いいね数のバケット別推移を返す（likes.liked_at 基準・videos JOIN・SQL 集計）。
+    """いいね数のバケット別推移を返す（likes.liked_at 基準・日次ロールアップ likes_daily を集計）。
 
     Returns:
         DataFrame: columns = ["label", "count"]
     """
-    label = _bucket_label_expr("l.liked_at", bucket)
-    where, params = _trend_filters(
-        "l.liked_at", period_start, period_end, is_available, include_deleted
-    )
-    query = (
-        f"SELECT {label} AS label, COUNT(*) AS count"
-        f" FROM likes l JOIN videos v ON v.id = l.video_id"
-        f" WHERE 1=1{where}"
-        f" GROUP BY label ORDER BY label"
+    query, params = _count_trend_query(
+        "likes_daily",
+        "likes l JOIN videos v ON v.id = l.video_id",
+        "l.liked_at",
+        "",
+        [],
+        period_start,
+        period_end,
+        is_available,
+        include_deleted,
+        bucket,
     )
 
     if conn is not None:
@@ -447,38 +618,54 @@ def get_likes_trend(
         return pd.read_sql_query(query, local_conn, params=params)
 
 
-def get_view_count_ranking(df_filtered: pd.DataFrame, top_n: int = 50) -> pd.DataFrame:
-    """period_view_count を用いたランキング DataFrame を返す。"""
-    if df_filtered.empty:
-        return pd.DataFrame(
-            columns=["順位", "ファイル名", "利用可否", "保存場所", "ファイル作成日", "お気に入りレベル", "視聴回数"]
-        )
+_RANKING_BASE_COLUMNS = ["順位", "ファイル名", "利用可否", "保存場所", "ファイル作成日", "お気に入りレベル"]
+
+# ファイル名部分（最後の区切り文字より後ろ）。Windows では Path と同じく \ も区切りとして扱う
+_BASENAME_PATTERN = r"([^\\/]*)$" if os.sep == "\\" else r"([^/]*)$"
+
+
+def _empty_ranking(score_label: str) -> pd.DataFrame:
+    return pd.DataFrame(columns=[*_RANKING_BASE_COLUMNS, score_label])
 
-    ranking = df_filtered.nlargest(top_n, "period_view_count").copy()
-    ranking.insert(0, "順位", range(1, len(ranking) + 1))
 
-    def _display_name(row) -> str:
-        if row.get("current_full_path"):
-            return Path(row["current_full_path"]).name
-        return row.get("essential_filename", "")
+def _column(df: pd.DataFrame, name: str) -> pd.Series:
+    """df の列（無ければ None の列）を返す。"""
+    if name in df:
+        return df[name]
+    return pd.Series([None] * len(df), index=df.index, dtype=object)
 
-    ranking["ファイル名"] = ranking.apply(_display_name, axis=1)
-    availability_series = ranking.get("is_available", pd.Series([None] * len(ranking)))
-    ranking["利用可否"] = availability_series.map({1: "利用可", 0: "利用不可"}).fillna("不明")
 
-    storage_series = ranking.get("storage_location", pd.Series([None] * len(ranking)))
-    ranking["保存場所"] = storage_series.fillna("")
+def _display_names(df: pd.DataFrame) -> pd.Series:
+    """表示用ファイル名（current_full_path のファイル名。空なら essential_filename）を列演算で作る。"""
+    names = _column(df, "current_full_path").astype("string").str.extract(_BASENAME_PATTERN, expand=False)
+    fallback = _column(df, "essential_filename").fillna("")
+    has_path = _column(df, "current_full_path").fillna("").astype(bool)
+    return names.where(has_path, fallback).astype(object)
 
-    created_series = ranking.get("file_created_at", pd.Series([None] * len(ranking)))
-    ranking["ファイル作成日"] = (
-        pd.to_datetime(created_series, errors="coerce").dt.strftime("%Y-%m-%d").fillna("-")
+
+def _format_ranking(ranking: pd.DataFrame, score_col: str, score_label: str) -> pd.DataFrame:
+    """上位 N 行（スコア降順）を日本語フラット列のランキング表にする（行ごとの Python 処理なし）。"""
+    created = pd.to_datetime(_column(ranking, "file_created_at"), errors="coerce", format="ISO8601")
+    return pd.DataFrame(
+        {
+            "順位": range(1, len(ranking) + 1),
+            "ファイル名": _display_names(ranking).to_numpy(),
+            "利用可否": _column(ranking, "is_available").map({1: "利用可", 0: "利用不可"}).fillna("不明").to_numpy(),
+            "保存場所": _column(ranking, "storage_location").fillna("").to_numpy(),
+            "ファイル作成日": created.dt.strftime("%Y-%m-%d").fillna("-").to_numpy(),
+            "お気に入りレベル": ranking["current_favorite_level"].to_numpy(),
+            score_label: ranking[score_col].to_numpy(),
+        },
+        index=ranking.index,
     )
-    ranking["お気に入りレベル"] = ranking["current_favorite_level"]
-    ranking["視聴回数"] = ranking["period_view_count"]
 
-    return ranking[
-        ["順位", "ファイル名", "利用可否", "保存場所", "ファイル作成日", "お気に入りレベル", "視聴回数"]
-    ]
+
+def get_view_count_ranking(df_filtered: pd.DataFrame, top_n: int = 50) -> pd.DataFrame:
+    """period_view_count を用いたランキング DataFrame を返す。"""
+    if df_filtered.empty:
+        return _empty_ranking("視聴回数")
+
+    return _format_ranking(df_filtered.nlargest(top_n, "period_view_count"), "period_view_count", "視聴回数")
 
 
 def get_like_count_ranking(
@@ -486,95 +673,46 @@ def get_like_count_ranking(
     period_start: Optional[datetime] = None,
     period_end: Optional[datetime] = None,
     top_n: int = 50,
+    scope: Optional[VideoScope] = None,
 ) -> pd.DataFrame:
     """いいね数ランキング DataFrame を返す。
 
     period_start / period_end を渡すと likes.liked_at をその期間で絞る。
     いずれも None（既定）なら全期間累計（後方互換）。
+    scope に df_filtered の絞り込み条件を渡すと、対象動画を videos のサブクエリで絞る。
     """
     if df_filtered.empty:
-        return pd.DataFrame(
-            columns=["順位", "ファイル名", "利用可否", "保存場所", "ファイル作成日", "お気に入りレベル", "いいね数"]
-        )
-
-    video_ids = df_filtered["id"].tolist()
-    if not video_ids:
-        return pd.DataFrame(
-            columns=["順位", "ファイル名", "利用可否", "保存場所", "ファイル作成日", "お気に入りレベル", "いいね数"]
-        )
+        return _empty_ranking("いいね数")
 
     # likesテーブルから動画別いいね数を集計（任意で liked_at の期間で絞る）
-    # NOTE: _run_chunked_query は extra_params を IN 句のチャンクより前に渡すため、
-    #       期間条件は SQL 上 IN 句より前に置く。
-    period_conditions: list = []
-    extra_params: list = []
+    conditions: list = []
+    params: list = []
     if period_start is not None:
-        period_conditions.append("liked_at >= ?")
-        extra_params.append(period_start)
+        conditions.append("liked_at >= ?")
+        params.append(period_start)
     if period_end is not None:
-        period_conditions.append("liked_at <= ?")
-        extra_params.append(period_end)
-    where_period = (" AND ".join(period_conditions) + " AND ") if period_conditions else ""
-    base_query = f"""
-        SELECT video_id, COUNT(*) AS like_count
+        conditions.append("liked_at <= ?")
+        params.append(period_end)
+    id_filter, id_params = _video_id_filter("video_id", df_filtered["id"].tolist(), scope)
+    conditions.append(id_filter)
+    query = f"""
+        SELECT video_id AS id, COUNT(*) AS like_count
           FROM likes
-         WHERE {where_period}video_id IN ({{placeholders}})
+         WHERE {" AND ".join(conditions)}
          GROUP BY video_id
     """
     with get_db_connection() as conn:
-        rows = _run_chunked_query(conn, base_query, video_ids, extra_params)
-    df_likes = (
-        pd.DataFrame(rows)
-        if rows
-        else pd.DataFrame(columns=["video_id", "like_count"])
-    )
-
-    if df_likes.empty:
-        return pd.DataFrame(
-            columns=["順位", "ファイル名", "利用可否", "保存場所", "ファイル作成日", "お気に入りレベル", "いいね数"]
-        )
-
-    df_likes = df_likes.rename(columns={"video_id": "id"})
-    df_likes["like_count"] = df_likes["like_count"].fillna(0).astype(int)
-
-    # df_filteredとマージ
-    ranking_base = df_filtered.merge(df_likes, on="id", how="left")
-    ranking_base["like_count"] = ranking_base["like_count"].fillna(0).astype(int)
-
-    # いいね数が1以上の動画のみフィルタ
-    ranking_base = ranking_base[ranking_base["like_count"] > 0]
+        rows = conn.execute(query, [*params, *id_params]).fetchall()
+    if not rows:
+        return _empty_ranking("いいね数")
+    df_likes = pd.DataFrame([tuple(row) for row in rows], columns=["id", "like_count"])
 
+    # df_filteredとマージ（いいね数が1以上の動画のみ）
+    ranking_base = df_filtered.merge(df_likes, on="id", how="inner")
     if ranking_base.empty:
-        return pd.DataFrame(
-            columns=["順位", "ファイル名", "利用可否", "保存場所", "ファイル作成日", "お気に入りレベル", "いいね数"]
-        )
-
-    # Top N抽出
-    ranking = ranking_base.nlargest(top_n, "like_count").copy()
-    ranking.insert(0, "順位", range(1, len(ranking) + 1))
-
-    def _display_name(row) -> str:
-        if row.get("current_full_path"):
-            return Path(row["current_full_path"]).name
-        return row.get("essential_filename", "")
+        return _empty_ranking("いいね数")
 
-    ranking["ファイル名"] = ranking.apply(_display_name, axis=1)
-    availability_series = ranking.get("is_available", pd.Series([None] * len(ranking)))
-    ranking["利用可否"] = availability_series.map({1: "利用可", 0: "利用不可"}).fillna("不明")
-
-    storage_series = ranking.get("storage_location", pd.Series([None] * len(ranking)))
-    ranking["保存場所"] = storage_series.fillna("")
-
-    created_series = ranking.get("file_created_at", pd.Series([None] * len(ranking)))
-    ranking["ファイル作成日"] = (
-        pd.to_datetime(created_series, errors="coerce").dt.strftime("%Y-%m-%d").fillna("-")
-    )
-    ranking["お気に入りレベル"] = ranking["current_favorite_level"]
-    ranking["いいね数"] = ranking["like_count"]
-
-    return ranking[
-        ["順位", "ファイル名", "利用可否", "保存場所", "ファイル作成日", "お気に入りレベル", "いいね数"]
-    ]
+    return _format_ranking(ranking_base.nlargest(top_n, "like_count"), "like_count", "いいね数")
 
 
 def get_selection_judgment_trend(
@@ -630,107 +768,103 @@ def get_view_days_ranking(
     period_start: Optional[datetime],
     period_end: Optional[datetime],
     top_n: int = 50,
+    scope: Optional[VideoScope] = None,
 ) -> pd.DataFrame:
-    """指定期間に「何日視聴されたか」で集計したランキングを返す。"""
-    if df_filtered.empty:
-        return pd.DataFrame(
-            columns=["順位", "ファイル名", "利用可否", "保存場所", "ファイル作成日", "お気に入りレベル", "視聴日数"]
-        )
+    """指定期間に「何日視聴されたか」で集計したランキングを返す。
 
-    video_ids = df_filtered["id"].tolist()
-    if not video_ids:
-        return pd.DataFrame(
-            columns=["順位", "ファイル名", "利用可否", "保存場所", "ファイル作成日", "お気に入りレベル", "視聴日数"]
-        )
+    scope に df_filtered の絞り込み条件を渡すと、対象動画を videos のサブクエリで絞る。
+    """
+    if df_filtered.empty:
+        return _empty_ranking("視聴日数")
 
-    base_query = """
-        SELECT video_id, COUNT(DISTINCT DATE(viewed_at)) AS view_days
+    query = """
+        SELECT video_id AS id, COUNT(DISTINCT DATE(viewed_at)) AS view_days
           FROM viewing_history
          WHERE viewing_method = ?
     """
-    extra_params: list = [VIEWING_METHOD_APP_PLAYBACK]
+    params: list = [VIEWING_METHOD_APP_PLAYBACK]
 
     if period_start is not None:
-        base_query += " AND viewed_at >= ?"
-        extra_params.append(period_start)
+        query += " AND viewed_at >= ?"
+        params.append(period_start)
     if period_end is not None:
-        base_query += " AND viewed_at <= ?"
-        extra_params.append(period_end)
+        query += " AND viewed_at <= ?"
+        params.append(period_end)
 
-    base_query += " AND video_id IN ({placeholders}) GROUP BY video_id"
+    id_filter, id_params = _video_id_filter("video_id", df_filtered["id"].tolist(), scope)
+    query += f" AND {id_filter} GROUP BY video_id"
 
     with get_db_connection() as conn:
-        rows = _run_chunked_query(conn, base_query, video_ids, extra_params)
-    df_days = (
-        pd.DataFrame(rows)
-        if rows
-        else pd.DataFrame(columns=["video_id", "view_days"])
-    )
-
-    df_days = df_days.rename(columns={"video_id": "id"})
-    df_days["view_days"] = df_days["view_days"].fillna(0).astype(int)
+        rows = conn.execute(query, [*params, *id_params]).fetchall()
+    df_days = pd.DataFrame([tuple(row) for row in rows], columns=["id", "view_days"])
 
     ranking_base = df_filtered.merge(df_days, on="id", how="left")
     ranking_base["view_days"] = ranking_base["view_days"].fillna(0).astype(int)
 
-    ranking = ranking_base.nlargest(top_n, "view_days").copy()
-    ranking.insert(0, "順位", range(1, len(ranking) + 1))
-
-    def _display_name(row) -> str:
-        if row.get("current_full_path"):
-            return Path(row["current_full_path"]).name
-        return row.get("essential_filename", "")
+    return _format_ranking(ranking_base.nlargest(top_n, "view_days"), "view_days", "視聴日数")
 
-    ranking["ファイル名"] = ranking.apply(_display_name, axis=1)
-    availability_series = ranking.get("is_available", pd.Series([None] * len(ranking)))
-    ranking["利用可否"] = availability_series.map({1: "利用可", 0: "利用不可"}).fillna("不明")
 
-    storage_series = ranking.get("storage_location", pd.Series([None] * len(ranking)))
-    ranking["保存場所"] = storage_series.fillna("")
+_VIDEO_DATETIME_COLUMNS = ("last_file_modified", "created_at", "last_scanned_at", "file_created_at")
+_VIDEO_FLAG_COLUMNS = {
+    "is_available": 1,
+    "is_deleted": 0,
+    "is_judging": 0,
+    "needs_selection": 0,
+    "watch_later": 0,
+}
 
-    created_series = ranking.get("file_created_at", pd.Series([None] * len(ranking)))
-    ranking["ファイル作成日"] = (
-        pd.to_datetime(created_series, errors="coerce").dt.strftime("%Y-%m-%d").fillna("-")
-    )
-    ranking["お気に入りレベル"] = ranking["current_favorite_level"]
-    ranking["視聴日数"] = ranking["view_days"]
 
-    return ranking[
-        ["順位", "ファイル名", "利用可否", "保存場所", "ファイル作成日", "お気に入りレベル", "視聴日数"]
-    ]
+def _parse_datetimes(values: pd.Series) -> List[Optional[datetime]]:
+    """日時文字列の列を datetime のリスト（解釈できない値は None）にまとめて変換する。"""
+    parsed = pd.to_datetime(values, errors="coerce", format="ISO8601")
+    retry = parsed.isna() & values.notna()
+    if retry.any():
+        parsed = parsed.copy()
+        parsed[retry] = pd.to_datetime(values[retry], errors="coerce", format="mixed")
+    return [None if pd.isna(ts) else ts.to_pydatetime() for ts in parsed]
 
 
-def _df_row_to_video(row) -> "Video":
-    """pandas DataFrame の行から Video オブジェクトを生成"""
+def _frame_to_videos(df: pd.DataFrame) -> List["Video"]:
+    """DataFrame から Video のリストを生成する（列ごとにまとめて変換し、行は列配列の zip で組み立てる）。"""
     from core.models import Video
 
-    def _dt(val):
-        if val is None:
-            return None
-        try:
-            return pd.to_datetime(val).to_pydatetime()
-        except Exception:
-            return None
-
-    return Video(
-        id=int(row["id"]) if row["id"] is not None else None,
-        essential_filename=row.get("essential_filename", ""),
-        current_full_path=row.get("current_full_path", ""),
-        current_favorite_level=int(row.get("current_favorite_level", -1)),
-        file_size=int(row["file_size"]) if row.get("file_size") is not None else None,
-        performer=row.get("performer"),
-        storage_location=row.get("storage_location", "C_DRIVE"),
-        last_file_modified=_dt(row.get("last_file_modified")),
-        created_at=_dt(row.get("created_at")),
-        last_scanned_at=_dt(row.get("last_scanned_at")),
-        notes=row.get("notes"),
-        file_created_at=_dt(row.get("file_created_at")),
-        is_available=bool(int(row.get("is_available", 1) or 0)),
-        is_deleted=bool(int(row.get("is_deleted", 0) or 0)),
-        is_judging=bool(int(row.get("is_judging", 0) or 0)),
-        needs_selection=bool(int(row.get("needs_selection", 0) or 0)),
-        watch_later=bool(int(row.get("watch_later", 0) or 0)),
+    if df.empty:
+        return []
+    n = len(df)
+
+    def _values(name: str, default=None) -> list:
+        if name not in df:
+            return [default] * n
+        return df[name].astype(object).where(df[name].notna(), default).tolist()
+
+    def _ints(name: str, default) -> list:
+        return [None if v is None else int(v) for v in _values(name, default)]
+
+    dates = {
+        name: (_parse_datetimes(df[name]) if name in df else [None] * n) for name in _VIDEO_DATETIME_COLUMNS
+    }
+    flags = {name: [bool(int(v or 0)) for v in _values(name, default)] for name, default in _VIDEO_FLAG_COLUMNS.items()}
+    columns = zip(
+        _ints("id", None),
+        _values("essential_filename", ""),
+        _values("current_full_path", ""),
+        _ints("current_favorite_level", -1),
+        _ints("file_size", None),
+        _values("performer"),
+        _values("storage_location", "C_DRIVE"),
+        dates["last_file_modified"],
+        dates["created_at"],
+        dates["last_scanned_at"],
+        _values("notes"),
+        dates["file_created_at"],
+        *flags.values(),
     )
+    return [Video(*values) for values in columns]
+
+
+def _df_row_to_video(row) -> "Video":
+    """pandas DataFrame の行（または dict）から Video オブジェクトを生成"""
+    return _frame_to_videos(pd.DataFrame([dict(row)]))[0]
 
 
 _RANKING_PERIOD_DAYS = {"180日": 180, "1年": 365}
@@ -743,6 +877,107 @@ _COMPOSITE_BONUS_T1 = 0.5  # T1 判定済みボーナス（+50%）
 _COMPOSITE_BONUS_T2 = 0.3  # T2 選別済み追加ボーナス（+30%）
 
 
+# 種別ごとの素点: (全期間の video_stats 列, 期間指定時に集計する CTE の SELECT)
+# CTE は期間（?, ?）で絞り、対象を scoped の動画に限る
+_RANKING_METRICS = {
+    "view_count": (
+        "vs.view_count",
+        "SELECT video_id, COUNT(*) AS n FROM viewing_history"
+        " WHERE viewing_method = ? AND viewed_at BETWEEN ? AND ?",
+    ),
+    "view_days": (
+        "vs.view_days",
+        "SELECT video_id, COUNT(DISTINCT DATE(viewed_at)) AS n FROM viewing_history"
+        " WHERE viewing_method = ? AND viewed_at >= ? AND viewed_at <= ?",
+    ),
+    "likes": (
+        "vs.like_count",
+        "SELECT video_id, COUNT(*) AS n FROM likes WHERE liked_at >= ? AND liked_at <= ?",
+    ),
+}
+# CTE の期間より前に渡すパラメータ
+_RANKING_METRIC_PARAMS = {
+    "view_count": [VIEWING_METHOD_APP_PLAYBACK],
+    "view_days": [VIEWING_METHOD_APP_PLAYBACK],
+    "likes": [],
+}
+
+
+def _ranking_query(
+    ranking_type: str,
+    period_start: Optional[datetime],
+    period_end: Optional[datetime],
+    min_level: Optional[int],
+    availability_filter: str,
+    top_n: int,
+) -> Tuple[str, list]:
+    """ランキング 1 本分の SQL（スコープ → 素点 → スコア → 上位 N 件）とパラメータを組み立てる。
+
+    スコープ（未削除・可用性・最低レベル）は scoped CTE に置き、期間指定時の素点は scoped の動画だけを
+    集計する CTE で求める（全期間は video_stats の集計済み列）。並びは score DESC → 最終視聴（アプリ再生）
+    DESC → id ASC で、LIMIT により SQLite が上位 N 件だけを保持して並べる。
+    """
+    scope = ["v.is_deleted = 0"]
+    params: list = []
+    if availability_filter == "利用可能のみ":
+        scope.append("v.is_available = 1")
+    elif availability_filter == "利用不可のみ":
+        scope.append("v.is_available = 0")
+    if min_level is not None:
+        scope.append("v.current_favorite_level >= ?")
+        params.append(min_level)
+
+    metrics = ("view_days", "likes") if ranking_type == "composite" else (ranking_type,)
+    ctes = [
+        f"""scoped AS (
+            SELECT v.*, vs.last_viewed_at AS last_viewed_at, {", ".join(
+                f"{_RANKING_METRICS[m][0]} AS all_{m}" for m in metrics
+            )}
+              FROM videos v
+              LEFT JOIN video_stats vs ON vs.video_id = v.id
+             WHERE {" AND ".join(scope)}
+        )"""
+    ]
+    joins = []
+    values = {}
+    for m in metrics:
+        if period_start is None and period_end is None:
+            values[m] = f"COALESCE(s.all_{m}, 0)"
+            continue
+        ctes.append(
+            f"period_{m} AS ({_RANKING_METRICS[m][1]}"
+            " AND video_id IN (SELECT id FROM scoped) GROUP BY video_id)"
+        )
+        params.extend([*_RANKING_METRIC_PARAMS[m], period_start, period_end])
+        joins.append(f"LEFT JOIN period_{m} ON period_{m}.video_id = s.id")
+        values[m] = f"COALESCE(period_{m}.n, 0)"
+
+    if ranking_type == "composite":
+        # score = int((view_days*A + likes*B) * (1 + BONUS_T1*t1 + BONUS_T2*t2) * 100)
+        score = (
+            f"CAST(ROUND(({values['view_days']} * ? + {values['likes']} * ?)"
+            " * (1 + ? * (COALESCE(s.current_favorite_level, -1) >= 0)"
+            " + ? * COALESCE(s.is_selection_completed, 0)) * 100) AS INTEGER)"
+        )
+        params.extend([_COMPOSITE_A, _COMPOSITE_B, _COMPOSITE_BONUS_T1, _COMPOSITE_BONUS_T2])
+    else:
+        score = values[ranking_type]
+
+    query = f"""
+        WITH {", ".join(ctes)}
+        SELECT * FROM (
+            SELECT s.*, {score} AS score
+              FROM scoped s
+              {" ".join(joins)}
+        )
+         WHERE score > 0
+         ORDER BY score DESC, last_viewed_at DESC NULLS LAST, id ASC
+         LIMIT ?
+    """
+    params.append(top_n)
+    return query, params
+
+
 def get_ranked_videos_for_tab(
     ranking_type: str,
     period_label: str,
@@ -754,6 +989,8 @@ def get_ranked_videos_for_tab(
     ランキングタブ用: (Video, score) のリストを返す。
     同スコア時は last_viewed_at 降順、さらに id 昇順（タイブレーカー）。
 
+    スコープ・素点・スコア・上位 N 件の選択を 1 本の SQL で行い、読み出すのは結果の N 行だけ。
+
     Args:
         ranking_type: "view_count" | "view_days" | "likes" | "composite"
         period_label: "180日" | "1年" | "全期間"
@@ -761,16 +998,7 @@ def get_ranked_videos_for_tab(
         availability_filter: "利用可能のみ" | "利用不可のみ" | "すべて"
         top_n: 上位何件を返すか
     """
-    from datetime import datetime, timedelta
-
-    df = load_analysis_data(is_deleted_filter=0)
-    if df.empty:
-        return []
-
-    df = apply_scope_filter(df, availability_filter)
-    if min_level is not None:
-        df = df[df["current_favorite_level"] >= min_level]
-    if df.empty:
+    if ranking_type not in _RANKING_METRICS and ranking_type != "composite":
         return []
 
     # 期間計算
@@ -781,129 +1009,13 @@ def get_ranked_videos_for_tab(
         period_end = datetime.now()
         period_start = period_end - timedelta(days=days)
 
-    if ranking_type == "view_count":
-        df = calculate_period_view_count(df, period_start, period_end)
-        score_col = "period_view_count"
-        df[score_col] = df[score_col].fillna(0).astype(int)
-
-    elif ranking_type == "view_days":
-        video_ids = df["id"].tolist()
-        query = (
-            "SELECT video_id, COUNT(DISTINCT DATE(viewed_at)) AS view_days"
-            " FROM viewing_history WHERE viewing_method = ?"
-        )
-        params: list = [VIEWING_METHOD_APP_PLAYBACK]
-        if period_start:
-            query += " AND viewed_at >= ?"
-            params.append(period_start)
-        if period_end:
-            query += " AND viewed_at <= ?"
-            params.append(period_end)
-        query += " AND video_id IN ({placeholders}) GROUP BY video_id"
-        with get_db_connection() as conn:
-            rows = _run_chunked_query(conn, query, video_ids, params)
-        df_days = (
-            pd.DataFrame(rows) if rows
-            else pd.DataFrame(columns=["video_id", "view_days"])
-        )
-        df_days = df_days.rename(columns={"video_id": "id"})
-        df = df.merge(df_days, on="id", how="left")
-        score_col = "view_days"
-        df[score_col] = df[score_col].fillna(0).astype(int)
-
-    elif ranking_type == "likes":
-        video_ids = df["id"].tolist()
-        query = "SELECT video_id, COUNT(*) AS like_count FROM likes WHERE 1=1"
-        params = []
-        if period_start:
-            query += " AND liked_at >= ?"
-            params.append(period_start)
-        if period_end:
-            query += " AND liked_at <= ?"
-            params.append(period_end)
-        query += " AND video_id IN ({placeholders}) GROUP BY video_id"
-        with get_db_connection() as conn:
-            rows = _run_chunked_query(conn, query, video_ids, params)
-        df_likes = (
-            pd.DataFrame(rows) if rows
-            else pd.DataFrame(columns=["video_id", "like_count"])
-        )
-        df_likes = df_likes.rename(columns={"video_id": "id"})
-        df = df.merge(df_likes, on="id", how="left")
-        score_col = "like_count"
-        df[score_col] = df[score_col].fillna(0).astype(int)
-
-    elif ranking_type == "composite":
-        # 視聴日数
-        video_ids = df["id"].tolist()
-        q_days = (
-            "SELECT video_id, COUNT(DISTINCT DATE(viewed_at)) AS view_days"
-            " FROM viewing_history WHERE viewing_method = ?"
-        )
-        p_days: list = [VIEWING_METHOD_APP_PLAYBACK]
-        if period_start:
-            q_days += " AND viewed_at >= ?"
-            p_days.append(period_start)
-        if period_end:
-            q_days += " AND viewed_at <= ?"
-            p_days.append(period_end)
-        q_days += " AND video_id IN ({placeholders}) GROUP BY video_id"
-        with get_db_connection() as conn:
-            rows_days = _run_chunked_query(conn, q_days, video_ids, p_days)
-        df_days = (
-            pd.DataFrame(rows_days) if rows_days
-            else pd.DataFrame(columns=["video_id", "view_days"])
-        ).rename(columns={"video_id": "id"})
-        df = df.merge(df_days, on="id", how="left")
-        df["view_days"] = df["view_days"].fillna(0).astype(int)
-
-        # いいね数
-        q_lk = "SELECT video_id, COUNT(*) AS like_count FROM likes WHERE 1=1"
-        p_lk: list = []
-        if period_start:
-            q_lk += " AND liked_at >= ?"
-            p_lk.append(period_start)
-        if period_end:
-            q_lk += " AND liked_at <= ?"
-            p_lk.append(period_end)
-        q_lk += " AND video_id IN ({placeholders}) GROUP BY video_id"
-        with get_db_connection() as conn:
-            rows_lk = _run_chunked_query(conn, q_lk, video_ids, p_lk)
-        df_lk = (
-            pd.DataFrame(rows_lk) if rows_lk
-            else pd.DataFrame(columns=["video_id", "like_count"])
-        ).rename(columns={"video_id": "id"})
-        df = df.merge(df_lk, on="id", how="left")
-        df["like_count"] = df["like_count"].fillna(0).astype(int)
-
-        # T1/T2 フラグ（未判定は t1=0 でボーナスなしのままランキング対象）
-        df["_t1"] = (df["current_favorite_level"].fillna(-1).astype(int) >= 0).astype(int)
-        df["_t2"] = df["is_selection_completed"].fillna(0).astype(int)
-
-        # ハイブリッドスコア: base * bonus * 100 整数化
-        base = df["view_days"] * _COMPOSITE_A + df["like_count"] * _COMPOSITE_B
-        bonus = 1 + _COMPOSITE_BONUS_T1 * df["_t1"] + _COMPOSITE_BONUS_T2 * df["_t2"]
-        df["composite_score"] = (base * bonus * 100).round(0).astype(int)
-        score_col = "composite_score"
-
-    else:
-        return []
-
-    # スコア0は除外
-    df = df[df[score_col] > 0]
+    query, params = _ranking_query(ranking_type, period_start, period_end, min_level, availability_filter, top_n)
+    with get_db_connection() as conn:
+        df = pd.read_sql_query(query, conn, params=params)
     if df.empty:
         return []
 
-    # タイブレーカー: score DESC → last_viewed_at DESC → id ASC
-    df["_lv_dt"] = pd.to_datetime(df.get("last_viewed_at"), errors="coerce")
-    df = df.sort_values(
-        [score_col, "_lv_dt", "id"],
-        ascending=[False, False, True],
-        na_position="last",
-    )
-    df = df.head(top_n)
-
-    return [(_df_row_to_video(row), int(row[score_col])) for _, row in df.iterrows()]
+    return list(zip(_frame_to_videos(df), df["score"].astype(int).tolist()))
 
 
 def get_response_time_data() -> list[dict]:
@@ -6,27 +6,41 @@ Streamlit 側からの呼び出しをこのファイルに集約し、
 外部挙動は一切変えない。
 """
 
+import sqlite3
 from datetime import datetime
-from typing import Optional, Dict, List
+from typing import Any, Optional, Dict, Iterator, List, Sequence
 from pathlib import Path
 
 from core import config_utils
 from core import database
+from core.availability import availability_cache
+from core.fate_sampler import fate_index
 from core.file_ops import create_file_scanner
-from core.database import init_database, check_database_exists, get_db_connection
+from core.library_watcher import LibraryWatcher
+from core.query_cache import query_cache
+from core.logger import get_logger
+from core.scan_jobs import CANCELLED, SUCCEEDED, ScanJob, ScanJobConflict, ScanJobManager
+from core.scanner import ScanProgress
+from core.database import init_database, check_database_exists, get_db_connection, get_db_write_connection
 from core import analysis_service
-from core.video_manager import VideoManager
-from core.models import Video, normalize_text
+from core import export_service
+from core.video_manager import VideoManager, VideoPage
+from core.models import Video
 from core import like_service
 from core import selection_service
 from core import watch_later_service
 from core.viewing import VIEWING_METHOD_APP_PLAYBACK
 
+logger = get_logger(__name__)
+
 
 # DB / 接続管理 -------------------------------------------------------------
 init_database = init_database
 check_database_exists = check_database_exists
 get_db_connection = get_db_connection
+get_db_write_connection = get_db_write_connection
+close_db_pool = database.close_db_pool
+get_data_generation = database.get_data_generation
 
 
 # VideoManager -------------------------------------------------------------
@@ -50,8 +64,9 @@ def get_videos(
     needs_selection_filter: Optional[bool] = None,
     exclude_selection: bool = False,
     watch_later_filter: Optional[bool] = None,
+    columns: Optional[Sequence[str]] = None,
 ) -> List[Video]:
-    """フィルタ条件に合致する動画一覧を返す（VideoManager.get_videos 委譲）。"""
+    """フィルタ条件に合致する動画一覧を返す（VideoManager.get_videos 委譲。columns で読む列を絞れる）。"""
     return create_video_manager().get_videos(
         favorite_levels=favorite_levels,
         storage_locations=storage_locations,
@@ -62,25 +77,87 @@ def get_videos(
         needs_selection_filter=needs_selection_filter,
         exclude_selection=exclude_selection,
         watch_later_filter=watch_later_filter,
+        columns=columns,
     )
 
 
-def get_videos_by_ids(video_ids: List[int], include_deleted: bool = False) -> List[Video]:
-    """指定IDの動画を取得する（IDの順序を保つ）。include_deleted=True で削除済みも含む。"""
-    return create_video_manager().get_videos_by_ids(video_ids, include_deleted=include_deleted)
+def get_videos_page(
+    *,
+    favorite_levels: Optional[List[int]] = None,
+    storage_locations: Optional[List[str]] = None,
+    keyword: Optional[str] = None,
+    availability: Optional[str] = None,
+    show_unavailable: bool = False,
+    show_deleted: bool = False,
+    needs_selection_filter: Optional[bool] = None,
+    exclude_selection: bool = False,
+    watch_later_filter: Optional[bool] = None,
+    folder: Optional[str] = None,
+    sort: Optional[str] = None,
+    order: Optional[str] = None,
+    selection: bool = False,
+    limit: int = 100,
+    offset: int = 0,
+    after: Optional[Sequence[Any]] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> VideoPage:
+    """フィルタ・ソート・ページングを SQL で行った1ページ分を返す（VideoManager.get_videos_page 委譲）。"""
+    return create_video_manager().get_videos_page(
+        favorite_levels=favorite_levels,
+        storage_locations=storage_locations,
+        keyword=keyword,
+        availability=availability,
+        show_unavailable=show_unavailable,
+        show_deleted=show_deleted,
+        needs_selection_filter=needs_selection_filter,
+        exclude_selection=exclude_selection,
+        watch_later_filter=watch_later_filter,
+        folder=folder,
+        sort=sort,
+        order=order,
+        selection=selection,
+        limit=limit,
+        offset=offset,
+        after=after,
+        columns=columns,
+    )
+
+def get_videos_by_ids(
+    video_ids: List[int], include_deleted: bool = False, columns: Optional[Sequence[str]] = None
+) -> List[Video]:
+    """指定IDの動画を取得する（IDの順序を保つ）。include_deleted=True で削除済みも含む。columns で読む列を絞れる。"""
+    return create_video_manager().get_videos_by_ids(video_ids, include_deleted=include_deleted, columns=columns)
+
+
+def video_exists(video_id: int) -> bool:
+    """未削除の動画が存在するか（id 列だけ読む）。"""
+    return bool(get_videos_by_ids([video_id], columns=()))
 
 
-def search_videos(keyword: str, storage_locations: Optional[List[str]] = None) -> List[Video]:
-    """ファイル名でDB内動画を部分一致検索する（normalize_text による正規化一致）。"""
-    videos = create_video_manager().get_videos(
+def search_videos(
+    keyword: str, storage_locations: Optional[List[str]] = None, columns: Optional[Sequence[str]] = None
+) -> List[Video]:
+    """ファイル名でDB内動画を部分一致検索する（normalize_text 正規化一致・normalized_filename 索引で検索）。"""
+    return create_video_manager().get_videos(
+        storage_locations=storage_locations,
+        keyword=keyword or None,
+        show_unavailable=True,
+        show_deleted=False,
+        columns=columns,
+    )
+
+
+def iter_search_videos(
+    keyword: str, storage_locations: Optional[List[str]] = None, columns: Optional[Sequence[str]] = None
+) -> Iterator[List[Video]]:
+    """search_videos と同じ条件の動画を id 順にバッチで返す（全件ストリーミング用。キャッシュしない）。"""
+    return create_video_manager().iter_videos(
         storage_locations=storage_locations,
+        keyword=keyword or None,
         show_unavailable=True,
         show_deleted=False,
+        columns=columns,
     )
-    if keyword:
-        kw_norm = normalize_text(keyword)
-        videos = [v for v in videos if kw_norm in normalize_text(v.essential_filename)]
-    return videos
 
 
 def get_unrated_random_videos(n: int) -> List[Video]:
@@ -132,13 +209,15 @@ def record_avp_viewing(video_ids: List[int]) -> None:
     if not video_ids:
         return
     viewed_at = datetime.now()
-    with get_db_connection() as conn:
+    with get_db_write_connection() as conn:
         conn.executemany(
             "INSERT INTO viewing_history (video_id, viewed_at, viewing_method)"
             " VALUES (?, ?, ?)",
             [(vid, viewed_at, VIEWING_METHOD_APP_PLAYBACK) for vid in video_ids],
         )
         watch_later_service.clear_processed_watch_later(conn, video_ids)
+    for vid in video_ids:
+        fate_index.record_view(vid, viewed_at)
 
 
 def detect_library_root(file_path: Path, active_roots: list) -> str:
@@ -166,55 +245,176 @@ def _get_existing_selection_folder(config: Dict[str, object]) -> Optional[Path]:
     return path if path.exists() and path.is_dir() else None
 
 
-def scan_and_update_with_connection(scanner) -> None:
-    """DB 接続を内部で確立してスキャンを実行する。接続を外部から渡さない場合に使用。"""
-    with get_db_connection() as conn:
-        scanner.scan_and_update(conn)
+def scan_and_update_with_connection(scanner, incremental: bool = False) -> None:
+    """DB 接続を内部で確立してスキャンを実行する。接続を外部から渡さない場合に使用。
+
+    書き込みキューはスキャン全体では持たない。走査は読み取り接続で行い、DB への反映だけを
+    scanner が書き込みトランザクション（get_db_write_connection）で行う。
+    """
+    scanner.scan_and_update(incremental=incremental)
 
 
-def scan_library() -> Dict[str, str]:
+def _run_library_scan(incremental: bool, progress: Optional[ScanProgress] = None) -> None:
+    """保存済み config でライブラリ全体 + セレクションフォルダをスキャンする（失敗・中止は例外）。
+
+    中止できるのはライブラリの反映がコミットされるまで。コミット後のセレクションフォルダの反映は
+    中止要求があっても最後まで行う（反映済みの変更を「ロールバックされた」と報告しないため）。
+    """
+    config = config_utils.load_user_config()
+    roots = [Path(r) for r in config.get("library_roots", [])]
+    selection_folder = _get_existing_selection_folder(config)
+    protected_roots = [selection_folder] if selection_folder else []
+    scanner = create_file_scanner(roots, protected_roots=protected_roots, progress=progress)
+    scan_and_update_with_connection(scanner, incremental=incremental)
+    if selection_folder:
+        selection_service.scan_selection_folder(selection_folder)
+
+
+def scan_library(incremental: bool = False) -> Dict[str, str]:
     """保存済み config の library_roots からスキャナを構築しライブラリ全体を更新する。
 
     HTTP からは scanner オブジェクトを渡せないためサーバ側で構築する。config の roots は
     文字列で来るため Path へ変換する（FileScanner.scan_and_update が directory.exists() を呼ぶため）。
+    incremental=True はスキャンマニフェストで未変更のディレクトリ・ファイルを省略する増分スキャン。
+    実行はスキャンジョブ経由（完了まで待つ）で、実行中のジョブがあればエラーを返す（同時に 2 本走らせない）。
     結果は {'status', 'message'} で合成して返す。
     """
     try:
-        config = config_utils.load_user_config()
-        roots = [Path(r) for r in config.get("library_roots", [])]
-        selection_folder = _get_existing_selection_folder(config)
-        protected_roots = [selection_folder] if selection_folder else []
-        scanner = create_file_scanner(roots, protected_roots=protected_roots)
-        scan_and_update_with_connection(scanner)
-        if selection_folder:
-            selection_service.scan_selection_folder(selection_folder)
-        return {"status": "success", "message": "ライブラリスキャンが完了しました"}
-    except Exception as e:
-        return {"status": "error", "message": f"スキャンに失敗しました: {e}"}
+        job = _run_scan_job_and_wait(incremental)
+    except ScanJobConflict as e:
+        return {"status": "error", "message": f"スキャンジョブが実行中です（id={e.job.id}）"}
+    if job.status != SUCCEEDED:
+        return {"status": "error", "message": job.message or "スキャンに失敗しました"}
+    return {"status": "success", "message": "ライブラリスキャンが完了しました"}
+
+
+def start_availability_refresher() -> None:
+    """存在確認キャッシュのバックグラウンド更新を開始する（未判定候補のパスを事前に確認し続ける）。"""
+    import config
+
+    availability_cache.start_refresher(
+        create_video_manager().get_unrated_candidate_paths,
+        interval=config.AVAILABILITY_REFRESH_SEC,
+    )
+
+
+stop_availability_refresher = availability_cache.stop_refresher
+
+
+# スキャンジョブ（バックグラウンド実行） ------------------------------------
+_scan_jobs = ScanJobManager()
+
+
+def start_scan_job(incremental: bool = False) -> ScanJob:
+    """ライブラリスキャンをバックグラウンドジョブとして開始する（実行中なら ScanJobConflict）。"""
+    return _scan_jobs.start(lambda progress: _run_library_scan(incremental, progress), incremental=incremental)
+
+
+def _run_scan_job_and_wait(incremental: bool) -> ScanJob:
+    """スキャンジョブを開始し、完了まで待って返す（実行中のジョブがあれば ScanJobConflict）。"""
+    job = start_scan_job(incremental=incremental)
+    job.wait()
+    return job
+
+
+get_scan_job = _scan_jobs.get
+list_scan_jobs = _scan_jobs.list
+cancel_scan_job = _scan_jobs.cancel
+
+
+_library_watcher: Optional[LibraryWatcher] = None
+
+
+def _watched_roots() -> List[Path]:
+    """監視対象（存在する library_roots + selection_folder）を保存済み config から返す。"""
+    config = config_utils.load_user_config()
+    roots = [Path(r) for r in config.get("library_roots", []) if Path(r).is_dir()]
+    selection_folder = _get_existing_selection_folder(config)
+    if selection_folder:
+        roots.append(selection_folder)
+    return roots
+
+
+def _apply_library_changes() -> bool:
+    """監視が検知した変化を増分スキャンジョブで反映する。見送ったら False（監視側が保留して再試行する）。
+
+    手動スキャンと同じく、直近 24 時間以内のバックアップが無ければ見送る（スキャンは破壊的なため）。
+    実行中のジョブ（手動スキャン）があるときも見送る。失敗は例外にする。
+    """
+    if not has_recent_backup(hours=24):
+        logger.warning("operation=library_watch apply=skipped reason=no_recent_backup")
+        return False
+    try:
+        job = _run_scan_job_and_wait(incremental=True)
+    except ScanJobConflict as e:
+        logger.info("operation=library_watch apply=skipped reason=scan_job_running job_id=%s", e.job.id)
+        return False
+    if job.status == CANCELLED:
+        # 利用者が中止した自動スキャンはやり直さない（次の変化か手動スキャンで反映される）
+        logger.info("operation=library_watch apply=cancelled job_id=%s", job.id)
+        return True
+    if job.status != SUCCEEDED:
+        raise RuntimeError(job.message or f"scan job {job.id} {job.status}")
+    return True
+
+
+def start_library_watcher() -> LibraryWatcher:
+    """ライブラリ監視を開始する（起動済みならそれを返す）。変化は増分スキャンで反映する。"""
+    import config
+
+    global _library_watcher
+    if _library_watcher is None:
+        _library_watcher = LibraryWatcher(
+            _watched_roots,
+            _apply_library_changes,
+            poll_interval=config.LIBRARY_WATCH_POLL_SEC,
+            debounce=config.LIBRARY_WATCH_DEBOUNCE_SEC,
+        )
+    _library_watcher.start()
+    return _library_watcher
+
+
+def stop_library_watcher() -> None:
+    """ライブラリ監視を止める（未起動なら何もしない）。"""
+    global _library_watcher
+    if _library_watcher is not None:
+        _library_watcher.stop()
+        _library_watcher = None
 
 
 # 設定 ----------------------------------------------------------------------
 load_user_config = config_utils.load_user_config
-save_user_config = config_utils.save_user_config
+
+
+def save_user_config(user_config: Dict[str, Any]) -> None:
+    """ユーザー設定を保存し、データ世代を進める（設定由来の既定値を使う集計・ETag を失効させる）。"""
+    config_utils.save_user_config(user_config)
+    database.bump_data_generation()
 
 
 # 分析タブ ---------------------------------------------------------------
-load_analysis_data = analysis_service.load_analysis_data
+# 集計結果は query_cache（データ世代で失効する LRU）経由。DataFrame を受け取る関数はキャッシュしない。
+VideoScope = analysis_service.VideoScope
+load_analysis_data = query_cache.cached(analysis_service.load_analysis_data)
 apply_scope_filter = analysis_service.apply_scope_filter
 convert_period_filter = analysis_service.convert_period_filter
 calculate_period_view_count = analysis_service.calculate_period_view_count
-get_viewing_history = analysis_service.get_viewing_history
-get_judgment_history = analysis_service.get_judgment_history
+get_viewing_history = query_cache.cached(analysis_service.get_viewing_history)
+get_judgment_history = query_cache.cached(analysis_service.get_judgment_history)
+# ストリーミング出力用のバッチ読み（ジェネレータなのでキャッシュしない）
+iter_analysis_data = analysis_service.iter_analysis_data
+iter_viewing_history = analysis_service.iter_viewing_history
+iter_judgment_history = analysis_service.iter_judgment_history
 get_view_count_ranking = analysis_service.get_view_count_ranking
 get_view_days_ranking = analysis_service.get_view_days_ranking
 get_like_count_ranking = analysis_service.get_like_count_ranking
-get_selection_judgment_trend = analysis_service.get_selection_judgment_trend
-get_selection_level_distribution = analysis_service.get_selection_level_distribution
-get_viewing_trend = analysis_service.get_viewing_trend
-get_judgment_trend = analysis_service.get_judgment_trend
-get_likes_trend = analysis_service.get_likes_trend
-get_response_time_data = analysis_service.get_response_time_data
-get_ranked_videos_for_tab = analysis_service.get_ranked_videos_for_tab
+get_selection_judgment_trend = query_cache.cached(analysis_service.get_selection_judgment_trend)
+get_selection_level_distribution = query_cache.cached(analysis_service.get_selection_level_distribution)
+get_viewing_trend = query_cache.cached(analysis_service.get_viewing_trend)
+get_judgment_trend = query_cache.cached(analysis_service.get_judgment_trend)
+get_likes_trend = query_cache.cached(analysis_service.get_likes_trend)
+get_response_time_data = query_cache.cached(analysis_service.get_response_time_data)
+get_ranked_videos_for_tab = query_cache.cached(analysis_service.get_ranked_videos_for_tab)
 
 # いいね機能 -------------------------------------------------------------
 add_like = like_service.add_like
@@ -222,34 +422,56 @@ get_like_counts = like_service.get_like_counts
 
 # セレクション ----------------------------------------------------------
 scan_selection_folder = selection_service.scan_selection_folder
-get_selection_kpi = selection_service.get_selection_kpi
+get_selection_kpi = query_cache.cached(selection_service.get_selection_kpi)
 
 
 # DB 集計・選択肢・バックアップ（API 用 read wrapper） ----------------------
+@query_cache.cached
 def get_kpi_stats() -> Dict[str, float]:
     """Tier1 KPI を返す（analysis_service.get_kpi_stats 委譲、接続は内部で確立）。"""
     with get_db_connection() as conn:
         return analysis_service.get_kpi_stats(conn)
 
 
+@query_cache.cached
 def get_view_counts_map() -> Dict[int, int]:
     """動画IDごとの視聴回数マップを返す。"""
     with get_db_connection() as conn:
         return database.get_view_counts_map(conn)
 
 
+def iter_view_counts() -> Iterator[List[sqlite3.Row]]:
+    """get_view_counts_map と同じ (video_id, view_count) を video_id 順にバッチで返す（ストリーミング用）。"""
+    return database.iter_view_counts()
+
+
+@query_cache.cached
 def get_last_viewed_map() -> Dict[int, str]:
     """動画IDごとの最終視聴日時マップを返す。"""
     with get_db_connection() as conn:
         return database.get_last_viewed_map(conn)
 
 
+@query_cache.cached
 def get_latest_judged_at_map(selection: bool) -> Dict[int, str]:
     """動画IDごとの最新判定日時マップを Tier 別に返す（判定日時ソート用）。"""
     with get_db_connection() as conn:
         return database.get_latest_judged_at_map(conn, selection)
 
 
+def rebuild_video_stats() -> int:
+    """動画ごとの集計表 video_stats を基表から作り直す（修復用）。作成した行数を返す。"""
+    with get_db_write_connection() as conn:
+        return database.rebuild_video_stats(conn)
+
+
+def rebuild_trend_rollups() -> Dict[str, int]:
+    """推移の日次ロールアップ（viewing_daily / likes_daily / judgment_daily）を作り直す（修復用）。"""
+    with get_db_write_connection() as conn:
+        return database.rebuild_trend_rollups(conn)
+
+
+@query_cache.cached
 def get_filter_options() -> Dict[str, list]:
     """フィルタUI用の選択肢（お気に入りレベル・保存場所）を返す。
 
@@ -287,6 +509,37 @@ def has_recent_backup(hours: int = 24) -> bool:
     return False
 
 
+# 列指向スナップショット（Parquet / Arrow IPC） --------------------------------
+SnapshotUnavailable = export_service.SnapshotUnavailable
+SNAPSHOT_TABLES = export_service.SNAPSHOT_TABLES
+
+
+def export_snapshots(
+    format: str = "parquet",
+    tables: Optional[Sequence[str]] = None,
+    full: bool = False,
+    directory: Optional[Path] = None,
+) -> Dict[str, Dict[str, int]]:
+    """スナップショットを書き出す（履歴は id の watermark から増分）。directory 省略時は config.SNAPSHOT_EXPORT_DIR。"""
+    import config
+
+    return export_service.write_snapshots(directory or config.SNAPSHOT_EXPORT_DIR, tables, format, full)
+
+
+def get_snapshot_status(format: str = "parquet") -> Dict[str, Dict[str, int]]:
+    """config.SNAPSHOT_EXPORT_DIR の表ごとの watermark・part 数・サイズ（pyarrow 不要）。"""
+    import config
+
+    return export_service.snapshot_status(config.SNAPSHOT_EXPORT_DIR, format)
+
+
+def read_snapshot(table: str, format: str = "arrow", columns: Optional[Sequence[str]] = None):
+    """config.SNAPSHOT_EXPORT_DIR の表を pyarrow.Table で読む（arrow は memory-map・ゼロコピー）。"""
+    import config
+
+    return export_service.read_snapshot(config.SNAPSHOT_EXPORT_DIR, table, format, columns)
+
+
 # マイグレーション ----------------------------------------------------------
 def run_startup_migration() -> dict:
     """
@@ -303,7 +556,7 @@ def run_startup_migration() -> dict:
     from core.migration import Migration
 
     migration = Migration(DATABASE_PATH)
-    with get_db_connection() as conn:
+    with get_db_write_connection() as conn:
         results = [
             migration.migrate_level_0_to_minus_1(conn),
             migration.resync_selection_completed(conn),
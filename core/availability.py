@@ -0,0 +1,169 @@
+"""
+ClipBox - ファイル存在確認キャッシュ（ドライブ接続状態 + ファイル単位、TTL 付き）。
+
+役割:
+    運命の1本 / ランダム取得は候補ごとにファイルの実在を確認する。外付け HDD 上の大量ファイルを
+    リクエストのたびに stat しないよう、ドライブの接続状態とファイル単位の存在を TTL 付きで保持する。
+
+【設計制約】
+- ドライブ未接続ならファイル単位の確認をせず False（未接続ドライブの stat 待ちを避ける）。
+- TTL 切れの値は、バックグラウンド更新（start_refresher）が動いていればそのまま返し（更新は次の周期に任せる）、
+  動いていなければその場で stat し直す。キャッシュに無いパスはその場で stat する。
+  ただし更新スレッドが遅いドライブで止まっていても消えたファイルを「あり」と返し続けないよう、
+  TTL + 更新周期の 2 倍を過ぎた値は更新スレッドの有無によらずその場で stat し直す。
+- 更新の契機: スキャン（見つかったパスを存在ありで記録・全体スキャン後は一旦破棄）、リネーム
+  （旧パスなし・新パスあり）、再生・判定時のファイル不在検知。
+- プロセス内に 1 つ（`availability_cache`）。ロックで保護し、API スレッドとスキャン・更新スレッドから共有する。
+- `streamlit` を import しない。
+
+【依存関係】
+core.video_manager / core.scanner → core.availability
+api_app.lifespan → core.app_service.start_availability_refresher → core.availability
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from config import AVAILABILITY_DRIVE_TTL_SEC, AVAILABILITY_PATH_TTL_SEC
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class AvailabilityCache:
+    """ドライブ接続状態とファイル存在の TTL キャッシュ。"""
+
+    def __init__(
+        self,
+        *,
+        drive_ttl: float,
+        path_ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+        probe: Callable[[str], bool] = os.path.exists,
+    ):
+        """
+        Args:
+            drive_ttl: ドライブ接続状態の有効秒数
+            path_ttl: ファイル存在の有効秒数
+            clock: 経過時間の計測に使う時計（テスト用に差し替え可能）
+            probe: 実在確認（テスト用に差し替え可能）
+        """
+        self.drive_ttl = drive_ttl
+        self.path_ttl = path_ttl
+        self._clock = clock
+        self._probe = probe
+        self._lock = threading.Lock()
+        # key -> (存在するか, 確認時刻)
+        self._drives: Dict[str, Tuple[bool, float]] = {}
+        self._paths: Dict[str, Tuple[bool, float]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # 更新スレッドの動作中に TTL 切れの値を使ってよい猶予（start_refresher で更新周期の 2 倍にする）
+        self._refresh_grace = 0.0
+
+    @staticmethod
+    def _drive_of(path: str) -> str:
+        # "C:" / "D:" など（POSIX では "" → ルート "/" を確認する）
+        return Path(path).drive
+
+    def _lookup(self, table: Dict[str, Tuple[bool, float]], key: str, ttl: float, target: str) -> bool:
+        now = self._clock()
+        with self._lock:
+            entry = table.get(key)
+        if entry is not None:
+            age = now - entry[1]
+            if age < ttl or (age < ttl + self._refresh_grace and self.refresher_running):
+                return entry[0]
+        value = self._probe(target)
+        with self._lock:
+            table[key] = (value, now)
+        return value
+
+    def drive_mounted(self, drive: str) -> bool:
+        """ドライブ（"C:" 等、POSIX では ""）が接続されているか。"""
+        return self._lookup(self._drives, drive, self.drive_ttl, drive + "/")
+
+    def exists(self, path: str) -> bool:
+        """path が実在するか（ドライブ未接続なら False）。"""
+        if not path or not self.drive_mounted(self._drive_of(path)):
+            return False
+        return self._lookup(self._paths, path, self.path_ttl, path)
+
+    def mark(self, path: str, exists: bool) -> None:
+        """確認済みの事実（リネーム・スキャン結果）を記録する。"""
+        now = self._clock()
+        with self._lock:
+            self._paths[path] = (exists, now)
+
+    def mark_many(self, paths: Iterable[str], exists: bool) -> None:
+        now = self._clock()
+        with self._lock:
+            for path in paths:
+                self._paths[path] = (exists, now)
+
+    def invalidate(self, paths: Optional[Iterable[str]] = None) -> None:
+        """paths のキャッシュを破棄する（None ならドライブ含め全件）。"""
+        with self._lock:
+            if paths is None:
+                self._drives.clear()
+                self._paths.clear()
+                return
+            for path in paths:
+                self._paths.pop(path, None)
+
+    def refresh(self, paths: Iterable[str] = ()) -> int:
+        """TTL 切れのドライブ・パスと、paths のうち未確認のものを確認し直す。確認した件数を返す。"""
+        now = self._clock()
+        with self._lock:
+            stale_drives = [d for d, (_, at) in self._drives.items() if now - at >= self.drive_ttl]
+            stale_paths = {p for p, (_, at) in self._paths.items() if now - at >= self.path_ttl}
+            stale_paths.update(p for p in paths if p and p not in self._paths)
+        for drive in stale_drives:
+            value = self._probe(drive + "/")
+            with self._lock:
+                self._drives[drive] = (value, now)
+        # 未接続ドライブのファイルは stat しない（キャッシュ済みの値はドライブ確認で隠れる）
+        results = {
+            path: self._probe(path) for path in stale_paths if self.drive_mounted(self._drive_of(path))
+        }
+        with self._lock:
+            for path, value in results.items():
+                self._paths[path] = (value, now)
+        return len(stale_drives) + len(results)
+
+    @property
+    def refresher_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start_refresher(self, load_paths: Callable[[], Iterable[str]], interval: float) -> None:
+        """interval 秒ごとに refresh(load_paths()) するデーモンスレッドを開始する。"""
+        if self.refresher_running:
+            return
+        self._stop.clear()
+        self._refresh_grace = 2 * interval
+
+        def run() -> None:
+            while not self._stop.is_set():
+                try:
+                    probed = self.refresh(load_paths())
+                    logger.debug("operation=availability_refresh probed=%d", probed)
+                except Exception as e:
+                    logger.warning("operation=availability_refresh reason=error error=%s", str(e))
+                self._stop.wait(interval)
+
+        self._thread = threading.Thread(target=run, name="clipbox-availability", daemon=True)
+        self._thread.start()
+
+    def stop_refresher(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+availability_cache = AvailabilityCache(drive_ttl=AVAILABILITY_DRIVE_TTL_SEC, path_ttl=AVAILABILITY_PATH_TTL_SEC)
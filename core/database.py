@@ -4,47 +4,364 @@ SQLiteデータベースへのCRUD操作を提供
 """
 
 import sqlite3
+import threading
+import time
 from contextlib import contextmanager
 
-from config import DATABASE_PATH
-from typing import Optional
+from config import (
+    DATABASE_PATH,
+    DB_POOL_MAX_SIZE,
+    EXPORT_BATCH_SIZE,
+    DB_WAL_AUTOCHECKPOINT_PAGES,
+    DB_WAL_CHECKPOINT_INTERVAL_WRITES,
+    DB_WAL_ENABLED,
+    DB_WAL_SYNCHRONOUS,
+    DB_WRITE_QUEUE_TIMEOUT_SEC,
+)
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 from core.logger import get_logger
+from core.models import is_path_within, normalize_text
 from core.viewing import VIEWING_METHOD_APP_PLAYBACK
 
 logger = get_logger(__name__)
 
 
+# 接続プール（DB パスごと）。テストは DATABASE_PATH を monkeypatch で差し替えるため、
+# 呼び出し時点の DATABASE_PATH をキーにプールを引く。
+_pools: Dict[str, "_ConnectionPool"] = {}
+_pools_lock = threading.Lock()
+
+
+def _open_connection(db_path) -> sqlite3.Connection:
+    """接続を開き、ClipBox 共通の接続設定（row_factory / PRAGMA）を 1 回だけ適用する。"""
+    # check_same_thread=False: プール済み接続は uvicorn のスレッドプール間で受け渡されるため。
+    # 同時に複数スレッドが同じ接続を使うことはない（貸し出し中はプールから外れる）。
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row  # 辞書形式でアクセス可能
+    # 外部キー制約を有効化（CASCADE を効かせる）
+    conn.execute("PRAGMA foreign_keys = ON;")
+    _register_sql_functions(conn)
+    if DB_WAL_ENABLED:
+        # WAL: 読み取りは書き込み中も最後にコミットされたスナップショットを読める。
+        # journal_mode は DB ファイルに永続化される（無効化しても自動では戻さない）。
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute(f"PRAGMA synchronous = {DB_WAL_SYNCHRONOUS};")
+        conn.execute(f"PRAGMA wal_autocheckpoint = {int(DB_WAL_AUTOCHECKPOINT_PAGES)};")
+    return conn
+
+
+def _register_sql_functions(conn: sqlite3.Connection) -> None:
+    """Python 側と同じ判定を SQL から使うための関数を登録する（一覧のフィルタ・ソート用）。
+
+    - clipbox_normalize_text(text): models.normalize_text（キーワード部分一致）
+    - clipbox_is_path_within(path, folder): models.is_path_within（1/0）
+    - clipbox_lower(text): str.lower（SQLite の lower() は ASCII のみのため）
+    """
+    conn.create_function("clipbox_normalize_text", 1, normalize_text, deterministic=True)
+    conn.create_function(
+        "clipbox_is_path_within", 2,
+        lambda path, folder: 1 if is_path_within(path, folder) else 0,
+        deterministic=True,
+    )
+    conn.create_function(
+        "clipbox_lower", 1,
+        lambda text: text.lower() if text is not None else None,
+        deterministic=True,
+    )
+
+
+class _ConnectionPool:
+    """1 つの DB ファイルに対する SQLite 接続プール。
+
+    - 接続設定（row_factory / foreign_keys）は接続生成時に 1 回だけ行う。
+    - 返却された接続は idle リストに戻し、同じスレッドが次に借りるときは
+      直前に使った接続を優先して返す（スレッド単位の再利用）。
+    - プールで保持する接続数は max_size まで。上限到達時は従来どおり
+      使い捨て接続を開いて返却時に閉じる（待たせない）。
+    - idle 接続は貸し出し前に `SELECT 1` で健全性を確認し、壊れていれば作り直す。
+    """
+
+    def __init__(self, db_path: str, max_size: int):
+        self.db_path = db_path
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._idle: List[sqlite3.Connection] = []
+        self._size = 0  # プール管理下の接続数（idle + 貸し出し中）
+        self._local = threading.local()
+        self._closed = False
+
+    def acquire(self) -> Tuple[sqlite3.Connection, bool]:
+        """接続を借りる。戻り値の bool はプール管理下の接続かどうか。"""
+        conn: Optional[sqlite3.Connection] = None
+        with self._lock:
+            preferred = getattr(self._local, "last", None)
+            if preferred is not None and any(c is preferred for c in self._idle):
+                self._idle = [c for c in self._idle if c is not preferred]
+                conn = preferred
+            elif self._idle:
+                conn = self._idle.pop()
+            elif self._size < self.max_size and not self._closed:
+                self._size += 1
+            else:
+                return _open_connection(self.db_path), False
+
+        if conn is not None and self._is_healthy(conn):
+            return conn, True
+        if conn is not None:
+            _close_quietly(conn)
+        try:
+            return _open_connection(self.db_path), True
+        except Exception:
+            with self._lock:
+                self._size -= 1
+            raise
+
+    def release(self, conn: sqlite3.Connection, pooled: bool) -> None:
+        """接続を返す。未確定のトランザクションが残っていれば破棄してから idle に戻す。"""
+        if not pooled:
+            _close_quietly(conn)
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        with self._lock:
+            if self._closed:
+                self._size -= 1
+                _close_quietly(conn)
+                return
+            self._idle.append(conn)
+            self._local.last = conn
+
+    def close(self) -> None:
+        """idle 接続を閉じ、貸し出し中の接続は返却時に閉じるようにする。"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn in idle:
+            _close_quietly(conn)
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self._size -= 1
+        _close_quietly(conn)
+
+    @staticmethod
+    def _is_healthy(conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+
+def _close_quietly(conn: sqlite3.Connection) -> None:
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+def _get_pool() -> _ConnectionPool:
+    key = str(DATABASE_PATH)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _ConnectionPool(key, DB_POOL_MAX_SIZE)
+            _pools[key] = pool
+        return pool
+
+
+def close_db_pool() -> None:
+    """全プールの接続を閉じる（テスト後始末・DB ファイル差し替え前に使う）。"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+    # DB ファイルが差し替わり得るため、世代に依存するキャッシュを無効にする
+    bump_data_generation()
+
+
+# データ世代（プロセス内で DB の内容が変わるたびに増える単調増加カウンタ）。
+# get_db_connection が変更行のあるトランザクションのコミット時に増やすため、書き込み経路を問わない。
+# 別プロセスからの書き込みは検知しない（利用側は最大保持時間を併用する）。
+_data_generation = 0
+_generation_lock = threading.Lock()
+
+
+def get_data_generation() -> int:
+    """現在のデータ世代を返す（DB に触れない）。"""
+    return _data_generation
+
+
+def bump_data_generation() -> int:
+    """データ世代を 1 進めて新しい値を返す。"""
+    global _data_generation
+    with _generation_lock:
+        _data_generation += 1
+        return _data_generation
+
+
 @contextmanager
 def get_db_connection():
     """
     データベース接続のコンテキストマネージャ。
 
-    成功時に自動 commit、例外時に自動 rollback する。
+    成功時に自動 commit、例外時に自動 rollback する。行を変更したトランザクションのコミット時は
+    データ世代（get_data_generation）を進める。
     PRAGMA foreign_keys = ON を常に設定（CASCADE DELETE を有効化）。
 
+    接続はプール（DB パスごと・上限 config.DB_POOL_MAX_SIZE）から借りて返す。
+    接続設定は接続生成時に 1 回だけ行い、以降のリクエストでは開閉コストを払わない。
+    同一スレッド内でネストして呼ぶと別の接続が渡される（トランザクションは共有しない）。
+
+    読み取り専用の処理に使う。書き込み（INSERT/UPDATE/DELETE）は
+    get_db_write_connection() を使い、書き込みキューで直列化すること。
+
     直接 sqlite3.connect() を使わず、必ずこの関数を使うこと。
 
     Yields:
         sqlite3.Connection: 辞書形式アクセス可能なデータベース接続
     """
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row  # 辞書形式でアクセス可能
-    # 外部キー制約を有効化（CASCADE を効かせる）
-    conn.execute("PRAGMA foreign_keys = ON;")
-    # 注意: WAL は未設定（既定のロールバックジャーナル）。busy_timeout も明示設定していないが、
-    # sqlite3.connect() の timeout 既定 5.0 秒が busy timeout として効くため、ロック競合時は
+    pool = _get_pool()
+    conn, pooled = pool.acquire()
+    changes_before = conn.total_changes
+    # 注意: WAL は既定で無効（ロールバックジャーナル）。config.DB_WAL_ENABLED（CLIPBOX_DB_WAL=1）で有効化する。
+    # busy_timeout は sqlite3.connect() の timeout 既定 5.0 秒が効くため、ロック競合時は
     # 最大約5秒待機し、解放されなければ OperationalError: database is locked（SQLITE_BUSY 相当）
-    # で失敗し得る（「即座に失敗」ではない）。即時失敗にしたい場合（timeout=0）は挙動変更のため別PRで扱う。
-    # いずれにせよ Streamlit と FastAPI の同時書き込みは運用上禁止（書き込みは一方のサーバーのみ）。
+    # で失敗し得る（「即座に失敗」ではない）。プロセス内の書き込みは書き込みキューで直列化されるが、
+    # 別プロセス（Streamlit 等）との同時書き込みは運用上禁止（書き込みは一方のサーバーのみ）。
     # （AGENTS.md / CLAUDE.md / SPEC_NEXTJS.md §11）
     try:
         yield conn
         conn.commit()
+        if conn.total_changes != changes_before:
+            bump_data_generation()
     except Exception as e:
         conn.rollback()
         raise e
     finally:
-        conn.close()
+        pool.release(conn, pooled)
+
+
+class _WriterQueue:
+    """プロセス内の書き込みを 1 本に直列化する FIFO キュー。
+
+    到着順に整理券を発行し、先頭の 1 スレッドだけが書き込みトランザクションを持つ。
+    同じスレッドからのネスト呼び出しは外側のトランザクション（同じ接続）に合流する。
+    待ち時間が timeout を超えた整理券は破棄し（順番が来ても飛ばす）、OperationalError を送出する。
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+        self._abandoned: set = set()
+        self._local = threading.local()
+        self._writes_since_checkpoint = 0
+
+    def enter(self, timeout: Optional[float] = None) -> None:
+        """順番が来るまで待つ。timeout 秒（None は無制限）を過ぎたら OperationalError。"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while ticket != self._serving:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._abandoned.add(ticket)
+                    raise sqlite3.OperationalError(
+                        f"database is locked (writer queue timeout after {timeout:g}s)"
+                    )
+                self._cond.wait(remaining)
+
+    def leave(self) -> None:
+        with self._cond:
+            self._serving += 1
+            while self._serving in self._abandoned:
+                self._abandoned.discard(self._serving)
+                self._serving += 1
+            self._cond.notify_all()
+
+    @property
+    def current(self) -> Optional[sqlite3.Connection]:
+        return getattr(self._local, "conn", None)
+
+    @current.setter
+    def current(self, conn: Optional[sqlite3.Connection]) -> None:
+        self._local.conn = conn
+
+    def count_write(self) -> bool:
+        """コミット数を数え、チェックポイント間隔に達したら True を返す。"""
+        self._writes_since_checkpoint += 1
+        if self._writes_since_checkpoint >= DB_WAL_CHECKPOINT_INTERVAL_WRITES:
+            self._writes_since_checkpoint = 0
+            return True
+        return False
+
+
+_writer = _WriterQueue()
+
+
+@contextmanager
+def get_db_write_connection():
+    """
+    書き込み用データベース接続のコンテキストマネージャ（単一の書き込みキュー）。
+
+    VideoManager / like_service / watch_later_service / AVP 視聴記録 / スキャンなど、
+    DB を変更する処理はすべてこの関数を経由する。プロセス内の書き込みは到着順に
+    1 本ずつ実行され、`BEGIN IMMEDIATE` で書き込みロックを最初に確保するため、
+    書き込み同士が SQLITE_BUSY で失敗しない。WAL 有効時は読み取り（get_db_connection）が
+    書き込みの完了を待たない。
+
+    成功時に自動 commit、例外時に自動 rollback する。同一スレッド内でネストして呼ぶと
+    外側と同じ接続・トランザクションが渡される（commit は外側で 1 回）。
+    キューで config.DB_WRITE_QUEUE_TIMEOUT_SEC 秒を超えて待たされたら
+    sqlite3.OperationalError（database is locked）で失敗する（無期限には待たない）。
+    長い I/O（ファイル走査など）をこのブロックの中で行わないこと。
+
+    Yields:
+        sqlite3.Connection: 書き込みトランザクション開始済みの接続
+    """
+    outer = _writer.current
+    if outer is not None:
+        yield outer
+        return
+
+    _writer.enter(DB_WRITE_QUEUE_TIMEOUT_SEC)
+    try:
+        with get_db_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            _writer.current = conn
+            try:
+                yield conn
+            finally:
+                _writer.current = None
+        if DB_WAL_ENABLED and _writer.count_write():
+            checkpoint_wal("PASSIVE")
+    finally:
+        _writer.leave()
+
+
+def checkpoint_wal(mode: str = "PASSIVE") -> None:
+    """WAL の内容を DB 本体へ書き戻す（WAL 無効時は何もしない no-op）。
+
+    Args:
+        mode: "PASSIVE"（読み取りを待たない）/ "TRUNCATE"（WAL ファイルを空にする。バックアップ前に使う）
+    """
+    if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"unknown checkpoint mode: {mode}")
+    with get_db_connection() as conn:
+        row = conn.execute(f"PRAGMA wal_checkpoint({mode});").fetchone()
+    if row is not None and row[1] != -1:
+        logger.debug(
+            "operation=wal_checkpoint mode=%s busy=%d log=%d checkpointed=%d",
+            mode, row[0], row[1], row[2],
+        )
 
 
 def init_database():
@@ -70,7 +387,8 @@ def init_database():
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                 last_scanned_at DATETIME,
                 notes TEXT,
-                watch_later BOOLEAN DEFAULT 0
+                watch_later BOOLEAN DEFAULT 0,
+                normalized_filename TEXT
             )
         """)
 
@@ -173,6 +491,16 @@ def init_database():
             conn.execute("ALTER TABLE videos ADD COLUMN watch_later BOOLEAN DEFAULT 0")
             conn.execute("UPDATE videos SET watch_later = 0 WHERE watch_later IS NULL")
 
+        # キーワード検索: normalize_text(essential_filename) の保存列。値は書き込み側（スキャナー）が
+        # Python で計算して入れる。ClipBox 以外の接続（sqlite3 CLI・DB ブラウザ等）で追加・改名された行は
+        # 未設定・古い値のままになり得るため、起動時に埋め直す（FTS は videos_fts_au トリガーで追従）
+        if "normalized_filename" not in videos_cols:
+            conn.execute("ALTER TABLE videos ADD COLUMN normalized_filename TEXT")
+        conn.execute(
+            "UPDATE videos SET normalized_filename = clipbox_normalize_text(essential_filename)"
+            " WHERE normalized_filename IS NOT clipbox_normalize_text(essential_filename)"
+        )
+
         # セレクション: judgment_history に was_selection_judgment フラグ
         judgment_cols = [row[1] for row in conn.execute("PRAGMA table_info(judgment_history)").fetchall()]
         if "was_selection_judgment" not in judgment_cols:
@@ -197,6 +525,8 @@ def init_database():
         conn.execute("CREATE INDEX IF NOT EXISTS idx_judged_at ON judgment_history(judged_at)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_judgment_video_id ON judgment_history(video_id)")
 
+        _ensure_filename_search(conn)
+
         # counters テーブル（カウンタ A/B/C）
         conn.execute(
             """
@@ -223,6 +553,35 @@ def init_database():
         conn.execute("CREATE INDEX IF NOT EXISTS idx_likes_video_id ON likes(video_id)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_likes_liked_at ON likes(liked_at)")
 
+        # スキャンマニフェスト（増分スキャン用）。root ごとにディレクトリ mtime と
+        # 動画ファイルの (size, mtime) を保持し、変化のないサブツリーを読み飛ばす。
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS scan_manifest_dirs (
+                root TEXT NOT NULL,
+                path TEXT NOT NULL,
+                parent TEXT,
+                mtime_ns INTEGER NOT NULL,
+                PRIMARY KEY (root, path)
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS scan_manifest_files (
+                root TEXT NOT NULL,
+                path TEXT NOT NULL,
+                dir_path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                PRIMARY KEY (root, path)
+            )
+            """
+        )
+
+        _ensure_video_stats(conn)
+        _ensure_trend_rollups(conn)
+
         # 初期レコード投入（存在しないIDのみ）
         existing_ids = {row[0] for row in conn.execute("SELECT counter_id FROM counters").fetchall()}
         for cid in ["A", "B", "C"]:
@@ -231,6 +590,382 @@ def init_database():
 
         conn.commit()
 
+    # スキーマ変更（列追加など）は変更行数に表れないため、世代を明示的に進める
+    bump_data_generation()
+
+
+def _ensure_filename_search(conn) -> None:
+    """normalized_filename の FTS5（trigram）索引と同期トリガーを用意する。
+
+    - normalized_filename は書き込み側が Python の normalize_text で計算して入れる（スキャナーの upsert。
+      essential_filename はリネームでも変わらない）。スキーマに残るトリガーは素の SQL だけにし、
+      clipbox_normalize_text（_open_connection で登録する関数）を呼ばない。ClipBox 以外の接続からの
+      INSERT / UPDATE も失敗させないため。未設定の行は filename_keyword_filter が essential_filename から
+      その場で判定し、次回の init_database で埋め直す。
+    - videos_fts は rowid = videos.id の FTS5 表（trigram・大文字小文字区別あり＝正規化済み値をそのまま照合）。
+      トリガーで常に「rowid を消してから現在値を入れ直す」ため、トリガーの発火順に依存しない。
+    - FTS5 / trigram が使えない SQLite（3.34 未満など）では索引を作らず、検索は
+      normalized_filename の instr() 走査にフォールバックする（filename_keyword_filter）。
+    """
+    # 旧版が作った clipbox_normalize_text 依存のトリガー（外部ツールからの書き込みが失敗する）を外す
+    conn.execute("DROP TRIGGER IF EXISTS videos_normalized_ai")
+    conn.execute("DROP TRIGGER IF EXISTS videos_normalized_au")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_videos_unnormalized ON videos(normalized_filename)"
+        " WHERE normalized_filename IS NULL"
+    )
+
+    fts_exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'videos_fts'"
+    ).fetchone()
+    if not fts_exists:
+        try:
+            conn.execute(
+                "CREATE VIRTUAL TABLE videos_fts USING fts5("
+                "normalized_filename, tokenize = 'trigram case_sensitive 1')"
+            )
+        except sqlite3.OperationalError as e:
+            logger.info("operation=init_fts skipped=true reason=%s", str(e))
+            return
+        conn.execute(
+            "INSERT INTO videos_fts (rowid, normalized_filename)"
+            " SELECT id, normalized_filename FROM videos"
+        )
+
+    sync_body = (
+        "DELETE FROM videos_fts WHERE rowid = NEW.id;"
+        " INSERT INTO videos_fts (rowid, normalized_filename)"
+        " SELECT id, normalized_filename FROM videos WHERE id = NEW.id;"
+    )
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS videos_fts_ai AFTER INSERT ON videos BEGIN {sync_body} END")
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS videos_fts_au AFTER UPDATE OF normalized_filename ON videos"
+        f" BEGIN {sync_body} END"
+    )
+    conn.execute(
+        "CREATE TRIGGER IF NOT EXISTS videos_fts_ad AFTER DELETE ON videos"
+        " BEGIN DELETE FROM videos_fts WHERE rowid = OLD.id; END"
+    )
+
+
+# video_stats の 1 動画分を基表から計算し直して upsert する SQL（{video_id} に動画 ID の式を入れる）。
+# 動画が存在しない（削除の連鎖中など）ときは何もしない。
+_VIDEO_STATS_UPSERT = f"""
+    INSERT INTO video_stats (
+        video_id, view_count, last_viewed_at, view_days, like_count, tier1_judged_at, tier2_judged_at
+    )
+    SELECT {{video_id}}, vh.cnt, vh.last_viewed, vh.days, lk.cnt, j1.latest, j2.latest
+      FROM (SELECT COUNT(*) AS cnt, MAX(viewed_at) AS last_viewed, COUNT(DISTINCT DATE(viewed_at)) AS days
+              FROM viewing_history
+             WHERE video_id = {{video_id}} AND viewing_method = '{VIEWING_METHOD_APP_PLAYBACK}') vh,
+           (SELECT COUNT(*) AS cnt FROM likes WHERE video_id = {{video_id}}) lk,
+           (SELECT MAX(judged_at) AS latest FROM judgment_history
+             WHERE video_id = {{video_id}} AND was_selection_judgment = 0) j1,
+           (SELECT MAX(judged_at) AS latest FROM judgment_history
+             WHERE video_id = {{video_id}} AND was_selection_judgment = 1) j2
+     WHERE EXISTS (SELECT 1 FROM videos WHERE id = {{video_id}})
+    ON CONFLICT (video_id) DO UPDATE SET
+        view_count = excluded.view_count,
+        last_viewed_at = excluded.last_viewed_at,
+        view_days = excluded.view_days,
+        like_count = excluded.like_count,
+        tier1_judged_at = excluded.tier1_judged_at,
+        tier2_judged_at = excluded.tier2_judged_at;
+"""
+
+# video_stats を保守する基表とトリガー対象の列（UPDATE は集計に効く列の変更時のみ）
+_VIDEO_STATS_SOURCES = {
+    "viewing_history": "video_id, viewed_at, viewing_method",
+    "likes": "video_id",
+    "judgment_history": "video_id, judged_at, was_selection_judgment",
+}
+
+
+def _ensure_video_stats(conn) -> None:
+    """動画ごとの集計表 video_stats と、それを書き込みと同じトランザクションで保守するトリガーを用意する。
+
+    - 列: アプリ再生の視聴回数・最終視聴日時・視聴日数（DATE(viewed_at) の種類数）、いいね数、
+      Tier1 / Tier2 の最新判定日時。集計の定義は get_view_counts_map などの従来の GROUP BY と同じ。
+    - viewing_history / likes / judgment_history の INSERT・DELETE・UPDATE で、該当動画の行を
+      video_id 索引経由で計算し直す（差分加算ではないため、削除・付け替えでもずれない）。
+      書き込み経路（play_video / record_avp_viewing / add_like / 判定 / 保守スクリプト）を問わず効く。
+    - 初回作成時は既存データから作る。ずれた場合は rebuild_video_stats で作り直す。
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'video_stats'"
+    ).fetchone()
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS video_stats (
+            video_id INTEGER PRIMARY KEY,
+            view_count INTEGER NOT NULL DEFAULT 0,
+            last_viewed_at DATETIME,
+            view_days INTEGER NOT NULL DEFAULT 0,
+            like_count INTEGER NOT NULL DEFAULT 0,
+            tier1_judged_at DATETIME,
+            tier2_judged_at DATETIME
+        )
+        """
+    )
+    for table, columns in _VIDEO_STATS_SOURCES.items():
+        for suffix, event, refs in (
+            ("ai", "INSERT", ("NEW",)),
+            ("ad", "DELETE", ("OLD",)),
+            ("au", f"UPDATE OF {columns}", ("OLD", "NEW")),
+        ):
+            body = "".join(
+                _VIDEO_STATS_UPSERT.format(video_id=f"{ref}.video_id") for ref in refs
+            )
+            conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_video_stats_{suffix} AFTER {event} ON {table}"
+                f" BEGIN {body} END"
+            )
+    conn.execute(
+        "CREATE TRIGGER IF NOT EXISTS videos_video_stats_ad AFTER DELETE ON videos"
+        " BEGIN DELETE FROM video_stats WHERE video_id = OLD.id; END"
+    )
+    if not exists:
+        count = rebuild_video_stats(conn)
+        logger.info("operation=init_video_stats rows=%s", count)
+
+
+def rebuild_video_stats(conn) -> int:
+    """video_stats を基表から作り直す（修復用）。作成した行数を返す。
+
+    呼び出し側のトランザクション内で実行する（書き込み接続で呼ぶこと）。
+    """
+    conn.execute("DELETE FROM video_stats")
+    conn.execute(
+        f"""
+        INSERT INTO video_stats (
+            video_id, view_count, last_viewed_at, view_days, like_count, tier1_judged_at, tier2_judged_at
+        )
+        SELECT v.id,
+               COALESCE(vh.cnt, 0), vh.last_viewed, COALESCE(vh.days, 0),
+               COALESCE(lk.cnt, 0), j.tier1, j.tier2
+          FROM videos v
+          LEFT JOIN (SELECT video_id, COUNT(*) AS cnt, MAX(viewed_at) AS last_viewed,
+                            COUNT(DISTINCT DATE(viewed_at)) AS days
+                       FROM viewing_history WHERE viewing_method = '{VIEWING_METHOD_APP_PLAYBACK}'
+                      GROUP BY video_id) vh ON vh.video_id = v.id
+          LEFT JOIN (SELECT video_id, COUNT(*) AS cnt FROM likes GROUP BY video_id) lk ON lk.video_id = v.id
+          LEFT JOIN (SELECT video_id,
+                            MAX(CASE WHEN was_selection_judgment = 0 THEN judged_at END) AS tier1,
+                            MAX(CASE WHEN was_selection_judgment = 1 THEN judged_at END) AS tier2
+                       FROM judgment_history GROUP BY video_id) j ON j.video_id = v.id
+         WHERE vh.video_id IS NOT NULL OR lk.video_id IS NOT NULL OR j.video_id IS NOT NULL
+        """
+    )
+    return conn.execute("SELECT COUNT(*) FROM video_stats").fetchone()[0]
+
+
+# 推移グラフ用の日次ロールアップ。日は保存値そのままの日付（raw_day、期間条件の境界判定用）と
+# ラベル用のローカル日付（local_day = DATE(ts, 'localtime')）の組で持つ。
+# 件数型: (ロールアップ表, 基表, 日時列, 基表側の対象条件（{ref} は NEW / OLD / 行別名）)
+_COUNT_ROLLUPS = (
+    ("viewing_daily", "viewing_history", "viewed_at", f"{{ref}}.viewing_method = '{VIEWING_METHOD_APP_PLAYBACK}'"),
+    ("likes_daily", "likes", "liked_at", "1"),
+)
+
+# judgment_daily の tier（1=Tier1 判定 / 2=Tier2 選別判定 / 0=区分なしの旧行）
+_JUDGMENT_TIER_EXPR = (
+    "(CASE {ref}.was_selection_judgment WHEN 0 THEN 1 WHEN 1 THEN 2 ELSE 0 END)"
+)
+
+
+def _count_rollup_triggers(conn, rollup: str, source: str, ts: str, cond: str) -> None:
+    """件数型ロールアップ（日 × 可用性 × 論理削除の件数）を基表・videos の変更に追従させるトリガー。
+
+    スコープ（is_available / is_deleted）は書き込み時点の動画の値で数え、videos 側の変更時に
+    その動画の件数を旧スコープから新スコープへ移す。動画の物理削除は BEFORE DELETE で差し引く
+    （外部キーの CASCADE は親行が消えた後に子行を消すため、子行側のトリガーでは動画を引けない）。
+    """
+    key = "raw_day, local_day, is_available, is_deleted"
+
+    def add(ref: str) -> str:
+        return (
+            f"INSERT INTO {rollup} ({key}, count)"
+            f" SELECT DATE({ref}.{ts}), DATE({ref}.{ts}, 'localtime'), v.is_available, v.is_deleted, 1"
+            f" FROM videos v WHERE v.id = {ref}.video_id AND {ref}.{ts} IS NOT NULL AND {cond.format(ref=ref)}"
+            f" ON CONFLICT ({key}) DO UPDATE SET count = count + 1;"
+        )
+
+    def subtract(ref: str) -> str:
+        day = f"raw_day = DATE({ref}.{ts}) AND local_day = DATE({ref}.{ts}, 'localtime')"
+        return (
+            f"UPDATE {rollup} SET count = count - 1"
+            f" WHERE {day} AND {cond.format(ref=ref)}"
+            f" AND (is_available, is_deleted) = (SELECT is_available, is_deleted FROM videos WHERE id = {ref}.video_id);"
+            f" DELETE FROM {rollup} WHERE {day} AND count <= 0;"
+        )
+
+    def move_video(ref: str, sign: str) -> str:
+        rows = f"FROM {source} s WHERE s.video_id = {ref}.id AND s.{ts} IS NOT NULL AND {cond.format(ref='s')}"
+        if sign == "+":
+            return (
+                f"INSERT INTO {rollup} ({key}, count)"
+                f" SELECT DATE(s.{ts}), DATE(s.{ts}, 'localtime'), {ref}.is_available, {ref}.is_deleted, COUNT(*)"
+                f" {rows} GROUP BY 1, 2"
+                f" ON CONFLICT ({key}) DO UPDATE SET count = count + excluded.count;"
+            )
+        scope = f"is_available = {ref}.is_available AND is_deleted = {ref}.is_deleted"
+        return (
+            f"UPDATE {rollup} SET count = count - (SELECT COUNT(*) {rows}"
+            f" AND DATE(s.{ts}) = {rollup}.raw_day AND DATE(s.{ts}, 'localtime') = {rollup}.local_day)"
+            f" WHERE {scope} AND raw_day IN (SELECT DATE(s.{ts}) {rows});"
+            f" DELETE FROM {rollup} WHERE {scope} AND count <= 0;"
+        )
+
+    watched = f"video_id, {ts}" + (", viewing_method" if source == "viewing_history" else "")
+    for name, event, body in (
+        (f"{source}_{rollup}_ai", f"AFTER INSERT ON {source}", add("NEW")),
+        (f"{source}_{rollup}_ad", f"AFTER DELETE ON {source}", subtract("OLD")),
+        (f"{source}_{rollup}_au", f"AFTER UPDATE OF {watched} ON {source}", subtract("OLD") + add("NEW")),
+        (
+            f"videos_{rollup}_au",
+            f"AFTER UPDATE OF is_available, is_deleted ON videos"
+            f" WHEN OLD.is_available IS NOT NEW.is_available OR OLD.is_deleted IS NOT NEW.is_deleted",
+            move_video("OLD", "-") + move_video("NEW", "+"),
+        ),
+        (f"videos_{rollup}_bd", "BEFORE DELETE ON videos", move_video("OLD", "-")),
+    ):
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+
+
+def _judgment_rollup_triggers(conn) -> None:
+    """judgment_daily（日 × tier ごとの判定済み動画の集合）を judgment_history に追従させるトリガー。
+
+    判定推移はバケット内の COUNT(DISTINCT video_id) のため件数を足し合わせられない。日ごとに
+    重複を除いた (tier, video_id) を持ち、週・月はその集合から数える。スコープは videos と JOIN して
+    読み取り時の値で絞る（動画の変更に追従する必要がない）。
+    """
+    def add(ref: str) -> str:
+        return (
+            "INSERT OR IGNORE INTO judgment_daily (raw_day, local_day, tier, video_id)"
+            f" SELECT DATE({ref}.judged_at), DATE({ref}.judged_at, 'localtime'),"
+            f" {_JUDGMENT_TIER_EXPR.format(ref=ref)}, {ref}.video_id"
+            f" WHERE {ref}.judged_at IS NOT NULL;"
+        )
+
+    def remove(ref: str) -> str:
+        return (
+            f"DELETE FROM judgment_daily WHERE raw_day = DATE({ref}.judged_at)"
+            f" AND local_day = DATE({ref}.judged_at, 'localtime')"
+            f" AND tier = {_JUDGMENT_TIER_EXPR.format(ref=ref)} AND video_id = {ref}.video_id"
+            " AND NOT EXISTS (SELECT 1 FROM judgment_history jh WHERE jh.video_id = judgment_daily.video_id"
+            f" AND {_JUDGMENT_TIER_EXPR.format(ref='jh')} = judgment_daily.tier"
+            " AND DATE(jh.judged_at) = judgment_daily.raw_day"
+            " AND DATE(jh.judged_at, 'localtime') = judgment_daily.local_day);"
+        )
+
+    for name, event, body in (
+        ("judgment_history_daily_ai", "AFTER INSERT ON judgment_history", add("NEW")),
+        ("judgment_history_daily_ad", "AFTER DELETE ON judgment_history", remove("OLD")),
+        (
+            "judgment_history_daily_au",
+            "AFTER UPDATE OF video_id, judged_at, was_selection_judgment ON judgment_history",
+            remove("OLD") + add("NEW"),
+        ),
+    ):
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+
+
+def _ensure_trend_rollups(conn) -> None:
+    """視聴・いいね・判定の推移用の日次ロールアップ表と保守トリガーを用意する。
+
+    - viewing_daily / likes_daily: 日 × is_available × is_deleted ごとの件数（視聴はアプリ再生のみ）。
+    - judgment_daily: 日 × tier ごとに判定された動画 ID（重複なし）。
+    - 日は (raw_day, local_day) の組で持つ。期間条件は保存値に対して比較するため、期間の内側に
+      完全に含まれる日だけをロールアップから読み、境界の日は基表から読む（analysis_service）。
+    - 初回作成時は既存データから作る。ずれた場合（タイムゾーン変更など）は rebuild_trend_rollups で作り直す。
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'judgment_daily'"
+    ).fetchone()
+    for rollup, source, ts, cond in _COUNT_ROLLUPS:
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {rollup} (
+                raw_day TEXT NOT NULL,
+                local_day TEXT NOT NULL,
+                is_available INTEGER NOT NULL,
+                is_deleted INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (raw_day, local_day, is_available, is_deleted)
+            ) WITHOUT ROWID
+            """
+        )
+        _count_rollup_triggers(conn, rollup, source, ts, cond)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS judgment_daily (
+            raw_day TEXT NOT NULL,
+            local_day TEXT NOT NULL,
+            tier INTEGER NOT NULL,
+            video_id INTEGER NOT NULL,
+            PRIMARY KEY (raw_day, local_day, tier, video_id)
+        ) WITHOUT ROWID
+        """
+    )
+    _judgment_rollup_triggers(conn)
+    if not exists:
+        counts = rebuild_trend_rollups(conn)
+        logger.info("operation=init_trend_rollups rows=%s", counts)
+
+
+def rebuild_trend_rollups(conn) -> Dict[str, int]:
+    """推移の日次ロールアップを基表から作り直す（修復用）。表ごとの行数を返す。
+
+    呼び出し側のトランザクション内で実行する（書き込み接続で呼ぶこと）。
+    """
+    counts: Dict[str, int] = {}
+    for rollup, source, ts, cond in _COUNT_ROLLUPS:
+        conn.execute(f"DELETE FROM {rollup}")
+        conn.execute(
+            f"""
+            INSERT INTO {rollup} (raw_day, local_day, is_available, is_deleted, count)
+            SELECT DATE(s.{ts}), DATE(s.{ts}, 'localtime'), v.is_available, v.is_deleted, COUNT(*)
+              FROM {source} s JOIN videos v ON v.id = s.video_id
+             WHERE s.{ts} IS NOT NULL AND {cond.format(ref='s')}
+             GROUP BY 1, 2, 3, 4
+            """
+        )
+        counts[rollup] = conn.execute(f"SELECT COUNT(*) FROM {rollup}").fetchone()[0]
+    conn.execute("DELETE FROM judgment_daily")
+    conn.execute(
+        f"""
+        INSERT OR IGNORE INTO judgment_daily (raw_day, local_day, tier, video_id)
+        SELECT DATE(judged_at), DATE(judged_at, 'localtime'), {_JUDGMENT_TIER_EXPR.format(ref='judgment_history')},
+               video_id
+          FROM judgment_history
+         WHERE judged_at IS NOT NULL
+        """
+    )
+    counts["judgment_daily"] = conn.execute("SELECT COUNT(*) FROM judgment_daily").fetchone()[0]
+    return counts
+
+
+# trigram は 3 文字単位の索引。これより短い語は索引を引けないため instr() 走査にする。
+_FTS_TRIGRAM_MIN_CHARS = 3
+
+
+def filename_keyword_filter(conn, keyword: str) -> Tuple[str, list]:
+    """本質的ファイル名のキーワード部分一致（normalize_text 正規化）を WHERE 条件にする。
+
+    videos の列を修飾なしで参照する条件式とバインド値を返す。3 文字以上かつ videos_fts が
+    あれば FTS5 trigram 索引で引き、それ以外は保存済み normalized_filename の instr() で判定する。
+    normalized_filename が未設定の行（ClipBox 以外の接続で追加された行）は essential_filename を
+    その場で正規化して判定する（部分索引 idx_videos_unnormalized で対象行だけを引く）。
+    """
+    kw = normalize_text(keyword)
+    unnormalized = "(normalized_filename IS NULL AND instr(clipbox_normalize_text(essential_filename), ?) > 0)"
+    if len(kw) >= _FTS_TRIGRAM_MIN_CHARS and conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'videos_fts'"
+    ).fetchone():
+        phrase = '"' + kw.replace('"', '""') + '"'
+        return f"(id IN (SELECT rowid FROM videos_fts WHERE videos_fts MATCH ?) OR {unnormalized})", [phrase, kw]
+    return "instr(COALESCE(normalized_filename, clipbox_normalize_text(essential_filename)), ?) > 0", [kw]
+
 
 def create_backup() -> dict:
     """
@@ -247,6 +982,9 @@ def create_backup() -> dict:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         BACKUP_DIR.mkdir(parents=True, exist_ok=True)
         backup_path = BACKUP_DIR / f"videos_{timestamp}.db"
+        # WAL に残っている更新を本体へ書き戻してからファイルコピーする（WAL 無効時は no-op）
+        if DATABASE_PATH.exists():
+            checkpoint_wal("TRUNCATE")
         shutil.copy2(DATABASE_PATH, backup_path)
         size_bytes = backup_path.stat().st_size
         logger.info(
@@ -298,7 +1036,7 @@ def insert_play_history(
     play_history に 1 件の再生レコードを挿入する。
 
     conn を渡すと既存トランザクションを再利用する（viewing_history との同一トランザクション記録に使用）。
-    conn が None の場合は新規接続を開いて挿入する。
+    conn が None の場合は書き込みキュー経由で挿入する。
     """
     sql = """
         INSERT INTO play_history (file_path, title, player, library_root, trigger, video_id, internal_id)
@@ -308,7 +1046,7 @@ def insert_play_history(
     if conn is not None:
         conn.execute(sql, params)
     else:
-        with get_db_connection() as _conn:
+        with get_db_write_connection() as _conn:
             _conn.execute(sql, params)
 
 
@@ -340,42 +1078,73 @@ def get_distinct_storage_locations(conn) -> list[str]:
 
 
 def get_view_counts_map(conn) -> dict[int, int]:
-    """動画IDごとのアプリ再生回数マップを取得。"""
+    """動画IDごとのアプリ再生回数マップを取得（video_stats 参照）。"""
     rows = conn.execute(
-        "SELECT video_id, COUNT(*) AS cnt FROM viewing_history"
-        " WHERE viewing_method = ? GROUP BY video_id",
-        (VIEWING_METHOD_APP_PLAYBACK,),
+        "SELECT video_id, view_count FROM video_stats WHERE view_count > 0"
     ).fetchall()
-    return {row["video_id"]: row["cnt"] for row in rows}
+    return {row["video_id"]: row["view_count"] for row in rows}
+
+
+def iter_keyset_batches(
+    select: str,
+    where: str,
+    params: Sequence[Any],
+    key: str,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    after: int = 0,
+) -> Iterator[List[sqlite3.Row]]:
+    """select を key（一意の整数列）の昇順に batch_size 行ずつ読むジェネレータ（キーセット）。
+
+    select の先頭列は key の値であること（次のバッチは最終行の先頭列より後ろから読む）。
+    after を渡すと key がそれより大きい行だけを読む（既定 0: AUTOINCREMENT の id は 1 から）。
+    1 バッチごとに接続を借りて返すため、読み取りロックはバッチを読む間だけ保持する
+    （WAL 無効時に、長いストリーミング転送の間ずっと書き込みを待たせない）。
+    その代わり全体で 1 つのスナップショットではなく、バッチの間のコミットは後続のバッチに現れ得る。
+    """
+    query = f"{select} WHERE ({where}) AND {key} > ? ORDER BY {key} LIMIT ?"
+    last = after
+    while True:
+        with get_db_connection() as conn:
+            rows = conn.execute(query, [*params, last, batch_size]).fetchall()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < batch_size:
+            return
+        last = rows[-1][0]
+
+
+def iter_view_counts(batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[sqlite3.Row]]:
+    """get_view_counts_map と同じ (video_id, view_count) を video_id 順に batch_size 行ずつ返す。"""
+    return iter_keyset_batches(
+        "SELECT video_id, view_count FROM video_stats", "view_count > 0", [], "video_id", batch_size
+    )
 
 
 def get_last_viewed_map(conn) -> dict[int, str]:
-    """動画IDごとの最終アプリ再生日時マップを取得。"""
+    """動画IDごとの最終アプリ再生日時マップを取得（video_stats 参照）。"""
     rows = conn.execute(
-        "SELECT video_id, MAX(viewed_at) AS last_viewed FROM viewing_history"
-        " WHERE viewing_method = ? GROUP BY video_id",
-        (VIEWING_METHOD_APP_PLAYBACK,),
+        "SELECT video_id, last_viewed_at FROM video_stats WHERE last_viewed_at IS NOT NULL"
     ).fetchall()
-    return {row["video_id"]: row["last_viewed"] for row in rows}
+    return {row["video_id"]: row["last_viewed_at"] for row in rows}
 
 
 def get_latest_judged_at_map(conn, selection: bool) -> dict[int, str]:
     """動画IDごとの「最新の判定日時」マップを Tier 別に取得する。
 
     Tier1（通常判定）は was_selection_judgment=0、Tier2（選別判定）は =1 の
-    judgment_history を対象に、video_id ごとの MAX(judged_at) を返す。
+    judgment_history の video_id ごとの MAX(judged_at)（video_stats の tier1/tier2_judged_at）を返す。
     論理削除済み（is_deleted=1）の動画は除外する。判定日時ソート用。
     """
+    column = "tier2_judged_at" if selection else "tier1_judged_at"
     rows = conn.execute(
-        """
-        SELECT jh.video_id AS video_id, MAX(jh.judged_at) AS latest
-          FROM judgment_history jh
-          JOIN videos v ON v.id = jh.video_id
-         WHERE jh.was_selection_judgment = ?
+        f"""
+        SELECT s.video_id AS video_id, s.{column} AS latest
+          FROM video_stats s
+          JOIN videos v ON v.id = s.video_id
+         WHERE s.{column} IS NOT NULL
            AND v.is_deleted = 0
-         GROUP BY jh.video_id
-        """,
-        (1 if selection else 0,),
+        """
     ).fetchall()
     return {row["video_id"]: row["latest"] for row in rows}
 
@@ -0,0 +1,323 @@
+"""
+列指向スナップショット（Parquet / Arrow IPC）の書き出しと読み込み。
+
+【役割】
+  videos / viewing_history / judgment_history / likes を型付きの列（日時は timestamp[us]）でファイルに書き出す。
+  オフライン分析（docs/analysis のノートブック等）は DB のコピーを毎回 pd.read_sql_query で読み直さず、
+  read_snapshot で memory-map して読む。
+
+【設計制約】
+- pyarrow は任意依存（requirements.txt には入れない）。import できなければ書き出し・読み込みは
+  SnapshotUnavailable を送出する。ファイル名だけで分かる情報（snapshot_status）は pyarrow なしで返す。
+- DB は database.iter_keyset_batches（id のキーセット・バッチごとに接続を借りる）で読み、
+  1 バッチずつ書き込む（全件をメモリに載せない・書き込みを長く待たせない）。
+- 配置は <directory>/<table>/part-<先頭 id>-<末尾 id>.<parquet|arrow>。id の watermark は
+  part ファイル名の末尾 id の最大値（manifest を別に持たない）。
+- viewing_history / judgment_history / likes は追記のみの表として、watermark より後ろの行だけを
+  新しい part に書く（増分）。videos は行が更新されるため毎回全件を書き直す。
+  履歴の削除（scripts/purge_legacy_viewing_history.py、動画の物理削除による連鎖削除）は増分に
+  現れないため、full=True で作り直す。
+- part は一時ファイルに書いてから os.replace で置く（途中で失敗しても壊れた part を残さない）。
+- Arrow IPC は非圧縮で書き、memory-map で読むとゼロコピー。Parquet は圧縮されるため読み込み時に展開する。
+- 日時は DB と同じローカル時刻（タイムゾーンなし）。解釈できない値は null。
+- streamlit を import しない。
+
+【依存関係】
+config → core.database → core.export_service → core.app_service
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Literal, Optional, Sequence, Tuple
+
+from config import EXPORT_BATCH_SIZE
+from core.database import iter_keyset_batches
+from core.logger import get_logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc  # noqa: F401  pa.ipc を使えるようにする
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow は任意依存
+    pa = None
+    pq = None
+
+logger = get_logger(__name__)
+
+SnapshotFormat = Literal["parquet", "arrow"]
+
+# 表ごとの (列名, 型)。型は int / str / bool / timestamp。先頭は id（キーセットと watermark のキー）
+SNAPSHOT_TABLES: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    "videos": (
+        ("id", "int"),
+        ("essential_filename", "str"),
+        ("current_full_path", "str"),
+        ("current_favorite_level", "int"),
+        ("file_size", "int"),
+        ("performer", "str"),
+        ("storage_location", "str"),
+        ("last_file_modified", "timestamp"),
+        ("created_at", "timestamp"),
+        ("last_scanned_at", "timestamp"),
+        ("notes", "str"),
+        ("file_created_at", "timestamp"),
+        ("is_available", "bool"),
+        ("is_deleted", "bool"),
+        ("is_judging", "bool"),
+        ("needs_selection", "bool"),
+        ("is_selection_completed", "bool"),
+        ("watch_later", "bool"),
+    ),
+    "viewing_history": (
+        ("id", "int"),
+        ("video_id", "int"),
+        ("viewed_at", "timestamp"),
+        ("viewing_method", "str"),
+    ),
+    "judgment_history": (
+        ("id", "int"),
+        ("video_id", "int"),
+        ("old_level", "int"),
+        ("new_level", "int"),
+        ("judged_at", "timestamp"),
+        ("rename_completed_at", "timestamp"),
+        ("rename_duration_ms", "int"),
+        ("storage_location", "str"),
+        ("was_selection_judgment", "bool"),
+    ),
+    "likes": (
+        ("id", "int"),
+        ("video_id", "int"),
+        ("liked_at", "timestamp"),
+    ),
+}
+
+# 追記のみの表（watermark より後ろの行だけを書き足す）
+INCREMENTAL_TABLES = ("viewing_history", "judgment_history", "likes")
+
+_EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow"}
+_PART_PATTERN = re.compile(r"^part-(\d+)-(\d+)\.(parquet|arrow)$")
+
+# 同じディレクトリへの書き出しを直列化する（一時ファイル名・watermark の読み書きが競合しないように）
+_export_lock = threading.Lock()
+
+
+class SnapshotUnavailable(Exception):
+    """pyarrow が無く、スナップショットを読み書きできない。"""
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise SnapshotUnavailable("スナップショットの読み書きには pyarrow が必要です（pip install pyarrow）")
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    """DB の日時文字列を datetime にする（タイムゾーン付きはローカル時刻へ。解釈できない値は None）。"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def _parse_int(value: Any) -> Optional[int]:
+    """整数列の値を int にする（列の型宣言に合わない値が入っていれば None）。"""
+    if value is None or isinstance(value, int):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_bool(value: Any) -> Optional[bool]:
+    return None if value is None else bool(value)
+
+
+_CONVERTERS = {"int": _parse_int, "bool": _parse_bool, "timestamp": _parse_timestamp}
+
+
+@functools.lru_cache(maxsize=None)
+def _arrow_schema(table: str) -> "pa.Schema":
+    types = {"int": pa.int64(), "str": pa.string(), "bool": pa.bool_(), "timestamp": pa.timestamp("us")}
+    return pa.schema([pa.field(name, types[kind]) for name, kind in SNAPSHOT_TABLES[table]])
+
+
+def _record_batch(table: str, rows: Sequence[Sequence[Any]]) -> "pa.RecordBatch":
+    """DB 行（SNAPSHOT_TABLES の列順）のバッチを列ごとに型付き配列へ変換する。"""
+    schema = _arrow_schema(table)
+    arrays = []
+    for i, (name, kind) in enumerate(SNAPSHOT_TABLES[table]):
+        convert = _CONVERTERS.get(kind)
+        values = [row[i] for row in rows]
+        if convert is not None:
+            values = [convert(value) for value in values]
+        arrays.append(pa.array(values, type=schema.field(name).type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _parts(directory: Path, table: str, format: SnapshotFormat) -> List[Tuple[int, int, Path]]:
+    """table の part ファイルを (先頭 id, 末尾 id, パス) の id 順で返す。"""
+    folder = Path(directory) / table
+    if not folder.is_dir():
+        return []
+    parts = []
+    for path in folder.iterdir():
+        match = _PART_PATTERN.match(path.name)
+        if match and match.group(3) == format:
+            parts.append((int(match.group(1)), int(match.group(2)), path))
+    return sorted(parts)
+
+
+def _status(directory: Path, table: str, format: SnapshotFormat) -> Dict[str, int]:
+    parts = _parts(directory, table, format)
+    return {
+        "watermark": max((last for _, last, _ in parts), default=0),
+        "parts": len(parts),
+        "size_bytes": sum(path.stat().st_size for _, _, path in parts),
+    }
+
+
+def snapshot_status(directory: Path, format: SnapshotFormat = "parquet") -> Dict[str, Dict[str, int]]:
+    """表ごとの書き出し状況 {"watermark": 書き出し済みの最大 id, "parts": part 数, "size_bytes": 合計サイズ}。
+
+    ファイル名とサイズだけを見る（pyarrow 不要）。
+    """
+    return {table: _status(directory, table, format) for table in SNAPSHOT_TABLES}
+
+
+def _write_part(
+    directory: Path, table: str, format: SnapshotFormat, batches: Iterable[Sequence[Sequence[Any]]]
+) -> Optional[Tuple[int, Path]]:
+    """batches を 1 つの part に書き、(行数, パス) を返す。0 行なら何も作らず None。"""
+    schema = _arrow_schema(table)
+    folder = Path(directory) / table
+    folder.mkdir(parents=True, exist_ok=True)
+    tmp = folder / f".writing{_EXTENSIONS[format]}"
+    writer = None
+    count, first, last = 0, 0, 0
+    try:
+        for rows in batches:
+            batch = _record_batch(table, rows)
+            if writer is None:
+                first = rows[0][0]
+                if format == "parquet":
+                    writer = pq.ParquetWriter(str(tmp), schema)
+                else:
+                    writer = pa.ipc.new_file(str(tmp), schema)
+            if format == "parquet":
+                writer.write_table(pa.Table.from_batches([batch], schema=schema))
+            else:
+                writer.write_batch(batch)
+            count += len(rows)
+            last = rows[-1][0]
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    if writer is None:
+        return None
+    writer.close()
+    path = folder / f"part-{first:012d}-{last:012d}{_EXTENSIONS[format]}"
+    os.replace(tmp, path)
+    return count, path
+
+
+def write_snapshots(
+    directory: Path,
+    tables: Optional[Sequence[str]] = None,
+    format: SnapshotFormat = "parquet",
+    full: bool = False,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Dict[str, Dict[str, int]]:
+    """
+    スナップショットを directory に書き出す。
+
+    Args:
+        directory: 出力先（表ごとにサブディレクトリを作る）。
+        tables: 書き出す表（SNAPSHOT_TABLES のキー）。None で全表。
+        format: parquet（圧縮・保存向き）/ arrow（Arrow IPC。非圧縮・memory-map でゼロコピー）。
+        full: True で増分の表も全件を書き直す（削除された履歴を反映する）。
+        batch_size: DB から 1 回に読む行数（= 書き込むレコードバッチの行数）。
+
+    Returns:
+        表名 → {"rows": 今回書いた行数, "watermark", "parts", "size_bytes"}（snapshot_status と同じ）。
+
+    Raises:
+        SnapshotUnavailable: pyarrow が無い。
+        ValueError: 未知の表・形式。
+    """
+    _require_pyarrow()
+    if format not in _EXTENSIONS:
+        raise ValueError(f"未知の形式です: {format}")
+    names = list(SNAPSHOT_TABLES) if tables is None else list(dict.fromkeys(tables))
+    unknown = [name for name in names if name not in SNAPSHOT_TABLES]
+    if unknown:
+        raise ValueError(f"未知の表です: {', '.join(unknown)}")
+
+    results: Dict[str, Dict[str, int]] = {}
+    with _export_lock:
+        for table in names:
+            rebuild = full or table not in INCREMENTAL_TABLES
+            stale = _parts(directory, table, format) if rebuild else []
+            after = 0 if rebuild else _status(directory, table, format)["watermark"]
+            columns = ", ".join(name for name, _ in SNAPSHOT_TABLES[table])
+            batches = iter_keyset_batches(f"SELECT {columns} FROM {table}", "1=1", [], "id", batch_size, after)
+            written = _write_part(directory, table, format, batches)
+            count = 0 if written is None else written[0]
+            for _, _, path in stale:
+                # 書き直した part と同名なら os.replace で置き換え済み
+                if written is None or path != written[1]:
+                    path.unlink(missing_ok=True)
+            results[table] = {"rows": count, **_status(directory, table, format)}
+            logger.info(
+                "operation=export_snapshot table=%s format=%s full=%s rows=%s watermark=%s",
+                table, format, rebuild, count, results[table]["watermark"],
+            )
+    return results
+
+
+def read_snapshot(
+    directory: Path,
+    table: str,
+    format: SnapshotFormat = "arrow",
+    columns: Optional[Sequence[str]] = None,
+) -> "pa.Table":
+    """
+    table の part を id 順に連結した pyarrow.Table を返す（part が無ければ 0 行）。
+
+    arrow は memory-map した IPC ファイルを読み、列のバッファはファイルの領域をそのまま指す（ゼロコピー）。
+    parquet は memory_map=True で読む（展開・復号のコピーは発生する）。
+    pandas では `.to_pandas()`（日時列は datetime64）で使う。
+
+    Raises:
+        SnapshotUnavailable: pyarrow が無い。
+    """
+    _require_pyarrow()
+    if table not in SNAPSHOT_TABLES:
+        raise ValueError(f"未知の表です: {table}")
+    loaded = []
+    for _, _, path in _parts(directory, table, format):
+        if format == "arrow":
+            # Table が参照する間は memory-map を開いたままにする（GC で閉じる）
+            loaded.append(pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all())
+        else:
+            loaded.append(pq.read_table(str(path), columns=columns, memory_map=True))
+    result = pa.concat_tables(loaded) if loaded else _arrow_schema(table).empty_table()
+    if columns is not None and (format == "arrow" or not loaded):
+        result = result.select(list(columns))
+    return result
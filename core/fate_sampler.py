@@ -0,0 +1,315 @@
+"""
+ClipBox - 運命の1本（最近見ていない動画を少し優先）の重み付き抽選索引。
+
+役割:
+    候補動画ごとの重み（`VideoManager._recently_unwatched_weight`）を Fenwick 木に保持し、
+    1 本の抽選を O(log n) で行う。視聴記録・判定のたびに候補全件を組み立て直さない。
+
+【設計制約】
+- 候補集合（プール）は Tier1（未判定）と Tier2（セレクションフォルダごと）で別に持つ。
+  Tier1 のランダム取得（重みなしの一様抽選、sample_uniform）も同じプールを使う。
+  初回・無効化後・_POOL_MAX_AGE_SEC 経過後の抽選時に 1 本の SQL で作り直す（IN リストを使わない）。
+- 重みは「プールを作った時刻」基準の経過日数で計算する（日数は 0..180 に丸めるため、
+  作り直し間隔ぶんのずれは重みの 1/2000 程度）。
+- 視聴記録（record_view）は該当動画の重みを O(log n) で更新する。候補から外れる変更（判定など）は
+  discard、候補に加わり得る変更（差し戻し・スキャンなど）は invalidate で次回作り直す。
+- フックの漏れで古い候補を引いても、呼び出し側が抽選後に DB 行で条件を確認して discard → 再抽選する。
+- プロセス内に 1 つ（`fate_index`）。ロックで保護するが、ロックを持つのはメモリ上の操作の間だけ。
+  プールの作り直し（load の DB 問い合わせ）と accept（ファイルの存在確認。眠った HDD で遅くなり得る）は
+  ロックの外で行い、他の抽選や record_view（再生の書き込みトランザクション内から呼ばれる）を待たせない。
+- `streamlit` を import しない。
+
+【依存関係】
+core.video_manager / core.app_service → core.fate_sampler
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+# プールを作り直すまでの最大秒数（重みの基準時刻の更新と、フック漏れの候補追加の取り込み）
+_POOL_MAX_AGE_SEC = 3600.0
+
+_RNG = random.Random()
+
+
+class WeightedSampler:
+    """キーごとの重みを Fenwick 木で持つ重み付き抽選器（更新・削除・抽選とも O(log n)）。
+
+    重みは正の値を前提とし、削除は重み 0 にしてスロットを残す（抽選で選ばれず、再追加で再利用する）。
+    """
+
+    def __init__(self, items: Iterable[Tuple[Hashable, float]] = ()):
+        self._keys: List[Hashable] = []
+        self._weights: List[float] = []
+        self._slots: Dict[Hashable, int] = {}
+        self._live = 0
+        for key, weight in items:
+            self._keys.append(key)
+            self._weights.append(float(weight))
+            self._slots[key] = len(self._keys) - 1
+            self._live += 1
+        # O(n) 構築: 各ノードの値を親ノードへ一度だけ足し込む
+        n = len(self._weights)
+        self._tree = [0.0] + list(self._weights)
+        for i in range(1, n + 1):
+            parent = i + (i & -i)
+            if parent <= n:
+                self._tree[parent] += self._tree[i]
+
+    def __len__(self) -> int:
+        return self._live
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.weight(key) > 0
+
+    def weight(self, key: Hashable) -> float:
+        slot = self._slots.get(key)
+        return 0.0 if slot is None else self._weights[slot]
+
+    def total(self) -> float:
+        return self._prefix(len(self._weights))
+
+    def _prefix(self, i: int) -> float:
+        total = 0.0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _add(self, slot: int, delta: float) -> None:
+        i = slot + 1
+        n = len(self._weights)
+        while i <= n:
+            self._tree[i] += delta
+            i += i & -i
+
+    def set(self, key: Hashable, weight: float) -> None:
+        """キーの重みを設定する（無ければ末尾に追加）。"""
+        weight = float(weight)
+        slot = self._slots.get(key)
+        if slot is not None:
+            self._live += (weight > 0) - (self._weights[slot] > 0)
+            self._add(slot, weight - self._weights[slot])
+            self._weights[slot] = weight
+            return
+        self._keys.append(key)
+        self._weights.append(weight)
+        slot = len(self._keys) - 1
+        self._slots[key] = slot
+        self._live += weight > 0
+        # 新しいノード i は区間 (i - lowbit(i), i] の和を持つ
+        i = slot + 1
+        self._tree.append(weight + self._prefix(i - 1) - self._prefix(i - (i & -i)))
+
+    def remove(self, key: Hashable) -> None:
+        if key in self._slots:
+            self.set(key, 0.0)
+
+    def slot_count(self) -> int:
+        """スロット数（削除済みを含む。一様抽選の範囲）。"""
+        return len(self._keys)
+
+    def key_at(self, slot: int) -> Optional[Hashable]:
+        """slot のキー（削除済みなら None）。"""
+        return self._keys[slot] if self._weights[slot] > 0 else None
+
+    def sample(self, rng: Callable[[], float] = random.random) -> Optional[Hashable]:
+        """重みに比例した確率でキーを 1 つ返す（空・重み合計 0 なら None）。"""
+        total = self.total()
+        if not self._live or total <= 0:
+            return None
+        target = rng() * total
+        pos = 0
+        step = 1 << (len(self._weights).bit_length() - 1)
+        while step:
+            nxt = pos + step
+            if nxt <= len(self._weights) and self._tree[nxt] <= target:
+                pos = nxt
+                target -= self._tree[nxt]
+            step >>= 1
+        # 浮動小数の誤差で末尾を越えた・重み 0 に着地した場合は直前の有効スロットに寄せる
+        slot = min(pos, len(self._weights) - 1)
+        while slot > 0 and self._weights[slot] <= 0:
+            slot -= 1
+        if self._weights[slot] <= 0:
+            slot = next(i for i, w in enumerate(self._weights) if w > 0)
+        return self._keys[slot]
+
+
+# 候補行: (video_id, current_full_path, 最終視聴日時 or None)
+CandidateRow = Tuple[int, str, Optional[str]]
+WeightFn = Callable[[Optional[str], datetime], float]
+
+
+class _Pool:
+    def __init__(self, rows: List[CandidateRow], weight_fn: WeightFn):
+        self.weight_fn = weight_fn
+        self.now = datetime.now()
+        self.built_at = time.monotonic()
+        self.paths = {video_id: path for video_id, path, _ in rows}
+        self.sampler = WeightedSampler((video_id, weight_fn(last, self.now)) for video_id, _, last in rows)
+        # pick が accept 不可で一時的に外した候補の重み（pick の終わりに戻す。record_view / discard もここを見る）
+        self.held: Dict[int, float] = {}
+
+    def fresh(self) -> bool:
+        return time.monotonic() - self.built_at < _POOL_MAX_AGE_SEC
+
+
+class FateIndex:
+    """recently_unwatched_priority 抽選用の候補プール（Tier1 / Tier2 フォルダごと）。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools: Dict[Hashable, _Pool] = {}
+        # 候補の変更（invalidate / discard / record_view）の回数。ロック外で作ったプールを登録してよいかの判定に使う
+        self._version = 0
+
+    def pick(
+        self,
+        key: Hashable,
+        load: Callable[[], List[CandidateRow]],
+        weight_fn: WeightFn,
+        accept: Callable[[int, str], bool],
+        rng: Callable[[], float] = random.random,
+    ) -> Optional[int]:
+        """key のプールから 1 本抽選し、accept(video_id, path) を満たす動画 ID を返す。
+
+        プールが無ければ load() の候補行と weight_fn（最終視聴日時, 基準時刻 → 重み）で作る。
+        accept を満たさない候補はこの抽選の間だけ外して引き直す（除外後の重みで抽選したのと同じ分布）。
+        抽選はロック内、accept はロック外で行う。
+        """
+        pool = self._pool(key, load, weight_fn)
+        rejected: List[int] = []
+        try:
+            while True:
+                with self._lock:
+                    video_id = pool.sampler.sample(rng)
+                    if video_id is None:
+                        return None
+                    path = pool.paths[video_id]
+                if accept(video_id, path):
+                    return video_id
+                with self._lock:
+                    # 別の抽選が先に外していれば、戻すのもそちらに任せる
+                    if video_id in pool.sampler:
+                        pool.held[video_id] = pool.sampler.weight(video_id)
+                        pool.sampler.remove(video_id)
+                        rejected.append(video_id)
+        finally:
+            if rejected:
+                with self._lock:
+                    for video_id in rejected:
+                        weight = pool.held.pop(video_id, 0.0)
+                        if weight > 0:
+                            pool.sampler.set(video_id, weight)
+
+    def sample_uniform(
+        self,
+        key: Hashable,
+        load: Callable[[], List[CandidateRow]],
+        weight_fn: WeightFn,
+        k: int,
+        accept: Callable[[int, str], bool],
+        rand: Optional[random.Random] = None,
+    ) -> List[int]:
+        """key のプールから accept を満たす動画 ID を重みを無視して一様に最大 k 件（重複なし・抽選順）返す。
+
+        ランダムなスロットを引いて削除済み・既出を読み飛ばし、足りない件数ぶんをまとめてロック内で引いてから
+        ロック外で accept を確認する（通常 O(k)）。引き直しが続く（候補が少ない・不在ファイルが多い）ときは
+        残りの候補を全件シャッフルして埋める。
+        """
+        rand = rand or _RNG
+        pool = self._pool(key, load, weight_fn)
+        sampler = pool.sampler
+        picked: List[int] = []
+        seen = set()
+        attempts = 0
+        limit = 4 * k + 64
+        while len(picked) < k and attempts < limit:
+            drawn: List[Tuple[int, str]] = []
+            with self._lock:
+                while len(drawn) < k - len(picked) and sampler.slot_count() and attempts < limit:
+                    attempts += 1
+                    video_id = sampler.key_at(rand.randrange(sampler.slot_count()))
+                    if video_id is None or video_id in seen:
+                        continue
+                    seen.add(video_id)
+                    drawn.append((video_id, pool.paths[video_id]))
+            if not drawn:
+                break
+            picked.extend(video_id for video_id, path in drawn if accept(video_id, path))
+        if len(picked) < k:
+            with self._lock:
+                rest = [
+                    (video_id, path) for video_id, path in pool.paths.items()
+                    if video_id in sampler and video_id not in seen
+                ]
+            rand.shuffle(rest)
+            for video_id, path in rest:
+                if len(picked) >= k:
+                    break
+                if accept(video_id, path):
+                    picked.append(video_id)
+        return picked
+
+    def _pool(self, key: Hashable, load: Callable[[], List[CandidateRow]], weight_fn: WeightFn) -> _Pool:
+        """key のプールを返す。無い・古いときはロックの外で load() して作り、ロック内で差し替える。
+
+        作っている間に候補が変わった（invalidate / discard / record_view）ときは、作ったプールを
+        この呼び出しだけで使い、登録しない（次回作り直す）。
+        """
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is not None and pool.fresh():
+                return pool
+            version = self._version
+        built = _Pool(load(), weight_fn)
+        with self._lock:
+            current = self._pools.get(key)
+            if current is not None and current.fresh() and current is not pool:
+                # 別のスレッドが先に作り直した
+                return current
+            if self._version == version:
+                self._pools[key] = built
+        return built
+
+    def record_view(self, video_id: int, viewed_at: datetime) -> None:
+        """視聴を記録した動画の重みを更新する（候補でなければ何もしない）。"""
+        with self._lock:
+            self._version += 1
+            for pool in self._pools.values():
+                weight = pool.weight_fn(viewed_at.isoformat(sep=" "), pool.now)
+                if video_id in pool.held:
+                    pool.held[video_id] = weight
+                elif video_id in pool.sampler:
+                    pool.sampler.set(video_id, weight)
+
+    def discard(self, video_id: int) -> None:
+        """候補から外れた動画（判定済み・削除など）を全プールから除く。"""
+        with self._lock:
+            self._version += 1
+            for pool in self._pools.values():
+                pool.sampler.remove(video_id)
+                pool.held.pop(video_id, None)
+
+    def weights(self, key: Hashable) -> Dict[int, float]:
+        """key のプールの現在の重み（候補のみ。プールが無ければ空）。"""
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                return {}
+            return {video_id: pool.sampler.weight(video_id) for video_id in pool.paths if video_id in pool.sampler}
+
+    def invalidate(self) -> None:
+        """全プールを破棄する（次回の抽選で作り直す）。"""
+        with self._lock:
+            self._version += 1
+            self._pools.clear()
+
+
+fate_index = FateIndex()
@@ -6,7 +6,7 @@ File/OS related operations.
 from pathlib import Path
 from typing import Optional, Sequence, Union
 
-from core.scanner import FileScanner
+from core.scanner import FileScanner, ScanProgress
 
 PathLike = Union[str, Path]
 
@@ -14,5 +14,6 @@ PathLike = Union[str, Path]
 def create_file_scanner(
     library_roots: Sequence[PathLike],
     protected_roots: Optional[Sequence[PathLike]] = None,
+    progress: Optional[ScanProgress] = None,
 ) -> FileScanner:
-    return FileScanner(library_roots, protected_roots=protected_roots)
+    return FileScanner(library_roots, protected_roots=protected_roots, progress=progress)
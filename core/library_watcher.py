@@ -0,0 +1,121 @@
+"""
+ClipBox - ライブラリ監視サービス（ポーリング）。
+
+役割:
+    library_roots と selection_folder を一定間隔でポーリングし、ファイルの追加・リネーム・削除・
+    ドライブの抜き差しを検知したら、変化が落ち着いた時点で増分スキャンを 1 回実行する。
+    手動の全体スキャン（`POST /api/scan/library`）は復旧用にだけ必要になる。
+
+【設計制約】
+- 検知は `scanner.snapshot_roots`（DB 非接触）で行う。前回スナップショットと比べて mtime の変わらない
+  ディレクトリは列挙しないため、1 回のポーリングはおおむねディレクトリ数ぶんの stat で済む。
+- OS のファイル通知（inotify / ReadDirectoryChangesW）は使わない（追加依存なし・外付け HDD の
+  抜き差しも同じ仕組みで拾える）。
+- 反映は呼び出し元が渡す apply（`app_service._apply_library_changes`: 手動スキャンと同じスキャンジョブ経由の
+  増分スキャン。直近バックアップが無い・ジョブ実行中なら見送る）に任せる。apply が False を返したら
+  変化を保留し、次のポーリングで再試行する。apply の例外は保留したまま警告ログに残す。
+- デバウンス: 変化を見たら、以後 debounce 秒間スナップショットが変わらなくなるまで反映を待つ。
+- `streamlit` を import しない。
+
+【依存関係】
+api_app.lifespan → core.app_service.start_library_watcher → core.library_watcher → core.scanner
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from core.logger import get_logger
+from core.scanner import snapshot_roots
+
+logger = get_logger(__name__)
+
+
+class LibraryWatcher:
+    """監視対象ルートをポーリングし、変化が落ち着いたら apply を呼ぶバックグラウンドサービス。"""
+
+    def __init__(
+        self,
+        load_roots: Callable[[], List[Path]],
+        apply: Callable[[], object],
+        *,
+        poll_interval: float,
+        debounce: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            load_roots: 監視対象ルートを返す（ポーリングごとに呼ぶため設定変更に追従する）
+            apply: 変化を反映する処理（増分スキャン）。False を返すと見送り（変化を保留して次回再試行）
+            poll_interval: ポーリング間隔（秒）
+            debounce: 最後の変化から反映までに待つ静止時間（秒）
+            clock: 経過時間の計測に使う時計（テスト用に差し替え可能）
+        """
+        self._load_roots = load_roots
+        self._apply = apply
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self._clock = clock
+        self._roots: List[str] = []
+        self._snapshot: Optional[Dict] = None
+        self._last_change: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """監視スレッドを開始する（デーモンスレッド）。"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="clipbox-library-watcher", daemon=True)
+        self._thread.start()
+        logger.info("operation=library_watch started=true poll_sec=%s debounce_sec=%s", self.poll_interval, self.debounce)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """監視スレッドを止める（実行中の apply は完了を待つ）。"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        logger.info("operation=library_watch stopped=true")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                # 監視は補助機能。1 回の失敗でサービスを止めない
+                logger.warning("operation=library_watch reason=error error=%s", str(e))
+            self._stop.wait(self.poll_interval)
+
+    def poll_once(self) -> bool:
+        """1 回ポーリングする。apply で変化を反映したら True（見送り・例外なら変化は保留のまま）。
+
+        初回（およびルート構成の変更時）はスナップショットを取るだけで反映しない。
+        """
+        roots = [str(Path(r)) for r in self._load_roots()]
+        if roots != self._roots or self._snapshot is None:
+            self._roots = roots
+            self._snapshot = snapshot_roots(roots)
+            self._last_change = None
+            return False
+
+        current = snapshot_roots(roots, previous=self._snapshot)
+        now = self._clock()
+        if current != self._snapshot:
+            self._snapshot = current
+            self._last_change = now
+            return False
+
+        if self._last_change is None or now - self._last_change < self.debounce:
+            return False
+
+        logger.info("operation=library_watch apply=true roots=%d", len(roots))
+        if self._apply() is False:
+            # 見送り: _last_change を残し、次のポーリングで再試行する
+            return False
+        self._last_change = None
+        return True
@@ -6,7 +6,7 @@ ClipBox - いいね機能サービス
 from datetime import datetime
 from typing import Dict, List
 
-from core.database import get_db_connection
+from core.database import get_db_connection, get_db_write_connection
 from core.watch_later_service import clear_processed_watch_later
 
 
@@ -20,16 +20,16 @@ def add_like(video_id: int) -> int:
     Returns:
         int: 追加後のいいね総数
     """
-    with get_db_connection() as conn:
+    with get_db_write_connection() as conn:
         # いいねを追加
         conn.execute(
             "INSERT INTO likes (video_id, liked_at) VALUES (?, ?)",
             (video_id, datetime.now())
         )
 
-        # 最新のいいね総数を取得
+        # 最新のいいね総数を取得（INSERT のトリガーで更新済みの video_stats）
         cursor = conn.execute(
-            "SELECT COUNT(*) FROM likes WHERE video_id = ?",
+            "SELECT like_count FROM video_stats WHERE video_id = ?",
             (video_id,)
         )
         count = cursor.fetchone()[0]
@@ -55,15 +55,14 @@ def get_like_counts(video_ids: List[int]) -> Dict[int, int]:
         placeholders = ",".join("?" * len(video_ids))
         cursor = conn.execute(
             f"""
-            SELECT video_id, COUNT(*) as like_count
-            FROM likes
+            SELECT video_id, like_count
+            FROM video_stats
             WHERE video_id IN ({placeholders})
-            GROUP BY video_id
             """,
             video_ids
         )
 
         result = {row["video_id"]: row["like_count"] for row in cursor.fetchall()}
 
-    # video_idsに含まれているがlikesテーブルにない動画は0を返す
+    # video_idsに含まれているがvideo_statsにない動画は0を返す
     return {vid: result.get(vid, 0) for vid in video_ids}
@@ -7,13 +7,18 @@ import os
 import unicodedata
 from dataclasses import dataclass
 from datetime import datetime
-from pathlib import Path
 from typing import Optional
 
 
-@dataclass
+def _file_name(path: str) -> str:
+    """パスのファイル名部分（Path(path).name と同じ区切り文字で切る。Path オブジェクトは作らない）"""
+    cut = max(path.rfind("/"), path.rfind("\\")) if os.sep == "\\" else path.rfind("/")
+    return path[cut + 1:]
+
+
+@dataclass(slots=True)
 class Video:
-    """動画メタ情報モデル"""
+    """動画メタ情報モデル（一覧で大量に作るため __slots__ で持つ）"""
     id: Optional[int]
     essential_filename: str
     current_full_path: str
@@ -35,12 +40,11 @@ class Video:
     @property
     def is_selection_completed(self) -> bool:
         """ファイル名に+プレフィックスが付いているかどうか（セレクション経由済み）"""
-        return Path(self.current_full_path).name.startswith('+')
+        return _file_name(self.current_full_path).startswith('+')
 
     def is_judged(self) -> bool:
         """判定済みかどうかを判別（プレフィックスの有無で判定）"""
-        filename = Path(self.current_full_path).name
-        return filename != self.essential_filename
+        return _file_name(self.current_full_path) != self.essential_filename
 
 
 @dataclass
@@ -0,0 +1,153 @@
+"""
+ClipBox - 集計クエリ結果のキャッシュ（データ世代で無効化・LRU・最大保持時間）。
+
+役割:
+    統計・ランキング・分析の集計は、再生・いいね・判定・スキャンが無い限り同じ結果になる。
+    ダッシュボードの再読み込みのたびに SQLite で集計し直さないよう、関数と引数ごとに結果を保持する。
+
+【設計制約】
+- 各エントリは計算を始める前のデータ世代（`database.get_data_generation`）を持ち、世代が進んでいれば
+  使わない。世代は書き込み接続のコミットで進むため、書き込み経路ごとの無効化呼び出しは不要。
+- 別プロセスからの書き込み・日付の変わり目（「本日」「直近 N 日」の集計）は世代に表れないため、
+  最大保持時間（max_age）を過ぎたエントリも使わない。
+- 件数上限を超えたら最も長く使われていないエントリから捨てる（LRU）。
+- 引数がハッシュできない呼び出し（DataFrame・接続など）はキャッシュせずそのまま実行する。
+- 返す値は呼び出し側が変更してもキャッシュが壊れないよう、ヒットのたびに複製して返す（DataFrame は `copy()`、
+  dict / list / tuple / set は要素まで再帰、dataclass（Video 等）はフィールドまで複製、スカラー・日時はそのまま。
+  それ以外は `copy.deepcopy`）。
+- `streamlit` を import しない。
+
+【依存関係】
+core.app_service → core.query_cache → core.database
+"""
+
+from __future__ import annotations
+
+import copy
+import dataclasses
+import functools
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+import pandas as pd
+
+from config import QUERY_CACHE_MAX_AGE_SEC, QUERY_CACHE_MAX_ENTRIES
+from core.database import get_data_generation
+
+
+def _freeze(value: Any) -> Hashable:
+    """list / set / dict の引数をキーに使える形にする（それ以外はそのまま）。"""
+    if isinstance(value, list):
+        return ("list", tuple(_freeze(v) for v in value))
+    if isinstance(value, (set, frozenset)):
+        return ("set", frozenset(_freeze(v) for v in value))
+    if isinstance(value, dict):
+        return ("dict", tuple(sorted((k, _freeze(v)) for k, v in value.items())))
+    return value
+
+
+# 変更できない値（複製しない）
+_IMMUTABLE = (str, bytes, int, float, bool, type(None), date, datetime, dt_time, timedelta)
+
+
+def _copy(value: Any) -> Any:
+    """キャッシュ済みの値を、呼び出し側が変更しても元に影響しない形で複製する。"""
+    if isinstance(value, _IMMUTABLE):
+        return value
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, tuple) and not hasattr(value, "_fields"):
+        return tuple(_copy(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return type(value)(_copy(v) for v in value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        duplicate = copy.copy(value)
+        for f in dataclasses.fields(value):
+            item = getattr(value, f.name)
+            if not isinstance(item, _IMMUTABLE):
+                object.__setattr__(duplicate, f.name, _copy(item))
+        return duplicate
+    return copy.deepcopy(value)
+
+
+class QueryCache:
+    """関数 + 引数をキーに結果を保持する LRU キャッシュ（データ世代・最大保持時間で失効）。"""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int,
+        max_age: float,
+        generation: Callable[[], int] = get_data_generation,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            max_entries: 保持する最大件数（超えたら LRU で捨てる）
+            max_age: エントリの最大保持秒数（世代が同じでもこれを過ぎたら計算し直す）
+            generation: 現在のデータ世代を返す関数（テスト用に差し替え可能）
+            clock: 経過時間の計測に使う時計（テスト用に差し替え可能）
+        """
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._generation = generation
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (データ世代, 保存時刻, 値)
+        self._entries: "OrderedDict[Hashable, Tuple[int, float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """key の結果を返す。無い・失効していれば compute() で計算して保持する。"""
+        generation = self._generation()
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == generation and now - entry[1] < self.max_age:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _copy(entry[2])
+            self.misses += 1
+        # 計算中に世代が進んだ場合、このエントリは次回の参照で失効する（計算前の世代で保存するため）
+        value = compute()
+        with self._lock:
+            self._entries[key] = (generation, now, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return _copy(value)
+
+    def cached(self, fn: Callable[..., Any], name: Optional[str] = None) -> Callable[..., Any]:
+        """fn の結果を (name, 引数) ごとにキャッシュするラッパーを返す。"""
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (label, _freeze(args), _freeze(kwargs))
+            try:
+                hash(key)
+            except TypeError:
+                return fn(*args, **kwargs)
+            return self.get_or_compute(key, lambda: fn(*args, **kwargs))
+
+        return wrapper
+
+    def clear(self) -> None:
+        """全エントリを捨てる。"""
+        with self._lock:
+            self._entries.clear()
+
+
+query_cache = QueryCache(max_entries=QUERY_CACHE_MAX_ENTRIES, max_age=QUERY_CACHE_MAX_AGE_SEC)
@@ -0,0 +1,165 @@
+"""
+ClipBox - バックグラウンドスキャンジョブ。
+
+役割:
+    ライブラリスキャンを HTTP リクエストから切り離してバックグラウンドスレッドで実行し、
+    ジョブ ID で状態・進捗（`scanner.ScanProgress`）を参照・中止できるようにする。
+
+【設計制約】
+- スキャンは破壊的（不在動画を is_available=0 にする）な全体処理のため、同時に実行するのは 1 件だけ。
+  実行中に新規開始しようとすると ScanJobConflict。
+- 中止は ScanProgress の中止要求で行う。スキャナーは次の確認箇所で ScanCancelled を送出し、
+  DB 反映の書き込みトランザクション（走査後に 1 本）はロールバックされる（走査中の中止では DB に何も書かない）。
+  反映がコミットされた後の中止要求では ScanCancelled を送出せず、ジョブは SUCCEEDED で終わる。
+- 実行内容（target）は呼び出し元（app_service）が渡す。本モジュールは DB・設定に触れない。
+- 完了済みジョブは直近 _MAX_FINISHED_JOBS 件だけ保持する（プロセス内メモリのみ。再起動で消える）。
+- `streamlit` を import しない。
+
+【依存関係】
+core.app_service → core.scan_jobs → core.scanner（ScanProgress / ScanCancelled）
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from core.logger import get_logger
+from core.scanner import ScanCancelled, ScanProgress
+
+logger = get_logger(__name__)
+
+_MAX_FINISHED_JOBS = 20
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class ScanJobConflict(Exception):
+    """別のスキャンジョブが実行中。"""
+
+    def __init__(self, job: "ScanJob"):
+        super().__init__(f"scan job {job.id} is {job.status}")
+        self.job = job
+
+
+class ScanJob:
+    """1 回分のスキャンジョブ（状態は実行スレッドが更新し、API スレッドが読む）。"""
+
+    def __init__(self, incremental: bool):
+        self.id = uuid.uuid4().hex
+        self.incremental = incremental
+        self.status = PENDING
+        self.message: Optional[str] = None
+        self.progress = ScanProgress()
+        self.created_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self._started: Optional[float] = None
+        self._elapsed: Optional[float] = None
+        self._done = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """完了まで最大 timeout 秒待つ。完了していれば True。"""
+        return self._done.wait(timeout)
+
+    def elapsed_ms(self) -> int:
+        if self._elapsed is not None:
+            return int(self._elapsed * 1000)
+        if self._started is None:
+            return 0
+        return int((time.monotonic() - self._started) * 1000)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """API 応答用の状態スナップショット。"""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "incremental": self.incremental,
+            "message": self.message,
+            "created_at": self.created_at.isoformat(timespec="seconds"),
+            "finished_at": self.finished_at.isoformat(timespec="seconds") if self.finished_at else None,
+            "elapsed_ms": self.elapsed_ms(),
+            **self.progress.snapshot(),
+        }
+
+    def _run(self, target: Callable[[ScanProgress], None]) -> None:
+        self._started = time.monotonic()
+        self.status = RUNNING
+        try:
+            target(self.progress)
+            self.status = SUCCEEDED
+        except ScanCancelled:
+            self.status = CANCELLED
+            self.message = "スキャンを中止しました（変更はロールバックされました）"
+        except Exception as e:
+            self.status = FAILED
+            self.message = f"スキャンに失敗しました: {e}"
+            logger.exception("operation=scan_job id=%s failed=true", self.id)
+        finally:
+            self._elapsed = time.monotonic() - self._started
+            self.finished_at = datetime.now()
+            self._done.set()
+            logger.info(
+                "operation=scan_job id=%s status=%s elapsed_ms=%d", self.id, self.status, self.elapsed_ms()
+            )
+
+
+class ScanJobManager:
+    """スキャンジョブの登録・参照・中止（プロセス内に 1 つ）。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, ScanJob] = {}
+
+    def start(self, target: Callable[[ScanProgress], None], incremental: bool = False) -> ScanJob:
+        """target(progress) をバックグラウンドで実行するジョブを開始する。
+
+        Raises:
+            ScanJobConflict: 実行中のジョブがある
+        """
+        with self._lock:
+            active = self._active()
+            if active is not None:
+                raise ScanJobConflict(active)
+            job = ScanJob(incremental)
+            self._jobs[job.id] = job
+            self._prune()
+        threading.Thread(target=job._run, args=(target,), name=f"clipbox-scan-job-{job.id[:8]}", daemon=True).start()
+        return job
+
+    def get(self, job_id: str) -> Optional[ScanJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[ScanJob]:
+        """新しい順のジョブ一覧。"""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> Optional[ScanJob]:
+        """中止を要求する（完了済みなら何もしない）。存在しなければ None。"""
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.progress.cancel()
+        return job
+
+    def _active(self) -> Optional[ScanJob]:
+        return next((job for job in self._jobs.values() if not job.finished), None)
+
+    def _prune(self) -> None:
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished), key=lambda job: job.created_at
+        )
+        for job in finished[: max(0, len(finished) - _MAX_FINISHED_JOBS)]:
+            del self._jobs[job.id]
@@ -5,18 +5,136 @@ ClipBox - ファイルスキャン機能
 
 import os
 import re
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional, Sequence, Tuple, Union
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
 from datetime import datetime
 
-from config import VIDEO_EXTENSIONS
+from config import SCAN_MAX_WORKERS, SCAN_SPLIT_TOP_LEVEL, VIDEO_EXTENSIONS
+from core.availability import availability_cache
+from core.database import get_db_connection, get_db_write_connection
+from core.fate_sampler import fate_index
 from core.logger import get_logger
+from core.models import normalize_text
 
 logger = get_logger(__name__)
 
 PathLike = Union[str, Path]
 
+# 1 回の executemany で upsert する件数
+_UPSERT_BATCH_SIZE = 500
+
+# 見つかったファイルを videos に反映する upsert。既存行（essential_filename 一致）は
+# パス・レベル・日時・フラグのみ更新し、file_size / performer は新規登録時の値を保つ。
+_UPSERT_VIDEO_SQL = """
+    INSERT INTO videos (
+        essential_filename, current_full_path, current_favorite_level,
+        file_size, performer, storage_location, last_file_modified,
+        file_created_at, is_available, is_deleted, needs_selection,
+        is_selection_completed, last_scanned_at, normalized_filename
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, 0, ?, ?, CURRENT_TIMESTAMP, ?)
+    ON CONFLICT(essential_filename) DO UPDATE SET
+        current_full_path = excluded.current_full_path,
+        current_favorite_level = excluded.current_favorite_level,
+        storage_location = excluded.storage_location,
+        last_file_modified = excluded.last_file_modified,
+        file_created_at = excluded.file_created_at,
+        is_available = 1,
+        needs_selection = excluded.needs_selection,
+        is_selection_completed = excluded.is_selection_completed,
+        last_scanned_at = CURRENT_TIMESTAMP
+"""
+
+# スキャンマニフェスト: path -> (parent, mtime_ns) / path -> (dir_path, size, mtime_ns)
+_DirManifest = Dict[str, Tuple[Optional[str], int]]
+_FileManifest = Dict[str, Tuple[str, int, int]]
+
+
+@dataclass
+class _Manifest:
+    """1 ルート分の前回スキャンマニフェスト（ワーカーからは読み取り専用で共有する）。"""
+
+    dirs: _DirManifest = field(default_factory=dict)
+    files: _FileManifest = field(default_factory=dict)
+    # 以下は dirs / files から作る索引（比較対象外）
+    children: Dict[str, List[str]] = field(default_factory=dict, compare=False)
+    dir_files: Dict[str, List[str]] = field(default_factory=dict, compare=False)
+
+    def index(self) -> "_Manifest":
+        """親→子ディレクトリ・ディレクトリ→ファイルの索引を作る（増分スキャン用）。"""
+        for path, (parent, _) in self.dirs.items():
+            if parent is not None:
+                self.children.setdefault(parent, []).append(path)
+        for path, (dir_path, _, _) in self.files.items():
+            self.dir_files.setdefault(dir_path, []).append(path)
+        return self
+
+
+class ScanCancelled(Exception):
+    """中止要求でスキャンを打ち切った（書き込みトランザクションごとロールバックされる）。"""
+
+
+class ScanProgress:
+    """スキャンの進捗カウンタと中止要求。
+
+    走査ワーカー（dirs_visited / files_seen）と DB 反映（files_processed 以降）の双方から
+    更新されるため、加算はロックで保護する。中止要求は走査中のディレクトリごと・upsert バッチごとに
+    確認し、ScanCancelled を送出する。
+    """
+
+    FIELDS = ("dirs_visited", "files_seen", "files_processed", "inserted", "updated", "marked_unavailable")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = dict.fromkeys(self.FIELDS, 0)
+        self._cancel = threading.Event()
+
+    def add(self, **deltas: int) -> None:
+        with self._lock:
+            for name, delta in deltas.items():
+                self._counts[name] += delta
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def cancel(self) -> None:
+        """中止を要求する（実際に止まるのは次の確認箇所）。"""
+        self._cancel.set()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise ScanCancelled()
+
+
+@dataclass
+class _WalkResult:
+    """ファイルシステム走査の結果（DB には触れない）。"""
+
+    dirs: _DirManifest = field(default_factory=dict)
+    files: _FileManifest = field(default_factory=dict)
+    changed: List[Tuple[str, os.stat_result]] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    reused_dirs: int = 0
+    # descend=False で走査したときに残したサブディレクトリ（別ワーカーに回す）
+    pending_dirs: List[Tuple[str, Optional[str]]] = field(default_factory=list)
+
+    def merge(self, other: "_WalkResult") -> None:
+        self.dirs.update(other.dirs)
+        self.files.update(other.files)
+        self.changed.extend(other.changed)
+        self.unchanged.extend(other.unchanged)
+        self.reused_dirs += other.reused_dirs
+
 
 def extract_essential_filename(filename: str) -> Tuple[int, str, bool, bool]:
     """
@@ -115,10 +233,13 @@ class FileScanner:
         self,
         scan_directories: Sequence[PathLike],
         protected_roots: Optional[Sequence[PathLike]] = None,
+        progress: Optional[ScanProgress] = None,
     ):
         """
         Args:
             scan_directories: スキャン対象ディレクトリのリスト
+            protected_roots: 不在でも is_available を落とさないルート（セレクションフォルダ）
+            progress: 進捗カウンタ・中止要求（省略時は内部で作る）
         """
         self.scan_directories = [Path(p) for p in scan_directories]
         self.protected_roots = [
@@ -127,6 +248,11 @@ class FileScanner:
             if Path(p).exists() and Path(p).is_dir()
         ]
         self.found_files = set()  # スキャン中に見つかったファイルのessential_filenameを記録
+        self.found_paths: Set[str] = set()  # スキャン中に見つかったファイルのフルパス（存在確認キャッシュ用）
+        self._pending: List[tuple] = []  # upsert 待ちのレコード（_flush_pending で書き込む）
+        self._baseline: Dict[str, tuple] = {}  # 走査開始時点の videos 行（_load_video_states）
+        self._changed_meanwhile: Set[str] = set()  # 走査中に他の書き込みで変わった essential_filename
+        self.progress = progress or ScanProgress()
 
     @staticmethod
     def _is_path_within_root(file_path: str, root: Path) -> bool:
@@ -146,7 +272,7 @@ class FileScanner:
                 return True
         return False
 
-    def scan_and_update(self, db_conn):
+    def scan_and_update(self, db_conn=None, incremental: bool = False):
         """
         ファイルをスキャンしてデータベースを更新。
 
@@ -155,18 +281,23 @@ class FileScanner:
         セレクションフォルダの個別スキャンには scan_single_directory() を使うこと。
 
         Args:
-            db_conn: データベース接続（get_db_connection() のコンテキスト内で渡すこと）
+            db_conn: 省略時（通常）は走査（ファイルシステム I/O）を書き込みキューの外で行い、
+                DB への反映（upsert・マニフェスト・is_available の更新）だけを 1 つの書き込みトランザクション
+                （get_db_write_connection）で行う。渡した場合は読み取り・書き込みともその接続を使う
+                （トランザクションは呼び出し元の管理）。
+            incremental: True のときスキャンマニフェストと比較し、mtime が変わっていない
+                ディレクトリは列挙・stat を省略し、(size, mtime) が変わったファイルだけ DB を更新する。
+                False（既定）は従来どおり全ファイルを処理する（マニフェストはどちらでも更新）。
         """
         start_time = time.monotonic()
         # スキャン前に見つかったファイルをリセット
         self.found_files = set()
-        scanned_dirs: List[Path] = []
+        self.found_paths = set()
 
-        # 各ディレクトリをスキャン（実際にスキャンしたディレクトリを記録）
-        for directory in self.scan_directories:
-            if directory.exists():
-                self._scan_directory(directory, db_conn)
-                scanned_dirs.append(directory.resolve())
+        # 存在するディレクトリだけを並列に走査する（実際にスキャンしたディレクトリを記録）
+        existing_dirs = [directory for directory in self.scan_directories if directory.exists()]
+        walks = self._walk_directories(existing_dirs, db_conn, incremental=incremental)
+        scanned_dirs = [directory.resolve() for directory in existing_dirs]
 
         if not scanned_dirs:
             # スキャン実行済みディレクトリが1つもなければ is_available の更新はスキップ
@@ -176,38 +307,52 @@ class FileScanner:
             )
             return
 
-        # スキャンで見つからなかった全動画を is_available=0 に更新
-        cursor = db_conn.execute("SELECT id, essential_filename, current_full_path FROM videos")
-        all_videos = cursor.fetchall()
-
-        unavailable_count = 0
-        protected_count = 0
-        for video in all_videos:
-            video_id = video[0]
-            essential_filename = video[1]
-            current_full_path = video[2]
-
-            if essential_filename not in self.found_files:
-                if self._is_protected_path(current_full_path):
-                    protected_count += 1
-                    continue
-                db_conn.execute(
-                    "UPDATE videos SET is_available = 0 WHERE id = ?",
-                    (video_id,)
-                )
-                unavailable_count += 1
+        with _writing(db_conn) as conn:
+            self._apply_walks(walks, conn, incremental)
+
+            # スキャンで見つからなかった全動画を is_available=0 に更新（一時表で集合演算）
+            self.progress.check_cancelled()
+            with _temp_name_table(conn, "scan_found", self.found_files | self._changed_meanwhile):
+                protected_ids: List[int] = []
+                if self.protected_roots:
+                    rows = conn.execute(
+                        "SELECT id, current_full_path FROM videos"
+                        " WHERE essential_filename NOT IN (SELECT name FROM temp.scan_found)"
+                    ).fetchall()
+                    protected_ids = [row[0] for row in rows if self._is_protected_path(row[1])]
+                with _temp_name_table(conn, "scan_keep_ids", protected_ids):
+                    unavailable_count = conn.execute(
+                        """
+                        UPDATE videos SET is_available = 0
+                         WHERE essential_filename NOT IN (SELECT name FROM temp.scan_found)
+                           AND id NOT IN (SELECT name FROM temp.scan_keep_ids)
+                           AND is_available IS NOT 0
+                        """
+                    ).rowcount
+        protected_count = len(protected_ids)
+        self.progress.add(marked_unavailable=unavailable_count)
+        # 消えたファイル・外れたドライブの情報を捨て、今回見つかったパスだけを存在ありとして持ち直す
+        availability_cache.invalidate()
+        availability_cache.mark_many(self.found_paths, True)
+        fate_index.invalidate()
 
         elapsed_ms = int((time.monotonic() - start_time) * 1000)
+        counts = self.progress.snapshot()
         logger.info(
-            "operation=scan dirs=%d found=%d unavailable=%d protected=%d elapsed_ms=%d",
+            "operation=scan incremental=%s dirs=%d found=%d inserted=%d updated=%d unavailable=%d protected=%d"
+            " changed_meanwhile=%d elapsed_ms=%d",
+            incremental,
             len(scanned_dirs),
             len(self.found_files),
+            counts["inserted"],
+            counts["updated"],
             unavailable_count,
             protected_count,
+            len(self._changed_meanwhile),
             elapsed_ms,
         )
 
-    def scan_single_directory(self, directory: Path, db_conn) -> int:
+    def scan_single_directory(self, directory: Path, db_conn=None) -> int:
         """
         指定ディレクトリのみをスキャンしてDB登録/更新を行う。
         他のディレクトリのレコードの is_available は変更しない。
@@ -215,7 +360,7 @@ class FileScanner:
 
         Args:
             directory: スキャン対象ディレクトリ
-            db_conn: データベース接続
+            db_conn: データベース接続（省略時は scan_and_update と同じく走査後に書き込みトランザクションを取る）
 
         Returns:
             int: 検出したファイル数
@@ -223,52 +368,154 @@ class FileScanner:
         if not directory.exists() or not directory.is_dir():
             return 0
         self.found_files = set()
+        self.found_paths = set()
         resolved_directory = directory.resolve()
-        self._scan_directory(resolved_directory, db_conn)
-        self._mark_missing_in_directory_unavailable(resolved_directory, db_conn)
+        walks = self._walk_directories([resolved_directory], db_conn)
+        with _writing(db_conn) as conn:
+            self._apply_walks(walks, conn, incremental=False)
+            self._mark_missing_in_directory_unavailable(resolved_directory, conn)
         return len(self.found_files)
 
     def _mark_missing_in_directory_unavailable(self, directory: Path, db_conn) -> None:
-        rows = db_conn.execute(
-            "SELECT id, essential_filename, current_full_path FROM videos"
-        ).fetchall()
-        for row in rows:
-            if row[1] in self.found_files:
-                continue
-            if self._is_path_within_root(row[2], directory):
-                db_conn.execute(
-                    "UPDATE videos SET is_available = 0 WHERE id = ?",
-                    (row[0],),
-                )
-
-    def _scan_directory(self, directory: Path, db_conn):
+        with _temp_name_table(db_conn, "scan_found", self.found_files | self._changed_meanwhile):
+            rows = db_conn.execute(
+                "SELECT id, current_full_path FROM videos"
+                " WHERE essential_filename NOT IN (SELECT name FROM temp.scan_found)"
+                " AND is_available IS NOT 0"
+            ).fetchall()
+        missing = [(row[0], row[1]) for row in rows if self._is_path_within_root(row[1], directory)]
+        missing_ids = [video_id for video_id, _ in missing]
+        availability_cache.mark_many(self.found_paths, True)
+        availability_cache.mark_many((path for _, path in missing), False)
+        fate_index.invalidate()
+        with _temp_name_table(db_conn, "scan_missing_ids", missing_ids):
+            count = db_conn.execute(
+                "UPDATE videos SET is_available = 0 WHERE id IN (SELECT name FROM temp.scan_missing_ids)"
+            ).rowcount
+        self.progress.add(marked_unavailable=count)
+
+    def _walk_directories(
+        self, directories: Sequence[Path], db_conn=None, incremental: bool = False
+    ) -> List[Tuple[str, _Manifest, _WalkResult]]:
         """
-        ディレクトリをスキャン
+        各ルート配下を os.scandir で再帰的に走査する（DB は読み取りのみ。書き込みキューは取らない）。
+
+        走査（ファイルシステム I/O）はスレッドプールでルートごとに並列に行う
+        （config.SCAN_MAX_WORKERS。SCAN_SPLIT_TOP_LEVEL=True ならルート直下のサブディレクトリ単位）。
+        別ドライブ同士は I/O を奪い合わないため、全体の所要時間はおおむね最も遅いドライブの走査時間になる。
+        結果は _apply_walks で書き込みトランザクション内に反映する。遅い HDD の走査中も
+        他の書き込み（再生記録・レベル変更など）は待たされない。走査開始時点の videos 行を
+        self._baseline に控え、走査中に変わった行を _apply_walks が上書きしないようにする。
+
+        走査結果（ディレクトリ mtime・ファイルの size/mtime）はスキャンマニフェストに保存する。
+        incremental=True のときは前回のマニフェストと比較して次のように省略する:
+        - mtime が変わっていないディレクトリは列挙せず、前回のファイル一覧・子ディレクトリを使う
+          （エントリの追加・削除・リネームはディレクトリ mtime を変えるため）。子ディレクトリは個別に比較する。
+        - (size, mtime) が前回と同じファイルは DB 行が現状と一致していれば触らない
+          （行が無い・パスが違う・is_available=0 のときだけ stat して処理対象に加える）。
 
         Args:
-            directory: スキャン対象ディレクトリ
-            db_conn: データベース接続
+            directories: スキャン対象ディレクトリ（存在確認済み）
+            db_conn: マニフェスト・videos を読む接続（省略時は読み取り用のプール接続）
+            incremental: マニフェストで未変更分を省略するか
+
+        Returns:
+            (ルート, 前回のマニフェスト, 走査結果) のルート順のリスト
         """
-        for file_path in directory.rglob("*"):
-            if file_path.is_file() and is_video_file(file_path):
-                self._process_file(file_path, db_conn)
+        roots = [str(directory) for directory in directories]
+        with _reading(db_conn) as conn:
+            previous = [_load_manifest(conn, root) for root in roots]
+            self._baseline = _load_video_states(conn)
+        walks = list(zip(roots, previous, _walk_roots(roots, previous, incremental, self.progress)))
+        if any(result.unchanged for _, _, result in walks):
+            db_state = {essential: (state[0], state[2]) for essential, state in self._baseline.items()}
+            for _, _, result in walks:
+                self._reconcile_unchanged_files(result, db_state)
+        return walks
+
+    def _apply_walks(self, walks: List[Tuple[str, _Manifest, _WalkResult]], db_conn, incremental: bool) -> None:
+        """走査結果をルート順に DB に反映する（同名ファイルは後のルートが勝つ）。
+
+        走査中に他の書き込み（判定・リネーム・削除など）で変わった行は、走査時点の古いパス・レベルで
+        上書きしないよう upsert を省き、is_available=0 の対象からも外す（次回のスキャンで突き合わせる）。
+        """
+        current = _load_video_states(db_conn)
+        self._changed_meanwhile = {
+            essential
+            for essential in self._baseline.keys() | current.keys()
+            if self._baseline.get(essential) != current.get(essential)
+        }
+        for root, previous, result in walks:
+            self._apply_walk(root, previous, result, db_conn, incremental)
+
+    def _apply_walk(self, root: str, previous: _Manifest, result: _WalkResult, db_conn, incremental: bool):
+        """1 ルート分の走査結果を DB（videos・マニフェスト）に書き込む。"""
+        self.progress.check_cancelled()
+        self.found_paths.update(result.files)
+        for file_path, st in result.changed:
+            self._process_file(Path(file_path), db_conn, file_stat=st)
+        self._flush_pending(db_conn)
+        _save_manifest(db_conn, root, previous.dirs, result.dirs, previous.files, result.files)
+
+        logger.debug(
+            "operation=scan_dir root=%s incremental=%s dirs=%d dirs_reused=%d files=%d processed=%d",
+            root,
+            incremental,
+            len(result.dirs),
+            result.reused_dirs,
+            len(result.files),
+            len(result.changed),
+        )
+
+    def _reconcile_unchanged_files(
+        self, result: _WalkResult, db_state: Dict[str, Tuple[str, int]]
+    ) -> None:
+        """マニフェスト上は未変更のファイルを found に記録し、DB 行がずれているものだけ stat して changed に回す。
 
-    def _process_file(self, file_path: Path, db_conn):
+        stat できなかった（走査後に消えた）ファイルは found にもマニフェストにも入れない。
+
+        db_state（essential_filename -> (パス, is_available)）はこのルートを反映した後の状態に更新し、
+        後のルートの判定に使う（ルート順に DB へ反映していたときと同じ結果にするため）。
         """
-        個別ファイルの処理
+        for file_path, _ in result.changed:
+            _, essential, _, _ = extract_essential_filename(os.path.basename(file_path))
+            db_state[essential] = (file_path, 1)
+        drifted: List[Tuple[str, os.stat_result]] = []
+        for path in result.unchanged:
+            _, essential, _, _ = extract_essential_filename(os.path.basename(path))
+            state = db_state.get(essential)
+            if state is None or state[0] != path or not state[1]:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    # 走査後に消えた・リネームされた: 見つからなかったファイルとして扱う（_walk と同じく読み飛ばす）
+                    result.files.pop(path, None)
+                    continue
+                drifted.append((path, st))
+                db_state[essential] = (path, 1)
+            self.found_files.add(essential)
+        result.changed.extend(drifted)
+
+    def _process_file(self, file_path: Path, db_conn, file_stat: Optional[os.stat_result] = None):
+        """
+        個別ファイルの処理（DB へは upsert 待ちに積み、_flush_pending でまとめて書き込む）
 
         Args:
             file_path: ファイルパス
             db_conn: データベース接続
+            file_stat: 走査時に取得済みの stat 結果（省略時はここで stat する）
         """
         # お気に入りレベルと本質的ファイル名を抽出
         level, essential, needs_selection, is_sel_completed = extract_essential_filename(file_path.name)
 
         # スキャンで見つかったファイルとして記録
         self.found_files.add(essential)
+        if essential in self._changed_meanwhile:
+            return
 
         # ファイル情報を取得
-        file_stat = file_path.stat()
+        if file_stat is None:
+            file_stat = file_path.stat()
         file_size = file_stat.st_size
         storage_location = determine_storage_location(file_path)
         performer = extract_performer(file_path)
@@ -276,38 +523,252 @@ class FileScanner:
         # Windowsでは st_ctime がファイル作成時刻を示す
         file_created = datetime.fromtimestamp(file_stat.st_ctime)
 
-        # データベースに既存レコードがあるか確認
-        cursor = db_conn.execute(
-            "SELECT * FROM videos WHERE essential_filename = ?",
-            (essential,)
+        self._pending.append((
+            essential, str(file_path), level, file_size, performer, storage_location,
+            last_modified, file_created, 1 if needs_selection else 0, 1 if is_sel_completed else 0,
+            normalize_text(essential),
+        ))
+        if len(self._pending) >= _UPSERT_BATCH_SIZE:
+            self._flush_pending(db_conn)
+
+    def _flush_pending(self, db_conn) -> None:
+        """溜まったレコードを 1 回の executemany（INSERT ... ON CONFLICT DO UPDATE）で書き込む。
+
+        新規行は直前の MAX(id) より大きい id を採番されるため、その件数を新規登録数として数える。
+        """
+        if not self._pending:
+            return
+        self.progress.check_cancelled()
+        batch, self._pending = self._pending, []
+        max_id = db_conn.execute("SELECT COALESCE(MAX(id), 0) FROM videos").fetchone()[0]
+        db_conn.executemany(_UPSERT_VIDEO_SQL, batch)
+        inserted = db_conn.execute("SELECT COUNT(*) FROM videos WHERE id > ?", (max_id,)).fetchone()[0]
+        self.progress.add(files_processed=len(batch), inserted=inserted, updated=len(batch) - inserted)
+
+
+@contextmanager
+def _reading(db_conn):
+    """渡された接続があればそれを、無ければ読み取り用のプール接続を返す。"""
+    if db_conn is not None:
+        yield db_conn
+        return
+    with get_db_connection() as conn:
+        yield conn
+
+
+@contextmanager
+def _writing(db_conn):
+    """渡された接続があればそれを、無ければ書き込みキュー経由の接続（トランザクション開始済み）を返す。"""
+    if db_conn is not None:
+        yield db_conn
+        return
+    with get_db_write_connection() as conn:
+        yield conn
+
+
+@contextmanager
+def _temp_name_table(db_conn, name: str, values):
+    """values を 1 列（name 列）の一時表 temp.<name> に入れ、ブロックを抜けたら破棄する。
+
+    プール済み接続は使い回されるため、一時表は必ず DROP して次の利用者に残さない。
+    """
+    db_conn.execute(f"DROP TABLE IF EXISTS temp.{name}")
+    db_conn.execute(f"CREATE TEMP TABLE {name} (name PRIMARY KEY) WITHOUT ROWID")
+    try:
+        db_conn.executemany(f"INSERT OR IGNORE INTO temp.{name} (name) VALUES (?)", ((v,) for v in values))
+        yield
+    finally:
+        db_conn.execute(f"DROP TABLE IF EXISTS temp.{name}")
+
+
+def _load_video_states(db_conn) -> Dict[str, tuple]:
+    """videos のスキャンが書き込む列を essential_filename ごとに読み込む（走査中の変更検出用）。
+
+    値は (current_full_path, current_favorite_level, is_available, is_deleted, needs_selection,
+    is_selection_completed)。パスと is_available は _reconcile_unchanged_files も使う。
+    """
+    return {
+        row[0]: tuple(row[1:])
+        for row in db_conn.execute(
+            "SELECT essential_filename, current_full_path, current_favorite_level, is_available,"
+            " is_deleted, needs_selection, is_selection_completed FROM videos"
         )
-        existing = cursor.fetchone()
-
-        if existing:
-            # 更新（ファイルが見つかったので is_available=1 に設定）
-            db_conn.execute("""
-                UPDATE videos
-                SET current_full_path = ?,
-                    current_favorite_level = ?,
-                    storage_location = ?,
-                    last_file_modified = ?,
-                    file_created_at = ?,
-                    is_available = 1,
-                    needs_selection = ?,
-                    is_selection_completed = ?,
-                    last_scanned_at = CURRENT_TIMESTAMP
-                WHERE essential_filename = ?
-            """, (str(file_path), level, storage_location, last_modified, file_created,
-                  1 if needs_selection else 0, 1 if is_sel_completed else 0, essential))
+    }
+
+
+def _load_manifest(db_conn, root: str) -> _Manifest:
+    """root のスキャンマニフェストを読み込む。"""
+    dirs = {
+        row[0]: (row[1], row[2])
+        for row in db_conn.execute(
+            "SELECT path, parent, mtime_ns FROM scan_manifest_dirs WHERE root = ?", (root,)
+        )
+    }
+    files = {
+        row[0]: (row[1], row[2], row[3])
+        for row in db_conn.execute(
+            "SELECT path, dir_path, size, mtime_ns FROM scan_manifest_files WHERE root = ?", (root,)
+        )
+    }
+    return _Manifest(dirs=dirs, files=files).index()
+
+
+def _walk(
+    starts: List[Tuple[str, Optional[str]]],
+    previous: _Manifest,
+    incremental: bool,
+    descend: bool = True,
+    progress: Optional[ScanProgress] = None,
+) -> _WalkResult:
+    """starts（(ディレクトリ, 親)）から os.scandir で走査する。DB には触れないためワーカースレッドで実行できる。
+
+    DirEntry の stat（Windows では列挙結果に含まれ追加のシステムコール不要）を使う。
+    descend=False のときはサブディレクトリに入らず pending_dirs に残す。
+    progress を渡すとディレクトリごとに件数を加算し、中止要求があれば ScanCancelled を送出する。
+    """
+    result = _WalkResult()
+    stack = list(starts)
+    while stack:
+        if progress is not None:
+            progress.check_cancelled()
+        dir_path, parent = stack.pop()
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            continue
+        result.dirs[dir_path] = (parent, mtime_ns)
+        subdirs: List[Tuple[str, Optional[str]]] = []
+        files_before = len(result.files)
+
+        before = previous.dirs.get(dir_path)
+        if incremental and before is not None and before[1] == mtime_ns:
+            result.reused_dirs += 1
+            for file_path in previous.dir_files.get(dir_path, []):
+                result.files[file_path] = previous.files[file_path]
+                result.unchanged.append(file_path)
+            subdirs = [(child, dir_path) for child in previous.children.get(dir_path, [])]
+        else:
+            try:
+                with os.scandir(dir_path) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                # rglob と同じくシンボリックリンクのディレクトリは辿らない
+                                subdirs.append((entry.path, dir_path))
+                            elif entry.is_file() and is_video_file(Path(entry.name)):
+                                st = entry.stat()
+                                state = (dir_path, st.st_size, st.st_mtime_ns)
+                                result.files[entry.path] = state
+                                if incremental and previous.files.get(entry.path) == state:
+                                    result.unchanged.append(entry.path)
+                                else:
+                                    result.changed.append((entry.path, st))
+                        except OSError:
+                            continue
+            except OSError:
+                # アクセス権のないディレクトリ等は rglob と同様に読み飛ばす
+                continue
+
+        if progress is not None:
+            progress.add(dirs_visited=1, files_seen=len(result.files) - files_before)
+        if descend:
+            stack.extend(subdirs)
         else:
-            # 新規追加（デフォルトで is_available=1, is_deleted=0）
-            db_conn.execute("""
-                INSERT INTO videos (
-                    essential_filename, current_full_path, current_favorite_level,
-                    file_size, performer, storage_location, last_file_modified,
-                    file_created_at, is_available, is_deleted, needs_selection,
-                    is_selection_completed, last_scanned_at
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, 0, ?, ?, CURRENT_TIMESTAMP)
-            """, (essential, str(file_path), level, file_size, performer, storage_location,
-                  last_modified, file_created, 1 if needs_selection else 0, 1 if is_sel_completed else 0))
+            result.pending_dirs.extend(subdirs)
+    return result
+
+
+def snapshot_roots(
+    roots: Sequence[PathLike],
+    previous: Optional[Dict[str, _Manifest]] = None,
+) -> Dict[str, _Manifest]:
+    """DB に触れずに各ルートのディレクトリ mtime・動画ファイル (size, mtime) を採取する（監視用）。
+
+    previous（前回の戻り値）を渡すと mtime 未変更のディレクトリは列挙を省き、前回の一覧を引き継ぐ。
+    存在しないルートは空のマニフェストになる。2 回の戻り値を == で比べれば変化の有無がわかる。
+    """
+    snapshots: Dict[str, _Manifest] = {}
+    for root in (str(Path(r)) for r in roots):
+        before = (previous or {}).get(root)
+        walked = _walk([(root, None)], before or _Manifest(), incremental=before is not None)
+        snapshots[root] = _Manifest(dirs=walked.dirs, files=walked.files).index()
+    return snapshots
+
+
+def _walk_roots(
+    roots: List[str],
+    previous: List[_Manifest],
+    incremental: bool,
+    progress: Optional[ScanProgress] = None,
+) -> Iterator[_WalkResult]:
+    """ルートごとの走査結果をルート順に返す。走査自体はスレッドプールで並列に進める。
+
+    結果をルート順に消費することで、同名ファイルが複数ルートにある場合の勝ち負け
+    （後のルートが優先）を逐次スキャン時と同じに保つ。
+    """
+    split = SCAN_SPLIT_TOP_LEVEL
+    if SCAN_MAX_WORKERS <= 1 or (len(roots) <= 1 and not split):
+        for root, prev in zip(roots, previous):
+            yield _walk([(root, None)], prev, incremental, progress=progress)
+        return
+
+    with ThreadPoolExecutor(max_workers=SCAN_MAX_WORKERS, thread_name_prefix="clipbox-scan") as pool:
+        groups: List[Tuple[Optional[_WalkResult], List[Future]]] = []
+        if split:
+            # ルート直下の列挙（各 1 ディレクトリ分）を先に並列で済ませ、サブツリーをワーカーに配る
+            heads = [
+                pool.submit(_walk, [(root, None)], prev, incremental, False, progress)
+                for root, prev in zip(roots, previous)
+            ]
+            for head_future, prev in zip(heads, previous):
+                head = head_future.result()
+                groups.append((
+                    head,
+                    [pool.submit(_walk, [d], prev, incremental, progress=progress) for d in head.pending_dirs],
+                ))
+        else:
+            groups = [
+                (None, [pool.submit(_walk, [(root, None)], prev, incremental, progress=progress)])
+                for root, prev in zip(roots, previous)
+            ]
+
+        for head, futures in groups:
+            result = head or _WalkResult()
+            for future in futures:
+                result.merge(future.result())
+            yield result
+
+
+def _save_manifest(
+    db_conn,
+    root: str,
+    old_dirs: _DirManifest,
+    new_dirs: _DirManifest,
+    old_files: _FileManifest,
+    new_files: _FileManifest,
+) -> None:
+    """前回との差分だけマニフェストに書き込む（消えたエントリは削除）。"""
+    db_conn.executemany(
+        "DELETE FROM scan_manifest_dirs WHERE root = ? AND path = ?",
+        [(root, path) for path in old_dirs.keys() - new_dirs.keys()],
+    )
+    db_conn.executemany(
+        """
+        INSERT INTO scan_manifest_dirs (root, path, parent, mtime_ns) VALUES (?, ?, ?, ?)
+        ON CONFLICT(root, path) DO UPDATE SET parent = excluded.parent, mtime_ns = excluded.mtime_ns
+        """,
+        [(root, path, parent, mtime) for path, (parent, mtime) in new_dirs.items()
+         if old_dirs.get(path) != (parent, mtime)],
+    )
+    db_conn.executemany(
+        "DELETE FROM scan_manifest_files WHERE root = ? AND path = ?",
+        [(root, path) for path in old_files.keys() - new_files.keys()],
+    )
+    db_conn.executemany(
+        """
+        INSERT INTO scan_manifest_files (root, path, dir_path, size, mtime_ns) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(root, path) DO UPDATE SET
+            dir_path = excluded.dir_path, size = excluded.size, mtime_ns = excluded.mtime_ns
+        """,
+        [(root, path, *state) for path, state in new_files.items() if old_files.get(path) != state],
+    )
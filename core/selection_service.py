@@ -30,10 +30,10 @@ def scan_selection_folder(folder_path: Path) -> dict:
 
     scanner = FileScanner([folder_path])
     try:
-        with get_db_connection() as conn:
-            # scan_and_update は「スキャン対象外のファイルを is_available=0 にする」副作用があるため使わない。
-            # 指定フォルダのみをスキャンし、他ディレクトリのレコードには一切触れない。
-            found_count = scanner.scan_single_directory(folder_path, conn)
+        # scan_and_update は「スキャン対象外のファイルを is_available=0 にする」副作用があるため使わない。
+        # 指定フォルダのみをスキャンし、他ディレクトリのレコードには一切触れない。
+        # 走査は書き込みキューの外で行い、DB への反映だけを書き込みトランザクションで行う。
+        found_count = scanner.scan_single_directory(folder_path)
         return {
             "status": "success",
             "message": f"スキャン完了: {found_count} 件のファイルを検出しました",
@@ -3,24 +3,36 @@
 
 【設計制約】
 - streamlit を import しない（Flask移行時に再利用するため）
-- DBアクセスは get_db_connection() 経由のみ（直接 sqlite3.connect 禁止）
+- DBアクセスは get_db_connection() 経由のみ（直接 sqlite3.connect 禁止）。
+  書き込み（再生記録・判定リネーム・あとで見る）は get_db_write_connection()（書き込みキュー）を使う
 - N+1クエリ禁止（ループ内でDB呼び出しをしない）
 
 【依存関係】
 models.py → database.py → video_manager.py → streamlit_app.py（UI）
 """
 
-import subprocess
+import functools
 import random
-from typing import List, Optional, Dict
+import sqlite3
+import subprocess
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 from datetime import datetime
 from pathlib import Path
 
-from core.models import Video, is_path_within, normalize_text
-from core.database import get_db_connection, insert_play_history
+from core.availability import availability_cache
+from core.fate_sampler import fate_index
+from core.models import Video, is_path_within
+from core.database import (
+    filename_keyword_filter,
+    get_db_connection,
+    get_db_write_connection,
+    insert_play_history,
+    iter_keyset_batches,
+)
 from core.logger import get_logger
 from core.viewing import VIEWING_METHOD_APP_PLAYBACK
-from config import FAVORITE_LEVEL_NAMES
+from config import EXPORT_BATCH_SIZE, FAVORITE_LEVEL_NAMES
 
 logger = get_logger(__name__)
 
@@ -28,27 +40,245 @@ logger = get_logger(__name__)
 _SQLITE_VAR_LIMIT = 900
 
 
+# Video のフィールド順に (列名, 列が無いときの値, bool に変換するか)
+_VIDEO_COLUMNS: Tuple[Tuple[str, Any, bool], ...] = (
+    ("id", None, False),
+    ("essential_filename", "", False),
+    ("current_full_path", "", False),
+    ("current_favorite_level", -1, False),
+    ("file_size", None, False),
+    ("performer", None, False),
+    ("storage_location", "", False),
+    ("last_file_modified", None, False),
+    ("created_at", None, False),
+    ("last_scanned_at", None, False),
+    ("notes", None, False),
+    ("file_created_at", None, False),
+    ("is_available", True, True),
+    ("is_deleted", False, True),
+    ("is_judging", False, True),
+    ("needs_selection", False, True),
+    ("watch_later", False, True),
+)
+
+
+# 射影（columns=）で選べる videos の列（Video のフィールドに対応する列）
+VIDEO_COLUMNS: Tuple[str, ...] = tuple(name for name, _, _ in _VIDEO_COLUMNS)
+
+
+def _select_list(columns: Optional[Sequence[str]], alias: str = "") -> str:
+    """SELECT 句の列リストを返す（None なら全列）。id は常に含め、VIDEO_COLUMNS 以外は ValueError。"""
+    prefix = f"{alias}." if alias else ""
+    if columns is None:
+        return f"{prefix}*"
+    unknown = [name for name in columns if name not in VIDEO_COLUMNS]
+    if unknown:
+        raise ValueError(f"未知の列です: {', '.join(unknown)}")
+    return ", ".join(f"{prefix}{name}" for name in dict.fromkeys(["id", *columns]))
+
+
+@functools.lru_cache(maxsize=64)
+def _video_decoder(columns: Tuple[str, ...]) -> Callable[[Sequence[Any]], Video]:
+    """結果列名の並びごとに 1 回だけ作る「行 → Video」変換関数（列位置で読む）。
+
+    列の有無の確認はここで済ませ、行ごとには列名の検索をしない。無い列は既定値になる。
+    """
+    index = {name: i for i, name in enumerate(columns)}
+    plan = tuple((index.get(name, -1), default, as_bool) for name, default, as_bool in _VIDEO_COLUMNS)
+
+    def decode(row: Sequence[Any]) -> Video:
+        return Video(
+            *[
+                default if i < 0 else (bool(row[i]) if as_bool else row[i])
+                for i, default, as_bool in plan
+            ]
+        )
+
+    return decode
+
+
+def _cursor_decoder(cursor: sqlite3.Cursor) -> Callable[[Sequence[Any]], Video]:
+    """カーソルの結果列（cursor.description）に対応する変換関数を返す。"""
+    return _video_decoder(tuple(column[0] for column in cursor.description))
+
+
+def videos_from_cursor(cursor: sqlite3.Cursor) -> List[Video]:
+    """実行済みカーソルの全行を Video のリストにする（変換関数は 1 回だけ組み立てる）。"""
+    decode = _cursor_decoder(cursor)
+    return [decode(row) for row in cursor.fetchall()]
+
+
 def video_from_row(row) -> Video:
     """データベースの行を Video オブジェクトに変換（モジュールレベル公開関数）"""
-    return Video(
-        id=row["id"],
-        essential_filename=row["essential_filename"],
-        current_full_path=row["current_full_path"],
-        current_favorite_level=row["current_favorite_level"],
-        file_size=row["file_size"] if "file_size" in row.keys() else None,
-        performer=row["performer"] if "performer" in row.keys() else None,
-        storage_location=row["storage_location"] if "storage_location" in row.keys() else "",
-        last_file_modified=row["last_file_modified"] if "last_file_modified" in row.keys() else None,
-        created_at=row["created_at"] if "created_at" in row.keys() else None,
-        last_scanned_at=row["last_scanned_at"] if "last_scanned_at" in row.keys() else None,
-        notes=row["notes"] if "notes" in row.keys() else None,
-        file_created_at=row["file_created_at"] if "file_created_at" in row.keys() else None,
-        is_available=bool(row["is_available"]) if "is_available" in row.keys() else True,
-        is_deleted=bool(row["is_deleted"]) if "is_deleted" in row.keys() else False,
-        is_judging=bool(row["is_judging"]) if "is_judging" in row.keys() else False,
-        needs_selection=bool(row["needs_selection"]) if "needs_selection" in row.keys() else False,
-        watch_later=bool(row["watch_later"]) if "watch_later" in row.keys() else False,
-    )
+    columns = tuple(row.keys())
+    if not isinstance(row, sqlite3.Row):
+        row = [row[name] for name in columns]
+    return _video_decoder(columns)(row)
+
+
+@dataclass
+class VideoPage:
+    """ページング済み一覧の1ページ分（get_videos_page の戻り値）。
+
+    next_key は最終行のソートキー（ORDER BY 各列の値のタプル）。次ページがあり得る
+    （items が limit 件ちょうど）ときのみ設定し、get_videos_page(after=...) に渡すと続きを取れる。
+    """
+
+    items: List[Video]
+    total: int
+    next_key: Optional[Tuple[Any, ...]] = None
+
+
+def _build_filter_where(
+    *,
+    favorite_levels: Optional[List[int]] = None,
+    storage_locations: Optional[List[str]] = None,
+    availability: Optional[str] = None,
+    show_unavailable: bool = False,
+    show_deleted: bool = False,
+    needs_selection_filter: Optional[bool] = None,
+    exclude_selection: bool = False,
+    watch_later_filter: Optional[bool] = None,
+) -> Tuple[str, list]:
+    """get_videos / get_videos_page 共通の WHERE 句（videos 列のみ参照）とバインド値を組み立てる。"""
+    clauses: List[str] = []
+    params: list = []
+
+    # is_available / 表示可否フィルタ
+    if availability == "available":
+        clauses.append("is_available = 1")
+    elif availability == "unavailable":
+        clauses.append("is_available = 0")
+    elif not show_unavailable:
+        clauses.append("is_available = 1")
+
+    if not show_deleted:
+        clauses.append("is_deleted = 0")
+
+    if needs_selection_filter is not None:
+        clauses.append("needs_selection = ?")
+        params.append(1 if needs_selection_filter else 0)
+
+    if exclude_selection:
+        clauses.append("needs_selection = 0 AND is_selection_completed = 0")
+
+    if watch_later_filter is not None:
+        clauses.append("watch_later = ?")
+        params.append(1 if watch_later_filter else 0)
+
+    if favorite_levels:
+        placeholders = ",".join("?" * len(favorite_levels))
+        clauses.append(f"current_favorite_level IN ({placeholders})")
+        params.extend(favorite_levels)
+
+    if storage_locations:
+        placeholders = ",".join("?" * len(storage_locations))
+        clauses.append(f"storage_location IN ({placeholders})")
+        params.extend(storage_locations)
+
+    return " AND ".join(clauses) or "1=1", params
+
+
+# 一覧ソートの ORDER BY 定義。各要素は (SQL式, 降順か)。式はすべて NULL を返さない形にし、
+# キーセット比較（行値の大小）を単純に保つ。末尾の v.id で全順序にする。
+# 既定順（sort 未指定）は get_videos と同じ current_favorite_level DESC, last_file_modified DESC。
+_DEFAULT_ORDER_KEYS: List[Tuple[str, bool]] = [
+    ("v.current_favorite_level", True),
+    ("COALESCE(v.last_file_modified, '')", True),
+    ("v.id", False),
+]
+
+# 視聴回数・最終視聴日時（アプリ内再生のみ）・Tier 別の最新判定日時。書き込み時にトリガーで保守される
+# video_stats を動画 ID で引く（database.get_view_counts_map / get_last_viewed_map と同じ値）。
+_VIEW_STATS_JOIN = "LEFT JOIN video_stats vs ON vs.video_id = v.id"
+
+# database.get_latest_judged_at_map と同じく削除済み動画は未判定扱い
+_JUDGED_AT_EXPR = "(CASE WHEN v.is_deleted = 0 THEN vs.{column} END)"
+
+# Tier1 の未判定候補（セレクション関連は除外）。運命の1本 / ランダム取得と存在確認の事前確認で共有する
+_UNRATED_CANDIDATE_WHERE = """
+    current_favorite_level = -1
+    AND is_available = 1
+    AND is_deleted = 0
+    AND needs_selection = 0
+    AND is_selection_completed = 0
+"""
+
+# Tier2 の未選別候補（get_videos(needs_selection_filter=True) の既定フィルタと同じ）
+_SELECTION_CANDIDATE_WHERE = "needs_selection = 1 AND is_available = 1 AND is_deleted = 0"
+
+# fate_index のプールキー（Tier2 はフォルダごとに (キー, フォルダ) で分ける）
+_UNRATED_FATE_POOL = "unrated"
+_SELECTION_FATE_POOL = "selection"
+
+
+def _sort_plan(
+    sort: Optional[str], order: Optional[str], selection: bool
+) -> Tuple[List[Tuple[str, bool]], List[str]]:
+    """sort / order から (ORDER BY キー, 必要な JOIN) を返す。
+
+    既定方向は降順（title のみ昇順）。order を明示すると優先する。同値は既定順で並べる。
+    judged_at は判定履歴の無い動画を asc/desc いずれでも常に末尾に置く。
+    未知の sort は既定順として扱う。
+    """
+    desc = (order != "asc") if order else (sort != "title")
+    joins: List[str] = []
+    primary: List[Tuple[str, bool]] = []
+
+    if sort == "favorite_level":
+        primary = [("v.current_favorite_level", desc)]
+    elif sort == "creation_date":
+        primary = [("COALESCE(NULLIF(v.file_created_at, ''), NULLIF(v.created_at, ''), '')", desc)]
+    elif sort == "title":
+        primary = [("clipbox_lower(v.essential_filename)", desc)]
+    elif sort in ("view_count", "last_viewed"):
+        joins.append(_VIEW_STATS_JOIN)
+        if sort == "view_count":
+            primary = [("COALESCE(vs.view_count, 0)", desc)]
+        else:
+            primary = [("COALESCE(vs.last_viewed_at, '')", desc)]
+    elif sort == "judged_at":
+        joins.append(_VIEW_STATS_JOIN)
+        judged_at = _JUDGED_AT_EXPR.format(column="tier2_judged_at" if selection else "tier1_judged_at")
+        primary = [
+            (f"(CASE WHEN COALESCE({judged_at}, '') = '' THEN 1 ELSE 0 END)", False),
+            (f"COALESCE({judged_at}, '')", desc),
+        ]
+    return primary + _DEFAULT_ORDER_KEYS, joins
+
+
+def _keyset_where(keys: List[Tuple[str, bool]], after: Sequence[Any]) -> Tuple[str, list]:
+    """ORDER BY キー列で after より後ろの行だけを残す条件（キーセットページング）を組み立てる。
+
+    (k1, k2, ...) の辞書式比較を、列ごとの方向を考慮して
+    `k1 > ? OR (k1 = ? AND k2 > ?) OR ...` の形に展開する（降順の列は `<`）。
+    """
+    if len(after) != len(keys):
+        raise ValueError("after の要素数がソートキーと一致しません")
+    disjuncts: List[str] = []
+    params: list = []
+    for i, (expr, desc) in enumerate(keys):
+        terms = [f"{keys[j][0]} = ?" for j in range(i)]
+        terms.append(f"{expr} {'<' if desc else '>'} ?")
+        disjuncts.append("(" + " AND ".join(terms) + ")")
+        params.extend(after[:i])
+        params.append(after[i])
+    return "(" + " OR ".join(disjuncts) + ")", params
+
+
+def _fate_pool_loader(where: str, params: Sequence[Any]):
+    """fate_index のプール用に、候補の (id, パス, 最終視聴日時) を 1 本の SQL で読む関数を返す。"""
+
+    def load() -> List[Tuple[int, str, Optional[str]]]:
+        with get_db_connection() as conn:
+            rows = conn.execute(
+                f"SELECT v.id, v.current_full_path, vs.last_viewed_at FROM videos v {_VIEW_STATS_JOIN}"
+                f" WHERE {where}",
+                list(params),
+            ).fetchall()
+        return [(row[0], row[1], row[2]) for row in rows]
+
+    return load
 
 
 class VideoManager:
@@ -65,6 +295,7 @@ class VideoManager:
         needs_selection_filter: Optional[bool] = None,
         exclude_selection: bool = False,
         watch_later_filter: Optional[bool] = None,
+        columns: Optional[Sequence[str]] = None,
     ) -> List[Video]:
         """
         フィルタ条件に合致する動画一覧を返す。
@@ -78,64 +309,160 @@ class VideoManager:
             needs_selection_filter: True=!プレフィックス動画のみ / False=通常動画のみ / None=全て。
             exclude_selection: True のとき needs_selection=1 と is_selection_completed=1 の動画を除外する。
             watch_later_filter: True=あとで見る動画のみ / False=それ以外のみ / None=全て。
+            columns: 読む列（VIDEO_COLUMNS の部分集合。id は常に含む）。None で全列。
+                読まなかった列の Video フィールドは既定値になる。
 
         Returns:
             List[Video]: 条件に合致する動画のリスト。
         """
+        where, params = _build_filter_where(
+            favorite_levels=favorite_levels,
+            storage_locations=storage_locations,
+            availability=availability,
+            show_unavailable=show_unavailable,
+            show_deleted=show_deleted,
+            needs_selection_filter=needs_selection_filter,
+            exclude_selection=exclude_selection,
+            watch_later_filter=watch_later_filter,
+        )
         with get_db_connection() as conn:
-            query = "SELECT * FROM videos WHERE 1=1"
-            params: list = []
-
-            # is_available / 表示可否フィルタ
-            if availability == "available":
-                query += " AND is_available = 1"
-            elif availability == "unavailable":
-                query += " AND is_available = 0"
-            else:
-                if not show_unavailable:
-                    query += " AND is_available = 1"
-
-            if not show_deleted:
-                query += " AND is_deleted = 0"
+            if keyword:
+                keyword_sql, keyword_params = filename_keyword_filter(conn, keyword)
+                where += f" AND {keyword_sql}"
+                params.extend(keyword_params)
+            query = f"SELECT {_select_list(columns)} FROM videos WHERE {where}"
+            query += " ORDER BY current_favorite_level DESC, last_file_modified DESC"
 
-            if needs_selection_filter is not None:
-                query += " AND needs_selection = ?"
-                params.append(1 if needs_selection_filter else 0)
+            return videos_from_cursor(conn.execute(query, params))
 
-            if exclude_selection:
-                query += " AND needs_selection = 0 AND is_selection_completed = 0"
+    def get_videos_page(
+        self,
+        *,
+        favorite_levels: Optional[List[int]] = None,
+        storage_locations: Optional[List[str]] = None,
+        keyword: Optional[str] = None,
+        availability: Optional[str] = None,
+        show_unavailable: bool = False,
+        show_deleted: bool = False,
+        needs_selection_filter: Optional[bool] = None,
+        exclude_selection: bool = False,
+        watch_later_filter: Optional[bool] = None,
+        folder: Optional[str] = None,
+        sort: Optional[str] = None,
+        order: Optional[str] = None,
+        selection: bool = False,
+        limit: int = 100,
+        offset: int = 0,
+        after: Optional[Sequence[Any]] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> VideoPage:
+        """
+        フィルタ・ソート・ページングをすべて SQL で行い、1ページ分の動画だけを返す。
 
-            if watch_later_filter is not None:
-                query += " AND watch_later = ?"
-                params.append(1 if watch_later_filter else 0)
+        get_videos と同じフィルタ（keyword は normalized_filename / FTS5 索引）に加え、
+        folder（is_path_within による配下判定）も SQL 関数で WHERE に入れる。
+        total はページングとは別の COUNT(*) で数える（after の有無に依らずフィルタ全体の件数）。
 
-            if favorite_levels:
-                placeholders = ",".join("?" * len(favorite_levels))
-                query += f" AND current_favorite_level IN ({placeholders})"
-                params.extend(favorite_levels)
+        Args:
+            folder: 指定時は current_full_path がこのフォルダ配下の動画のみ。
+            sort: favorite_level / creation_date / view_count / last_viewed / title / judged_at。None で既定順。
+            order: 'asc' / 'desc'。None のとき title は昇順、他は降順。
+            selection: judged_at ソートで Tier2（選別判定）の判定日時を使う。
+            limit: 1ページの件数。
+            offset: 先頭から読み飛ばす件数（after 指定時は無視）。
+            after: 前ページの VideoPage.next_key。指定時はその行より後ろから limit 件（キーセット）。
+            columns: 読む列（get_videos と同じ）。ソートキーは射影に関係なく読む。
 
-            if storage_locations:
-                placeholders = ",".join("?" * len(storage_locations))
-                query += f" AND storage_location IN ({placeholders})"
-                params.extend(storage_locations)
+        Returns:
+            VideoPage: items / total / next_key。
+        """
+        where, params = _build_filter_where(
+            favorite_levels=favorite_levels,
+            storage_locations=storage_locations,
+            availability=availability,
+            show_unavailable=show_unavailable,
+            show_deleted=show_deleted,
+            needs_selection_filter=needs_selection_filter,
+            exclude_selection=exclude_selection,
+            watch_later_filter=watch_later_filter,
+        )
+        if folder is not None:
+            where += " AND clipbox_is_path_within(current_full_path, ?) = 1"
+            params.append(folder)
 
-            query += " ORDER BY current_favorite_level DESC, last_file_modified DESC"
+        keys, joins = _sort_plan(sort, order, selection)
+        key_columns = ", ".join(f"{expr} AS _k{i}" for i, (expr, _) in enumerate(keys))
+        order_by = ", ".join(f"{expr} {'DESC' if desc else 'ASC'}" for expr, desc in keys)
 
-            cursor = conn.execute(query, params)
+        with get_db_connection() as conn:
+            if keyword:
+                keyword_sql, keyword_params = filename_keyword_filter(conn, keyword)
+                where += f" AND {keyword_sql}"
+                params.extend(keyword_params)
+
+            page_where = where
+            page_params = list(params)
+            if after is not None:
+                keyset_sql, keyset_params = _keyset_where(keys, after)
+                page_where += f" AND {keyset_sql}"
+                page_params.extend(keyset_params)
+                offset = 0
+
+            total = conn.execute(f"SELECT COUNT(*) FROM videos WHERE {where}", params).fetchone()[0]
+            cursor = conn.execute(
+                f"SELECT {_select_list(columns, 'v')}, {key_columns} FROM videos v {' '.join(joins)}"
+                f" WHERE {page_where} ORDER BY {order_by} LIMIT ? OFFSET ?",
+                [*page_params, limit, offset],
+            )
+            decode = _cursor_decoder(cursor)
             rows = cursor.fetchall()
 
-            videos = [self._row_to_video(row) for row in rows]
-            if keyword:
-                keyword_norm = normalize_text(keyword)
-                videos = [
-                    video
-                    for video in videos
-                    if keyword_norm in normalize_text(video.essential_filename)
-                ]
-            return videos
+        items = [decode(row) for row in rows]
+        next_key = None
+        if rows and len(rows) >= limit:
+            last = rows[-1]
+            next_key = tuple(last[f"_k{i}"] for i in range(len(keys)))
+        return VideoPage(items=items, total=total, next_key=next_key)
+
+    def iter_videos(
+        self,
+        *,
+        storage_locations: Optional[List[str]] = None,
+        keyword: Optional[str] = None,
+        availability: Optional[str] = None,
+        show_unavailable: bool = False,
+        show_deleted: bool = False,
+        columns: Optional[Sequence[str]] = None,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> Iterator[List[Video]]:
+        """
+        get_videos と同じフィルタの動画を id 昇順に batch_size 件ずつ返すジェネレータ（全件ストリーミング用）。
+
+        全件を 1 つのリストにしない。各バッチは id のキーセットで読む短いクエリ
+        （database.iter_keyset_batches）で、件数の COUNT(*) は数えない。
+        """
+        where, params = _build_filter_where(
+            storage_locations=storage_locations,
+            availability=availability,
+            show_unavailable=show_unavailable,
+            show_deleted=show_deleted,
+        )
+        if keyword:
+            with get_db_connection() as conn:
+                keyword_sql, keyword_params = filename_keyword_filter(conn, keyword)
+            where += f" AND {keyword_sql}"
+            params.extend(keyword_params)
+
+        select = f"SELECT {_select_list(columns)} FROM videos"
+        for rows in iter_keyset_batches(select, where, params, "id", batch_size):
+            decode = _video_decoder(tuple(rows[0].keys()))
+            yield [decode(row) for row in rows]
 
     def get_videos_by_ids(
-        self, video_ids: List[int], include_deleted: bool = False
+        self,
+        video_ids: List[int],
+        include_deleted: bool = False,
+        columns: Optional[Sequence[str]] = None,
     ) -> List[Video]:
         """指定IDリストの動画をDBから取得し、IDの順序を保って返す。
 
@@ -143,6 +470,7 @@ class VideoManager:
         SQLite のバインド変数上限を超える件数は _SQLITE_VAR_LIMIT 件ずつチャンクに
         分けて取得し、最終的な順序を入力順に揃える。
         include_deleted=True の場合のみ is_deleted=1 の動画も返す。
+        columns で読む列を絞れる（get_videos と同じ。存在確認だけなら ("id",)）。
         """
         if not video_ids:
             return []
@@ -154,12 +482,12 @@ class VideoManager:
             for i in range(0, len(unique_ids), _SQLITE_VAR_LIMIT):
                 chunk = unique_ids[i : i + _SQLITE_VAR_LIMIT]
                 placeholders = ",".join("?" * len(chunk))
-                rows = conn.execute(
-                    f"SELECT * FROM videos WHERE id IN ({placeholders}){deleted_filter}",
+                cursor = conn.execute(
+                    f"SELECT {_select_list(columns)} FROM videos WHERE id IN ({placeholders}){deleted_filter}",
                     chunk,
-                ).fetchall()
-                for row in rows:
-                    id_to_video[row["id"]] = video_from_row(row)
+                )
+                for video in videos_from_cursor(cursor):
+                    id_to_video[video.id] = video
         return [id_to_video[vid] for vid in unique_ids if vid in id_to_video]
 
     def get_fate_video(self, folder_path_str: str = "") -> Optional[Video]:
@@ -173,45 +501,59 @@ class VideoManager:
         recently_unwatched_priority: bool = False,
     ) -> Optional[Video]:
         """未選別動画を1本選出する（Tier2 運命の1本用）。"""
+        if recently_unwatched_priority:
+            where = _SELECTION_CANDIDATE_WHERE
+            params: List[Any] = []
+            if folder_path_str:
+                where += " AND clipbox_is_path_within(current_full_path, ?) = 1"
+                params.append(folder_path_str)
+            return self._pick_recently_unwatched(
+                (_SELECTION_FATE_POOL, folder_path_str), where, params, check_exists=False
+            )
+
+        # 候補は ID とパスだけ読み、選んだ 1 本だけ全列を取得する
         videos = self.get_videos(
             needs_selection_filter=True,
             show_unavailable=False,
             show_deleted=False,
+            columns=("current_full_path",),
         )
-        if not videos:
-            return None
         if folder_path_str:
             videos = [v for v in videos if is_path_within(v.current_full_path, folder_path_str)]
         if not videos:
             return None
-        if not recently_unwatched_priority:
-            return random.choice(videos)
-
-        return self._choose_by_recently_unwatched_priority(videos)
+        picked = self.get_videos_by_ids([random.choice(videos).id])
+        return picked[0] if picked else None
 
-    def _choose_by_recently_unwatched_priority(self, videos: List[Video]) -> Optional[Video]:
-        """最終視聴日が古い/未再生の動画を軽く優先して1本選ぶ。"""
-        video_ids = [v.id for v in videos if v.id is not None]
-        if not video_ids:
-            return None
-        placeholders = ",".join("?" * len(video_ids))
-        with get_db_connection() as conn:
-            rows = conn.execute(
-                f"SELECT video_id, MAX(viewed_at) AS last_viewed"
-                f" FROM viewing_history WHERE viewing_method = ?"
-                f" AND video_id IN ({placeholders})"
-                f" GROUP BY video_id",
-                [VIEWING_METHOD_APP_PLAYBACK, *video_ids],
-            ).fetchall()
-        last_viewed_map = {row["video_id"]: row["last_viewed"] for row in rows}
+    def _pick_recently_unwatched(
+        self,
+        pool_key: Any,
+        where: str,
+        params: Sequence[Any],
+        *,
+        check_exists: bool,
+    ) -> Optional[Video]:
+        """最終視聴日が古い/未再生の動画を軽く優先して1本選ぶ（fate_index の重み付き抽選）。
 
-        today = datetime.now()
-        weights: list[float] = []
-        for v in videos:
-            lv = last_viewed_map.get(v.id)
-            weights.append(self._recently_unwatched_weight(lv, today))
+        候補（where に合う動画）の重みは fate_index のプールに保持し、抽選は O(log n)。
+        抽選した ID は DB 行で候補条件を確かめ、外れていれば（フック漏れ）プールから除いて引き直す。
+        """
 
-        return random.choices(videos, weights=weights, k=1)[0]
+        def accept(video_id: int, path: str) -> bool:
+            return not check_exists or availability_cache.exists(path)
+
+        load = _fate_pool_loader(where, params)
+        while True:
+            video_id = fate_index.pick(pool_key, load, self._recently_unwatched_weight, accept)
+            if video_id is None:
+                return None
+            with get_db_connection() as conn:
+                row = conn.execute(
+                    f"SELECT * FROM videos WHERE id = ? AND {where}", [video_id, *params]
+                ).fetchone()
+            if row is not None:
+                return video_from_row(row)
+            fate_index.discard(video_id)
 
     @staticmethod
     def _recently_unwatched_weight(last_viewed: Optional[str], now: datetime) -> float:
@@ -232,38 +574,41 @@ class VideoManager:
         ランダム順序を保ったまま全フィールドの Video リストを返すため、
         UI 側は DB に直接アクセスする必要がない。
         ファイルが実際に存在しない動画（外付けHDD未接続など）は除外する。
-        ドライブ単位の接続確認を 1 回のみ行い、未接続ドライブのファイルを高速スキップする。
-        LIMIT を設けず全件をシャッフル取得することで、接続済みドライブの動画が少数でも確実に拾える。
+        存在確認は `availability_cache`（ドライブ接続状態 + ファイル単位の TTL キャッシュ）で行い、
+        未接続ドライブのファイルは stat せずにスキップする。
+        抽選は `fate_index` の未判定候補プール（ID とパスのみ）から一様に行い、選んだ n 件の行だけを取得する
+        （全件の ORDER BY RANDOM() はしない）。接続済みドライブの動画が少数でも、プール全体から拾う。
         """
-        with get_db_connection() as conn:
-            rows = conn.execute(
-                """
-                SELECT * FROM videos
-                WHERE current_favorite_level = -1
-                  AND is_available = 1
-                  AND is_deleted = 0
-                  AND needs_selection = 0
-                  AND is_selection_completed = 0
-                ORDER BY RANDOM()
-                """,
-            ).fetchall()
-
-        # ドライブ単位の存在確認を 1 回のみ実行（未接続ドライブのファイルを高速スキップ）
-        drive_cache: dict = {}
-
-        result = []
-        for row in rows:
-            video = video_from_row(row)
-            path = Path(video.current_full_path)
-            drive = path.drive  # "C:", "D:" など
-            if drive not in drive_cache:
-                drive_cache[drive] = Path(drive + "/").exists()
-            if not drive_cache[drive]:
-                continue
-            if path.exists():
-                result.append(video)
-                if len(result) >= n:
-                    break
+        load = _fate_pool_loader(_UNRATED_CANDIDATE_WHERE, [])
+        result: List[Video] = []
+        exclude = set()
+        while len(result) < n:
+            ids = fate_index.sample_uniform(
+                _UNRATED_FATE_POOL,
+                load,
+                self._recently_unwatched_weight,
+                n - len(result),
+                lambda video_id, path: video_id not in exclude and availability_cache.exists(path),
+            )
+            if not ids:
+                break
+            exclude.update(ids)
+            rows = {}
+            with get_db_connection() as conn:
+                for i in range(0, len(ids), _SQLITE_VAR_LIMIT):
+                    chunk = ids[i : i + _SQLITE_VAR_LIMIT]
+                    placeholders = ",".join("?" * len(chunk))
+                    for row in conn.execute(
+                        f"SELECT * FROM videos WHERE id IN ({placeholders}) AND {_UNRATED_CANDIDATE_WHERE}",
+                        chunk,
+                    ):
+                        rows[row["id"]] = row
+            for video_id in ids:
+                if video_id in rows:
+                    result.append(video_from_row(rows[video_id]))
+                else:
+                    # プール作成後に候補から外れていた（フック漏れ）。除いて不足分を引き直す
+                    fate_index.discard(video_id)
         return result
 
     def get_unrated_fate_video(
@@ -276,30 +621,15 @@ class VideoManager:
             videos = self.get_unrated_random_videos(1)
             return videos[0] if videos else None
 
+        return self._pick_recently_unwatched(_UNRATED_FATE_POOL, _UNRATED_CANDIDATE_WHERE, [], check_exists=True)
+
+    def get_unrated_candidate_paths(self) -> List[str]:
+        """Tier1 運命の1本 / ランダム取得の候補パス（存在確認キャッシュの事前確認用）。"""
         with get_db_connection() as conn:
             rows = conn.execute(
-                """
-                SELECT * FROM videos
-                WHERE current_favorite_level = -1
-                  AND is_available = 1
-                  AND is_deleted = 0
-                  AND needs_selection = 0
-                  AND is_selection_completed = 0
-                """
+                f"SELECT current_full_path FROM videos WHERE {_UNRATED_CANDIDATE_WHERE}"
             ).fetchall()
-
-        drive_cache: dict = {}
-        videos = []
-        for row in rows:
-            video = video_from_row(row)
-            path = Path(video.current_full_path)
-            drive = path.drive
-            if drive not in drive_cache:
-                drive_cache[drive] = Path(drive + "/").exists()
-            if drive_cache[drive] and path.exists():
-                videos.append(video)
-
-        return self._choose_by_recently_unwatched_priority(videos) if videos else None
+        return [row[0] for row in rows]
 
     def play_video(
         self,
@@ -323,7 +653,7 @@ class VideoManager:
         Returns:
             Dict: 実行結果 {'status': 'success'|'error', 'message': '...'}
         """
-        with get_db_connection() as conn:
+        with get_db_write_connection() as conn:
             cursor = conn.execute(
                 "SELECT * FROM videos WHERE id = ?",
                 (video_id,)
@@ -340,6 +670,8 @@ class VideoManager:
 
             if not file_path.exists():
                 # ファイルが見つからない場合、is_available=0 に更新
+                availability_cache.mark(str(file_path), False)
+                fate_index.discard(video_id)
                 conn.execute(
                     "UPDATE videos SET is_available = 0 WHERE id = ?",
                     (video_id,)
@@ -367,6 +699,7 @@ class VideoManager:
                 """,
                 (video_id, viewed_at, VIEWING_METHOD_APP_PLAYBACK)
             )
+            fate_index.record_view(video_id, viewed_at)
             if player is not None:
                 insert_play_history(
                     file_path=str(file_path),
@@ -398,7 +731,7 @@ class VideoManager:
         judged_at = datetime.now()
         target_level = -1 if new_level is None else new_level
 
-        with get_db_connection() as conn:
+        with get_db_write_connection() as conn:
             row = conn.execute("SELECT * FROM videos WHERE id = ?", (video_id,)).fetchone()
             if not row:
                 return {'status': 'error', 'message': '動画が見つかりません'}
@@ -407,6 +740,8 @@ class VideoManager:
             current_path = Path(video.current_full_path)
 
             if not current_path.exists():
+                availability_cache.mark(str(current_path), False)
+                fate_index.discard(video_id)
                 conn.execute("UPDATE videos SET is_available = 0 WHERE id = ?", (video_id,))
                 logger.warning(
                     "operation=judgment video_id=%d reason=file_not_found", video_id
@@ -465,6 +800,8 @@ class VideoManager:
             try:
                 if new_path != current_path:
                     current_path.rename(new_path)
+                    availability_cache.mark(str(current_path), False)
+                    availability_cache.mark(str(new_path), True)
 
                 conn.execute(
                     """
@@ -486,6 +823,11 @@ class VideoManager:
                         video_id,
                     ),
                 )
+                if new_needs_selection or (db_level == -1 and not new_is_selection_completed):
+                    # 未判定・未選別の候補に加わり得るため、運命の1本の候補プールを作り直させる
+                    fate_index.invalidate()
+                else:
+                    fate_index.discard(video_id)
 
                 rename_completed_at = datetime.now()
                 rename_duration_ms = int((rename_completed_at - judged_at).total_seconds() * 1000)
@@ -554,7 +896,7 @@ class VideoManager:
 
     def unselect_video(self, video_id: int) -> Dict[str, str]:
         """Tier2: レベルを維持したまま needs_selection=1 に戻す（ファイル先頭に ! を付与）。"""
-        with get_db_connection() as conn:
+        with get_db_write_connection() as conn:
             row = conn.execute("SELECT * FROM videos WHERE id = ?", (video_id,)).fetchone()
             if not row:
                 return {"status": "error", "message": "動画が見つかりません"}
@@ -562,6 +904,8 @@ class VideoManager:
             video = self._row_to_video(row)
             current_path = Path(video.current_full_path)
             if not current_path.exists():
+                availability_cache.mark(str(current_path), False)
+                fate_index.discard(video_id)
                 conn.execute("UPDATE videos SET is_available = 0 WHERE id = ?", (video_id,))
                 logger.warning("operation=unselect video_id=%d reason=file_not_found", video_id)
                 return {"status": "error", "message": "ファイルが見つかりません。移動または削除された可能性があります"}
@@ -580,12 +924,15 @@ class VideoManager:
             try:
                 if current_path != new_path:
                     current_path.rename(new_path)
+                    availability_cache.mark(str(current_path), False)
+                    availability_cache.mark(str(new_path), True)
 
                 conn.execute(
                     "UPDATE videos SET current_full_path=?, needs_selection=1, "
                     "is_selection_completed=0, last_scanned_at=CURRENT_TIMESTAMP WHERE id=?",
                     (str(new_path), video_id),
                 )
+                fate_index.invalidate()
             except PermissionError:
                 return {"status": "error", "message": "ファイルが使用中、またはアクセス権がありません"}
             except Exception as e:
@@ -595,7 +942,7 @@ class VideoManager:
 
     def toggle_watch_later(self, video_id: int) -> bool:
         """watch_later フラグを反転して新しい値を返す。動画不在は KeyError。"""
-        with get_db_connection() as conn:
+        with get_db_write_connection() as conn:
             rowcount = conn.execute(
                 "UPDATE videos SET watch_later = 1 - watch_later WHERE id = ? AND is_deleted = 0",
                 (video_id,),
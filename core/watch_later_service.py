@@ -5,19 +5,19 @@ ClipBox - あとで見る状態の共通更新サービス。
     watch_later の一括解除と、判定済み/選別済み動画に対する条件付き自動解除を提供する。
 
 【設計制約】
-- DB 接続は呼び出し元のトランザクションを受け取るか、get_db_connection() 経由で作成する。
+- DB 接続は呼び出し元のトランザクションを受け取るか、get_db_write_connection()（書き込みキュー）経由で作成する。
 - `needs_selection=1` の Tier2 未選別は、レベル値が 0..4 でも処理済み扱いにしない。
 - API/画面の状態永続先は変更しない。watch_later は DB 永続。
 
 【依存関係】
-core.watch_later_service → core.database.get_db_connection
+core.watch_later_service → core.database.get_db_write_connection
 """
 
 from __future__ import annotations
 
 from typing import Iterable
 
-from core.database import get_db_connection
+from core.database import get_db_write_connection
 
 
 _SQLITE_VAR_LIMIT = 900
@@ -58,7 +58,7 @@ def clear_watch_later_for_ids(video_ids: Iterable[int]) -> int:
         return 0
 
     updated_count = 0
-    with get_db_connection() as conn:
+    with get_db_write_connection() as conn:
         for chunk in _chunks(ids):
             placeholders = ",".join("?" for _ in chunk)
             cursor = conn.execute(
@@ -18,6 +18,7 @@ import type {
   ResponseTimeItem,
   RuntimeServiceName,
   RuntimeStatusResponse,
+  ScanJob,
   ScanLibraryResponse,
   ScanSelectionResponse,
   SelectionDistributionItem,
@@ -285,6 +286,48 @@ export function scanLibrary(): Promise<ScanLibraryResponse> {
   return request<ScanLibraryResponse>(`/scan/library`, { method: "POST" });
 }
 
+export function startScanJob(incremental = false): Promise<ScanJob> {
+  return request<ScanJob>(`/scan/jobs?incremental=${incremental}`, { method: "POST" });
+}
+
+export function getScanJob(id: string): Promise<ScanJob> {
+  return request<ScanJob>(`/scan/jobs/${encodeURIComponent(id)}`);
+}
+
+export function cancelScanJob(id: string): Promise<ScanJob> {
+  return request<ScanJob>(`/scan/jobs/${encodeURIComponent(id)}`, { method: "DELETE" });
+}
+
+// 進捗ストリーム（NDJSON）を読み、1 行ごとに onProgress を呼ぶ。完了状態を返す。
+export async function watchScanJob(
+  id: string,
+  onProgress: (job: ScanJob) => void,
+  signal?: AbortSignal,
+): Promise<ScanJob> {
+  const res = await fetch(`${API_BASE}/scan/jobs/${encodeURIComponent(id)}/events`, { signal });
+  if (!res.ok || !res.body) {
+    return getScanJob(id);
+  }
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  let last: ScanJob | null = null;
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+    let newline: number;
+    while ((newline = buffer.indexOf("\n")) >= 0) {
+      const line = buffer.slice(0, newline).trim();
+      buffer = buffer.slice(newline + 1);
+      if (line) {
+        last = JSON.parse(line) as ScanJob;
+        onProgress(last);
+      }
+    }
+  }
+  return last ?? getScanJob(id);
+}
+
 export function scanSelection(folder?: string): Promise<ScanSelectionResponse> {
   return request<ScanSelectionResponse>(`/scan/selection`, {
     method: "POST",
@@ -28,6 +28,8 @@ export interface VideosResponse {
   total: number;
   page: number;
   page_size: number;
+  // 次ページ取得用の不透明カーソル（cursor= に渡す）。最終ページでは null。
+  next_cursor?: string | null;
 }
 
 // POST /api/videos/by-ids のレスポンス。items は入力順保持・削除済み含む。
@@ -148,6 +150,7 @@ export interface VideoListParams {
   order?: SortOrder;
   page?: number;
   page_size?: number;
+  cursor?: string;
 }
 
 export interface WatchLaterResponse {
@@ -174,6 +177,7 @@ export interface SelectionVideoListParams {
   order?: SortOrder;
   page?: number;
   page_size?: number;
+  cursor?: string;
 }
 
 export type AnalysisPeriodPreset =
@@ -272,6 +276,24 @@ export interface ScanLibraryResponse {
   message: string;
 }
 
+export type ScanJobStatus = "pending" | "running" | "succeeded" | "failed" | "cancelled";
+
+export interface ScanJob {
+  id: string;
+  status: ScanJobStatus;
+  incremental: boolean;
+  message: string | null;
+  created_at: string;
+  finished_at: string | null;
+  elapsed_ms: number;
+  dirs_visited: number;
+  files_seen: number;
+  files_processed: number;
+  inserted: number;
+  updated: number;
+  marked_unavailable: number;
+}
+
 export interface ScanSelectionResponse {
   status: string;
   message: string;
@@ -0,0 +1,57 @@
+"""videos / viewing_history / judgment_history / likes を Parquet / Arrow IPC のスナップショットに書き出す。
+
+【役割】
+  オフライン分析（docs/analysis のノートブック等）が DB のコピーを毎回 SQL で読み直さずに済むよう、
+  型付きの列指向ファイルを書き出す。履歴 3 表は前回の続き（id の watermark より後ろ）だけを追記し、
+  videos は毎回全件を書き直す。読み込みは `app_service.read_snapshot`（Arrow IPC は memory-map）。
+
+【設計制約】
+  - streamlit を import しない（core.app_service 経由のみ）。
+  - DB は読み取りのみ。API 稼働中でも実行できる（バッチごとに接続を借りて返す）。
+  - pyarrow は任意依存（requirements/dev.txt）。無ければ終了コード 1。
+
+【依存関係】
+  config → core.database → core.export_service → core.app_service
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def main() -> int:
+    from core import app_service
+
+    parser = argparse.ArgumentParser(description="列指向スナップショット（Parquet / Arrow IPC）を書き出す")
+    parser.add_argument("--format", choices=("parquet", "arrow"), default="parquet", help="出力形式")
+    parser.add_argument(
+        "--table", action="append", choices=sorted(app_service.SNAPSHOT_TABLES), help="書き出す表（複数指定可。省略時は全表）"
+    )
+    parser.add_argument("--full", action="store_true", help="履歴も全件を書き直す（削除された履歴を反映する）")
+    parser.add_argument("--dir", type=Path, default=None, help="出力先（省略時は config.SNAPSHOT_EXPORT_DIR）")
+    args = parser.parse_args()
+
+    if not app_service.check_database_exists():
+        print("ERROR: database not found. Run scripts/run_migrations.py first.")
+        return 1
+    try:
+        results = app_service.export_snapshots(args.format, args.table, args.full, args.dir)
+    except app_service.SnapshotUnavailable as e:
+        print(f"ERROR: {e}")
+        return 1
+    for table, result in results.items():
+        print(
+            f"{table}: rows={result['rows']} watermark={result['watermark']}"
+            f" parts={result['parts']} size_bytes={result['size_bytes']}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""集計表（動画ごとの video_stats と推移の日次ロールアップ）を基表から作り直す修復スクリプト。
+
+【役割】
+  video_stats（視聴回数・最終視聴日時・視聴日数・いいね数・Tier 別最新判定日時）と
+  viewing_daily / likes_daily / judgment_daily（推移グラフ用）は、viewing_history / likes /
+  judgment_history / videos のトリガーで書き込みと同じトランザクション内に保守される。
+  トリガーを経由しない手作業の修正（別ツールでの直接編集など）や、ローカル日付の基準となる
+  タイムゾーンの変更でずれた場合に、本スクリプトで作り直す。
+
+【設計制約】
+  - streamlit を import しない（core.app_service 経由のみ）。
+  - 書き込みは集計表ごとに get_db_write_connection() の 1 トランザクションで行う（途中失敗時は元の表のまま）。
+  - API 稼働中でも実行できる（書き込みキューで他の書き込みと直列化される）。
+
+【依存関係】
+  config → core.database → core.app_service
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def main() -> int:
+    from core import app_service
+
+    if not app_service.check_database_exists():
+        print("ERROR: database not found. Run scripts/run_migrations.py first.")
+        return 1
+    app_service.init_database()
+    rows = app_service.rebuild_video_stats()
+    print(f"video_stats rebuilt: rows={rows}")
+    for table, count in app_service.rebuild_trend_rollups().items():
+        print(f"{table} rebuilt: rows={count}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,8 +3,8 @@ ClipBox API テスト共通フィクスチャ。
 
 - client: tmp_db 前提の FastAPI TestClient。
 - api_isolation: config_utils が import 時に束縛する SCAN_DIRECTORIES / DATABASE_PATH と
-  CONFIG_PATH、および config.BACKUP_DIR を tmp に寄せ、PUT /config・POST /backup・scan の
-  書き込みを本番 data/ から完全隔離する（tmp_db は DB パスのみ patch するため不足）。
+  CONFIG_PATH、および config.BACKUP_DIR / SNAPSHOT_EXPORT_DIR を tmp に寄せ、PUT /config・POST /backup・
+  POST /snapshots・scan の書き込みを本番 data/ から完全隔離する（tmp_db は DB パスのみ patch するため不足）。
 """
 
 import pytest
@@ -23,6 +23,7 @@ def api_isolation(tmp_db, tmp_path, monkeypatch):
     monkeypatch.setattr(config_utils, "SCAN_DIRECTORIES", [library_dir])
     monkeypatch.setattr(config_utils, "DATABASE_PATH", tmp_db)
     monkeypatch.setattr(config, "BACKUP_DIR", tmp_path / "backups")
+    monkeypatch.setattr(config, "SNAPSHOT_EXPORT_DIR", tmp_path / "exports")
     return tmp_path
 
 
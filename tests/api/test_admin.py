@@ -102,6 +102,17 @@ def test_scan_library_succeeds(client, tmp_path):
     assert body["status"] == "success"
 
 
+def test_scan_library_incremental_succeeds(client, tmp_path):
+    """incremental=true でも未変更の再スキャンで動画が利用可能のまま残る。"""
+    (tmp_path / "library" / "vid.mp4").write_text("x")
+    assert client.post("/api/backup").status_code == 200
+    assert client.post("/api/scan/library").json()["status"] == "success"
+    body = client.post("/api/scan/library", params={"incremental": "true"}).json()
+    assert body["status"] == "success"
+    items = client.get("/api/videos").json()["items"]
+    assert [it["essential_filename"] for it in items] == ["vid.mp4"]
+
+
 def test_scan_library_409_without_recent_backup(client, tmp_path):
     """直近バックアップが無ければライブラリスキャンは 409。"""
     (tmp_path / "library" / "vid.mp4").write_text("x")
@@ -166,6 +177,113 @@ def test_scan_library_error_maps_500(client, monkeypatch):
     """事前バックアップ要件を満たした上で scan_library が status:error を返したら 500 に寄せる。"""
     from core import app_service
     monkeypatch.setattr(app_service, "has_recent_backup", lambda hours=24: True)
-    monkeypatch.setattr(app_service, "scan_library", lambda: {"status": "error", "message": "boom"})
+    monkeypatch.setattr(app_service, "scan_library", lambda **_: {"status": "error", "message": "boom"})
     r = client.post("/api/scan/library")
     assert r.status_code == 500
+
+
+def test_scan_job_streams_progress_until_finished(client, tmp_path):
+    """POST /scan/jobs は 202 でジョブを返し、events は完了状態で閉じる NDJSON を流す。"""
+    import json
+
+    (tmp_path / "library" / "vid.mp4").write_text("x")
+    assert client.post("/api/backup").status_code == 200
+    r = client.post("/api/scan/jobs")
+    assert r.status_code == 202
+    job_id = r.json()["id"]
+
+    with client.stream("GET", f"/api/scan/jobs/{job_id}/events") as stream:
+        assert stream.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in stream.iter_lines() if line]
+    final = lines[-1]
+    assert final["status"] == "succeeded"
+    assert final["files_seen"] == 1
+    assert final["inserted"] == 1
+
+    body = client.get(f"/api/scan/jobs/{job_id}").json()
+    assert body["status"] == "succeeded"
+    assert [job["id"] for job in client.get("/api/scan/jobs").json()][0] == job_id
+    items = client.get("/api/videos").json()["items"]
+    assert [it["essential_filename"] for it in items] == ["vid.mp4"]
+
+
+def test_scan_job_409_without_recent_backup(client):
+    assert client.post("/api/scan/jobs").status_code == 409
+
+
+def test_scan_job_unknown_id_404(client):
+    assert client.get("/api/scan/jobs/nope").status_code == 404
+    assert client.get("/api/scan/jobs/nope/events").status_code == 404
+    assert client.delete("/api/scan/jobs/nope").status_code == 404
+
+
+def test_snapshot_status_and_export(client):
+    """GET /snapshots は pyarrow なしで状況を返す。POST は pyarrow が無ければ 503、未知の表は 422。"""
+    from core import export_service
+
+    status = client.get("/api/snapshots").json()
+    assert status["format"] == "parquet"
+    assert status["tables"]["videos"] == {"rows": 0, "watermark": 0, "parts": 0, "size_bytes": 0}
+
+    assert client.post("/api/snapshots", params={"table": "videos,nope"}).status_code == 422
+    response = client.post("/api/snapshots", params={"format": "arrow", "table": "likes"})
+    if export_service.pa is None:
+        assert response.status_code == 503
+    else:
+        assert response.status_code == 200
+        assert list(response.json()["tables"]) == ["likes"]
+
+
+def test_library_watcher_apply_uses_scan_jobs_and_backup_guard(client, tmp_path, monkeypatch):
+    """監視の反映はバックアップが無ければ見送り、スキャンジョブ経由で実行し、実行中のジョブがあれば見送る。"""
+    from core import app_service
+    from core.scan_jobs import ScanJob, ScanJobConflict
+
+    (tmp_path / "library" / "vid.mp4").write_text("x")
+    assert app_service._apply_library_changes() is False
+    assert client.get("/api/videos").json()["items"] == []
+
+    assert client.post("/api/backup").status_code == 200
+    assert app_service._apply_library_changes() is True
+    assert [it["essential_filename"] for it in client.get("/api/videos").json()["items"]] == ["vid.mp4"]
+    latest = client.get("/api/scan/jobs").json()[0]
+    assert (latest["status"], latest["incremental"]) == ("succeeded", True)
+
+    def _conflict(incremental=False):
+        raise ScanJobConflict(ScanJob(incremental))
+
+    monkeypatch.setattr(app_service, "start_scan_job", _conflict)
+    assert app_service._apply_library_changes() is False
+    assert client.post("/api/scan/library").json()["detail"].startswith("スキャンジョブが実行中です")
+
+
+def test_scan_job_cancel_after_library_commit_reports_success(client, tmp_path, monkeypatch):
+    """ライブラリ反映のコミット後に中止されても、ジョブは成功で終わり DB の状態と一致する。"""
+    from core import app_service
+    from core.database import get_db_connection
+
+    library = tmp_path / "library"
+    selection = tmp_path / "selection"
+    selection.mkdir()
+    (library / "vid.mp4").write_text("x")
+    (selection / "!pick.mp4").write_text("x")
+    client.put(
+        "/api/config",
+        json={"library_roots": [str(library)], "selection_folder": str(selection)},
+    )
+    assert client.post("/api/backup").status_code == 200
+
+    original = app_service.scan_and_update_with_connection
+
+    def _scan_then_cancel(scanner, incremental=False):
+        original(scanner, incremental=incremental)
+        app_service.cancel_scan_job(app_service.list_scan_jobs()[0].id)
+
+    monkeypatch.setattr(app_service, "scan_and_update_with_connection", _scan_then_cancel)
+    job = app_service._run_scan_job_and_wait(incremental=False)
+
+    assert (job.status, job.message) == ("succeeded", None)
+    assert job.progress.cancel_requested
+    with get_db_connection() as conn:
+        rows = conn.execute("SELECT essential_filename, is_available FROM videos ORDER BY essential_filename").fetchall()
+    assert [tuple(row) for row in rows] == [("pick.mp4", 1), ("vid.mp4", 1)]
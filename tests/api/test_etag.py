@@ -0,0 +1,71 @@
+"""
+ClipBox API - 条件付き GET（弱い ETag / If-None-Match → 304）と Cache-Control のテスト。
+"""
+
+from core.database import get_db_connection
+
+
+def _insert(essential):
+    with get_db_connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO videos (essential_filename, current_full_path, current_favorite_level,
+                                storage_location, is_available, is_deleted)
+            VALUES (?, ?, 1, 'C_DRIVE', 1, 0)
+            """,
+            (essential, f"C:/videos/###_{essential}"),
+        )
+        return conn.execute(
+            "SELECT id FROM videos WHERE essential_filename = ?", (essential,)
+        ).fetchone()[0]
+
+
+def test_read_endpoint_returns_weak_etag_and_304(client):
+    """read 系は弱い ETag を返し、一致する If-None-Match には本文なしの 304 を返す。"""
+    _insert("a.mp4")
+    first = client.get("/api/stats/view-counts")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    second = client.get("/api/stats/view-counts", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+
+    # 強い比較形式・複数候補でも一致とみなす
+    strong = etag[2:]
+    assert client.get("/api/stats/kpi", headers={"If-None-Match": f'"x", {strong}'}).status_code == 304
+
+
+def test_write_changes_etag(client):
+    """書き込み（いいね）の後は ETag が変わり、古い ETag では 200 で新しい内容が返る。"""
+    vid = _insert("a.mp4")
+    before = client.get("/api/likes", params={"video_ids": str(vid)})
+    etag = before.headers["etag"]
+
+    liked = client.post(f"/api/videos/{vid}/like")
+    assert liked.headers["cache-control"] == "no-store"
+    assert "etag" not in liked.headers
+
+    after = client.get("/api/likes", params={"video_ids": str(vid)}, headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.json() == {str(vid): 1}
+    assert after.headers["etag"] != etag
+
+
+def test_config_save_changes_etag(client):
+    """設定保存でもデータ世代が進み、ETag が変わる。"""
+    etag = client.get("/api/videos").headers["etag"]
+    cfg = client.get("/api/config").json()
+    assert client.put("/api/config", json=cfg).status_code == 200
+    assert client.get("/api/videos", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_random_endpoints_are_no_store(client):
+    """ランダム抽選はデータ世代で内容が決まらないため ETag を付けず no-store。"""
+    _insert("a.mp4")
+    response = client.get("/api/videos/unrated/random")
+    assert response.headers["cache-control"] == "no-store"
+    assert "etag" not in response.headers
@@ -0,0 +1,131 @@
+"""
+ClipBox API - 全件エクスポート（NDJSON / CSV ストリーミング）のテスト。
+
+通常エンドポイントと同じ内容になること、CSV のヘッダ・空欄、ETag の付与を検証する。
+"""
+
+import csv
+import io
+import json
+
+from api._video_json import FIELDS
+from core.database import get_db_connection
+
+
+def _seed():
+    """videos 3 本（1 本は論理削除）と視聴・判定履歴を投入する。"""
+    with get_db_connection() as conn:
+        conn.executemany(
+            "INSERT INTO videos (id, essential_filename, current_full_path, current_favorite_level,"
+            " storage_location, is_available, is_deleted, file_created_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (1, "a.mp4", "C:/x/###_a.mp4", 3, "C_DRIVE", 1, 0, "2026-01-01"),
+                (2, "b.mp4", "C:/x/b.mp4", -1, "EXTERNAL_HDD", 0, 0, None),
+                (3, "c.mp4", "C:/x/c.mp4", 1, "C_DRIVE", 1, 1, None),
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO viewing_history (video_id, viewed_at, viewing_method) VALUES (?, ?, ?)",
+            [
+                (1, "2026-01-10 10:00:00", "APP_PLAYBACK"),
+                (1, "2026-01-11 10:00:00", "APP_PLAYBACK"),
+                (2, "2026-01-12 10:00:00", "APP_PLAYBACK"),
+                (1, "2026-01-13 10:00:00", "MANUAL_ENTRY"),
+            ],
+        )
+        conn.execute(
+            "INSERT INTO judgment_history (video_id, new_level, judged_at, was_selection_judgment)"
+            " VALUES (1, 3, '2026-01-09 09:00:00', 0)"
+        )
+
+
+def _ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def _csv(response):
+    return list(csv.DictReader(io.StringIO(response.text)))
+
+
+def test_videos_export_matches_search(client):
+    """/videos/export は /videos/search と同じ要素を id 順に 1 行ずつ返す。"""
+    _seed()
+    response = client.get("/api/videos/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == 'attachment; filename="videos.ndjson"'
+
+    searched = sorted(client.get("/api/videos/search").json(), key=lambda v: v["id"])
+    assert _ndjson(response) == searched
+    assert [v["id"] for v in searched] == [1, 2]
+
+
+def test_videos_export_csv_with_fields(client):
+    """format=csv は 1 行目がヘッダ（fields 指定時はその項目のみ）、None は空欄。"""
+    _seed()
+    response = client.get(
+        "/api/videos/export", params={"format": "csv", "fields": "essential_filename,file_created_at"}
+    )
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert response.text.splitlines()[0] == "id,essential_filename,file_created_at"
+    assert _csv(response) == [
+        {"id": "1", "essential_filename": "a.mp4", "file_created_at": "2026-01-01"},
+        {"id": "2", "essential_filename": "b.mp4", "file_created_at": ""},
+    ]
+
+    # 0 件でもヘッダは返す。未知の項目は一覧と同じく 422
+    empty = client.get("/api/videos/export", params={"format": "csv", "keyword": "zzz"})
+    assert empty.text.splitlines() == [",".join(FIELDS)]
+    assert client.get("/api/videos/export", params={"fields": "nope"}).status_code == 422
+
+
+def test_analysis_data_export_matches_items(client):
+    """/analysis/data/export は /analysis/data の items と同じ行（期間・スコープ連動）。"""
+    _seed()
+    for params in (
+        {},
+        {"include_deleted": "true", "availability": "利用可能のみ"},
+        {"period": "カスタム", "start": "2026-01-11", "end": "2026-01-31"},
+    ):
+        items = client.get("/api/analysis/data", params=params).json()["items"]
+        exported = _ndjson(client.get("/api/analysis/data/export", params=params))
+        assert exported == sorted(items, key=lambda r: r["id"]), params
+
+    custom = {"period": "カスタム", "start": "2026-01-11", "end": "2026-01-31"}
+    by_id = {r["id"]: r for r in _ndjson(client.get("/api/analysis/data/export", params=custom))}
+    assert by_id[1]["period_view_count"] == 1
+    assert client.get("/api/analysis/data/export", params={"period": "カスタム"}).status_code == 422
+
+
+def test_history_exports(client):
+    """履歴は video_ids 省略で全動画、指定時はその動画だけ。期間で絞れる。"""
+    _seed()
+    rows = _ndjson(client.get("/api/analysis/viewing-history/export"))
+    assert [(r["video_id"], r["viewed_at"]) for r in rows] == [
+        (1, "2026-01-10 10:00:00"),
+        (1, "2026-01-11 10:00:00"),
+        (2, "2026-01-12 10:00:00"),
+        (1, "2026-01-13 10:00:00"),
+    ]
+    filtered = client.get(
+        "/api/analysis/viewing-history/export",
+        params={"video_ids": "2", "start": "2026-01-01T00:00:00", "format": "csv"},
+    )
+    assert [(r["video_id"], r["viewed_at"]) for r in _csv(filtered)] == [("2", "2026-01-12 10:00:00")]
+
+    judged = _ndjson(client.get("/api/analysis/judgment-history/export"))
+    assert [(r["video_id"], r["judged_at"]) for r in judged] == [(1, "2026-01-09 09:00:00")]
+
+
+def test_view_counts_export_and_etag(client):
+    """視聴回数は /stats/view-counts と同じ値。エクスポートにも ETag が付き 304 を返す。"""
+    _seed()
+    response = client.get("/api/stats/view-counts/export", params={"format": "csv"})
+    counts = client.get("/api/stats/view-counts").json()
+    assert {r["video_id"]: int(r["view_count"]) for r in _csv(response)} == counts
+
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+    again = client.get("/api/stats/view-counts/export", headers={"If-None-Match": etag})
+    assert again.status_code == 304
@@ -206,3 +206,36 @@ def test_list_videos_sort_judged_at_tail_stable(tmp_db, tmp_path):
 
     assert [it["essential_filename"] for it in desc["items"]] == ["beta.mp4", "alpha.mp4", "gamma.mp4"]
     assert [it["essential_filename"] for it in asc["items"]] == ["alpha.mp4", "beta.mp4", "gamma.mp4"]
+
+
+def test_list_videos_cursor_walks_all_pages(tmp_db, tmp_path):
+    """cursor=next_cursor で辿ると OFFSET ページングと同じ並びを重複なく返す。"""
+    for i in range(7):
+        _insert_video(f"v{i}.mp4", str(tmp_path / f"v{i}.mp4"), i % 3, "P")
+    client = TestClient(app)
+    params = {"sort": "title", "order": "desc", "page_size": 3}
+
+    expected = [it["id"] for it in client.get("/api/videos", params={**params, "page_size": 100}).json()["items"]]
+
+    walked, cursor = [], None
+    while True:
+        body = client.get("/api/videos", params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        assert body["total"] == 7
+        walked.extend(it["id"] for it in body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert walked == expected
+
+
+def test_list_videos_cursor_rejects_mismatch_and_garbage(tmp_db, tmp_path):
+    """別の並び順のカーソル・壊れたカーソルは 422。"""
+    for i in range(3):
+        _insert_video(f"v{i}.mp4", str(tmp_path / f"v{i}.mp4"), 1, "P")
+    client = TestClient(app)
+
+    cursor = client.get("/api/videos", params={"sort": "title", "page_size": 1}).json()["next_cursor"]
+    assert cursor
+
+    assert client.get("/api/videos", params={"sort": "favorite_level", "cursor": cursor}).status_code == 422
+    assert client.get("/api/videos", params={"cursor": "not-a-cursor"}).status_code == 422
@@ -343,3 +343,71 @@ def test_selection_folder_boundary_excludes_sibling(client, tmp_path):
         params={"folder": str(sel), "status": "unselected"},
     ).json()
     assert {it["essential_filename"] for it in lst["items"]} == {"a.mp4"}
+
+
+def test_list_videos_fields_projection(client):
+    """fields 指定時は指定項目（+ id）だけを返し、派生値も求められる。ETag も付く。"""
+    a = _insert("a.mp4", "C:/x/+###_a.mp4", 3, sel_done=1)
+    _insert("b.mp4", "C:/x/b.mp4", -1)
+
+    full = client.get("/api/videos", params={"sort": "title"}).json()
+    response = client.get(
+        "/api/videos", params={"sort": "title", "fields": "current_full_path,is_judged,is_selection_completed"}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"].startswith('W/"')
+    body = response.json()
+    assert {k: body[k] for k in ("total", "page", "page_size", "next_cursor")} == {
+        k: full[k] for k in ("total", "page", "page_size", "next_cursor")
+    }
+    assert body["items"][0] == {
+        "id": a,
+        "current_full_path": "C:/x/+###_a.mp4",
+        "is_judged": True,
+        "is_selection_completed": True,
+    }
+    assert body["items"][1]["is_judged"] is False
+
+    ids_only = client.get("/api/videos/search", params={"keyword": "", "fields": "id"}).json()
+    assert sorted(item["id"] for item in ids_only) == sorted(item["id"] for item in full["items"])
+    assert all(set(item) == {"id"} for item in ids_only)
+
+
+def test_list_videos_unknown_field_422(client):
+    assert client.get("/api/videos", params={"fields": "id,bogus"}).status_code == 422
+
+
+def test_bulk_video_json_matches_video_out():
+    """一括 JSON 化の要素は VideoOut.from_video の JSON と同じ（項目順・日時の文字列化・派生値）。"""
+    import json
+    from datetime import datetime
+
+    from api._video_json import json_response, video_dicts
+    from api.schemas import VideoOut
+    from core.models import Video
+    from fastapi import Response
+
+    videos = [
+        Video(
+            id=1, essential_filename="a.mp4", current_full_path="C:/x/+###_a.mp4", current_favorite_level=3,
+            file_size=10, performer="P", storage_location="C_DRIVE",
+            last_file_modified=datetime(2024, 1, 2, 3, 4, 5), created_at="2024-01-01 00:00:00",
+            last_scanned_at=None, is_available=1, watch_later=0,
+        ),
+        Video(
+            id=2, essential_filename="b.mp4", current_full_path="C:/x/b.mp4", current_favorite_level=-1,
+            file_size=None, performer=None, storage_location="EXTERNAL_HDD",
+            last_file_modified=None, created_at=None, last_scanned_at=None, notes="n",
+        ),
+    ]
+    expected = [VideoOut.from_video(v).model_dump(mode="json") for v in videos]
+    assert video_dicts(videos) == expected
+    assert [list(item) for item in video_dicts(videos)] == [list(item) for item in expected]
+    assert video_dicts(videos, ("is_judged", "id")) == [{"id": 1, "is_judged": True}, {"id": 2, "is_judged": False}]
+
+    headers = Response()
+    headers.headers["ETag"] = 'W/"x"'
+    response = json_response(headers, {"items": video_dicts(videos)})
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["etag"] == 'W/"x"'
+    assert json.loads(response.body) == {"items": expected}
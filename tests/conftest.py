@@ -8,6 +8,9 @@ DB パスの差し替えをここで一元管理する。
 import pytest
 import config
 import core.database as database
+from core.availability import availability_cache
+from core.fate_sampler import fate_index
+from core.query_cache import query_cache
 
 
 @pytest.fixture
@@ -27,4 +30,10 @@ def tmp_db(tmp_path, monkeypatch):
     monkeypatch.setattr(config, "DATABASE_PATH", db_path)
     monkeypatch.setattr(database, "DATABASE_PATH", db_path)
     database.init_database()
-    return db_path
+    yield db_path
+    # プール済み接続を閉じる（Windows で tmp ディレクトリを削除できるようにする）
+    database.close_db_pool()
+    # プロセス内の存在確認キャッシュ・運命の1本の候補プール・集計キャッシュを次のテストに持ち越さない
+    availability_cache.invalidate()
+    fate_index.invalidate()
+    query_cache.clear()
@@ -42,6 +42,171 @@ def test_df_row_to_video_carries_watch_later():
     assert analysis_service._df_row_to_video(row).watch_later is False
 
 
+def test_frame_to_videos_decodes_columns():
+    """列ごとの変換で Video を組み立てる（日時の書式混在・欠損・フラグの既定値）。"""
+    df = pd.DataFrame(
+        {
+            "id": [1, 2],
+            "essential_filename": ["a.mp4", "b.mp4"],
+            "current_full_path": ["C:/v/###_a.mp4", None],
+            "current_favorite_level": [3, -1],
+            "file_size": [10, None],
+            "storage_location": ["C_DRIVE", "EXTERNAL_HDD"],
+            "created_at": ["2024-01-02 03:04:05", "2024-01-02T03:04:05.123456"],
+            "file_created_at": [None, "not a date"],
+            "is_available": [1, 0],
+        }
+    )
+    first, second = analysis_service._frame_to_videos(df)
+
+    assert (first.id, first.current_full_path, first.file_size, first.is_available) == (1, "C:/v/###_a.mp4", 10, True)
+    assert first.created_at == datetime(2024, 1, 2, 3, 4, 5)
+    assert first.file_created_at is None and first.watch_later is False
+    assert second.created_at == datetime(2024, 1, 2, 3, 4, 5, 123456)
+    assert (second.current_full_path, second.file_size, second.file_created_at, second.is_available) == (
+        "",
+        None,
+        None,
+        False,
+    )
+
+
+def test_format_ranking_builds_display_columns():
+    """ランキング表の表示列（ファイル名・利用可否・作成日）を列演算で作る。"""
+    df = pd.DataFrame(
+        {
+            "essential_filename": ["a.mp4", "b.mp4", "c.mp4"],
+            "current_full_path": ["C:/v/###_a.mp4", "", None],
+            "is_available": [1, 0, None],
+            "storage_location": ["C_DRIVE", None, "EXTERNAL_HDD"],
+            "file_created_at": ["2024-05-06 07:08:09", None, "2024-05-07T00:00:00"],
+            "current_favorite_level": [3, 2, 1],
+            "period_view_count": [1, 5, 3],
+        }
+    )
+    ranking = analysis_service.get_view_count_ranking(df, top_n=2)
+
+    assert ranking.columns.tolist() == ["順位", "ファイル名", "利用可否", "保存場所", "ファイル作成日", "お気に入りレベル", "視聴回数"]
+    assert ranking.to_dict("records") == [
+        {"順位": 1, "ファイル名": "b.mp4", "利用可否": "利用不可", "保存場所": "", "ファイル作成日": "-", "お気に入りレベル": 2, "視聴回数": 5},
+        {"順位": 2, "ファイル名": "c.mp4", "利用可否": "不明", "保存場所": "EXTERNAL_HDD", "ファイル作成日": "2024-05-07", "お気に入りレベル": 1, "視聴回数": 3},
+    ]
+    assert analysis_service.get_view_count_ranking(df, top_n=1)["ファイル名"].tolist() == ["b.mp4"]
+    assert analysis_service.get_view_count_ranking(df.iloc[[0]], top_n=1)["ファイル名"].tolist() == ["###_a.mp4"]
+
+
+def _reference_ranking(ranking_type, period_start, min_level, availability):
+    """1 本の SQL に置き換える前と同じ定義（pandas で素点・スコアを計算）のランキング。"""
+    with db.get_db_connection() as conn:
+        videos = pd.read_sql_query("SELECT * FROM videos WHERE is_deleted = 0", conn)
+        views = pd.read_sql_query(
+            "SELECT video_id, viewed_at FROM viewing_history WHERE viewing_method = 'APP_PLAYBACK'", conn
+        )
+        likes = pd.read_sql_query("SELECT video_id, liked_at FROM likes", conn)
+    if availability != "すべて":
+        videos = videos[videos["is_available"] == (1 if availability == "利用可能のみ" else 0)]
+    if min_level is not None:
+        videos = videos[videos["current_favorite_level"] >= min_level]
+    last_viewed = views.groupby("video_id")["viewed_at"].max()
+    if period_start is not None:
+        views = views[views["viewed_at"] >= str(period_start)]
+        likes = likes[likes["liked_at"] >= str(period_start)]
+    count = views.groupby("video_id").size()
+    days = views.assign(day=views["viewed_at"].str[:10]).groupby("video_id")["day"].nunique()
+    like_count = likes.groupby("video_id").size()
+    scores = {}
+    for row in videos.itertuples():
+        n_days, n_likes = int(days.get(row.id, 0)), int(like_count.get(row.id, 0))
+        if ranking_type == "view_count":
+            score = int(count.get(row.id, 0))
+        elif ranking_type == "view_days":
+            score = n_days
+        elif ranking_type == "likes":
+            score = n_likes
+        else:
+            bonus = 1 + 0.5 * (row.current_favorite_level >= 0) + 0.3 * row.is_selection_completed
+            score = int(round((n_days + 3 * n_likes) * bonus * 100))
+        if score > 0:
+            scores[row.id] = (score, last_viewed.get(row.id, ""))
+    order = sorted(scores, key=lambda vid: (-scores[vid][0], _desc(scores[vid][1]), vid))
+    return [(vid, scores[vid][0]) for vid in order]
+
+
+def _desc(text):
+    return tuple(-ord(c) for c in text) + (1,)
+
+
+@pytest.mark.parametrize("ranking_type", ["view_count", "view_days", "likes", "composite"])
+def test_ranked_videos_sql_matches_reference(tmp_db, ranking_type):
+    """1 本の SQL のランキングが、スコープ・期間・同点順とも pandas での計算と一致する。"""
+    import random
+
+    rng = random.Random(7)
+    now = datetime.now()
+    with db.get_db_connection() as conn:
+        for vid in range(1, 41):
+            level = rng.choice([-1, 0, 2, 3, 4])
+            conn.execute(
+                """
+                INSERT INTO videos (id, essential_filename, current_full_path, current_favorite_level,
+                                    storage_location, is_available, is_deleted, is_selection_completed)
+                VALUES (?, ?, ?, ?, 'C_DRIVE', ?, ?, ?)
+                """,
+                (vid, f"v{vid}.mp4", f"C:/v/v{vid}.mp4", level, int(rng.random() < 0.8),
+                 int(rng.random() < 0.1), int(level >= 0 and rng.random() < 0.3)),
+            )
+        for _ in range(150):
+            viewed = (now - timedelta(days=rng.randint(0, 400), hours=rng.randint(0, 23))).replace(microsecond=0)
+            method = "APP_PLAYBACK" if rng.random() < 0.85 else "FILE_ACCESS_DETECTED"
+            conn.execute(
+                "INSERT INTO viewing_history (video_id, viewed_at, viewing_method) VALUES (?, ?, ?)",
+                (rng.randint(1, 40), viewed.isoformat(sep=" "), method),
+            )
+        for _ in range(60):
+            liked = (now - timedelta(days=rng.randint(0, 400))).replace(microsecond=0)
+            conn.execute(
+                "INSERT INTO likes (video_id, liked_at) VALUES (?, ?)", (rng.randint(1, 40), liked.isoformat(sep=" "))
+            )
+
+    cases = [("全期間", None, "すべて"), ("180日", None, "利用可能のみ"), ("1年", 3, "利用不可のみ")]
+    for period_label, min_level, availability in cases:
+        period_start = None if period_label == "全期間" else now - timedelta(days={"180日": 180, "1年": 365}[period_label])
+        expected = _reference_ranking(ranking_type, period_start, min_level, availability)[:15]
+        ranked = analysis_service.get_ranked_videos_for_tab(ranking_type, period_label, min_level, availability, 15)
+        assert [(video.id, score) for video, score in ranked] == expected, (period_label, min_level, availability)
+
+
+def test_history_and_period_counts_without_in_lists(tmp_db):
+    """900 件を超える id 指定（json_each）と scope のサブクエリ指定が、id 指定と同じ結果になる。"""
+    now = datetime.now().replace(microsecond=0)
+    with db.get_db_connection() as conn:
+        conn.executemany(
+            """
+            INSERT INTO videos (id, essential_filename, current_full_path, current_favorite_level,
+                                storage_location, is_available, is_deleted)
+            VALUES (?, ?, ?, 1, 'C_DRIVE', ?, ?)
+            """,
+            [(vid, f"v{vid}.mp4", f"v{vid}.mp4", int(vid % 3 != 0), int(vid % 7 == 0)) for vid in range(1, 1201)],
+        )
+        conn.executemany(
+            "INSERT INTO viewing_history (video_id, viewed_at, viewing_method) VALUES (?, ?, 'APP_PLAYBACK')",
+            [(vid, now - timedelta(days=vid % 40)) for vid in range(1, 1201, 2)],
+        )
+
+    history = analysis_service.get_viewing_history(None, None, list(range(1, 1201)))
+    assert len(history) == 600
+    assert history["viewed_at"].is_monotonic_increasing
+    assert analysis_service.get_viewing_history(None, None, [2, 4]).empty
+
+    scope = analysis_service.VideoScope(is_deleted_filter=0, availability="利用可能のみ")
+    df = analysis_service.apply_scope_filter(analysis_service.load_analysis_data(0), "利用可能のみ")
+    start = now - timedelta(days=10)
+    by_ids = analysis_service.calculate_period_view_count(df, start, now)
+    by_scope = analysis_service.calculate_period_view_count(df, start, now, scope)
+    assert by_ids["period_view_count"].tolist() == by_scope["period_view_count"].tolist()
+    assert 0 < by_scope["period_view_count"].sum() < len(df)
+
+
 def test_calculate_period_view_count_uses_period_range(tmp_db):
     now = datetime.now()
     with db.get_db_connection() as conn:
@@ -154,3 +319,105 @@ def test_get_like_count_ranking_period_filters_by_liked_at(tmp_db):
     )
     assert int(ranking_period["いいね数"].iloc[0]) == 1  # 直近30日: 1件のみ
 
+
+
+def _raw_trend(conn, table, col, extra, period_start, period_end, is_available, include_deleted, bucket, distinct=False):
+    """ロールアップを使わない基表集計（旧実装と同じ定義）。推移の突き合わせ用。"""
+    if bucket == "month":
+        label = f"strftime('%Y-%m', t.{col}, 'localtime')"
+    elif bucket == "week":
+        label = (
+            f"date(t.{col}, 'localtime', '-' || "
+            f"((cast(strftime('%w', t.{col}, 'localtime') as integer) + 6) % 7) || ' days')"
+        )
+    else:
+        label = f"DATE(t.{col}, 'localtime')"
+    where, params = analysis_service._trend_filters(
+        f"t.{col}", period_start, period_end, is_available, include_deleted
+    )
+    count = "COUNT(DISTINCT t.video_id)" if distinct else "COUNT(*)"
+    rows = conn.execute(
+        f"SELECT {label} AS label, {count} AS count FROM {table} t JOIN videos v ON v.id = t.video_id"
+        f" WHERE 1=1{where}{extra} GROUP BY label ORDER BY label",
+        params,
+    ).fetchall()
+    return [(row["label"], row["count"]) for row in rows]
+
+
+def test_trends_from_rollups_match_raw_aggregation(tmp_db):
+    """日次ロールアップ + 境界日の基表読みが、基表の全件集計と同じ推移を返す"""
+    with db.get_db_write_connection() as conn:
+        for vid in (1, 2, 3):
+            conn.execute(
+                "INSERT INTO videos (id, essential_filename, current_full_path, current_favorite_level,"
+                " storage_location, is_available, is_deleted) VALUES (?, ?, ?, 3, 'C_DRIVE', 1, 0)",
+                (vid, f"v{vid}.mp4", f"C:/v{vid}.mp4"),
+            )
+        base = datetime(2026, 5, 25, 0, 0, 0)
+        for i in range(60):
+            ts = (base + timedelta(hours=7 * i)).strftime("%Y-%m-%d %H:%M:%S")
+            vid = i % 3 + 1
+            conn.execute(
+                "INSERT INTO viewing_history (video_id, viewed_at, viewing_method) VALUES (?, ?, ?)",
+                (vid, ts, "APP_PLAYBACK" if i % 5 else "MANUAL_ENTRY"),
+            )
+            if i % 2:
+                conn.execute("INSERT INTO likes (video_id, liked_at) VALUES (?, ?)", (vid, ts))
+            if i % 4 == 0:
+                conn.execute(
+                    "INSERT INTO judgment_history (video_id, old_level, new_level, judged_at, was_selection_judgment)"
+                    " VALUES (?, -1, 3, ?, ?)",
+                    (vid, ts, i % 8 == 0),
+                )
+        # スコープ変更・削除・付け替えもロールアップに反映される
+        conn.execute("UPDATE videos SET is_available = 0 WHERE id = 2")
+        conn.execute("UPDATE videos SET is_deleted = 1 WHERE id = 3")
+        conn.execute("DELETE FROM likes WHERE id % 3 = 0")
+        conn.execute("UPDATE viewing_history SET video_id = 1 WHERE id % 7 = 0")
+        conn.execute("DELETE FROM judgment_history WHERE id % 3 = 0")
+
+    periods = [
+        (None, None),
+        (datetime(2026, 5, 27, 13, 30), datetime(2026, 6, 4, 9, 15)),
+        (datetime(2026, 5, 28, 2, 0), datetime(2026, 5, 28, 20, 0)),
+        (datetime(2026, 6, 1, 12, 0), None),
+        (None, datetime(2026, 5, 30, 6, 0)),
+    ]
+    with db.get_db_connection() as conn:
+        for period_start, period_end in periods:
+            for is_available, include_deleted in ((None, True), (True, False), (False, True)):
+                for bucket in ("day", "week", "month"):
+                    args = (period_start, period_end, is_available, include_deleted, bucket)
+                    viewing = analysis_service.get_viewing_trend(*args)
+                    assert list(zip(viewing["label"], viewing["count"])) == _raw_trend(
+                        conn, "viewing_history", "viewed_at", " AND t.viewing_method = 'APP_PLAYBACK'", *args
+                    )
+                    likes = analysis_service.get_likes_trend(*args, conn=conn)
+                    assert list(zip(likes["label"], likes["count"])) == _raw_trend(
+                        conn, "likes", "liked_at", "", *args
+                    )
+                    for tier, extra in ((None, ""), (1, " AND t.was_selection_judgment = 0"), (2, " AND t.was_selection_judgment = 1")):
+                        judged = analysis_service.get_judgment_trend(*args, tier=tier)
+                        assert list(zip(judged["label"], judged["count"])) == _raw_trend(
+                            conn, "judgment_history", "judged_at", extra, *args, distinct=True
+                        )
+
+
+def test_rebuild_trend_rollups_restores_rows(tmp_db):
+    """ずれたロールアップは rebuild_trend_rollups で基表から作り直される"""
+    with db.get_db_write_connection() as conn:
+        conn.execute(
+            "INSERT INTO videos (id, essential_filename, current_full_path, current_favorite_level,"
+            " storage_location, is_available, is_deleted) VALUES (1, 'a.mp4', 'C:/a.mp4', 3, 'C_DRIVE', 1, 0)"
+        )
+        conn.execute("INSERT INTO likes (video_id, liked_at) VALUES (1, '2026-06-01 10:00:00')")
+        conn.execute(
+            "INSERT INTO judgment_history (video_id, old_level, new_level, judged_at, was_selection_judgment)"
+            " VALUES (1, -1, 3, '2026-06-01 10:00:00', 0)"
+        )
+        conn.execute("DELETE FROM likes_daily")
+        conn.execute("DELETE FROM judgment_daily")
+        assert db.rebuild_trend_rollups(conn) == {"viewing_daily": 0, "likes_daily": 1, "judgment_daily": 1}
+
+    likes = analysis_service.get_likes_trend(None, None, None, True)
+    assert list(zip(likes["label"], likes["count"])) == [("2026-06-01", 1)]
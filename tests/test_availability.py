@@ -0,0 +1,118 @@
+from core.availability import AvailabilityCache
+
+
+class _Probe:
+    """存在するパスの集合で実在確認を代替し、呼び出しを記録する。"""
+
+    def __init__(self, existing):
+        self.existing = set(existing)
+        self.calls = []
+
+    def __call__(self, path):
+        self.calls.append(path)
+        return path in self.existing
+
+
+def _cache(probe, now):
+    return AvailabilityCache(drive_ttl=30, path_ttl=300, clock=lambda: now[0], probe=probe)
+
+
+def test_exists_caches_until_ttl():
+    now = [0.0]
+    probe = _Probe({"/", "/lib/a.mp4"})
+    cache = _cache(probe, now)
+
+    assert cache.exists("/lib/a.mp4") is True
+    assert cache.exists("/lib/b.mp4") is False
+    calls = len(probe.calls)
+    assert cache.exists("/lib/a.mp4") is True
+    assert len(probe.calls) == calls  # TTL 内は stat しない
+
+    probe.existing.discard("/lib/a.mp4")
+    now[0] = 301
+    assert cache.exists("/lib/a.mp4") is False
+
+
+def test_unmounted_drive_skips_file_probe():
+    now = [0.0]
+    probe = _Probe(set())  # ルート（ドライブ）が見えない = 未接続
+    cache = _cache(probe, now)
+
+    assert cache.exists("/lib/a.mp4") is False
+    assert cache.exists("/lib/b.mp4") is False
+    assert probe.calls == ["/"]
+
+
+def test_mark_and_invalidate():
+    now = [0.0]
+    probe = _Probe({"/"})
+    cache = _cache(probe, now)
+
+    cache.mark("/lib/renamed.mp4", True)
+    assert cache.exists("/lib/renamed.mp4") is True
+    assert "/lib/renamed.mp4" not in probe.calls
+
+    cache.invalidate(["/lib/renamed.mp4"])
+    assert cache.exists("/lib/renamed.mp4") is False
+    assert "/lib/renamed.mp4" in probe.calls
+
+
+def test_refresh_probes_unknown_and_stale_paths():
+    now = [0.0]
+    probe = _Probe({"/", "/lib/a.mp4"})
+    cache = _cache(probe, now)
+
+    cache.refresh(["/lib/a.mp4", "/lib/b.mp4"])
+    probe.calls.clear()
+    assert cache.exists("/lib/a.mp4") is True
+    assert cache.exists("/lib/b.mp4") is False
+    assert probe.calls == []
+
+    now[0] = 400
+    probe.existing.add("/lib/b.mp4")
+    cache.refresh()
+    probe.calls.clear()
+    assert cache.exists("/lib/b.mp4") is True
+    assert probe.calls == []
+
+
+def test_stale_value_served_while_refresher_runs():
+    now = [0.0]
+    probe = _Probe({"/", "/lib/a.mp4"})
+    cache = _cache(probe, now)
+    cache.exists("/lib/a.mp4")
+
+    def no_paths():
+        # 更新スレッド側の確認を走らせず、実行中の状態だけ作る
+        raise RuntimeError("skip")
+
+    cache.start_refresher(no_paths, interval=3600)
+    try:
+        now[0] = 1000
+        probe.calls.clear()
+        assert cache.exists("/lib/a.mp4") is True
+        assert probe.calls == []
+    finally:
+        cache.stop_refresher()
+
+
+def test_stale_value_has_hard_max_age_while_refresher_runs():
+    """更新スレッドが動いていても、TTL + 更新周期の 2 倍を過ぎた値はその場で stat し直す"""
+    now = [0.0]
+    probe = _Probe({"/", "/lib/a.mp4"})
+    cache = _cache(probe, now)
+    cache.exists("/lib/a.mp4")
+
+    def stalled():
+        # 遅いドライブで止まった更新スレッドの代わり（確認は一度も終わらない）
+        raise RuntimeError("stalled")
+
+    cache.start_refresher(stalled, interval=10)
+    try:
+        probe.existing.discard("/lib/a.mp4")
+        now[0] = 315
+        assert cache.exists("/lib/a.mp4") is True  # 猶予内は更新を待つ
+        now[0] = 321
+        assert cache.exists("/lib/a.mp4") is False
+    finally:
+        cache.stop_refresher()
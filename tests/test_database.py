@@ -0,0 +1,398 @@
+"""
+core.database の接続プールのテスト
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+import core.database as database
+from core.models import normalize_text
+
+
+def test_connection_is_reused_on_same_thread(tmp_db):
+    """同一スレッドの連続呼び出しは同じ接続を再利用する"""
+    with database.get_db_connection() as conn1:
+        pass
+    with database.get_db_connection() as conn2:
+        pass
+    assert conn1 is conn2
+
+
+def test_nested_calls_get_distinct_connections(tmp_db):
+    """ネストした呼び出しには別接続が渡され、外側のトランザクションを共有しない"""
+    with database.get_db_connection() as outer:
+        with database.get_db_connection() as inner:
+            assert inner is not outer
+
+
+def test_pooled_connection_keeps_setup(tmp_db):
+    """再利用された接続にも row_factory と foreign_keys が効いている"""
+    with database.get_db_connection():
+        pass
+    with database.get_db_connection() as conn:
+        assert conn.row_factory is sqlite3.Row
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+
+
+def test_exception_rolls_back_before_reuse(tmp_db):
+    """例外時は rollback され、次の利用者に未確定の変更が残らない"""
+    with pytest.raises(RuntimeError):
+        with database.get_db_connection() as conn:
+            conn.execute(
+                "INSERT INTO videos (essential_filename, current_full_path) VALUES ('a.mp4', 'C:/a.mp4')"
+            )
+            raise RuntimeError("boom")
+
+    with database.get_db_connection() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0] == 0
+
+
+def test_pool_size_is_capped(tmp_db, monkeypatch):
+    """上限を超えた分は使い捨て接続になり、プールには上限数までしか残らない"""
+    database.close_db_pool()
+    monkeypatch.setattr(database, "DB_POOL_MAX_SIZE", 2)
+
+    with database.get_db_connection() as c1:
+        with database.get_db_connection() as c2:
+            with database.get_db_connection() as c3:
+                pass
+
+    pool = database._get_pool()
+    assert pool._size == 2
+    assert {id(c) for c in pool._idle} == {id(c1), id(c2)}
+    with pytest.raises(sqlite3.ProgrammingError):
+        c3.execute("SELECT 1")
+
+
+def test_broken_idle_connection_is_replaced(tmp_db):
+    """健全性チェックに失敗した idle 接続は作り直される"""
+    with database.get_db_connection() as conn1:
+        pass
+    conn1.close()
+
+    with database.get_db_connection() as conn2:
+        assert conn2 is not conn1
+        assert conn2.execute("SELECT 1").fetchone()[0] == 1
+
+
+def test_connections_are_shared_across_threads(tmp_db):
+    """別スレッドが返却した接続も再利用できる（スレッド跨ぎで使っても壊れない）"""
+    with database.get_db_connection():
+        pass
+
+    results = []
+
+    def worker():
+        with database.get_db_connection() as conn:
+            results.append(conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0])
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    assert results == [0]
+    assert database._get_pool()._size == 1
+
+
+def test_wal_mode_is_opt_in(tmp_db, monkeypatch):
+    """DB_WAL_ENABLED のときだけ journal_mode=WAL / synchronous=NORMAL になる"""
+    with database.get_db_connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] != "wal"
+
+    database.close_db_pool()
+    monkeypatch.setattr(database, "DB_WAL_ENABLED", True)
+    with database.get_db_connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+
+def test_write_connection_commits_and_rolls_back(tmp_db):
+    """書き込み接続は成功で commit、例外で rollback する"""
+    with database.get_db_write_connection() as conn:
+        assert conn.in_transaction  # BEGIN IMMEDIATE 済み
+        conn.execute(
+            "INSERT INTO videos (essential_filename, current_full_path) VALUES ('a.mp4', 'C:/a.mp4')"
+        )
+    with pytest.raises(RuntimeError):
+        with database.get_db_write_connection() as conn:
+            conn.execute(
+                "INSERT INTO videos (essential_filename, current_full_path) VALUES ('b.mp4', 'C:/b.mp4')"
+            )
+            raise RuntimeError("boom")
+
+    with database.get_db_connection() as conn:
+        names = [r[0] for r in conn.execute("SELECT essential_filename FROM videos").fetchall()]
+    assert names == ["a.mp4"]
+
+
+def test_nested_write_joins_outer_transaction(tmp_db):
+    """同一スレッドのネストした書き込みは外側の接続・トランザクションに合流する"""
+    with database.get_db_write_connection() as outer:
+        with database.get_db_write_connection() as inner:
+            assert inner is outer
+
+
+def test_writes_are_serialized(tmp_db):
+    """複数スレッドの書き込みは同時に実行されない"""
+    active = []
+    overlaps = []
+    lock = threading.Lock()
+
+    def worker(i):
+        with database.get_db_write_connection() as conn:
+            with lock:
+                active.append(i)
+                if len(active) > 1:
+                    overlaps.append(tuple(active))
+            conn.execute(
+                "INSERT INTO videos (essential_filename, current_full_path) VALUES (?, ?)",
+                (f"{i}.mp4", f"C:/{i}.mp4"),
+            )
+            with lock:
+                active.remove(i)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert overlaps == []
+    with database.get_db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0] == 8
+
+
+def test_write_queue_wait_times_out_and_skips_abandoned_ticket(tmp_db, monkeypatch):
+    """書き込みキューで待ちすぎた書き込みは OperationalError で失敗し、後続の書き込みは詰まらない"""
+    monkeypatch.setattr(database, "DB_WRITE_QUEUE_TIMEOUT_SEC", 0.2)
+    holding = threading.Event()
+    release = threading.Event()
+
+    def holder():
+        with database.get_db_write_connection():
+            holding.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=holder)
+    thread.start()
+    try:
+        assert holding.wait(5)
+        with pytest.raises(sqlite3.OperationalError, match="database is locked"):
+            with database.get_db_write_connection():
+                pass
+    finally:
+        release.set()
+        thread.join()
+
+    with database.get_db_write_connection() as conn:
+        conn.execute("INSERT INTO videos (essential_filename, current_full_path) VALUES ('a.mp4', 'C:/a.mp4')")
+    with database.get_db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0] == 1
+
+
+def test_wal_reader_does_not_wait_for_writer(tmp_db, monkeypatch):
+    """WAL 有効時は書き込みトランザクション中でも読み取りがコミット済みの内容を即座に読める"""
+    database.close_db_pool()
+    monkeypatch.setattr(database, "DB_WAL_ENABLED", True)
+
+    in_write = threading.Event()
+    release = threading.Event()
+
+    def writer():
+        with database.get_db_write_connection() as conn:
+            conn.execute(
+                "INSERT INTO videos (essential_filename, current_full_path) VALUES ('w.mp4', 'C:/w.mp4')"
+            )
+            in_write.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        assert in_write.wait(5)
+        with database.get_db_connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0] == 0
+    finally:
+        release.set()
+        thread.join()
+
+    with database.get_db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0] == 1
+
+
+def test_create_backup_includes_wal_contents(tmp_db, tmp_path, monkeypatch):
+    """WAL 有効時もバックアップに直近の書き込みが含まれる（コピー前にチェックポイント）"""
+    import config
+
+    database.close_db_pool()
+    monkeypatch.setattr(database, "DB_WAL_ENABLED", True)
+    monkeypatch.setattr(config, "BACKUP_DIR", tmp_path / "backups")
+    with database.get_db_write_connection() as conn:
+        conn.execute(
+            "INSERT INTO videos (essential_filename, current_full_path) VALUES ('a.mp4', 'C:/a.mp4')"
+        )
+
+    result = database.create_backup()
+    assert result["status"] == "success"
+
+    backup = sqlite3.connect(tmp_path / "backups" / result["filename"])
+    try:
+        assert backup.execute("SELECT COUNT(*) FROM videos").fetchone()[0] == 1
+    finally:
+        backup.close()
+
+
+# --- normalized_filename / FTS5 -------------------------------------------------
+
+def _insert_named(conn, essential):
+    """スキャナーと同じく normalized_filename を Python で計算して入れる。"""
+    conn.execute(
+        """INSERT INTO videos (essential_filename, current_full_path, current_favorite_level,
+           storage_location, is_available, is_deleted, normalized_filename) VALUES (?, ?, 1, 'C_DRIVE', 1, 0, ?)""",
+        (essential, f"C:/videos/{essential}", normalize_text(essential)),
+    )
+
+
+def test_foreign_connection_can_write_videos_and_search_falls_back(tmp_db):
+    """clipbox_normalize_text の無い接続でも videos に書け、未設定行も検索でき、init_database で埋め直す"""
+    foreign = sqlite3.connect(database.DATABASE_PATH)
+    try:
+        foreign.execute(
+            "INSERT INTO videos (essential_filename, current_full_path) VALUES ('ＡＢＣ_カタカナ.mp4', 'C:/a.mp4')"
+        )
+        foreign.execute(
+            "INSERT INTO videos (essential_filename, current_full_path, normalized_filename)"
+            " VALUES ('old.mp4', 'C:/o.mp4', 'old.mp4')"
+        )
+        foreign.execute("UPDATE videos SET essential_filename = 'Xyz_テスト.mp4' WHERE essential_filename = 'old.mp4'")
+        foreign.commit()
+    finally:
+        foreign.close()
+
+    with database.get_db_connection() as conn:
+        for keyword in ("かたかな", "カタ"):
+            sql, params = database.filename_keyword_filter(conn, keyword)
+            names = [r[0] for r in conn.execute(f"SELECT essential_filename FROM videos WHERE {sql}", params)]
+            assert names == ["ＡＢＣ_カタカナ.mp4"], keyword
+
+    database.init_database()
+
+    with database.get_db_connection() as conn:
+        rows = dict(conn.execute("SELECT essential_filename, normalized_filename FROM videos").fetchall())
+        assert rows == {"ＡＢＣ_カタカナ.mp4": "abc_かたかな.mp4", "Xyz_テスト.mp4": "xyz_てすと.mp4"}
+        hits = conn.execute("SELECT rowid FROM videos_fts WHERE videos_fts MATCH '\"てすと\"'").fetchall()
+        assert len(hits) == 1
+        assert conn.execute("SELECT rowid FROM videos_fts WHERE videos_fts MATCH 'old'").fetchall() == []
+
+
+def test_filename_keyword_filter_uses_fts_and_short_fallback(tmp_db):
+    """3 文字以上は FTS5 索引、未満は instr() で、どちらも normalize_text 一致になる"""
+    with database.get_db_write_connection() as conn:
+        for name in ("ＡＢＣ_one.mp4", "abc_two.mp4", "xyz.mp4"):
+            _insert_named(conn, name)
+        conn.execute("DELETE FROM videos WHERE essential_filename = 'abc_two.mp4'")
+
+    with database.get_db_connection() as conn:
+        sql, params = database.filename_keyword_filter(conn, "ABC")
+        assert "videos_fts" in sql
+        names = [r[0] for r in conn.execute(f"SELECT essential_filename FROM videos WHERE {sql}", params)]
+        assert names == ["ＡＢＣ_one.mp4"]
+
+        sql, params = database.filename_keyword_filter(conn, "ｙｚ")
+        assert "videos_fts" not in sql
+        names = [r[0] for r in conn.execute(f"SELECT essential_filename FROM videos WHERE {sql}", params)]
+        assert names == ["xyz.mp4"]
+
+
+def test_init_database_backfills_normalized_filename(tmp_db):
+    """既存行（normalized_filename 未設定）は init_database で埋まり、FTS にも載る"""
+    with database.get_db_write_connection() as conn:
+        _insert_named(conn, "Legacy.mp4")
+        conn.execute("DROP TRIGGER videos_fts_au")
+        conn.execute("UPDATE videos SET normalized_filename = NULL")
+        conn.execute("DROP TABLE videos_fts")
+
+    database.init_database()
+
+    with database.get_db_connection() as conn:
+        assert conn.execute("SELECT normalized_filename FROM videos").fetchone()[0] == "legacy.mp4"
+        assert len(conn.execute("SELECT rowid FROM videos_fts WHERE videos_fts MATCH 'legacy'").fetchall()) == 1
+
+
+# --- video_stats ------------------------------------------------------------------
+
+def _video_stats(conn, video_id):
+    row = conn.execute(
+        "SELECT view_count, last_viewed_at, view_days, like_count, tier1_judged_at, tier2_judged_at"
+        " FROM video_stats WHERE video_id = ?",
+        (video_id,),
+    ).fetchone()
+    return tuple(row) if row else None
+
+
+def test_video_stats_maintained_by_triggers(tmp_db):
+    """視聴・いいね・判定の INSERT / UPDATE / DELETE が同じトランザクションで video_stats に反映される"""
+    with database.get_db_write_connection() as conn:
+        _insert_named(conn, "a.mp4")
+        vid = conn.execute("SELECT id FROM videos").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO viewing_history (video_id, viewed_at, viewing_method) VALUES (?, ?, ?)",
+            [
+                (vid, "2026-01-01 10:00:00", "APP_PLAYBACK"),
+                (vid, "2026-01-01 22:00:00", "APP_PLAYBACK"),
+                (vid, "2026-01-03 09:00:00", "APP_PLAYBACK"),
+                (vid, "2026-02-01 09:00:00", "MANUAL_ENTRY"),
+            ],
+        )
+        conn.execute("INSERT INTO likes (video_id, liked_at) VALUES (?, '2026-01-02 00:00:00')", (vid,))
+        conn.executemany(
+            "INSERT INTO judgment_history (video_id, old_level, new_level, judged_at, was_selection_judgment)"
+            " VALUES (?, -1, 3, ?, ?)",
+            [(vid, "2026-01-04 00:00:00", 0), (vid, "2026-01-05 00:00:00", 0), (vid, "2026-01-06 00:00:00", 1)],
+        )
+        assert _video_stats(conn, vid) == (
+            3, "2026-01-03 09:00:00", 2, 1, "2026-01-05 00:00:00", "2026-01-06 00:00:00"
+        )
+
+        conn.execute("DELETE FROM viewing_history WHERE viewed_at = '2026-01-03 09:00:00'")
+        conn.execute("UPDATE viewing_history SET viewing_method = 'APP_PLAYBACK' WHERE viewing_method = 'MANUAL_ENTRY'")
+        conn.execute("DELETE FROM likes")
+        conn.execute("DELETE FROM judgment_history WHERE was_selection_judgment = 1")
+
+    with database.get_db_connection() as conn:
+        assert _video_stats(conn, vid) == (3, "2026-02-01 09:00:00", 2, 0, "2026-01-05 00:00:00", None)
+        assert database.get_view_counts_map(conn) == {vid: 3}
+        assert database.get_last_viewed_map(conn) == {vid: "2026-02-01 09:00:00"}
+        assert database.get_latest_judged_at_map(conn, selection=False) == {vid: "2026-01-05 00:00:00"}
+
+    with database.get_db_write_connection() as conn:
+        conn.execute("DELETE FROM videos WHERE id = ?", (vid,))
+    with database.get_db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM video_stats").fetchone()[0] == 0
+
+
+def test_rebuild_video_stats_repairs_and_init_backfills(tmp_db):
+    """ずれた video_stats は rebuild_video_stats で、表が無い既存 DB は init_database で作り直される"""
+    with database.get_db_write_connection() as conn:
+        _insert_named(conn, "a.mp4")
+        _insert_named(conn, "b.mp4")
+        ids = [r[0] for r in conn.execute("SELECT id FROM videos ORDER BY id")]
+        conn.execute(
+            "INSERT INTO viewing_history (video_id, viewed_at, viewing_method) VALUES (?, '2026-01-01 10:00:00', 'APP_PLAYBACK')",
+            (ids[0],),
+        )
+        conn.execute("INSERT INTO likes (video_id) VALUES (?)", (ids[1],))
+        expected = {vid: _video_stats(conn, vid) for vid in ids}
+        conn.execute("UPDATE video_stats SET view_count = 99, like_count = 0")
+        assert database.rebuild_video_stats(conn) == 2
+        assert {vid: _video_stats(conn, vid) for vid in ids} == expected
+
+        conn.execute("DROP TABLE video_stats")
+
+    database.init_database()
+
+    with database.get_db_connection() as conn:
+        assert {vid: _video_stats(conn, vid) for vid in ids} == expected
@@ -0,0 +1,107 @@
+"""
+ClipBox - 列指向スナップショット（core.export_service）のテスト。
+
+pyarrow は任意依存のため、書き出し・読み込みのテストは pyarrow がある環境でだけ実行する。
+"""
+
+from datetime import datetime
+
+import pytest
+
+import core.database as database
+from core import export_service
+
+
+def _insert_history(rows):
+    with database.get_db_connection() as conn:
+        conn.executemany(
+            "INSERT INTO viewing_history (video_id, viewed_at, viewing_method) VALUES (?, ?, 'APP_PLAYBACK')",
+            rows,
+        )
+
+
+def _seed():
+    with database.get_db_connection() as conn:
+        conn.execute(
+            "INSERT INTO videos (id, essential_filename, current_full_path, current_favorite_level,"
+            " storage_location, is_available, is_deleted, file_created_at)"
+            " VALUES (1, 'a.mp4', 'C:/x/###_a.mp4', 3, 'C_DRIVE', 1, 0, '2026-01-01')"
+        )
+        conn.execute("INSERT INTO likes (video_id, liked_at) VALUES (1, '2026-01-05 08:00:00')")
+    _insert_history([(1, "2026-01-10 10:00:00"), (1, "2026-01-11T10:00:00.250000")])
+
+
+def test_parse_timestamp_accepts_db_formats():
+    """DB に入っている日時の書式を datetime にし、解釈できない値は None にする。"""
+    parse = export_service._parse_timestamp
+    assert parse("2026-01-10 10:00:00") == datetime(2026, 1, 10, 10, 0)
+    assert parse("2026-01-11T10:00:00.250000") == datetime(2026, 1, 11, 10, 0, 0, 250000)
+    assert parse("2026-01-01") == datetime(2026, 1, 1)
+    assert parse("") is None
+    assert parse(None) is None
+    assert parse("not a date") is None
+    assert parse("2026-01-10T10:00:00+00:00").tzinfo is None
+
+
+def test_snapshot_status_reads_watermark_from_part_names(tmp_path):
+    """watermark は形式ごとの part ファイル名の末尾 id の最大値（pyarrow 不要）。"""
+    folder = tmp_path / "viewing_history"
+    folder.mkdir()
+    (folder / "part-000000000001-000000000010.parquet").write_bytes(b"x" * 3)
+    (folder / "part-000000000011-000000000025.parquet").write_bytes(b"x" * 4)
+    (folder / "part-000000000001-000000000040.arrow").write_bytes(b"x")
+    (folder / ".writing.parquet").write_bytes(b"x")
+
+    status = export_service.snapshot_status(tmp_path, "parquet")
+    assert status["viewing_history"] == {"watermark": 25, "parts": 2, "size_bytes": 7}
+    assert status["videos"] == {"watermark": 0, "parts": 0, "size_bytes": 0}
+    assert export_service.snapshot_status(tmp_path, "arrow")["viewing_history"]["watermark"] == 40
+
+
+@pytest.mark.skipif(export_service.pa is not None, reason="pyarrow がある環境では書き出せる")
+def test_write_snapshots_without_pyarrow_raises(tmp_db, tmp_path):
+    with pytest.raises(export_service.SnapshotUnavailable):
+        export_service.write_snapshots(tmp_path)
+
+
+def test_write_snapshots_appends_history_by_watermark(tmp_db, tmp_path):
+    """履歴は watermark より後ろだけを新しい part に書き、videos は毎回書き直す。日時は timestamp 型。"""
+    pa = pytest.importorskip("pyarrow")
+    _seed()
+
+    first = export_service.write_snapshots(tmp_path, format="parquet", batch_size=1)
+    assert first["viewing_history"]["rows"] == 2
+    assert first["videos"]["rows"] == 1
+    assert first["likes"]["watermark"] == 1
+
+    _insert_history([(1, "2026-01-12 10:00:00")])
+    second = export_service.write_snapshots(tmp_path, format="parquet")
+    assert second["viewing_history"] == {**second["viewing_history"], "rows": 1, "watermark": 3, "parts": 2}
+    assert second["likes"]["rows"] == 0
+    assert second["videos"]["parts"] == 1
+
+    history = export_service.read_snapshot(tmp_path, "viewing_history", "parquet")
+    assert history.schema.field("viewed_at").type == pa.timestamp("us")
+    assert history.column("id").to_pylist() == [1, 2, 3]
+    assert history.column("viewed_at").to_pylist()[1] == datetime(2026, 1, 11, 10, 0, 0, 250000)
+
+    videos = export_service.read_snapshot(tmp_path, "videos", "parquet", columns=["id", "is_available"])
+    assert videos.to_pylist() == [{"id": 1, "is_available": True}]
+
+    rebuilt = export_service.write_snapshots(tmp_path, tables=["viewing_history"], format="parquet", full=True)
+    assert rebuilt["viewing_history"]["parts"] == 1
+    assert rebuilt["viewing_history"]["rows"] == 3
+
+
+def test_arrow_snapshot_is_memory_mapped(tmp_db, tmp_path):
+    """Arrow IPC は memory-map で読め、part が無い表は同じスキーマの 0 行。"""
+    pytest.importorskip("pyarrow")
+    _seed()
+    export_service.write_snapshots(tmp_path, tables=["likes"], format="arrow")
+
+    likes = export_service.read_snapshot(tmp_path, "likes", "arrow")
+    assert likes.column("liked_at").to_pylist() == [datetime(2026, 1, 5, 8, 0)]
+
+    empty = export_service.read_snapshot(tmp_path, "judgment_history", "arrow")
+    assert empty.num_rows == 0
+    assert empty.schema.names[:2] == ["id", "video_id"]
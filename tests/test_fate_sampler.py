@@ -0,0 +1,157 @@
+from datetime import datetime
+
+from core.fate_sampler import FateIndex, WeightedSampler
+
+
+def _draws(sampler, points):
+    return [sampler.sample(lambda p=p: p) for p in points]
+
+
+def test_weighted_sampler_picks_by_cumulative_weight():
+    sampler = WeightedSampler([("a", 1), ("b", 2), ("c", 1)])
+    assert sampler.total() == 4
+    # 累積 [0,1)=a, [1,3)=b, [3,4)=c
+    assert _draws(sampler, [0.0, 0.2, 0.25, 0.7, 0.75, 0.99]) == ["a", "a", "b", "b", "c", "c"]
+
+
+def test_weighted_sampler_update_remove_and_append():
+    sampler = WeightedSampler([("a", 1), ("b", 1)])
+    sampler.set("a", 3)
+    sampler.set("c", 4)  # 末尾に追加
+    assert sampler.total() == 8
+    assert _draws(sampler, [0.0, 0.45, 0.5, 0.99]) == ["a", "b", "c", "c"]
+
+    sampler.remove("c")
+    assert "c" not in sampler
+    assert len(sampler) == 2
+    assert _draws(sampler, [0.0, 0.74, 0.75, 0.999]) == ["a", "a", "b", "b"]
+
+    sampler.remove("a")
+    sampler.remove("b")
+    assert sampler.sample() is None
+
+
+def test_weighted_sampler_matches_prefix_sums_after_many_appends():
+    sampler = WeightedSampler()
+    for i in range(1, 38):
+        sampler.set(i, i)
+    assert sampler.total() == sum(range(1, 38))
+    # 各キーの区間の中央を引くとそのキーが選ばれる
+    start = 0
+    for i in range(1, 38):
+        assert sampler.sample(lambda s=start + i / 2: s / sampler.total()) == i
+        start += i
+
+
+def _weight(last_viewed, now):
+    return 1.0 if last_viewed else 3.0
+
+
+def test_fate_index_rejects_and_restores_candidates():
+    index = FateIndex()
+    rows = [(1, "/a.mp4", None), (2, "/b.mp4", None)]
+    loads = []
+
+    def load():
+        loads.append(1)
+        return rows
+
+    picked = index.pick("k", load, _weight, lambda vid, path: vid == 2, rng=lambda: 0.0)
+    assert picked == 2
+    # 除外は抽選中だけ。プールは 1 回しか作らない
+    assert index.weights("k") == {1: 3.0, 2: 3.0}
+    assert index.pick("k", load, _weight, lambda vid, path: True, rng=lambda: 0.0) == 1
+    assert loads == [1]
+
+
+def test_fate_index_record_view_discard_and_invalidate():
+    index = FateIndex()
+    rows = [(1, "/a.mp4", None), (2, "/b.mp4", None)]
+    index.pick("k", lambda: rows, _weight, lambda vid, path: True)
+
+    index.record_view(1, datetime.now())
+    assert index.weights("k") == {1: 1.0, 2: 3.0}
+    index.discard(2)
+    assert index.weights("k") == {1: 1.0}
+    index.invalidate()
+    assert index.weights("k") == {}
+
+
+def test_fate_index_sample_uniform_is_distinct_and_respects_accept():
+    import random
+
+    index = FateIndex()
+    rows = [(i, f"/v{i}.mp4", None) for i in range(1, 101)]
+    rand = random.Random(1)
+
+    picked = index.sample_uniform("k", lambda: rows, _weight, 30, lambda vid, path: vid % 2 == 0, rand=rand)
+    assert len(picked) == 30
+    assert len(set(picked)) == 30
+    assert all(vid % 2 == 0 for vid in picked)
+
+    # 受理できる候補が k 件未満なら全件シャッフルに切り替えて全部返す
+    picked = index.sample_uniform("k", lambda: rows, _weight, 10, lambda vid, path: vid in (7, 77), rand=rand)
+    assert sorted(picked) == [7, 77]
+
+    index.discard(7)
+    picked = index.sample_uniform("k", lambda: rows, _weight, 10, lambda vid, path: vid in (7, 77), rand=rand)
+    assert picked == [77]
+
+
+def _in_other_thread(fn):
+    """fn を別スレッドで実行し、5 秒以内に終われば True（索引のロックを待たされていないことの確認）。"""
+    import threading
+
+    thread = threading.Thread(target=fn)
+    thread.start()
+    thread.join(timeout=5)
+    return not thread.is_alive()
+
+
+def test_fate_index_runs_load_and_accept_outside_the_lock():
+    """load（DB）と accept（ファイル確認）の間も record_view / discard / 別の抽選は待たされない"""
+    index = FateIndex()
+    rows = [(1, "/a.mp4", None), (2, "/b.mp4", None), (3, "/c.mp4", None)]
+    index.pick("other", lambda: [(9, "/z.mp4", None)], _weight, lambda vid, path: True)
+    during = []
+
+    def load():
+        during.append(_in_other_thread(lambda: index.record_view(9, datetime.now())))
+        return rows
+
+    def accept(vid, path):
+        if vid == 1:
+            # 1 は外されている間に視聴され、2 は外されている間に候補から外れる
+            during.append(_in_other_thread(lambda: index.record_view(1, datetime.now())))
+            during.append(_in_other_thread(lambda: index.pick("other", load, _weight, lambda v, p: True)))
+            return False
+        if vid == 2:
+            during.append(_in_other_thread(lambda: index.discard(2)))
+            return False
+        return True
+
+    assert index.pick("k", load, _weight, accept, rng=lambda: 0.0) == 3
+    assert during == [True, True, True, True]
+    # 作っている間に候補が変わったプールは登録しない（次回作り直す）
+    assert index.weights("k") == {}
+    index.pick("k", lambda: rows, _weight, lambda vid, path: True)
+    assert index.weights("k") == {1: 3.0, 2: 3.0, 3: 3.0}
+
+
+def test_fate_index_pick_restores_held_weights_with_updates():
+    """外している間の record_view は戻すときの重みに反映され、discard された候補は戻さない"""
+    index = FateIndex()
+    rows = [(1, "/a.mp4", None), (2, "/b.mp4", None), (3, "/c.mp4", None)]
+    index.pick("k", lambda: rows, _weight, lambda vid, path: True)
+
+    def accept(vid, path):
+        if vid == 1:
+            index.record_view(1, datetime.now())
+            return False
+        if vid == 2:
+            index.discard(2)
+            return False
+        return True
+
+    assert index.pick("k", lambda: rows, _weight, accept, rng=lambda: 0.0) == 3
+    assert index.weights("k") == {1: 1.0, 3: 3.0}
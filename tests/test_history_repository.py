@@ -54,6 +54,9 @@ def test_insert_play_history(monkeypatch):
         with get_db_connection() as conn:
             rows = conn.execute("SELECT file_path, title, internal_id, player, library_root, trigger, video_id FROM play_history").fetchall()
 
+        # 一時ディレクトリ削除前にプール済み接続を閉じる（Windows のファイルロック対策）
+        database.close_db_pool()
+
         assert len(rows) == 1
         row = rows[0]
         assert row["file_path"] == file_path
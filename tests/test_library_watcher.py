@@ -0,0 +1,141 @@
+import os
+
+from core.library_watcher import LibraryWatcher
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _watcher(roots, applied, clock, debounce=5.0):
+    return LibraryWatcher(
+        lambda: roots,
+        lambda: applied.append(clock.now),
+        poll_interval=1.0,
+        debounce=debounce,
+        clock=clock,
+    )
+
+
+def _touch_dir(path, seconds):
+    # 同一秒内の変更でも mtime が確実に変わるようにずらす
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + seconds * 1_000_000_000))
+
+
+def test_watcher_applies_after_debounce(tmp_path):
+    (tmp_path / "a.mp4").write_bytes(b"a")
+    clock, applied = _Clock(), []
+    watcher = _watcher([tmp_path], applied, clock)
+
+    # 初回はスナップショットのみ
+    assert watcher.poll_once() is False
+    clock.now = 1
+    assert watcher.poll_once() is False
+
+    (tmp_path / "b.mp4").write_bytes(b"b")
+    _touch_dir(tmp_path, 1)
+    clock.now = 2
+    assert watcher.poll_once() is False  # 変化を検知（まだ反映しない）
+    clock.now = 4
+    assert watcher.poll_once() is False  # 静止時間が足りない
+    clock.now = 7
+    assert watcher.poll_once() is True
+    assert applied == [7]
+
+    # 反映後は変化が無ければ何もしない
+    clock.now = 20
+    assert watcher.poll_once() is False
+    assert applied == [7]
+
+
+def test_watcher_debounce_restarts_on_further_changes(tmp_path):
+    clock, applied = _Clock(), []
+    watcher = _watcher([tmp_path], applied, clock)
+    watcher.poll_once()
+
+    (tmp_path / "a.mp4").write_bytes(b"a")
+    _touch_dir(tmp_path, 1)
+    clock.now = 1
+    watcher.poll_once()
+
+    (tmp_path / "a.mp4").rename(tmp_path / "##_a.mp4")
+    _touch_dir(tmp_path, 2)
+    clock.now = 5
+    assert watcher.poll_once() is False  # 追加の変化で待ち直し
+    clock.now = 9
+    assert watcher.poll_once() is False
+    clock.now = 10
+    assert watcher.poll_once() is True
+    assert applied == [10]
+
+
+def test_watcher_detects_changes_in_nested_directory(tmp_path):
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    clock, applied = _Clock(), []
+    watcher = _watcher([tmp_path], applied, clock, debounce=0)
+    watcher.poll_once()
+
+    (sub / "a.mp4").write_bytes(b"a")
+    _touch_dir(sub, 1)
+    clock.now = 1
+    watcher.poll_once()
+    clock.now = 2
+    assert watcher.poll_once() is True
+
+
+def test_watcher_root_change_resets_snapshot(tmp_path):
+    first, second = tmp_path / "first", tmp_path / "second"
+    first.mkdir()
+    second.mkdir()
+    (second / "a.mp4").write_bytes(b"a")
+    roots = [first]
+    clock, applied = _Clock(), []
+    watcher = LibraryWatcher(lambda: list(roots), lambda: applied.append(1), poll_interval=1.0, debounce=0, clock=clock)
+    watcher.poll_once()
+
+    roots.append(second)
+    clock.now = 1
+    # ルート構成の変更は取り直しのみ（設定変更時の全体反映は手動スキャンに任せる）
+    assert watcher.poll_once() is False
+    clock.now = 2
+    assert watcher.poll_once() is False
+    assert applied == []
+
+
+def test_watcher_keeps_change_pending_when_apply_defers_or_fails(tmp_path):
+    """apply が False（見送り）や例外なら変化を保留し、次のポーリングで再試行する"""
+    clock, calls = _Clock(), []
+    outcomes = [False, RuntimeError("boom"), True]
+
+    def apply():
+        calls.append(clock.now)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    watcher = LibraryWatcher(lambda: [tmp_path], apply, poll_interval=1.0, debounce=0, clock=clock)
+    watcher.poll_once()
+    (tmp_path / "a.mp4").write_bytes(b"a")
+    _touch_dir(tmp_path, 1)
+    clock.now = 1
+    watcher.poll_once()
+
+    clock.now = 2
+    assert watcher.poll_once() is False
+    clock.now = 3
+    try:
+        watcher.poll_once()
+    except RuntimeError:
+        pass
+    clock.now = 4
+    assert watcher.poll_once() is True
+    clock.now = 5
+    assert watcher.poll_once() is False
+    assert calls == [2, 3, 4]
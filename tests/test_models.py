@@ -2,7 +2,7 @@
 
 import pytest
 
-from core.models import is_path_within
+from core.models import Video, is_path_within
 
 
 @pytest.mark.parametrize(
@@ -19,3 +19,24 @@ from core.models import is_path_within
 )
 def test_is_path_within(path, folder, expected):
     assert is_path_within(path, folder) is expected
+
+
+@pytest.mark.parametrize(
+    "path,selection_completed,judged",
+    [
+        ("C:/sel/+###_a.mp4", True, True),
+        ("C:/sel/###_a.mp4", False, True),
+        ("C:/+sel/a.mp4", False, False),  # フォルダ名の + は見ない
+        ("a.mp4", False, False),
+        ("", False, True),
+    ],
+)
+def test_video_derived_flags_use_file_name(path, selection_completed, judged):
+    video = Video(
+        id=1, essential_filename="a.mp4", current_full_path=path, current_favorite_level=3,
+        file_size=None, performer=None, storage_location="C_DRIVE",
+        last_file_modified=None, created_at=None, last_scanned_at=None,
+    )
+    assert video.is_selection_completed is selection_completed
+    assert video.is_judged() is judged
+    assert not hasattr(video, "__dict__")
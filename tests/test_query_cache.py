@@ -0,0 +1,124 @@
+import pandas as pd
+
+import core.database as database
+from core import app_service
+from core.models import Video
+from core.query_cache import QueryCache
+
+
+def _cache(generation, now, max_entries=8):
+    return QueryCache(
+        max_entries=max_entries, max_age=300, generation=lambda: generation[0], clock=lambda: now[0]
+    )
+
+
+def _counting(fn):
+    calls = []
+
+    def wrapped(*args, **kwargs):
+        calls.append((args, kwargs))
+        return fn(*args, **kwargs)
+
+    return wrapped, calls
+
+
+def test_cached_reuses_until_generation_or_age_changes():
+    generation, now = [0], [0.0]
+    cache = _cache(generation, now)
+    fn, calls = _counting(lambda n, ids=(): {"n": n, "ids": list(ids)})
+    cached = cache.cached(fn, name="fn")
+
+    assert cached(1, ids=[1, 2]) == {"n": 1, "ids": [1, 2]}
+    assert cached(1, ids=[1, 2]) == {"n": 1, "ids": [1, 2]}
+    assert cached(2, ids=[1, 2])["n"] == 2
+    assert len(calls) == 2  # list 引数もキーになり、同じ引数は計算し直さない
+
+    generation[0] += 1
+    cached(1, ids=[1, 2])
+    assert len(calls) == 3
+
+    now[0] = 301
+    cached(1, ids=[1, 2])
+    assert len(calls) == 4
+    assert (cache.hits, cache.misses) == (1, 4)
+
+
+def test_lru_evicts_least_recently_used():
+    generation, now = [0], [0.0]
+    cache = _cache(generation, now, max_entries=2)
+    fn, calls = _counting(lambda n: n)
+    cached = cache.cached(fn, name="fn")
+
+    cached(1)
+    cached(2)
+    cached(1)  # 1 を最近使ったことにする
+    cached(3)  # 2 が追い出される
+    assert len(cache) == 2
+    cached(1)
+    assert len(calls) == 3
+    cached(2)
+    assert len(calls) == 4
+
+
+def test_results_are_copied_and_unhashable_args_bypass():
+    generation, now = [0], [0.0]
+    cache = _cache(generation, now)
+    cached = cache.cached(lambda: pd.DataFrame({"label": ["a"], "count": [1]}), name="df")
+
+    first = cached()
+    first["count"] = 99
+    assert cached()["count"].tolist() == [1]
+
+    fn, calls = _counting(lambda df: len(df))
+    by_frame = cache.cached(fn, name="by_frame")
+    by_frame(first)
+    by_frame(first)
+    assert len(calls) == 2
+    assert len(cache) == 1
+
+
+def test_mutating_cached_elements_does_not_corrupt_cache():
+    """返したリストの Video や入れ子の dict を書き換えても、次のヒットは元の値を返す"""
+    generation, now = [0], [0.0]
+    cache = _cache(generation, now)
+    video = Video(1, "a.mp4", "C:/a.mp4", 3, None, None, "C_DRIVE", None, None, None)
+    videos = cache.cached(lambda: [video], name="videos")
+    kpi = cache.cached(lambda: {"counts": {"judged": 1}, "ids": [1]}, name="kpi")
+
+    first = videos()
+    first[0].current_favorite_level = 0
+    first.append(video)
+    assert [(v.id, v.current_favorite_level) for v in videos()] == [(1, 3)]
+    assert video.current_favorite_level == 3
+
+    result = kpi()
+    result["counts"]["judged"] = 99
+    result["ids"].append(2)
+    assert kpi() == {"counts": {"judged": 1}, "ids": [1]}
+
+
+def test_generation_advances_only_on_committed_changes(tmp_db):
+    before = database.get_data_generation()
+    with database.get_db_connection() as conn:
+        conn.execute("SELECT COUNT(*) FROM videos").fetchone()
+    assert database.get_data_generation() == before
+
+    with database.get_db_write_connection() as conn:
+        conn.execute(
+            "INSERT INTO videos (id, essential_filename, current_full_path, current_favorite_level,"
+            " storage_location, is_available, is_deleted) VALUES (1, 'a.mp4', 'C:/a.mp4', 3, 'C_DRIVE', 1, 0)"
+        )
+    assert database.get_data_generation() > before
+
+
+def test_app_service_stats_refresh_after_write(tmp_db):
+    """集計は書き込みまでメモリから返り、書き込み（トリガー経由の集計更新を含む）後は新しい値になる"""
+    with database.get_db_write_connection() as conn:
+        conn.execute(
+            "INSERT INTO videos (id, essential_filename, current_full_path, current_favorite_level,"
+            " storage_location, is_available, is_deleted) VALUES (1, 'a.mp4', 'C:/a.mp4', 3, 'C_DRIVE', 1, 0)"
+        )
+    assert app_service.get_view_counts_map() == {}
+    app_service.record_avp_viewing([1])
+    assert app_service.get_view_counts_map() == {1: 1}
+    assert app_service.get_view_counts_map() is not app_service.get_view_counts_map()
@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+
+from core.scan_jobs import ScanJobConflict, ScanJobManager
+
+
+def test_scan_job_succeeds_with_progress():
+    manager = ScanJobManager()
+
+    def target(progress):
+        progress.add(dirs_visited=2, inserted=1)
+
+    job = manager.start(target, incremental=True)
+    assert job.wait(5)
+    state = job.to_dict()
+    assert state["status"] == "succeeded"
+    assert state["incremental"] is True
+    assert state["dirs_visited"] == 2
+    assert state["inserted"] == 1
+    assert state["finished_at"] is not None
+    assert manager.get(job.id) is job
+
+
+def test_scan_job_rejects_concurrent_start_and_cancels():
+    manager = ScanJobManager()
+    started = threading.Event()
+
+    def target(progress):
+        started.set()
+        while True:
+            progress.check_cancelled()
+            threading.Event().wait(0.01)
+
+    job = manager.start(target)
+    assert started.wait(5)
+    with pytest.raises(ScanJobConflict) as excinfo:
+        manager.start(target)
+    assert excinfo.value.job is job
+
+    assert manager.cancel(job.id) is job
+    assert job.wait(5)
+    assert job.status == "cancelled"
+    # 完了後は新しいジョブを開始できる
+    assert manager.start(lambda progress: None).wait(5)
+
+
+def test_scan_job_failure_is_reported():
+    manager = ScanJobManager()
+
+    def target(progress):
+        raise RuntimeError("boom")
+
+    job = manager.start(target)
+    assert job.wait(5)
+    assert job.status == "failed"
+    assert "boom" in job.message
+
+
+def test_scan_job_cancel_unknown_returns_none():
+    assert ScanJobManager().cancel("missing") is None
@@ -217,3 +217,332 @@ def test_scan_does_not_change_is_available_when_no_files_found(tmp_path, tmp_db)
         ).fetchone()
 
     assert row["is_available"] == 1  # スキャン対象ディレクトリが存在しない → 更新なし
+
+
+def _scan(root, incremental):
+    """スキャンを実行し、DB 行を書き換えた（_process_file を通った）ファイル名を返す。"""
+    scanner = FileScanner([root])
+    processed = []
+    original = scanner._process_file
+
+    def _record(file_path, db_conn, **kwargs):
+        processed.append(file_path.name)
+        return original(file_path, db_conn, **kwargs)
+
+    scanner._process_file = _record
+    with database.get_db_connection() as conn:
+        scanner.scan_and_update(conn, incremental=incremental)
+    return processed
+
+
+def _availability():
+    with database.get_db_connection() as conn:
+        return {
+            row["essential_filename"]: (row["current_favorite_level"], row["is_available"])
+            for row in conn.execute("SELECT essential_filename, current_favorite_level, is_available FROM videos")
+        }
+
+
+def test_incremental_scan_skips_unchanged_tree(tmp_path, tmp_db):
+    """変化のないツリーの増分スキャンは videos を一切更新しない"""
+    library = tmp_path / "library"
+    (library / "sub").mkdir(parents=True)
+    (library / "a.mp4").write_bytes(b"a")
+    (library / "sub" / "#_b.mp4").write_bytes(b"b")
+
+    assert len(_scan(library, incremental=False)) == 2
+    assert _scan(library, incremental=True) == []
+    assert _availability() == {"a.mp4": (-1, 1), "b.mp4": (1, 1)}
+
+
+def test_incremental_scan_picks_up_renames_additions_and_removals(tmp_path, tmp_db):
+    """mtime が変わったディレクトリだけ列挙し直し、リネーム・追加・削除を反映する"""
+    library = tmp_path / "library"
+    (library / "sub").mkdir(parents=True)
+    (library / "keep").mkdir()
+    (library / "a.mp4").write_bytes(b"a")
+    (library / "sub" / "b.mp4").write_bytes(b"b")
+    (library / "keep" / "k.mp4").write_bytes(b"k")
+    _scan(library, incremental=False)
+
+    (library / "sub" / "b.mp4").rename(library / "sub" / "##_b.mp4")
+    (library / "sub" / "c.mp4").write_bytes(b"c")
+    (library / "a.mp4").unlink()
+
+    writes = _scan(library, incremental=True)
+
+    assert _availability() == {"a.mp4": (-1, 0), "b.mp4": (2, 1), "c.mp4": (-1, 1), "k.mp4": (-1, 1)}
+    assert sorted(writes) == ["##_b.mp4", "c.mp4"]
+
+
+def test_incremental_scan_restores_rows_marked_unavailable(tmp_path, tmp_db):
+    """ファイルが未変更でも DB 行が利用不可（ドライブ未接続時のスキャン等）なら戻す"""
+    library = tmp_path / "library"
+    library.mkdir()
+    (library / "a.mp4").write_bytes(b"a")
+    _scan(library, incremental=False)
+    with database.get_db_connection() as conn:
+        conn.execute("UPDATE videos SET is_available = 0")
+
+    _scan(library, incremental=True)
+
+    assert _availability() == {"a.mp4": (-1, 1)}
+
+
+def test_scan_upserts_in_batches_and_keeps_insert_only_columns(tmp_path, tmp_db, monkeypatch):
+    """バッチ upsert: 件数がバッチ境界をまたいでも全件入り、更新時は file_size / performer を保つ"""
+    import core.scanner as scanner_module
+
+    monkeypatch.setattr(scanner_module, "_UPSERT_BATCH_SIZE", 2)
+    library = tmp_path / "library"
+    library.mkdir()
+    for i in range(5):
+        (library / f"v{i}.mp4").write_bytes(b"x" * (i + 1))
+    with database.get_db_connection() as conn:
+        conn.execute(
+            """INSERT INTO videos (essential_filename, current_full_path, current_favorite_level,
+               file_size, performer, storage_location, is_available, is_deleted)
+               VALUES ('v0.mp4', 'old/v0.mp4', 3, 999, 'kept', 'C_DRIVE', 0, 0)"""
+        )
+
+    _scan(library, incremental=False)
+
+    with database.get_db_connection() as conn:
+        rows = {
+            r["essential_filename"]: r
+            for r in conn.execute("SELECT * FROM videos")
+        }
+        leftover = conn.execute("SELECT name FROM temp.sqlite_master").fetchall()
+    assert sorted(rows) == [f"v{i}.mp4" for i in range(5)]
+    v0 = rows["v0.mp4"]
+    assert (v0["file_size"], v0["performer"]) == (999, "kept")
+    assert (v0["current_full_path"], v0["current_favorite_level"], v0["is_available"]) == (
+        str(library / "v0.mp4"), -1, 1,
+    )
+    assert rows["v4.mp4"]["file_size"] == 5
+    assert rows["v4.mp4"]["normalized_filename"] == "v4.mp4"
+    assert leftover == []  # 一時表はプール接続に残さない
+
+
+@pytest.mark.parametrize("split", [False, True])
+def test_parallel_multi_root_scan_matches_sequential(tmp_path, tmp_db, monkeypatch, split):
+    """複数ルートの並列走査（ルート単位 / 直下サブディレクトリ単位）でも逐次と同じ結果になる"""
+    import threading
+
+    import core.scanner as scanner_module
+
+    roots = []
+    for r in range(3):
+        root = tmp_path / f"drive{r}"
+        for d in range(3):
+            (root / f"d{d}" / "deep").mkdir(parents=True)
+            (root / f"d{d}" / f"#_r{r}d{d}.mp4").write_bytes(b"x")
+            (root / f"d{d}" / "deep" / f"r{r}d{d}_deep.mp4").write_bytes(b"x")
+        (root / f"r{r}_top.mkv").write_bytes(b"x")
+        roots.append(root)
+    # 同名ファイルは後のルートが勝つ（逐次スキャンと同じ）
+    (roots[0] / "dup.mp4").write_bytes(b"x")
+    (roots[2] / "dup.mp4").write_bytes(b"x")
+
+    walker_threads = set()
+    original_walk = scanner_module._walk
+
+    def _recording_walk(*args, **kwargs):
+        walker_threads.add(threading.current_thread().name)
+        return original_walk(*args, **kwargs)
+
+    monkeypatch.setattr(scanner_module, "_walk", _recording_walk)
+    monkeypatch.setattr(scanner_module, "SCAN_MAX_WORKERS", 4)
+    monkeypatch.setattr(scanner_module, "SCAN_SPLIT_TOP_LEVEL", split)
+
+    with database.get_db_connection() as conn:
+        FileScanner(roots).scan_and_update(conn)
+
+    with database.get_db_connection() as conn:
+        rows = {r[0]: r[1] for r in conn.execute("SELECT essential_filename, current_full_path FROM videos")}
+    assert len(rows) == 3 * 3 * 2 + 3 + 1
+    assert rows["dup.mp4"] == str(roots[2] / "dup.mp4")
+    assert all(name.startswith("clipbox-scan") for name in walker_threads)
+
+
+def test_scan_progress_counts_inserted_updated_and_unavailable(tmp_path, tmp_db):
+    """進捗カウンタは走査数・新規/更新・利用不可化の件数を数える"""
+    root = tmp_path / "lib"
+    (root / "sub").mkdir(parents=True)
+    (root / "a.mp4").write_bytes(b"a")
+    (root / "sub" / "b.mp4").write_bytes(b"b")
+    with database.get_db_connection() as conn:
+        conn.execute(
+            "INSERT INTO videos (essential_filename, current_full_path, current_favorite_level,"
+            " storage_location, is_available, is_deleted) VALUES ('a.mp4', ?, -1, 'C_DRIVE', 1, 0)",
+            (str(root / "a.mp4"),),
+        )
+        conn.execute(
+            "INSERT INTO videos (essential_filename, current_full_path, current_favorite_level,"
+            " storage_location, is_available, is_deleted) VALUES ('gone.mp4', ?, -1, 'C_DRIVE', 1, 0)",
+            (str(root / "gone.mp4"),),
+        )
+
+    scanner = FileScanner([root])
+    with database.get_db_connection() as conn:
+        scanner.scan_and_update(conn)
+
+    assert scanner.progress.snapshot() == {
+        "dirs_visited": 2,
+        "files_seen": 2,
+        "files_processed": 2,
+        "inserted": 1,
+        "updated": 1,
+        "marked_unavailable": 1,
+    }
+
+
+def test_cancelled_scan_rolls_back(tmp_path, tmp_db, monkeypatch):
+    """途中で中止したスキャンは ScanCancelled を送出し、書き込みはすべてロールバックされる"""
+    import core.scanner as scanner_module
+    from core.scanner import ScanCancelled
+
+    monkeypatch.setattr(scanner_module, "_UPSERT_BATCH_SIZE", 1)
+    root = tmp_path / "lib"
+    root.mkdir()
+    for name in ("a.mp4", "b.mp4", "c.mp4"):
+        (root / name).write_bytes(b"x")
+
+    scanner = FileScanner([root])
+    original = scanner._flush_pending
+
+    def _flush_then_cancel(db_conn):
+        original(db_conn)
+        scanner.progress.cancel()
+
+    scanner._flush_pending = _flush_then_cancel
+    with pytest.raises(ScanCancelled):
+        with database.get_db_write_connection() as conn:
+            scanner.scan_and_update(conn)
+
+    assert scanner.progress.snapshot()["inserted"] == 1
+    with database.get_db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM scan_manifest_files").fetchone()[0] == 0
+
+
+def test_scan_walks_outside_the_writer(tmp_path, tmp_db, monkeypatch):
+    """接続を渡さないスキャンは走査中に書き込みキューを持たず、他の書き込みが待たされない"""
+    import threading
+
+    import core.scanner as scanner_module
+
+    root = tmp_path / "lib"
+    root.mkdir()
+    (root / "a.mp4").write_bytes(b"x")
+    with database.get_db_connection() as conn:
+        conn.execute(
+            "INSERT INTO videos (id, essential_filename, current_full_path, current_favorite_level,"
+            " storage_location, is_available, is_deleted) VALUES (9, 'other.mp4', 'x', -1, 'C_DRIVE', 1, 0)"
+        )
+
+    written = threading.Event()
+    original_walk = scanner_module._walk
+
+    def _walk_while_writing(*args, **kwargs):
+        def _write():
+            with database.get_db_write_connection() as conn:
+                conn.execute("INSERT INTO likes (video_id) VALUES (9)")
+            written.set()
+
+        writer = threading.Thread(target=_write)
+        writer.start()
+        writer.join(timeout=5)
+        return original_walk(*args, **kwargs)
+
+    monkeypatch.setattr(scanner_module, "_walk", _walk_while_writing)
+    monkeypatch.setattr(scanner_module, "SCAN_MAX_WORKERS", 1)
+    FileScanner([root]).scan_and_update(incremental=False)
+
+    assert written.is_set()
+    assert _availability() == {"a.mp4": (-1, 1), "other.mp4": (-1, 0)}
+
+
+def test_scan_keeps_rows_written_during_the_walk(tmp_path, tmp_db, monkeypatch):
+    """走査中にコミットされた判定・リネーム・登録を、走査時点の古いパス・レベルで上書きしない"""
+    import core.scanner as scanner_module
+
+    root = tmp_path / "lib"
+    root.mkdir()
+    (root / "a.mp4").write_bytes(b"a")
+    (root / "b.mp4").write_bytes(b"b")
+    FileScanner([root]).scan_and_update(incremental=False)
+    renamed = root / "#_a.mp4"
+    original_walk = scanner_module._walk
+
+    def _walk_then_rename(*args, **kwargs):
+        result = original_walk(*args, **kwargs)
+        # 走査後・反映前に判定（リネーム）と別経路の登録がコミットされる
+        (root / "a.mp4").rename(renamed)
+        with database.get_db_write_connection() as conn:
+            conn.execute(
+                "UPDATE videos SET current_full_path = ?, current_favorite_level = 1"
+                " WHERE essential_filename = 'a.mp4'",
+                (str(renamed),),
+            )
+            conn.execute(
+                "INSERT INTO videos (essential_filename, current_full_path, current_favorite_level,"
+                " storage_location, is_available, is_deleted) VALUES ('c.mp4', 'elsewhere', -1, 'C_DRIVE', 1, 0)"
+            )
+        return result
+
+    monkeypatch.setattr(scanner_module, "_walk", _walk_then_rename)
+    monkeypatch.setattr(scanner_module, "SCAN_MAX_WORKERS", 1)
+    FileScanner([root]).scan_and_update(incremental=False)
+
+    assert _availability() == {"a.mp4": (1, 1), "b.mp4": (-1, 1), "c.mp4": (-1, 1)}
+    with database.get_db_connection() as conn:
+        path = conn.execute("SELECT current_full_path FROM videos WHERE essential_filename = 'a.mp4'").fetchone()[0]
+    assert path == str(renamed)
+
+
+def test_incremental_multi_root_duplicate_keeps_last_root(tmp_path, tmp_db):
+    """未変更の同名ファイルが複数ルートにあっても、増分スキャンは後のルートのパスを保つ"""
+    roots = [tmp_path / "r0", tmp_path / "r1"]
+    for root in roots:
+        root.mkdir()
+        (root / "dup.mp4").write_bytes(b"x")
+
+    FileScanner(roots).scan_and_update(incremental=False)
+    FileScanner(roots).scan_and_update(incremental=True)
+
+    with database.get_db_connection() as conn:
+        path = conn.execute("SELECT current_full_path FROM videos WHERE essential_filename = 'dup.mp4'").fetchone()[0]
+    assert path == str(roots[1] / "dup.mp4")
+
+
+def test_incremental_scan_skips_file_vanishing_before_reconcile(tmp_path, tmp_db, monkeypatch):
+    """未変更判定の後に消えたファイルは stat 失敗でスキャンを止めず、見つからなかった扱いになる"""
+    import core.scanner as scanner_module
+
+    library = tmp_path / "library"
+    library.mkdir()
+    gone = library / "gone.mp4"
+    gone.write_bytes(b"g")
+    (library / "kept.mp4").write_bytes(b"k")
+    _scan(library, incremental=False)
+    with database.get_db_connection() as conn:
+        # DB 行をずらし、増分スキャンで stat し直す対象にする
+        conn.execute("UPDATE videos SET is_available = 0")
+
+    original_walk = scanner_module._walk
+
+    def _walk_then_delete(*args, **kwargs):
+        result = original_walk(*args, **kwargs)
+        if gone.exists():
+            gone.unlink()
+        return result
+
+    monkeypatch.setattr(scanner_module, "_walk", _walk_then_delete)
+    monkeypatch.setattr(scanner_module, "SCAN_MAX_WORKERS", 1)
+    assert _scan(library, incremental=True) == ["kept.mp4"]
+
+    assert _availability() == {"gone.mp4": (-1, 0), "kept.mp4": (-1, 1)}
+    with database.get_db_connection() as conn:
+        manifest = [r[0] for r in conn.execute("SELECT path FROM scan_manifest_files")]
+    assert manifest == [str(library / "kept.mp4")]
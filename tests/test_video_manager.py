@@ -6,7 +6,7 @@ from pathlib import Path
 from datetime import datetime, timedelta
 
 import core.database as database
-from core.video_manager import VideoManager, video_from_row
+from core.video_manager import VideoManager, video_from_row, videos_from_cursor
 
 
 def test_video_manager_initialization():
@@ -249,20 +249,13 @@ def test_get_unrated_fate_recently_unwatched_priority_uses_light_weights(tmp_pat
             (ids["unseen.mp4"], now.isoformat(), "FILE_ACCESS_DETECTED"),
         )
 
-    captured = {}
-
-    def fake_choices(population, weights, k):
-        captured["weights"] = {
-            video.essential_filename: weight for video, weight in zip(population, weights)
-        }
-        return [population[0]]
-
-    monkeypatch.setattr("core.video_manager.random.choices", fake_choices)
+    from core.fate_sampler import fate_index
 
     assert VideoManager().get_unrated_fate_video(recently_unwatched_priority=True) is not None
-    assert captured["weights"]["recent.mp4"] == 1
-    assert captured["weights"]["old.mp4"] == 3
-    assert captured["weights"]["unseen.mp4"] == 3
+    weights = fate_index.weights("unrated")
+    assert weights[ids["recent.mp4"]] == 1
+    assert weights[ids["old.mp4"]] == 3
+    assert weights[ids["unseen.mp4"]] == 3
 
 
 def test_set_favorite_level_updates_db_level(tmp_path, tmp_db):
@@ -482,6 +475,29 @@ def test_video_from_row_carries_watch_later(tmp_db):
     assert video.watch_later is True
 
 
+def test_videos_from_cursor_decodes_by_column_position(tmp_db):
+    """結果列の並びごとの変換関数で行を読み、無い列は既定値になる（列の射影・別名の並びでも同じ）。"""
+    with database.get_db_connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO videos (
+                essential_filename, current_full_path, current_favorite_level,
+                storage_location, is_available, is_deleted, needs_selection
+            ) VALUES ('p.mp4', 'C:/videos/!p.mp4', -1, 'EXTERNAL_HDD', 0, 0, 1)
+            """
+        )
+        full = videos_from_cursor(conn.execute("SELECT * FROM videos"))
+        projected = videos_from_cursor(
+            conn.execute("SELECT needs_selection, current_full_path, id, essential_filename FROM videos")
+        )
+
+    assert len(full) == len(projected) == 1
+    assert (full[0].storage_location, full[0].is_available, full[0].needs_selection) == ("EXTERNAL_HDD", False, True)
+    video = projected[0]
+    assert (video.id, video.essential_filename, video.current_full_path) == (full[0].id, "p.mp4", "C:/videos/!p.mp4")
+    assert (video.needs_selection, video.is_available, video.current_favorite_level, video.notes) == (True, True, -1, None)
+
+
 def test_get_videos_watch_later_filter(tmp_db):
     """get_videos の watch_later_filter で あとで見る動画のみ/以外を絞り込める（R8）"""
     with database.get_db_connection() as conn:
@@ -616,3 +632,184 @@ def test_was_selection_judgment_for_completed_video(tmp_path, tmp_db):
             (video_id,),
         ).fetchone()
     assert row["was_selection_judgment"] == 1
+
+
+def _insert_listing_fixture():
+    """get_videos_page 用: レベル・更新日時・視聴・判定がばらけた動画を入れる。"""
+    with database.get_db_connection() as conn:
+        conn.executemany(
+            """INSERT INTO videos (id, essential_filename, current_full_path,
+               current_favorite_level, storage_location, is_available, is_deleted,
+               last_file_modified, file_created_at)
+               VALUES (?, ?, ?, ?, 'C_DRIVE', 1, 0, ?, ?)""",
+            [
+                (i, f"{'ＡＢＣ' if i % 3 == 0 else 'abc'}_{i:02d}.mp4", f"C:/sel{i % 2}/v{i}.mp4",
+                 i % 4, f"2026-01-{(i % 5) + 1:02d} 00:00:00", None if i % 2 else f"2025-12-{i:02d}")
+                for i in range(1, 24)
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO viewing_history (video_id, viewed_at, viewing_method) VALUES (?, ?, 'APP_PLAYBACK')",
+            [(i, f"2026-02-{i:02d} 12:00:00") for i in range(1, 24, 3)] + [(4, "2026-03-01 00:00:00")],
+        )
+        conn.executemany(
+            """INSERT INTO judgment_history (video_id, new_level, judged_at, was_selection_judgment)
+               VALUES (?, 1, ?, 0)""",
+            [(i, f"2026-04-{i:02d} 00:00:00") for i in range(2, 24, 4)],
+        )
+
+
+def test_get_videos_page_offset_and_total(tmp_db):
+    """get_videos_page は既定順で LIMIT/OFFSET し、total はフィルタ全体の件数"""
+    _insert_listing_fixture()
+    manager = VideoManager()
+    full = manager.get_videos()
+
+    page = manager.get_videos_page(limit=5, offset=5)
+    assert page.total == len(full) == 23
+    assert [v.id for v in page.items] == [v.id for v in full[5:10]]
+    assert page.next_key is not None
+
+    last = manager.get_videos_page(limit=5, offset=20)
+    assert len(last.items) == 3
+    assert last.next_key is None
+
+
+def test_get_videos_page_keyset_matches_offset_for_every_sort(tmp_db):
+    """全ソートキー・両方向で、キーセット辿りと OFFSET ページングが同じ並びになる"""
+    _insert_listing_fixture()
+    manager = VideoManager()
+    sorts = [None, "favorite_level", "creation_date", "view_count", "last_viewed", "title", "judged_at"]
+    for sort in sorts:
+        for order in (None, "asc", "desc"):
+            expected = [v.id for v in manager.get_videos_page(sort=sort, order=order, limit=100).items]
+            assert len(expected) == 23
+
+            walked, after = [], None
+            while True:
+                page = manager.get_videos_page(sort=sort, order=order, limit=4, after=after)
+                walked.extend(v.id for v in page.items)
+                if page.next_key is None:
+                    break
+                after = page.next_key
+            assert walked == expected, (sort, order)
+
+
+def test_get_videos_page_sort_semantics(tmp_db):
+    """title は Unicode 小文字化で昇順既定、judged_at は未判定が常に末尾"""
+    _insert_listing_fixture()
+    manager = VideoManager()
+
+    titles = [v.essential_filename for v in manager.get_videos_page(sort="title", limit=100).items]
+    assert titles == sorted(titles, key=str.lower)
+
+    for order in ("asc", "desc"):
+        ids = [v.id for v in manager.get_videos_page(sort="judged_at", order=order, limit=100).items]
+        judged = [i for i in range(2, 24, 4)]
+        assert set(ids[: len(judged)]) == set(judged)
+        expected = sorted(judged, reverse=(order == "desc"))
+        assert ids[: len(judged)] == expected
+
+    counts = [v.id for v in manager.get_videos_page(sort="view_count", limit=1).items]
+    assert counts == [4]
+
+
+def test_get_videos_page_keyword_and_folder_in_sql(tmp_db):
+    """keyword は normalize_text 一致、folder は区切り境界を尊重した配下判定"""
+    _insert_listing_fixture()
+    manager = VideoManager()
+
+    page = manager.get_videos_page(keyword="abc_0", limit=100)
+    assert {v.id for v in page.items} == set(range(1, 10))
+    assert page.total == 9
+
+    sel1 = manager.get_videos_page(folder="C:/sel1", limit=100)
+    assert sel1.total == 12
+    assert all(v.current_full_path.startswith("C:/sel1/") for v in sel1.items)
+    assert manager.get_videos_page(folder="C:/sel", limit=100).total == 0
+
+
+def test_iter_videos_walks_filtered_rows_in_id_batches(tmp_db):
+    """iter_videos は get_videos と同じ動画を id 昇順・batch_size 件ずつ返す（端数バッチ含む）"""
+    _insert_listing_fixture()
+    manager = VideoManager()
+
+    batches = list(manager.iter_videos(keyword="abc_0", batch_size=4))
+    assert [len(b) for b in batches] == [4, 4, 1]
+    assert [v.id for b in batches for v in b] == list(range(1, 10))
+
+    expected = sorted(v.id for v in manager.get_videos(show_unavailable=True))
+    walked = [v.id for b in manager.iter_videos(show_unavailable=True, batch_size=23) for v in b]
+    assert walked == expected
+
+    projected = next(manager.iter_videos(columns=("essential_filename",), batch_size=2))
+    assert projected[0].essential_filename == "abc_01.mp4"
+    assert projected[0].current_full_path == ""
+
+
+def test_unrated_fate_priority_handles_more_candidates_than_sqlite_variable_limit(tmp_path, tmp_db):
+    """候補数が SQLite の変数上限を超えても（IN リストを使わず）抽選できる。"""
+    existing = tmp_path / "exists.mp4"
+    existing.write_text("x")
+    with database.get_db_connection() as conn:
+        conn.executemany(
+            """INSERT INTO videos (essential_filename, current_full_path,
+               current_favorite_level, storage_location, is_available, is_deleted)
+               VALUES (?, ?, -1, 'C_DRIVE', 1, 0)""",
+            [(f"m{i}.mp4", str(tmp_path / f"missing{i}.mp4")) for i in range(1500)]
+            + [("exists.mp4", str(existing))],
+        )
+
+    video = VideoManager().get_unrated_fate_video(recently_unwatched_priority=True)
+    assert video is not None
+    assert video.essential_filename == "exists.mp4"
+
+
+def test_unrated_fate_priority_skips_videos_judged_since_pool_was_built(tmp_path, tmp_db):
+    """判定で候補から外れた動画は、プール作成後でも選ばれない。"""
+    from core.fate_sampler import fate_index
+
+    paths = [tmp_path / "a.mp4", tmp_path / "b.mp4"]
+    for path in paths:
+        path.write_text("x")
+    with database.get_db_connection() as conn:
+        for path in paths:
+            conn.execute(
+                """INSERT INTO videos (essential_filename, current_full_path,
+                   current_favorite_level, storage_location, is_available, is_deleted)
+                   VALUES (?, ?, -1, 'C_DRIVE', 1, 0)""",
+                (path.name, str(path)),
+            )
+    manager = VideoManager()
+    first = manager.get_unrated_fate_video(recently_unwatched_priority=True)
+    assert manager.set_favorite_level_with_rename(first.id, 2)["status"] == "success"
+    assert first.id not in fate_index.weights("unrated")
+
+    # フックを経由しない変更（別経路の UPDATE）も抽選後の DB 確認で弾く
+    other = next(v for v in manager.get_videos() if v.id != first.id)
+    with database.get_db_connection() as conn:
+        conn.execute("UPDATE videos SET current_favorite_level = 1 WHERE id = ?", (other.id,))
+    assert manager.get_unrated_fate_video(recently_unwatched_priority=True) is None
+
+
+def test_unrated_random_videos_are_distinct_existing_and_limited(tmp_path, tmp_db):
+    """ランダム取得は存在する未判定動画から重複なしで n 件だけ返す。"""
+    with database.get_db_connection() as conn:
+        for i in range(60):
+            path = tmp_path / f"v{i}.mp4"
+            if i % 2 == 0:
+                path.write_text("x")
+            conn.execute(
+                """INSERT INTO videos (essential_filename, current_full_path,
+                   current_favorite_level, storage_location, is_available, is_deleted)
+                   VALUES (?, ?, -1, 'C_DRIVE', 1, 0)""",
+                (path.name, str(path)),
+            )
+
+    videos = VideoManager().get_unrated_random_videos(20)
+    names = [v.essential_filename for v in videos]
+    assert len(names) == 20
+    assert len(set(names)) == 20
+    assert all(int(name[1:-4]) % 2 == 0 for name in names)
+
+    assert len(VideoManager().get_unrated_random_videos(100)) == 30